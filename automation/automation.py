@@ -9,6 +9,7 @@ Version: 1.0.0
 
 import os
 import sys
+import copy
 import json
 import logging
 import time
@@ -33,6 +34,21 @@ from email import encoders
 from selenium.webdriver.common.keys import Keys
 import numpy as np
 
+from scripts.driver_pool import get_shared_pool
+from scripts.datatables_api import fetch_order_rows_via_ajax
+from scripts.order_warehouse import open_order_warehouse
+from scripts.order_changes import open_order_change_tracker
+from scripts.http_engine import fetch_orders_over_http
+from scripts.network_capture import create_network_capture, enable_network_domain, enable_performance_logging
+from scripts.request_blocking import create_request_blocker
+from scripts.strategy_cache import open_strategy_cache, page_fingerprint, try_strategies
+from scripts.wait_engine import AdaptiveWaiter, open_wait_history
+from scripts.parquet_export import export_parquet_dataset
+from scripts.excel_export import write_excel
+from scripts.export_stage import ExportStage, atomic_copy, merge_export_files
+from scripts.order_records import OrderBatch, orders_to_frame
+from scripts.order_table_dom import extract_order_table
+
 class SessionManager:
     """Quản lý session để tránh login lại"""
 
@@ -90,6 +106,184 @@ class OneAutomationSystem:
         self.session_data = {}
         self.session_manager = SessionManager()
         self.is_logged_in = False
+        self.pooled_driver = None
+        self.http_client = None
+        self.network_capture = None
+        self.request_blocker = None
+        self.driver_pool = self.setup_driver_pool()
+        self.order_warehouse = self.setup_order_warehouse()
+        self.order_changes = self.setup_order_changes()
+        self.strategy_cache = self.setup_strategy_cache()
+        self.wait_history = open_wait_history(self.config.get('wait_engine'), self.logger)
+        self.waiter = None
+
+    def setup_order_warehouse(self):
+        """Mở kho lịch sử đơn hàng (SQLite) được upsert sau mỗi lần export"""
+        return open_order_warehouse(self.config.get('order_warehouse'), self.logger)
+
+    def setup_order_changes(self):
+        """Mở store change-data-capture (hash từng đơn của lần chạy trước)"""
+        return open_order_change_tracker(self.config.get('order_changes'), self.logger)
+
+    def setup_strategy_cache(self):
+        """Mở strategy cache (selector/chiến lược thắng theo trang, dùng chung cho PaginationHandler...)"""
+        return open_strategy_cache(self.config.get('strategy_cache'), self.logger)
+
+    def get_waiter(self):
+        """AdaptiveWaiter gắn với driver hiện tại (chờ theo điều kiện, timeout học từ p95)"""
+        if self.waiter is None or self.waiter.driver is not self.driver:
+            self.waiter = AdaptiveWaiter(self.driver, self.logger, self.wait_history)
+        return self.waiter
+
+    def report_run_timing(self):
+        """Log thống kê strategy cache + thời gian chờ, lưu lịch sử độ trễ cho lần chạy sau"""
+        try:
+            if self.strategy_cache:
+                self.strategy_cache.log_report()
+            if self.wait_history:
+                self.wait_history.log_report()
+                self.wait_history.save()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không ghi được thống kê strategy cache/thời gian chờ: {e}")
+
+    def find_with_strategies(self, ladder, selectors, wait=None, action=None):
+        """
+        Tìm phần tử theo ladder selector (CSS hoặc XPath bắt đầu bằng '//'), thử selector thắng lần trước trước
+
+        Args:
+            ladder (str): Tên ladder trong strategy cache
+            selectors (list): Các selector theo thứ tự gốc
+            wait (WebDriverWait): Chờ phần tử clickable; None = find_element
+            action: Hàm nhận phần tử, trả về falsy nếu phần tử không dùng được (tính là trượt)
+
+        Returns:
+            tuple: (selector, phần tử) hoặc (None, None)
+        """
+        def attempt(selector):
+            by = By.XPATH if selector.startswith("//") else By.CSS_SELECTOR
+            if wait:
+                element = wait.until(EC.element_to_be_clickable((by, selector)))
+            else:
+                element = self.driver.find_element(by, selector)
+            if action and not action(element):
+                return None
+            return element
+
+        return try_strategies(self.strategy_cache, ladder, selectors, attempt,
+                              page_fingerprint(self.driver), self.logger)
+
+    def diff_order_changes(self, df):
+        """Change set (mới/thay đổi/biến mất) của dữ liệu lần này so với lần chạy trước; None nếu tắt"""
+        if not getattr(self, 'order_changes', None) or df is None or df.empty:
+            return None
+        try:
+            return self.order_changes.diff(df)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không tính được order changes, xử lý toàn bộ: {e}")
+            return None
+
+    def commit_order_changes(self, changes, carry=None):
+        """Lưu trạng thái đơn của lần chạy này làm mốc so sánh cho lần sau (chỉ sau khi export xong)"""
+        if not changes or not getattr(self, 'order_changes', None):
+            return
+        try:
+            self.order_changes.commit(changes, carry=carry)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không lưu được trạng thái order changes: {e}")
+
+    def setup_driver_pool(self):
+        """Thiết lập pool WebDriver dùng chung (giữ trình duyệt ấm giữa các lần chạy)"""
+        pool_config = self.config.get('driver_pool', {})
+        if not pool_config.get('enabled', False):
+            return None
+
+        return get_shared_pool(
+            'one_automation',
+            driver_factory=self.create_driver,
+            login_function=self._login_pooled_driver,
+            size=pool_config.get('size', 2),
+            logger=self.logger,
+            max_age_seconds=pool_config.get(
+                'max_age_seconds', self.config.get('system', {}).get('session_timeout', 3600)
+            ),
+            session_check=self._pooled_session_alive
+        )
+
+    def acquire_driver(self):
+        """Lấy WebDriver cho một lần chạy: trình duyệt ấm từ pool nếu bật, nếu không thì tạo mới"""
+        if not self.driver_pool:
+            return self.setup_driver()
+
+        try:
+            self.pooled_driver = self.driver_pool.checkout(
+                timeout=self.config.get('driver_pool', {}).get('checkout_timeout', 300)
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Không lấy được WebDriver từ pool: {e}")
+            return False
+
+        self.driver = self.pooled_driver.driver
+        self.is_logged_in = self.pooled_driver.logged_in
+
+        # Trình duyệt ấm: bỏ response của lần chạy trước còn trong performance log
+        capture = self.get_network_capture()
+        if capture:
+            capture.clear()
+        return True
+
+    def release_driver(self, success=True):
+        """Trả WebDriver về pool (hủy nếu lần chạy lỗi) hoặc đóng driver"""
+        pooled_driver = getattr(self, 'pooled_driver', None)
+        released = False
+
+        if pooled_driver:
+            pooled_driver.logged_in = self.is_logged_in
+            self.driver_pool.checkin(pooled_driver, discard=not success)
+            self.pooled_driver = None
+            released = True
+        elif self.driver:
+            try:
+                self.driver.quit()
+                released = True
+            except:
+                pass
+
+        self.driver = None
+        self.is_logged_in = False
+        return released
+
+    def _login_pooled_driver(self, driver):
+        """
+        Đăng nhập sẵn cho trình duyệt mới trong pool.
+        Pool gọi hàm này ngoài lock, có thể song song và trong lúc instance này đang chạy,
+        nên đăng nhập trên một bản sao riêng gắn với `driver` thay vì đổi self.driver/self.is_logged_in
+        """
+        login_session = copy.copy(self)
+        login_session.driver = driver
+        login_session.is_logged_in = False
+        login_session.pooled_driver = None
+        login_session.network_capture = None
+        login_session.request_blocker = None
+        login_session.waiter = None
+        return login_session.login_to_one()
+
+    def _pooled_session_alive(self, driver):
+        """
+        Xác nhận phiên của trình duyệt trong pool còn sống: fetch trang đơn hàng bằng cookie hiện tại,
+        phiên hết hạn thì server chuyển hướng về trang đăng nhập
+        """
+        orders_url = self.config['system'].get('orders_url', 'https://one.tga.com.vn/so/')
+        login_url = self.config['system']['one_url'].rstrip('/')
+        final_url = driver.execute_async_script("""
+            var done = arguments[arguments.length - 1];
+            fetch(arguments[0], {credentials: 'include'})
+                .then(function (response) { done(response.url); })
+                .catch(function () { done(null); });
+        """, orders_url)
+        if not final_url:
+            return False
+        final_url = final_url.split('?')[0].rstrip('/')
+        return final_url != login_url and '/login' not in final_url
 
     def load_config(self, config_path):
         """Tải cấu hình từ file JSON"""
@@ -148,6 +342,11 @@ class OneAutomationSystem:
 
     def setup_driver(self):
         """Thiết lập WebDriver với tối ưu hiệu suất tối đa"""
+        self.driver = self.create_driver()
+        return self.driver is not None
+
+    def create_driver(self):
+        """Tạo một WebDriver mới đã tối ưu (trả về driver hoặc None)"""
         try:
             options = Options()
 
@@ -206,6 +405,13 @@ class OneAutomationSystem:
             if os.getenv('HEADLESS', 'true').lower() == 'true':
                 options.add_argument('--headless=new')  # Use new headless mode
 
+            # CDP network capture: đọc JSON của DataTables/invoiceJSON ngay khi response về
+            capture_config = self.config.get('network_capture', {})
+            blocking_config = self.config.get('request_blocking', {})
+            if capture_config.get('enabled', False) or (
+                    blocking_config.get('enabled', False) and blocking_config.get('debug', False)):
+                enable_performance_logging(options)
+
             # Chrome binary path for macOS
             chrome_binary = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
             if os.path.exists(chrome_binary):
@@ -214,28 +420,83 @@ class OneAutomationSystem:
             # Setup driver
             try:
                 service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=options)
+                driver = webdriver.Chrome(service=service, options=options)
             except Exception as e:
                 self.logger.warning(f"ChromeDriverManager failed: {e}")
                 service = Service()
-                self.driver = webdriver.Chrome(service=service, options=options)
+                driver = webdriver.Chrome(service=service, options=options)
 
             # OPTIMIZED TIMEOUTS (Tối ưu #2)
-            self.driver.implicitly_wait(3)  # Giảm từ 10s xuống 3s
-            self.driver.set_page_load_timeout(15)  # Giảm từ 30s xuống 15s
-            self.driver.set_script_timeout(3)  # Giảm từ 5s xuống 3s
+            driver.implicitly_wait(3)  # Giảm từ 10s xuống 3s
+            driver.set_page_load_timeout(15)  # Giảm từ 30s xuống 15s
+            driver.set_script_timeout(3)  # Giảm từ 5s xuống 3s
 
             # Hide automation detection
-            self.driver.execute_script(
+            driver.execute_script(
                 "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             )
 
+            if capture_config.get('enabled', False) and not enable_network_domain(
+                    driver, capture_config.get('buffer_mb', 64)):
+                self.logger.warning("⚠️ Không bật được CDP Network domain - network capture có thể thiếu body")
+
             self.logger.info("✅ WebDriver tối ưu đã sẵn sàng")
-            return True
+            return driver
 
         except Exception as e:
             self.logger.error(f"❌ Lỗi khởi tạo WebDriver: {e}")
-            return False
+            return None
+
+    def get_network_capture(self):
+        """NetworkCapture gắn với driver hiện tại (tạo lại khi đổi driver); None nếu tắt"""
+        if self.driver is None:
+            return None
+        if self.network_capture is None or self.network_capture.driver is not self.driver:
+            self.network_capture = create_network_capture(self.driver, self.logger,
+                                                          self.config.get('network_capture'))
+        return self.network_capture
+
+    def get_request_blocker(self):
+        """RequestBlocker gắn với driver hiện tại (tạo lại khi đổi driver); None nếu tắt"""
+        if self.driver is None:
+            return None
+        if self.request_blocker is None or self.request_blocker.driver is not self.driver:
+            capture = self.get_network_capture()
+            self.request_blocker = create_request_blocker(self.driver, self.logger,
+                                                          self.config.get('request_blocking'),
+                                                          forward=capture.poll if capture else None)
+        return self.request_blocker
+
+    def open_page(self, url=None, refresh=False):
+        """Mở trang (hoặc refresh) với danh sách chặn request của trang đó nếu bật request_blocking"""
+        blocker = self.get_request_blocker()
+        if blocker:
+            blocker.navigate(url, refresh=refresh)
+        elif refresh:
+            self.driver.refresh()
+        else:
+            self.driver.get(url)
+
+    def scrape_order_data_from_network(self):
+        """
+        Dòng đơn hàng từ response DataTables đã bắt qua CDP (không đọc lại DOM)
+
+        Returns:
+            OrderBatch | None: None nếu tắt, chưa bắt được, hoặc response chỉ là một phần (server-side paging)
+        """
+        capture = self.get_network_capture()
+        if not capture:
+            return None
+
+        captured = capture.latest_table_rows(timeout=self.config.get('network_capture', {}).get('wait_seconds', 3))
+        if not captured or not captured['rows']:
+            self.logger.info("🛰️ Chưa bắt được response DataTables, dùng cách lấy dữ liệu khác")
+            return None
+        if len(captured['rows']) < captured['total']:
+            self.logger.info(f"🛰️ Response DataTables chỉ có {len(captured['rows'])}/{captured['total']} dòng, "
+                             f"dùng AJAX để lấy đủ")
+            return None
+        return OrderBatch.from_rows(captured['rows'], min_cells=2)
 
     def check_existing_session(self):
         """Kiểm tra session hiện tại có còn hợp lệ không (Tối ưu #1)"""
@@ -247,8 +508,8 @@ class OneAutomationSystem:
             self.logger.info("🔄 Thử sử dụng session đã lưu...")
 
             # Load cookies vào driver
-            self.driver.get(session_data['url'])
-            time.sleep(1)
+            self.open_page(session_data['url'])
+            self.get_waiter().wait_for_ready('session.load')
 
             for cookie in session_data['cookies']:
                 try:
@@ -257,8 +518,8 @@ class OneAutomationSystem:
                     continue
 
             # Refresh trang để áp dụng cookies
-            self.driver.refresh()
-            time.sleep(2)
+            self.open_page(refresh=True)
+            self.get_waiter().wait_for_idle('session.refresh')
 
             # Kiểm tra đã login chưa
             try:
@@ -301,8 +562,8 @@ class OneAutomationSystem:
             self.logger.info("🔐 Bắt đầu đăng nhập mới...")
 
             # Truy cập trang đăng nhập
-            self.driver.get(self.config['system']['one_url'])
-            time.sleep(1)  # Giảm từ 3s xuống 1s
+            self.open_page(self.config['system']['one_url'])
+            self.get_waiter().wait_for_ready('login.load')
 
             # Kiểm tra nhanh đã login chưa
             try:
@@ -329,16 +590,10 @@ class OneAutomationSystem:
                 "#email"
             ]
 
-            username_field = None
-            for selector in username_selectors:
-                try:
-                    username_field = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    self.logger.info(f"✅ Tìm thấy username field: {selector}")
-                    break
-                except TimeoutException:
-                    continue
-
-            if not username_field:
+            selector, username_field = self.find_with_strategies('login.username', username_selectors, wait)
+            if username_field:
+                self.logger.info(f"✅ Tìm thấy username field: {selector}")
+            else:
                 raise Exception("Không tìm thấy trường username")
 
             # Nhập username
@@ -363,22 +618,15 @@ class OneAutomationSystem:
                 ".login-btn"
             ]
 
-            login_button = None
-            for selector in login_selectors:
-                try:
-                    login_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    break
-                except Exception:
-                    continue
-
+            _, login_button = self.find_with_strategies('login.submit', login_selectors)
             if not login_button:
                 raise Exception("Không tìm thấy nút đăng nhập")
 
             login_button.click()
             self.logger.info("✅ Đã click nút đăng nhập")
 
-            # Chờ login thành công với timeout dài hơn
-            time.sleep(5)  # Tăng lên 5s
+            # Chờ request đăng nhập xong (không sleep cố định), rồi xác nhận bên dưới
+            self.get_waiter().wait_for_idle('login.submit')
 
             # Kiểm tra login thành công với nhiều cách
             try:
@@ -416,7 +664,7 @@ class OneAutomationSystem:
 
             # Điều hướng trực tiếp đến trang đơn hàng
             orders_url = self.config['system'].get('orders_url', 'https://one.tga.com.vn/so/')
-            self.driver.get(orders_url)
+            self.open_page(orders_url)
 
             # Sử dụng thời gian chờ động dựa trên độ phức tạp của trang
             # Đầu tiên thử với timeout ngắn, sau đó tăng nếu cần
@@ -445,8 +693,8 @@ class OneAutomationSystem:
                 )
                 self.logger.info("✅ Đã tải trang đơn hàng (cần thêm thời gian)")
 
-            # Chờ ngắn cho JavaScript tải xong và DOM ổn định
-            time.sleep(0.3)  # Giảm xuống 0.3s thay vì 0.5s
+            # Chờ JavaScript tải xong và AJAX ban đầu kết thúc
+            self.get_waiter().wait_for_idle('orders.ready')
 
             # Bước 1: Bấm vào tab "Đơn chờ xuất kho" trước
             self.click_pending_export_tab()
@@ -468,24 +716,32 @@ class OneAutomationSystem:
             start_time = time.time()
             orders = []
 
-            # Sử dụng JavaScript để tăng tốc truy vấn DOM
-            js_script = """
-            return Array.from(document.querySelectorAll('table tbody tr, tbody tr, .table tbody tr'))
-                .filter(row => row.querySelectorAll('td').length > 0)
-                .map(row => {
-                    const cells = Array.from(row.querySelectorAll('td'));
-                    return cells.map(cell => cell.innerText.trim());
-                });
-            """
-
             try:
-                # Chờ ngắn cho DOM ổn định
-                time.sleep(0.3)
+                rows_data = None
+                processing_config = self.config.get('data_processing', {})
+
+                # Response DataTables đã về trình duyệt (CDP network capture) - không cần request lại
+                orders = self.scrape_order_data_from_network() or []
 
-                # Thực thi script JS để lấy dữ liệu trực tiếp - nhanh hơn nhiều
-                rows_data = self.driver.execute_script(js_script)
+                # Ưu tiên gọi thẳng endpoint AJAX của DataTables (bỏ qua phân trang DOM)
+                if not orders and processing_config.get('extraction_mode', 'ajax') == 'ajax':
+                    ajax_result = fetch_order_rows_via_ajax(
+                        self.driver, self.logger,
+                        page_length=processing_config.get('ajax_page_length', 5000)
+                    )
+                    if ajax_result:
+                        orders = OrderBatch.from_rows(ajax_result['rows'], min_cells=2)
+
+                if not orders:
+                    # Chờ bảng có dòng và không còn AJAX đang chạy
+                    self.get_waiter().wait_for_elements('orders.rows', '#orderTB tbody tr', required=False)
+                    self.get_waiter().wait_for_idle('orders.rows_idle')
+
+                    # Một execute_script cho cả bảng #orderTB, trả về mảng theo cột
+                    orders = extract_order_table(self.driver, self.logger, min_cells=2,
+                                                 keep_link_columns=False) or []
 
-                if not rows_data or len(rows_data) == 0:
+                if not orders:
                     self.logger.error("❌ Không tìm thấy dữ liệu thông qua JavaScript")
 
                     # Fallback sang cách cũ nếu JS không hoạt động
@@ -504,58 +760,11 @@ class OneAutomationSystem:
                         except Exception:
                             continue
 
-                self.logger.info(f"✅ Tìm thấy {len(rows_data)} dòng dữ liệu")
+                    # Dựng lô đơn hàng dạng cột (một timestamp cho cả lô, alias trỏ chung dữ liệu col_N)
+                    orders = OrderBatch.from_rows(rows_data or [], min_cells=2)
 
-                # Giới hạn số dòng dựa vào config
-                max_rows_config = self.config.get('data_processing', {}).get('max_rows_for_testing', None)
-                fast_mode = self.config.get('data_processing', {}).get('enable_fast_mode', True)
-
-                if fast_mode and max_rows_config and len(rows_data) > max_rows_config:
-                    self.logger.info(f"⚡ Fast mode: Giới hạn lấy {max_rows_config} dòng đầu tiên từ {len(rows_data)} dòng")
-                    rows_data = rows_data[:max_rows_config]
-                else:
-                    self.logger.info(f"🐌 Full mode: Lấy tất cả {len(rows_data)} dòng")
-
-                # Xử lý dữ liệu từ JavaScript
-                for i, cell_texts in enumerate(rows_data):
-                    try:
-                        if not cell_texts or len(cell_texts) < 2:  # Bỏ qua dòng không có đủ dữ liệu
-                            continue
-
-                        # Tạo order data nhanh chóng
-                        order_data = {
-                            'row_index': i + 1,
-                            'total_columns': len(cell_texts),
-                            'scraped_at': datetime.now().isoformat()
-                        }
-
-                        # Mapping nhanh các cột quan trọng
-                        if len(cell_texts) > 0:
-                            order_data['col_1'] = cell_texts[0]
-                        if len(cell_texts) > 1:
-                            order_data['id'] = cell_texts[1]
-                        if len(cell_texts) > 2:
-                            order_data['order_code'] = cell_texts[2]
-                        if len(cell_texts) > 3:
-                            order_data['col_4'] = cell_texts[3]
-                        if len(cell_texts) > 4:
-                            order_data['customer'] = cell_texts[4]
-
-                        # Lưu tất cả dữ liệu cột (để backup)
-                        for j, text in enumerate(cell_texts):
-                            if text:  # Chỉ lưu nếu có dữ liệu
-                                order_data[f'col_{j+1}'] = text
-
-                        orders.append(order_data)
-
-                        # Log progress mỗi 50 dòng thay vì 20 (giảm output log)
-                        if (i + 1) % 50 == 0:
-                            elapsed = time.time() - start_time
-                            self.logger.info(f"⚡ Đã xử lý {i+1}/{len(rows_data)} dòng trong {elapsed:.1f}s")
-
-                    except Exception as e:
-                        self.logger.warning(f"⚠️ Lỗi dòng {i+1}: {str(e)[:100]}")
-                        continue
+                self.logger.info(f"✅ Tìm thấy {len(orders)} dòng dữ liệu")
+                orders = self.limit_order_rows(orders)
 
             except Exception as e:
                 self.logger.error(f"❌ Lỗi khi thực thi JavaScript: {e}")
@@ -575,6 +784,101 @@ class OneAutomationSystem:
             self.logger.error(f"❌ Lỗi lấy dữ liệu đơn hàng: {e}")
             return []
 
+    def limit_order_rows(self, orders):
+        """Giới hạn số dòng dựa vào config (fast mode)"""
+        max_rows_config = self.config.get('data_processing', {}).get('max_rows_for_testing', None)
+        fast_mode = self.config.get('data_processing', {}).get('enable_fast_mode', True)
+
+        if fast_mode and max_rows_config and len(orders) > max_rows_config:
+            self.logger.info(f"⚡ Fast mode: Giới hạn lấy {max_rows_config} dòng đầu tiên từ {len(orders)} dòng")
+            return orders[:max_rows_config]
+
+        self.logger.info(f"🐌 Full mode: Lấy tất cả {len(orders)} dòng")
+        return orders
+
+    def scrape_order_data_http(self):
+        """
+        Lấy dữ liệu đơn hàng chỉ bằng HTTP (requests.Session, không mở Chrome) khi bật `http_engine`
+
+        Returns:
+            OrderBatch | None: None nếu engine tắt hoặc thất bại (caller chuyển sang trình duyệt)
+        """
+        if not self.config.get('http_engine', {}).get('enabled', False):
+            return None
+
+        try:
+            self.logger.info("🌐 Lấy dữ liệu đơn hàng qua HTTP (không mở trình duyệt)...")
+            start_time = time.time()
+
+            client, result = fetch_orders_over_http(self.config, self.logger, self.session_manager)
+            if not result or not result['rows']:
+                if client:
+                    client.close()
+                self.logger.warning("⚠️ HTTP engine không lấy được dữ liệu")
+                return None
+
+            self.http_client = client
+            orders = self.limit_order_rows(OrderBatch.from_rows(result['rows'], min_cells=2))
+            self.logger.info(f"✅ HTTP engine: {len(orders)} đơn hàng ({result.get('source')}, "
+                             f"{client.stats['requests']} request) trong {time.time() - start_time:.2f} giây")
+            return orders
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Lỗi HTTP engine: {e}")
+            return None
+
+    def close_http_client(self):
+        """Đóng session của HTTP engine sau lần chạy"""
+        if self.http_client:
+            self.http_client.close()
+            self.http_client = None
+
+    def collect_orders(self, progress_callback=None):
+        """
+        Lấy dữ liệu đơn hàng: HTTP engine trước (nếu bật), trình duyệt khi HTTP tắt/thất bại
+
+        Raises:
+            Exception: Khi không khởi tạo/đăng nhập/truy cập được hoặc không có dữ liệu
+        """
+        http_settings = self.config.get('http_engine', {})
+        if http_settings.get('enabled', False):
+            if progress_callback:
+                progress_callback("Đang lấy dữ liệu qua HTTP...", 20)
+
+            orders = self.scrape_order_data_http()
+            if orders:
+                return orders
+            if not http_settings.get('browser_fallback', True):
+                raise Exception("HTTP engine không lấy được dữ liệu đơn hàng")
+            self.logger.info("🔁 Chuyển sang trình duyệt (fallback)")
+
+        # 1. Khởi tạo WebDriver (lấy trình duyệt ấm từ pool nếu có)
+        if progress_callback:
+            progress_callback("Đang khởi tạo WebDriver...", 10)
+
+        if not self.acquire_driver():
+            raise Exception("Không thể khởi tạo WebDriver")
+
+        # 2. Đăng nhập (bỏ qua nếu trình duyệt trong pool đã đăng nhập)
+        if progress_callback:
+            progress_callback("Đang đăng nhập vào hệ thống...", 20)
+
+        if not self.is_logged_in and not self.login_to_one():
+            raise Exception("Đăng nhập thất bại")
+
+        # 3. Điều hướng đến đơn hàng
+        if progress_callback:
+            progress_callback("Đang truy cập trang đơn hàng...", 30)
+
+        if not self.navigate_to_orders():
+            raise Exception("Không thể truy cập trang đơn hàng")
+
+        # 4. Lấy dữ liệu
+        if progress_callback:
+            progress_callback("Đang lấy dữ liệu đơn hàng...", 40)
+
+        return self.scrape_order_data()
+
     def process_order_data(self, orders):
         """Xử lý và làm sạch dữ liệu đơn hàng"""
         try:
@@ -584,8 +888,8 @@ class OneAutomationSystem:
                 self.logger.warning("⚠️ Không có dữ liệu để xử lý")
                 return pd.DataFrame()
 
-            # Chuyển đổi sang DataFrame
-            df = pd.DataFrame(orders)
+            # Chuyển đổi sang DataFrame (OrderBatch dựng thẳng từ mảng cột)
+            df = orders_to_frame(orders)
             original_count = len(df)
 
             self.logger.info(f"📊 Dữ liệu gốc: {original_count} đơn hàng")
@@ -649,8 +953,21 @@ class OneAutomationSystem:
             self.logger.error(f"❌ Lỗi xử lý dữ liệu: {e}")
             return pd.DataFrame()
 
-    def export_data(self, df):
-        """Xuất dữ liệu ra các định dạng file"""
+    def export_data(self, df, extra_writers=None, changes=None):
+        """
+        Xuất dữ liệu ra các định dạng file
+
+        Các writer độc lập (CSV, Dashboard CSV, Excel, JSON, Parquet, warehouse) chạy song song trong
+        export stage; mọi file ghi qua file tạm rồi rename nên dashboard không đọc phải file ghi dở.
+
+        Args:
+            df (DataFrame): Dữ liệu đã xử lý
+            extra_writers (list): [(name, path, writer)] bổ sung (vd: products CSV của bản Enhanced)
+            changes (dict): Change set của OrderChangeTracker.diff - ghi thêm file orders_changes_*.csv gọn
+
+        Returns:
+            ExportFiles: {loại: đường dẫn}, kèm .stats thời gian/dung lượng từng writer
+        """
         try:
             self.logger.info("📁 Bắt đầu xuất dữ liệu...")
 
@@ -662,113 +979,108 @@ class OneAutomationSystem:
             os.makedirs('data', exist_ok=True)
 
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            export_files = {}
             export_config = self.config.get('export', {})
+            stage = ExportStage(export_config.get('max_workers', 4), self.logger)
 
             # 1. Xuất CSV raw data (mặc định)
             if export_config.get('csv', {}).get('enabled', True):
-                csv_filename = f"data/orders_export_{timestamp}.csv"
-                try:
-                    df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-                    export_files['csv'] = csv_filename
-                    self.logger.info(f"✅ Đã xuất CSV: {csv_filename}")
-                except Exception as e:
-                    self.logger.error(f"❌ Lỗi xuất CSV: {e}")
+                stage.add('csv', f"data/orders_export_{timestamp}.csv",
+                          lambda path: df.to_csv(path, index=False, encoding='utf-8-sig'))
 
             # 1b. Xuất Dashboard format CSV
-            try:
+            def write_dashboard_csv(path):
                 dashboard_df = self.create_dashboard_format(df)
                 if not dashboard_df.empty:
-                    dashboard_filename = f"data/orders_dashboard_{timestamp}.csv"
-                    dashboard_df.to_csv(dashboard_filename, index=False, encoding='utf-8-sig')
-                    export_files['dashboard_csv'] = dashboard_filename
-                    self.logger.info(f"✅ Đã xuất Dashboard CSV: {dashboard_filename}")
+                    dashboard_df.to_csv(path, index=False, encoding='utf-8-sig')
 
-                    # Cập nhật file mới nhất để dashboard tự động load
-                    latest_filename = "data/orders_latest.csv"
-                    dashboard_df.to_csv(latest_filename, index=False, encoding='utf-8-sig')
-                    self.logger.info(f"✅ Đã cập nhật file mới nhất: {latest_filename}")
-            except Exception as e:
-                self.logger.error(f"❌ Lỗi xuất Dashboard format: {e}")
+            stage.add('dashboard_csv', f"data/orders_dashboard_{timestamp}.csv", write_dashboard_csv)
 
-            # 2. Xuất Excel
-            if export_config.get('excel', {}).get('enabled', False):
-                excel_filename = f"data/orders_export_{timestamp}.xlsx"
-                try:
-                    with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-                        df.to_excel(writer, sheet_name='Đơn hàng', index=False)
-
-                        # Tự động điều chỉnh độ rộng cột
-                        worksheet = writer.sheets['Đơn hàng']
-                        for column in worksheet.columns:
-                            max_length = 0
-                            column_letter = column[0].column_letter
-                            for cell in column:
-                                try:
-                                    if len(str(cell.value)) > max_length:
-                                        max_length = len(str(cell.value))
-                                except:
-                                    pass
-                            adjusted_width = min(max_length + 2, 50)
-                            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                    export_files['excel'] = excel_filename
-                    self.logger.info(f"✅ Đã xuất Excel: {excel_filename}")
-                except Exception as e:
-                    self.logger.error(f"❌ Lỗi xuất Excel: {e}")
+            # 2. Xuất Excel (streaming xlsxwriter, độ rộng cột tính trước bằng pandas)
+            excel_config = export_config.get('excel', {})
+            if excel_config.get('enabled', False):
+                stage.add('excel', f"data/orders_export_{timestamp}.xlsx",
+                          lambda path: write_excel(df, path, 'Đơn hàng', streaming=excel_config.get('streaming', True)))
 
             # 3. Xuất JSON
             if export_config.get('json', {}).get('enabled', False):
-                json_filename = f"data/orders_export_{timestamp}.json"
+                stage.add('json', f"data/orders_export_{timestamp}.json",
+                          lambda path: df.to_json(path, orient='records', force_ascii=False, indent=2))
+
+            # 3b. Xuất Parquet (cột có kiểu, partition theo ngày đặt + sàn, kèm manifest)
+            parquet_config = export_config.get('parquet', {})
+            if parquet_config.get('enabled', False):
+                stage.add('parquet', None,
+                          lambda: export_parquet_dataset(df, parquet_config, self.logger, timestamp))
+
+            # 3c. Upsert vào kho lịch sử đơn hàng (truy vấn theo khoảng ngày thay cho glob CSV)
+            if getattr(self, 'order_warehouse', None):
+                stage.add('warehouse', None, lambda: self.order_warehouse.upsert_orders(df) and None)
+
+            # 3d. Change set gọn (chỉ đơn mới/thay đổi/biến mất so với lần chạy trước)
+            if changes is not None:
+                stage.add('changes', f"data/orders_changes_{timestamp}.csv",
+                          lambda path: changes['frame'].to_csv(path, index=False, encoding='utf-8-sig'))
+
+            for name, path, writer in extra_writers or []:
+                stage.add(name, path, writer)
+
+            export_files = stage.run()
+
+            # Cập nhật file mới nhất để dashboard tự động load (copy + rename, không bao giờ ghi dở)
+            if 'dashboard_csv' in export_files:
                 try:
-                    df.to_json(json_filename, orient='records', ensure_ascii=False, indent=2)
-                    export_files['json'] = json_filename
-                    self.logger.info(f"✅ Đã xuất JSON: {json_filename}")
+                    latest_filename = "data/orders_latest.csv"
+                    atomic_copy(export_files['dashboard_csv'], latest_filename)
+                    self.logger.info(f"✅ Đã cập nhật file mới nhất: {latest_filename}")
                 except Exception as e:
-                    self.logger.error(f"❌ Lỗi xuất JSON: {e}")
+                    self.logger.error(f"❌ Lỗi cập nhật orders_latest.csv: {e}")
 
-            # 4. Tạo file báo cáo tổng hợp
+            # 4. Tạo file báo cáo tổng hợp (cần danh sách file đã xuất nên chạy sau cùng)
             if export_config.get('summary', {}).get('enabled', True):
-                summary_filename = f"data/summary_report_{timestamp}.txt"
-                try:
-                    with open(summary_filename, 'w', encoding='utf-8') as f:
-                        f.write("📊 BÁO CÁO TỔNG HỢP XUẤT DỮ LIỆU\n")
-                        f.write("=" * 50 + "\n\n")
-                        f.write(f"🕐 Thời gian xuất: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                        f.write(f"📦 Tổng số đơn hàng: {len(df)}\n")
-                        f.write(f"📋 Số cột dữ liệu: {len(df.columns)}\n\n")
-
-                        f.write("📁 Các file đã xuất:\n")
-                        for file_type, file_path in export_files.items():
-                            file_size = os.path.getsize(file_path) / 1024  # KB
-                            f.write(f"  • {file_type.upper()}: {file_path} ({file_size:.1f} KB)\n")
-
-                        f.write("\n📋 Cấu trúc dữ liệu:\n")
-                        for i, col in enumerate(df.columns, 1):
-                            f.write(f"  {i}. {col}\n")
-
-                        # Thống kê cơ bản nếu có cột số
-                        numeric_cols = df.select_dtypes(include=['number']).columns
-                        if len(numeric_cols) > 0:
-                            f.write(f"\n📊 Thống kê cơ bản:\n")
-                            for col in numeric_cols:
-                                try:
-                                    f.write(f"  • {col}: Min={df[col].min()}, Max={df[col].max()}, Avg={df[col].mean():.2f}\n")
-                                except:
-                                    pass
-
-                    export_files['summary'] = summary_filename
-                    self.logger.info(f"✅ Đã tạo báo cáo tổng hợp: {summary_filename}")
-                except Exception as e:
-                    self.logger.error(f"❌ Lỗi tạo báo cáo: {e}")
+                summary_stage = ExportStage(1, self.logger)
+                summary_stage.add('summary', f"data/summary_report_{timestamp}.txt",
+                                  lambda path: self.write_export_summary(df, export_files, path))
+                merge_export_files(export_files, summary_stage.run())
 
-            self.logger.info(f"🎉 Hoàn thành xuất dữ liệu: {len(export_files)} file")
+            self.logger.info(f"🎉 Hoàn thành xuất dữ liệu: {len(export_files)} file "
+                             f"({export_files.total_bytes() / 1024:.1f} KB, {export_files.wall_seconds:.2f}s)")
             return export_files
 
         except Exception as e:
             self.logger.error(f"❌ Lỗi xuất dữ liệu: {e}")
             return {}
 
+    def write_export_summary(self, df, export_files, filename):
+        """Ghi báo cáo tổng hợp xuất dữ liệu (file đã xuất, cấu trúc dữ liệu, thống kê cơ bản)"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("📊 BÁO CÁO TỔNG HỢP XUẤT DỮ LIỆU\n")
+            f.write("=" * 50 + "\n\n")
+            f.write(f"🕐 Thời gian xuất: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"📦 Tổng số đơn hàng: {len(df)}\n")
+            f.write(f"📋 Số cột dữ liệu: {len(df.columns)}\n\n")
+
+            f.write("📁 Các file đã xuất:\n")
+            stats = getattr(export_files, 'stats', {})
+            for file_type, file_path in export_files.items():
+                file_size = os.path.getsize(file_path) / 1024  # KB
+                seconds = stats.get(file_type, {}).get('seconds')
+                timing = f", {seconds:.2f}s" if seconds is not None else ""
+                f.write(f"  • {file_type.upper()}: {file_path} ({file_size:.1f} KB{timing})\n")
+
+            f.write("\n📋 Cấu trúc dữ liệu:\n")
+            for i, col in enumerate(df.columns, 1):
+                f.write(f"  {i}. {col}\n")
+
+            # Thống kê cơ bản nếu có cột số
+            numeric_cols = df.select_dtypes(include=['number']).columns
+            if len(numeric_cols) > 0:
+                f.write(f"\n📊 Thống kê cơ bản:\n")
+                for col in numeric_cols:
+                    try:
+                        f.write(f"  • {col}: Min={df[col].min()}, Max={df[col].max()}, Avg={df[col].mean():.2f}\n")
+                    except:
+                        pass
+
     def send_notification(self, result):
         """Gửi thông báo kết quả"""
         try:
@@ -782,6 +1094,14 @@ class OneAutomationSystem:
                 self.logger.info("📧 Thông báo email đã bị tắt")
                 return
 
+            # Chỉ thông báo khi có đơn mới/thay đổi/biến mất (lần chạy lỗi vẫn thông báo)
+            changes = result.get('changes')
+            if (result.get('success') and changes is not None
+                    and self.config.get('order_changes', {}).get('notify_only_on_changes', True)
+                    and not any(changes.get(key) for key in ('inserted', 'updated', 'disappeared'))):
+                self.logger.info("📧 Không có đơn thay đổi so với lần chạy trước - bỏ qua thông báo")
+                return
+
             self.logger.info("📧 Gửi thông báo email...")
 
             # Kiểm tra cấu hình email
@@ -808,6 +1128,8 @@ class OneAutomationSystem:
                 <p><strong>Thời gian thực thi:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
                 <p><strong>Trạng thái:</strong> {success_status}</p>
                 <p><strong>Số đơn hàng:</strong> {result.get('order_count', 0)}</p>
+                {f"<p><strong>Thay đổi:</strong> {changes.get('inserted', 0)} mới, {changes.get('updated', 0)} cập nhật, "
+                 f"{changes.get('disappeared', 0)} biến mất</p>" if changes else ""}
                 <p><strong>File xuất:</strong> {', '.join(result.get('export_files', {}).keys())}</p>
 
                 {f"<p><strong>Lỗi:</strong> {result.get('error')}</p>" if result.get('error') else ""}
@@ -820,8 +1142,11 @@ class OneAutomationSystem:
 
             msg.attach(MIMEText(body, 'html'))
 
-            # Đính kèm file báo cáo
-            for file_type, file_path in result.get('export_files', {}).items():
+            # Đính kèm file báo cáo (chỉ change set nếu có, thay vì toàn bộ cửa sổ đơn)
+            attachments = result.get('export_files', {})
+            if 'changes' in attachments:
+                attachments = {'changes': attachments['changes']}
+            for file_type, file_path in attachments.items():
                 if os.path.exists(file_path):
                     try:
                         with open(file_path, 'rb') as attachment:
@@ -885,32 +1210,8 @@ class OneAutomationSystem:
             if progress_callback:
                 progress_callback("Khởi tạo quy trình", 5)
 
-            # 1. Khởi tạo WebDriver
-            if progress_callback:
-                progress_callback("Đang khởi tạo WebDriver...", 10)
-
-            if not self.setup_driver():
-                raise Exception("Không thể khởi tạo WebDriver")
-
-            # 2. Đăng nhập
-            if progress_callback:
-                progress_callback("Đang đăng nhập vào hệ thống...", 20)
-
-            if not self.login_to_one():
-                raise Exception("Đăng nhập thất bại")
-
-            # 3. Điều hướng đến đơn hàng
-            if progress_callback:
-                progress_callback("Đang truy cập trang đơn hàng...", 30)
-
-            if not self.navigate_to_orders():
-                raise Exception("Không thể truy cập trang đơn hàng")
-
-            # 4. Lấy dữ liệu
-            if progress_callback:
-                progress_callback("Đang lấy dữ liệu đơn hàng...", 40)
-
-            orders = self.scrape_order_data()
+            # 1-4. Lấy dữ liệu (HTTP engine hoặc WebDriver: khởi tạo, đăng nhập, truy cập trang đơn hàng)
+            orders = self.collect_orders(progress_callback)
             if not orders:
                 raise Exception("Không lấy được dữ liệu đơn hàng")
 
@@ -922,11 +1223,16 @@ class OneAutomationSystem:
             if df.empty:
                 raise Exception("Dữ liệu rỗng sau khi xử lý")
 
+            # So sánh với lần chạy trước: đơn mới / thay đổi / biến mất khỏi cửa sổ
+            changes = self.diff_order_changes(df)
+
             # 6. Xuất dữ liệu
             if progress_callback:
                 progress_callback("Đang xuất dữ liệu...", 80)
 
-            export_files = self.export_data(df)
+            export_files = self.export_data(df, changes=changes)
+            if export_files:
+                self.commit_order_changes(changes)
 
             # 7. Cập nhật kết quả
             if progress_callback:
@@ -936,6 +1242,7 @@ class OneAutomationSystem:
                 'success': True,
                 'order_count': len(df),
                 'export_files': export_files,
+                'changes': changes['counts'] if changes else None,
                 'end_time': datetime.now(),
                 'duration': (datetime.now() - result['start_time']).total_seconds()
             })
@@ -952,14 +1259,14 @@ class OneAutomationSystem:
                 progress_callback(f"Lỗi: {error_message}", 0)
 
         finally:
-            # Đóng driver
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    if progress_callback:
-                        progress_callback("Đã đóng trình duyệt", 95)
-                except:
-                    pass
+            # Trả trình duyệt về pool (hủy nếu lỗi) hoặc đóng driver - trước mọi bước dọn dẹp khác
+            try:
+                self.close_http_client()
+            finally:
+                released = self.release_driver(success=result['success'])
+            if released and progress_callback:
+                progress_callback("Đã đóng trình duyệt", 95)
+            self.report_run_timing()
 
             # Gửi thông báo
             try:
@@ -981,6 +1288,10 @@ class OneAutomationSystem:
 
             schedule_config = self.config.get('schedule', {})
 
+            # Khởi động trước các trình duyệt để lần chạy đầu tiên không phải chờ
+            if self.driver_pool:
+                self.driver_pool.warm_up()
+
             # Lên lịch theo cấu hình
             if schedule_config.get('daily', {}).get('enabled', False):
                 daily_time = schedule_config['daily'].get('time', '09:00')
@@ -1002,6 +1313,9 @@ class OneAutomationSystem:
             self.logger.info("⏹️ Đã dừng lịch chạy tự động")
         except Exception as e:
             self.logger.error(f"❌ Lỗi lên lịch: {e}")
+        finally:
+            if self.driver_pool:
+                self.driver_pool.shutdown()
 
     def configure_filters(self):
         """Cấu hình bộ lọc trang đơn hàng: 2000 đơn + thời gian sàn"""
@@ -1023,22 +1337,12 @@ class OneAutomationSystem:
                     "//select[option[@value='100']]"
                 ]
 
-                limit_dropdown = None
-                for selector in limit_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            limit_dropdown = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        else:
-                            limit_dropdown = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        self.logger.info(f"✅ Tìm thấy dropdown giới hạn với selector: {selector}")
-                        break
-                    except TimeoutException:
-                        continue
-
+                selector, limit_dropdown = self.find_with_strategies('filters.limit', limit_selectors, wait)
                 if limit_dropdown:
+                    self.logger.info(f"✅ Tìm thấy dropdown giới hạn với selector: {selector}")
                     # Click để mở dropdown
                     limit_dropdown.click()
-                    time.sleep(1)
+                    self.get_waiter().wait_for_idle('filters.limit_open', timeout=3)
 
                     # Tìm và chọn option 2000
                     option_2000_selectors = [
@@ -1048,24 +1352,16 @@ class OneAutomationSystem:
                         ".option:contains('2000')"
                     ]
 
-                    for option_selector in option_2000_selectors:
-                        try:
-                            if option_selector.startswith("//"):
-                                option_2000 = self.driver.find_element(By.XPATH, option_selector)
-                            else:
-                                option_2000 = self.driver.find_element(By.CSS_SELECTOR, option_selector)
-                            option_2000.click()
-                            self.logger.info("✅ Đã chọn giới hạn 2000 đơn")
-                            break
-                        except:
-                            continue
+                    if self.find_with_strategies('filters.limit_2000', option_2000_selectors,
+                                                 action=lambda option: option.click() or True)[1]:
+                        self.logger.info("✅ Đã chọn giới hạn 2000 đơn")
                 else:
                     self.logger.warning("⚠️ Không tìm thấy dropdown giới hạn")
 
             except Exception as e:
                 self.logger.warning(f"⚠️ Lỗi thay đổi giới hạn: {e}")
 
-            time.sleep(2)  # Chờ UI cập nhật
+            self.get_waiter().wait_for_idle('filters.limit_applied', timeout=5)  # Chờ UI cập nhật
 
             # Bước 2: Thay đổi bộ lọc thời gian từ "Odoo" → "Thời gian sàn TMĐT"
             self.logger.info("📅 Thay đổi bộ lọc thời gian thành 'Thời gian sàn TMĐT'...")
@@ -1080,22 +1376,12 @@ class OneAutomationSystem:
                     "//select[option[@value='odoo']]"
                 ]
 
-                time_dropdown = None
-                for selector in time_filter_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            time_dropdown = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        else:
-                            time_dropdown = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        self.logger.info(f"✅ Tìm thấy dropdown thời gian với selector: {selector}")
-                        break
-                    except TimeoutException:
-                        continue
-
+                selector, time_dropdown = self.find_with_strategies('filters.time_type', time_filter_selectors, wait)
                 if time_dropdown:
+                    self.logger.info(f"✅ Tìm thấy dropdown thời gian với selector: {selector}")
                     # Click để mở dropdown
                     time_dropdown.click()
-                    time.sleep(1)
+                    self.get_waiter().wait_for_idle('filters.time_open', timeout=3)
 
                     # Tìm và chọn "Thời gian sàn TMĐT"
                     platform_time_selectors = [
@@ -1108,24 +1394,16 @@ class OneAutomationSystem:
                         "//option[contains(text(), 'ecom')]"
                     ]
 
-                    for option_selector in platform_time_selectors:
-                        try:
-                            if option_selector.startswith("//"):
-                                platform_option = self.driver.find_element(By.XPATH, option_selector)
-                            else:
-                                platform_option = self.driver.find_element(By.CSS_SELECTOR, option_selector)
-                            platform_option.click()
-                            self.logger.info("✅ Đã chọn 'Thời gian sàn TMĐT'")
-                            break
-                        except:
-                            continue
+                    if self.find_with_strategies('filters.time_ecom', platform_time_selectors,
+                                                 action=lambda option: option.click() or True)[1]:
+                        self.logger.info("✅ Đã chọn 'Thời gian sàn TMĐT'")
                 else:
                     self.logger.warning("⚠️ Không tìm thấy dropdown thời gian")
 
             except Exception as e:
                 self.logger.warning(f"⚠️ Lỗi thay đổi bộ lọc thời gian: {e}")
 
-            time.sleep(2)  # Chờ UI cập nhật
+            self.get_waiter().wait_for_idle('filters.time_applied', timeout=5)  # Chờ UI cập nhật
 
             # Bước 3: Bấm nút tìm kiếm màu xanh
             self.logger.info("🔍 Bấm nút tìm kiếm để áp dụng bộ lọc...")
@@ -1145,28 +1423,27 @@ class OneAutomationSystem:
                     ".btn.btn-primary"
                 ]
 
-                search_button = None
-                for selector in search_button_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            search_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        else:
-                            search_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
+                clickable_buttons = []
 
-                        # Kiểm tra xem button có màu xanh không (class hoặc style)
-                        button_class = search_button.get_attribute('class') or ''
-                        button_style = search_button.get_attribute('style') or ''
-                        if 'primary' in button_class.lower() or 'blue' in button_style.lower() or 'search' in button_class.lower():
-                            self.logger.info(f"✅ Tìm thấy nút tìm kiếm với selector: {selector}")
-                            break
+                def is_search_button(button):
+                    # Kiểm tra xem button có màu xanh không (class hoặc style)
+                    clickable_buttons.append(button)
+                    button_class = (button.get_attribute('class') or '').lower()
+                    button_style = (button.get_attribute('style') or '').lower()
+                    return 'primary' in button_class or 'blue' in button_style or 'search' in button_class
 
-                    except TimeoutException:
-                        continue
+                selector, search_button = self.find_with_strategies('filters.search', search_button_selectors,
+                                                                    wait, action=is_search_button)
+                if search_button:
+                    self.logger.info(f"✅ Tìm thấy nút tìm kiếm với selector: {selector}")
+                elif clickable_buttons:
+                    # Không nút nào màu xanh: dùng nút clickable cuối cùng tìm được như trước
+                    search_button = clickable_buttons[-1]
 
                 if search_button:
                     # Scroll đến button nếu cần
                     self.driver.execute_script("arguments[0].scrollIntoView();", search_button)
-                    time.sleep(1)
+                    self.get_waiter().wait_for_clickable('filters.search_visible', search_button)
 
                     # Click nút tìm kiếm
                     search_button.click()
@@ -1174,7 +1451,7 @@ class OneAutomationSystem:
 
                     # Chờ trang load lại với dữ liệu mới
                     self.logger.info("⏳ Chờ trang tải lại với dữ liệu đã lọc...")
-                    time.sleep(5)
+                    self.get_waiter().wait_for_idle('filters.search_reload', timeout=30, required=True)
 
                     # Chờ bảng dữ liệu xuất hiện
                     wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr")))
@@ -1243,7 +1520,7 @@ class OneAutomationSystem:
             if pending_tab:
                 # Scroll đến tab nếu cần
                 self.driver.execute_script("arguments[0].scrollIntoView();", pending_tab)
-                time.sleep(1)
+                self.get_waiter().wait_for_clickable('orders.pending_tab_visible', pending_tab)
 
                 # Click vào tab
                 pending_tab.click()
@@ -1251,7 +1528,7 @@ class OneAutomationSystem:
 
                 # Chờ trang load
                 self.logger.info("⏳ Chờ trang 'Đơn chờ xuất kho' tải...")
-                time.sleep(3)
+                self.get_waiter().wait_for_idle('orders.pending_tab', timeout=15, required=True)
 
                 return True
             else:
@@ -1376,29 +1653,29 @@ class OneAutomationSystem:
         try:
             self.logger.info(f"🖱️ Đang click vào đơn hàng ID: {order_id}")
 
-            # Method 1: Click vào link đơn hàng trong table
+            # Method 1: Click vào link đơn hàng trong table (key trong strategy cache là template, không chứa id)
             link_selectors = [
-                f"a[href*='/so/detail/{order_id}']",
-                f"a[href*='detail/{order_id}']",
-                f"table tbody tr td a[href*='{order_id}']",
-                f"#orderTB tbody tr td a[href*='{order_id}']"
+                "a[href*='/so/detail/{order_id}']",
+                "a[href*='detail/{order_id}']",
+                "table tbody tr td a[href*='{order_id}']",
+                "#orderTB tbody tr td a[href*='{order_id}']"
             ]
 
             wait = WebDriverWait(self.driver, 10)
 
-            for selector in link_selectors:
-                try:
-                    order_link = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", order_link)
-                    time.sleep(0.5)
-                    order_link.click()
-                    self.logger.info(f"✅ Đã click vào đơn hàng {order_id} bằng selector: {selector}")
-                    return True
-                except TimeoutException:
-                    continue
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Lỗi với selector {selector}: {e}")
-                    continue
+            def click_link(template):
+                order_link = wait.until(EC.element_to_be_clickable(
+                    (By.CSS_SELECTOR, template.format(order_id=order_id))))
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", order_link)
+                self.get_waiter().wait_for_clickable('order.link_visible', order_link)
+                order_link.click()
+                return True
+
+            selector, _ = try_strategies(self.strategy_cache, 'order.link', link_selectors, click_link,
+                                         page_fingerprint(self.driver), self.logger)
+            if selector:
+                self.logger.info(f"✅ Đã click vào đơn hàng {order_id} bằng selector: {selector}")
+                return True
 
             # Method 2: JavaScript click fallback
             js_click_script = f"""
@@ -1444,7 +1721,7 @@ class OneAutomationSystem:
                     link = row.find_element(By.CSS_SELECTOR, "td a[href*='/so/detail/']")
 
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", link)
-                    time.sleep(0.5)
+                    self.get_waiter().wait_for_clickable('order.link_visible', link)
                     link.click()
 
                     self.logger.info(f"✅ Đã click vào đơn hàng ở hàng {row_index}")
@@ -1527,7 +1804,7 @@ class OneAutomationSystem:
             try:
                 action_element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", action_element)
-                time.sleep(0.5)
+                self.get_waiter().wait_for_clickable('order.action_visible', action_element)
                 action_element.click()
 
                 self.logger.info(f"✅ Đã click action '{action_type}' cho đơn hàng {order_id}")
@@ -1563,7 +1840,7 @@ class OneAutomationSystem:
             wait = WebDriverWait(self.driver, timeout)
             modal = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, modal_selector)))
 
-            time.sleep(1)  # Chờ nội dung modal load
+            self.get_waiter().wait_for_idle('modal.content', timeout=5)  # Chờ nội dung modal load (AJAX)
 
             # Extract thông tin từ modal
             modal_info = {
@@ -1615,7 +1892,7 @@ class OneAutomationSystem:
                 try:
                     close_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
                     close_btn.click()
-                    time.sleep(0.5)
+                    self.get_waiter().wait_for_gone('modal.close', modal_selector)
                     self.logger.info(f"✅ Đã đóng modal bằng {selector}")
                     return True
                 except:
@@ -8,6 +8,7 @@ Hệ thống tự động hóa warehouse với tính năng SLA monitoring và pr
 import json
 import requests
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import time
 import re
@@ -23,6 +24,13 @@ import os
 
 # Import base automation
 from automation import OneAutomationSystem, SessionManager
+from scripts.export_stage import ExportStage, merge_export_files
+from scripts.order_records import OrderBatch, orders_to_frame
+from scripts.order_changes import changed_order_ids
+from scripts.wait_engine import open_wait_history
+
+
+SLA_COLUMNS = ('sla_platform', 'sla_deadline', 'sla_status', 'sla_priority')
 
 
 class EnhancedOneAutomationSystem(OneAutomationSystem):
@@ -44,8 +52,21 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
         self.session_data = {}
         self.session_manager = SessionManager()
         self.is_logged_in = False
+        self.pooled_driver = None
+        self.http_client = None
+        self.network_capture = None
+        self.request_blocker = None
+        self.driver_pool = self.setup_driver_pool()
         self.sla_monitor = self.setup_sla_monitor()
         self.sheets_config_service = self.setup_sheets_config()
+        self.sync_sla_rules_from_sheets()
+        self.sla_watcher = self.setup_sla_watcher()
+        self.product_cache = self.setup_product_cache()
+        self.order_warehouse = self.setup_order_warehouse()
+        self.order_changes = self.setup_order_changes()
+        self.strategy_cache = self.setup_strategy_cache()
+        self.wait_history = open_wait_history(self.config.get('wait_engine'), self.logger)
+        self.waiter = None
 
     def setup_basic_logging(self):
         """Setup basic logging for initialization"""
@@ -124,37 +145,87 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.warning("⚠️ SLA Monitor not available")
             return None
 
-    def extract_product_details_batch(self, order_ids, batch_size=10):
-        """Lấy chi tiết sản phẩm theo batch để tối ưu performance"""
-        try:
-            self.logger.info(f"📦 Bắt đầu lấy chi tiết sản phẩm cho {len(order_ids)} đơn hàng...")
+    def setup_product_cache(self):
+        """Mở cache chi tiết sản phẩm trên đĩa (SQLite)"""
+        from scripts.product_cache import open_product_cache
 
-            product_details = {}
-            total_batches = (len(order_ids) + batch_size - 1) // batch_size
+        return open_product_cache(self.config.get('product_cache'), self.logger)
 
-            for batch_num in range(total_batches):
-                start_idx = batch_num * batch_size
-                end_idx = min(start_idx + batch_size, len(order_ids))
-                batch_ids = order_ids[start_idx:end_idx]
+    def setup_sla_watcher(self):
+        """Khởi động SLA watcher nền (cảnh báo ngay khi đơn vượt deadline giữa các lần chạy)"""
+        watcher_config = self.config.get('sla_watcher', {})
+        if not self.sla_monitor or not watcher_config.get('enabled', False):
+            return None
 
-                self.logger.info(f"📦 Batch {batch_num + 1}/{total_batches}: {len(batch_ids)} đơn hàng")
+        try:
+            from sla_watcher import SLAWatcher
+            watcher = SLAWatcher(self.sla_monitor,
+                                 alerts_file=watcher_config.get('alerts_file', 'data/sla_alerts_live.jsonl'))
+            watcher.start()
+            return watcher
+        except Exception as e:
+            self.logger.warning(f"⚠️ SLA watcher not available: {e}")
+            return None
 
-                # Method 1: Try direct API call first (fastest)
-                batch_details = self.fetch_json_api_direct(batch_ids)
+    def sync_sla_rules_from_sheets(self):
+        """Biên dịch lại SLA rules với sheet SLA_Rules (nếu có Google Sheets)"""
+        if not self.sla_monitor or not self.sheets_config_service:
+            return
 
-                if not batch_details:
-                    # Method 2: Fallback to UI interaction
-                    batch_details = self.fetch_json_via_ui(batch_ids)
+        try:
+            self.sla_monitor.apply_sheet_rules(self.sheets_config_service.get_sla_rules())
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không đọc được SLA rules từ Google Sheets: {e}")
 
-                # Merge results
-                product_details.update(batch_details)
+    def extract_product_details_batch(self, order_ids, batch_size=None, statuses=None):
+        """Lấy chi tiết sản phẩm song song (async + connection pool + rate limit)"""
+        try:
+            from scripts.product_fetcher import fetch_product_details
 
-                # Progress logging
-                processed = min(end_idx, len(order_ids))
-                self.logger.info(f"⚡ Đã xử lý {processed}/{len(order_ids)} đơn hàng")
+            self.logger.info(f"📦 Bắt đầu lấy chi tiết sản phẩm cho {len(order_ids)} đơn hàng...")
 
-                # Small delay between batches
-                time.sleep(0.5)
+            # Step 0a: invoiceJSON trình duyệt đã tải trong lúc điều hướng (CDP network capture)
+            captured = {}
+            capture = self.get_network_capture()
+            if capture:
+                invoice_details = capture.invoice_details(self.parse_json_response)
+                captured = {str(order_id): invoice_details[str(order_id)] for order_id in order_ids
+                            if str(order_id) in invoice_details}
+                if captured:
+                    self.logger.info(f"🛰️ Network capture: {len(captured)} đơn có sẵn chi tiết từ invoiceJSON")
+                    if self.product_cache:
+                        self.product_cache.put_many(captured, statuses)
+
+            # Step 0b: Cache trên đĩa - chỉ fetch đơn mới, hết hạn hoặc đổi trạng thái
+            product_details = dict(captured)
+            missing_ids = [order_id for order_id in order_ids if str(order_id) not in captured]
+            if self.product_cache and missing_ids:
+                cached, missing_ids = self.product_cache.get_many(missing_ids, statuses)
+                product_details.update(cached)
+                self.logger.info(f"🗄️ Product cache: {len(cached)} hit, {len(missing_ids)} miss")
+
+            if missing_ids:
+                settings = dict(self.config.get('product_details', {}))
+                if batch_size:
+                    settings['batch_size'] = batch_size
+
+                # Method 1: invoiceJSON song song qua connection pool dùng chung
+                # (HTTP engine: cookies của requests.Session thay cho WebDriver)
+                http_session = self.http_client.session if self.driver is None and self.http_client else None
+                fetched, failed_batches = fetch_product_details(
+                    self.driver, self.logger, missing_ids, self.parse_json_response, settings,
+                    session=http_session
+                )
+
+                # Method 2: Fallback UI interaction cho các batch lỗi (cần trình duyệt)
+                for batch_ids in failed_batches if self.driver is not None else []:
+                    batch_details = self.fetch_json_via_ui(batch_ids)
+                    if batch_details:
+                        fetched.update(batch_details)
+
+                if self.product_cache:
+                    self.product_cache.put_many(fetched, statuses)
+                product_details.update(fetched)
 
             self.logger.info(f"✅ Hoàn thành lấy chi tiết {len(product_details)} đơn hàng")
             return product_details
@@ -240,7 +311,7 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
                     if checkbox and not checkbox.is_selected():
                         # Scroll to checkbox
                         self.driver.execute_script("arguments[0].scrollIntoView();", checkbox)
-                        time.sleep(0.1)
+                        self.get_waiter().wait_for_clickable('invoice.checkbox_visible', checkbox, timeout=2)
 
                         # Click checkbox
                         checkbox.click()
@@ -293,8 +364,11 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             json_button.click()
             self.logger.info("✅ Clicked 'Lấy JSON' button")
 
-            # Wait for new page/response
-            time.sleep(2)
+            # Chờ chuyển sang trang invoiceJSON (có <pre>) thay cho sleep cố định
+            self.get_waiter().wait(
+                'invoice.json_page',
+                lambda driver: "invoiceJSON" in driver.current_url and driver.find_elements(By.TAG_NAME, "pre"),
+                timeout=10, required=False)
 
             # Check if redirected to JSON page
             current_url = self.driver.current_url
@@ -382,29 +456,39 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.error(f"❌ Error parsing product detail: {e}")
             return []
 
-    def enhanced_scrape_order_data(self):
-        """Enhanced scraping with product details"""
+    def enhanced_scrape_order_data(self, orders=None):
+        """Enhanced scraping with product details (orders: dữ liệu đã lấy sẵn, vd từ HTTP engine)"""
         try:
             self.logger.info("📊 Bắt đầu lấy dữ liệu đơn hàng ENHANCED...")
 
             # Step 1: Get basic order data (existing method)
-            orders = self.scrape_order_data()
+            if orders is None:
+                orders = self.scrape_order_data()
 
             if not orders:
                 return []
 
-            # Step 2: Extract order IDs
+            # Step 2: Extract order IDs (+ trạng thái col_7 để invalidate cache)
+            if isinstance(orders, OrderBatch):
+                id_status = zip(orders.column('id') or [], orders.column('col_7') or [None] * len(orders))
+            else:
+                id_status = ((order.get('id'), order.get('col_7')) for order in orders)
+
             order_ids = []
-            for order in orders:
-                order_id = order.get('id')
+            statuses = {}
+            for order_id, status in id_status:
                 if order_id:
                     order_ids.append(order_id)
+                    statuses[str(order_id)] = status
 
             self.logger.info(f"📦 Tìm thấy {len(order_ids)} order IDs để lấy chi tiết sản phẩm")
 
-            # Step 3: Get product details in batches
+            # Step 3: Get product details in batches (đơn không đổi so với lần trước dùng lại chi tiết đã lưu)
             if order_ids:
-                product_details = self.extract_product_details_batch(order_ids, batch_size=5)
+                reused = self.reuse_unchanged_product_details(orders)
+                fetch_ids = [order_id for order_id in order_ids if str(order_id) not in reused]
+                product_details = self.extract_product_details_batch(fetch_ids, statuses=statuses) if fetch_ids else {}
+                product_details.update(reused)
 
                 # Step 4: Merge product details with order data
                 enhanced_orders = self.merge_product_details(orders, product_details)
@@ -418,8 +502,61 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.error(f"❌ Lỗi enhanced scraping: {e}")
             return []
 
+    def reuse_unchanged_product_details(self, orders):
+        """
+        Chi tiết sản phẩm lưu từ lần chạy trước cho các đơn không đổi trạng thái/vận chuyển/tổng tiền
+
+        Returns:
+            dict: {order_id: details} như extract_product_details_batch (rỗng nếu chưa có lần chạy trước)
+        """
+        if not self.order_changes:
+            return {}
+        try:
+            scan = self.order_changes.scan(orders_to_frame(orders))
+            if scan['baseline']:
+                return {}
+
+            carried = self.order_changes.carried(scan['unchanged'])
+            reused = {order_id: carry['details'] for order_id, carry in carried.items() if carry.get('details')}
+            self.logger.info(f"🔁 {len(changed_order_ids(scan))} đơn mới/thay đổi cần lấy chi tiết, "
+                             f"dùng lại chi tiết của {len(reused)}/{len(scan['unchanged'])} đơn không đổi")
+            return reused
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không dùng lại được chi tiết sản phẩm, lấy toàn bộ: {e}")
+            return {}
+
+    def build_change_carry(self, df, changes):
+        """Dữ liệu mang sang lần sau cho đơn mới/thay đổi: chi tiết sản phẩm + cột SLA"""
+        if not changes or 'id' not in df.columns:
+            return {}
+
+        ids = df['id'].astype(str)
+        rows = df[ids.isin(changed_order_ids(changes))]
+        carry = {}
+        for record in rows.astype(object).where(rows.notna(), None).to_dict('records'):
+            entry = {}
+            if record.get('raw_product_detail') is not None:
+                entry['details'] = {
+                    'products': record.get('products') or [],
+                    'product_count': record.get('product_count') or 0,
+                    'raw_detail': record.get('raw_product_detail'),
+                    'customer': record.get('api_customer') or '',
+                    'amount_total': record.get('api_amount') or '',
+                    'transporter': record.get('api_transporter') or '',
+                    'address': record.get('api_address') or '',
+                    'phone': record.get('api_phone') or ''
+                }
+            if 'sla_status' in record:
+                entry['sla'] = {column: record.get(column) for column in SLA_COLUMNS}
+            carry[str(record['id'])] = entry
+        return carry
+
     def merge_product_details(self, orders, product_details):
         """Merge product details with basic order data"""
+        if isinstance(orders, OrderBatch):
+            return self.merge_product_details_columns(orders, product_details)
+
         try:
             enhanced_orders = []
 
@@ -468,36 +605,62 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.error(f"❌ Error merging product details: {e}")
             return orders
 
-    def export_enhanced_data(self, df):
-        """Export enhanced data with product details"""
+    def merge_product_details_columns(self, batch, product_details):
+        """Merge chi tiết sản phẩm vào OrderBatch theo cột (cùng kết quả với merge_product_details)"""
         try:
-            self.logger.info("📁 Xuất dữ liệu ENHANCED...")
+            details = [product_details.get(str(order_id)) if order_id is not None else None
+                       for order_id in batch.column('id') or [None] * len(batch)]
+
+            def api_column(key):
+                return [detail.get(key, '') if detail else None for detail in details]
+
+            products = [detail['products'] if detail else [] for detail in details]
+            batch.set_column('products', products)
+            batch.set_column('product_count', [detail['product_count'] if detail else 0 for detail in details])
+            batch.set_column('raw_product_detail', [detail['raw_detail'] if detail else None for detail in details])
+            batch.set_column('api_customer', api_column('customer'))
+            batch.set_column('api_amount', api_column('amount_total'))
+            batch.set_column('api_transporter', api_column('transporter'))
+            batch.set_column('api_address', api_column('address'))
+            batch.set_column('api_phone', api_column('phone'))
+            batch.set_column('product_summary', [
+                ('; '.join(p['name'] for p in items[:3]) if items else 'No products') if detail
+                else 'Details not available'
+                for detail, items in zip(details, products)
+            ])
+            batch.set_column('total_items', [sum(p['quantity'] for p in items) for items in products])
+            return batch
 
-            # Call parent export method
-            export_files = super().export_data(df)
+        except Exception as e:
+            self.logger.error(f"❌ Error merging product details: {e}")
+            return batch
+
+    def export_enhanced_data(self, df, changes=None):
+        """Export enhanced data with product details (kèm change set nếu có)"""
+        try:
+            self.logger.info("📁 Xuất dữ liệu ENHANCED...")
 
-            # Additional enhanced exports
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-            # 1. Products-only CSV
+            # 1. Products-only CSV - chạy song song cùng các writer của export stage
+            extra_writers = []
             if 'products' in df.columns:
-                try:
+                def write_products_csv(path):
                     products_df = self.create_products_export(df)
-                    products_filename = f"data/products_detail_{timestamp}.csv"
-                    products_df.to_csv(products_filename, index=False, encoding='utf-8-sig')
-                    export_files['products'] = products_filename
-                    self.logger.info(f"✅ Đã xuất Products CSV: {products_filename}")
-                except Exception as e:
-                    self.logger.error(f"❌ Lỗi xuất Products CSV: {e}")
+                    products_df.to_csv(path, index=False, encoding='utf-8-sig')
+
+                extra_writers.append(('products', f"data/products_detail_{timestamp}.csv", write_products_csv))
+
+            # Call parent export method
+            export_files = super().export_data(df, extra_writers=extra_writers, changes=changes)
+            if not export_files:
+                return export_files
 
             # 2. Enhanced summary report
-            try:
-                enhanced_summary = f"data/enhanced_summary_{timestamp}.txt"
-                self.create_enhanced_summary(df, enhanced_summary)
-                export_files['enhanced_summary'] = enhanced_summary
-                self.logger.info(f"✅ Đã tạo Enhanced Summary: {enhanced_summary}")
-            except Exception as e:
-                self.logger.error(f"❌ Lỗi tạo Enhanced Summary: {e}")
+            summary_stage = ExportStage(1, self.logger)
+            summary_stage.add('enhanced_summary', f"data/enhanced_summary_{timestamp}.txt",
+                              lambda path: self.create_enhanced_summary(df, path))
+            merge_export_files(export_files, summary_stage.run())
 
             return export_files
 
@@ -549,6 +712,11 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
                     f.write(f"📋 Đơn có sản phẩm: {orders_with_products}/{len(df)}\n")
                     f.write(f"📊 Tỷ lệ thành công: {orders_with_products/len(df)*100:.1f}%\n")
 
+                if self.product_cache:
+                    cache_stats = self.product_cache.get_stats()
+                    f.write(f"🗄️ Product cache: {cache_stats['hits']} hit / {cache_stats['misses']} miss "
+                            f"({cache_stats['hit_rate']}%), {cache_stats['invalidated']} đổi trạng thái\n")
+
                 f.write(f"\n📋 Cấu trúc dữ liệu Enhanced:\n")
                 for i, col in enumerate(df.columns, 1):
                     f.write(f"  {i}. {col}\n")
@@ -564,6 +732,7 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             'order_count': 0,
             'enhanced_order_count': 0,
             'export_files': {},
+            'product_cache': None,
             'error': None
         }
 
@@ -574,26 +743,16 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             if progress_callback:
                 progress_callback("Khởi tạo Enhanced automation", 5)
 
-            if not self.setup_driver():
-                raise Exception("Không thể khởi tạo WebDriver")
-
-            if progress_callback:
-                progress_callback("Đăng nhập...", 20)
-
-            if not self.login_to_one():
-                raise Exception("Đăng nhập thất bại")
-
-            if progress_callback:
-                progress_callback("Truy cập trang đơn hàng...", 30)
-
-            if not self.navigate_to_orders():
-                raise Exception("Không thể truy cập trang đơn hàng")
+            # HTTP engine (nếu bật) hoặc WebDriver: khởi tạo, đăng nhập, truy cập trang đơn hàng, lấy bảng đơn
+            orders = self.collect_orders(progress_callback)
+            if not orders:
+                raise Exception("Không lấy được dữ liệu đơn hàng")
 
             # Step 4: Enhanced data extraction
             if progress_callback:
                 progress_callback("Lấy dữ liệu ENHANCED với chi tiết sản phẩm...", 50)
 
-            orders = self.enhanced_scrape_order_data()
+            orders = self.enhanced_scrape_order_data(orders)
             if not orders:
                 raise Exception("Không lấy được dữ liệu đơn hàng")
 
@@ -601,7 +760,8 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             if progress_callback:
                 progress_callback("Xử lý dữ liệu ENHANCED...", 70)
 
-            df, sla_report = self.process_order_data(orders)
+            changes = self.diff_order_changes(orders_to_frame(orders))
+            df, sla_report = self.process_order_data(orders, changes=changes)
             if df.empty:
                 raise Exception("Dữ liệu rỗng sau khi xử lý")
 
@@ -609,7 +769,9 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             if progress_callback:
                 progress_callback("Xuất dữ liệu ENHANCED...", 85)
 
-            export_files = self.export_enhanced_data(df)
+            export_files = self.export_enhanced_data(df, changes=changes)
+            if export_files:
+                self.commit_order_changes(changes, carry=self.build_change_carry(df, changes))
 
             # Calculate enhanced metrics
             enhanced_count = len(df[df['product_count'] > 0]) if 'product_count' in df.columns else 0
@@ -619,6 +781,8 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
                 'order_count': len(df),
                 'enhanced_order_count': enhanced_count,
                 'export_files': export_files,
+                'changes': changes['counts'] if changes else None,
+                'product_cache': self.product_cache.get_stats() if self.product_cache else None,
                 'end_time': datetime.now(),
                 'duration': (datetime.now() - result['start_time']).total_seconds()
             })
@@ -627,6 +791,10 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
                 progress_callback("Hoàn thành ENHANCED automation", 100)
 
             self.logger.info(f"🎉 ENHANCED automation hoàn thành: {len(df)} đơn hàng, {enhanced_count} có chi tiết sản phẩm")
+            if result['product_cache']:
+                cache_stats = result['product_cache']
+                self.logger.info(f"🗄️ Product cache: {cache_stats['hits']} hit / {cache_stats['misses']} miss "
+                                 f"({cache_stats['hit_rate']}%)")
 
         except Exception as e:
             result['error'] = str(e)
@@ -635,11 +803,12 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
                 progress_callback(f"Lỗi: {e}", 0)
 
         finally:
-            if self.driver:
-                try:
-                    self.driver.quit()
-                except:
-                    pass
+            # Trả trình duyệt trước: lỗi khi đóng HTTP engine / ghi thống kê không được làm rò rỉ trình duyệt
+            try:
+                self.close_http_client()
+            finally:
+                self.release_driver(success=result['success'])
+            self.report_run_timing()
 
             # Log results to Google Sheets
             if hasattr(self, 'sheets_config_service') and self.sheets_config_service:
@@ -650,14 +819,21 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
 
         return result
 
-    def process_order_data(self, raw_data):
-        """Process scraped order data with SLA analysis"""
+    def process_order_data(self, raw_data, changes=None):
+        """
+        Process scraped order data with SLA analysis
+
+        Args:
+            raw_data: Danh sách đơn / OrderBatch
+            changes (dict): Change set so với lần trước - chỉ phân tích lại SLA cho đơn mới/thay đổi
+                            (và đơn không đổi sắp tới hạn), đơn còn lại dùng cột SLA đã lưu
+        """
         try:
             self.logger.info("📊 Processing order data with SLA analysis...")
 
             # Convert raw data to DataFrame
-            if isinstance(raw_data, list) and raw_data:
-                processed_data = pd.DataFrame(raw_data)
+            if isinstance(raw_data, (list, OrderBatch)) and len(raw_data):
+                processed_data = orders_to_frame(raw_data)
                 self.logger.info(f"✅ Converted {len(processed_data)} orders to DataFrame")
             else:
                 self.logger.warning("⚠️ No raw data to process")
@@ -665,14 +841,20 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
 
             # Add SLA analysis if available
             if self.sla_monitor and not processed_data.empty:
-                self.logger.info("🕐 Running SLA analysis...")
-                sla_report = self.sla_monitor.analyze_orders_sla(processed_data)
+                sla_input, carried_sla = self.select_sla_delta(processed_data, changes)
+                self.logger.info(f"🕐 Running SLA analysis ({len(sla_input)}/{len(processed_data)} đơn)...")
+                sla_report = self.sla_monitor.analyze_orders_sla(sla_input)
 
                 # Export SLA reports
                 sla_files = self.sla_monitor.export_sla_report(sla_report)
 
                 # Add SLA info to processed data
                 processed_data = self.add_sla_info_to_orders(processed_data, sla_report)
+                processed_data = self.apply_carried_sla(processed_data, carried_sla)
+
+                # Nạp tập đơn mới nhất vào SLA watcher (chỉ lên lịch lại đơn thay đổi)
+                if self.sla_watcher:
+                    self.sla_watcher.load_orders(processed_data)
 
                 # Log SLA summary
                 self.log_sla_summary(sla_report)
@@ -685,8 +867,45 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.error(f"❌ Error processing order data: {e}")
             return pd.DataFrame(), None
 
+    def select_sla_delta(self, orders_df, changes):
+        """
+        Đơn cần phân tích lại SLA: đơn mới/thay đổi + đơn không đổi chưa có cột SLA lưu sẵn
+        hoặc có hạn bàn giao trong `order_changes.sla_recheck_hours` tới (trạng thái urgent/overdue đổi theo giờ)
+
+        Returns:
+            tuple: (DataFrame cần phân tích, {order_id: cột SLA mang sang} cho các đơn còn lại)
+        """
+        if not changes or changes.get('baseline') or 'id' not in orders_df.columns:
+            return orders_df, {}
+
+        recheck_until = pd.Timestamp.now() + pd.Timedelta(
+            hours=self.config.get('order_changes', {}).get('sla_recheck_hours', 24))
+        carried_sla = {}
+        for order_id, carry in self.order_changes.carried(changes['unchanged']).items():
+            sla = carry.get('sla')
+            if not sla:
+                continue
+            deadline = pd.to_datetime(sla.get('sla_deadline'), errors='coerce')
+            if pd.isna(deadline) or deadline > recheck_until:
+                carried_sla[order_id] = sla
+
+        return orders_df[~orders_df['id'].astype(str).isin(carried_sla)], carried_sla
+
+    def apply_carried_sla(self, orders_df, carried_sla):
+        """Ghi cột SLA đã lưu từ lần chạy trước cho các đơn không phân tích lại"""
+        if not carried_sla:
+            return orders_df
+
+        carried = pd.DataFrame.from_dict(carried_sla, orient='index')
+        order_ids = orders_df['id'].astype(str)
+        matched = order_ids.isin(carried.index)
+        for column in SLA_COLUMNS:
+            if column in carried.columns:
+                orders_df.loc[matched, column] = order_ids[matched].map(carried[column])
+        return orders_df
+
     def add_sla_info_to_orders(self, orders_df, sla_report):
-        """Add SLA information to orders dataframe"""
+        """Add SLA information to orders dataframe (một lần map theo order id)"""
         try:
             # Add SLA columns
             orders_df['sla_platform'] = 'other'
@@ -694,35 +913,22 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             orders_df['sla_status'] = 'normal'
             orders_df['sla_priority'] = 'low'
 
-            # Process Shopee orders
-            shopee_statuses = sla_report.get('shopee', {}).get('sla_status', [])
-            for status in shopee_statuses:
-                order_id = status.get('order_id')
-                mask = orders_df['id'] == order_id
-                orders_df.loc[mask, 'sla_platform'] = 'shopee'
-                orders_df.loc[mask, 'sla_deadline'] = status.get('handover_deadline', '')
-
-                if status.get('handover_overdue') or status.get('confirm_overdue'):
-                    orders_df.loc[mask, 'sla_status'] = 'overdue'
-                    orders_df.loc[mask, 'sla_priority'] = 'critical'
-                elif status.get('time_to_handover', 24) < 2:
-                    orders_df.loc[mask, 'sla_status'] = 'urgent'
-                    orders_df.loc[mask, 'sla_priority'] = 'high'
-
-            # Process TikTok orders
-            tiktok_statuses = sla_report.get('tiktok', {}).get('sla_status', [])
-            for status in tiktok_statuses:
-                order_id = status.get('order_id')
-                mask = orders_df['id'] == order_id
-                orders_df.loc[mask, 'sla_platform'] = 'tiktok'
-                orders_df.loc[mask, 'sla_deadline'] = status.get('handover_deadline', '')
-
-                if status.get('handover_overdue'):
-                    orders_df.loc[mask, 'sla_status'] = 'overdue'
-                    orders_df.loc[mask, 'sla_priority'] = 'critical'
-                elif status.get('time_to_handover', 24) < 4:
-                    orders_df.loc[mask, 'sla_status'] = 'urgent'
-                    orders_df.loc[mask, 'sla_priority'] = 'high'
+            sla_entries = self.build_sla_annotation_frame(sla_report)
+            if sla_entries.empty:
+                return orders_df
+
+            # Entry sau ghi đè entry trước (TikTok sau Shopee); status/priority chỉ ghi đè khi có giá trị
+            latest = sla_entries.groupby('order_id', sort=False).last()
+            order_ids = orders_df['id']
+
+            matched = order_ids.isin(latest.index)
+            orders_df.loc[matched, 'sla_platform'] = order_ids[matched].map(latest['sla_platform'])
+            orders_df.loc[matched, 'sla_deadline'] = order_ids[matched].map(latest['sla_deadline'])
+
+            for column in ('sla_status', 'sla_priority'):
+                values = order_ids.map(latest[column])
+                has_value = values.notna()
+                orders_df.loc[has_value, column] = values[has_value]
 
             return orders_df
 
@@ -730,32 +936,61 @@ class EnhancedOneAutomationSystem(OneAutomationSystem):
             self.logger.error(f"❌ Error adding SLA info: {e}")
             return orders_df
 
+    def build_sla_annotation_frame(self, sla_report):
+        """Chuyển sla_status của các sàn có quy tắc SLA thành bảng order_id -> cột SLA"""
+        frames = []
+        default_urgent_hours = {'shopee': 2, 'tiktok': 4}
+
+        for platform in sla_report.get('platform_rules', ['shopee', 'tiktok']):
+            analysis = sla_report.get(platform, {})
+            statuses = analysis.get('sla_status', [])
+            if not statuses:
+                continue
+
+            urgent_hours = analysis.get('urgent_hours', default_urgent_hours.get(platform, 2))
+            entries = pd.DataFrame(statuses).reindex(
+                columns=['order_id', 'handover_deadline', 'handover_overdue', 'confirm_overdue', 'time_to_handover']
+            )
+            overdue = entries['handover_overdue'].astype('boolean').fillna(False).to_numpy(bool)
+            overdue |= entries['confirm_overdue'].astype('boolean').fillna(False).to_numpy(bool)
+            urgent = ~overdue & (pd.to_numeric(entries['time_to_handover'], errors='coerce') < urgent_hours)
+
+            frames.append(pd.DataFrame({
+                'order_id': entries['order_id'],
+                'sla_platform': platform,
+                'sla_deadline': entries['handover_deadline'].astype(object).where(
+                    entries['handover_deadline'].notna(), ''),
+                'sla_status': np.select([overdue, urgent], ['overdue', 'urgent'], default=None),
+                'sla_priority': np.select([overdue, urgent], ['critical', 'high'], default=None)
+            }))
+
+        if not frames:
+            return pd.DataFrame(columns=['order_id', 'sla_platform', 'sla_deadline', 'sla_status', 'sla_priority'])
+
+        sla_entries = pd.concat(frames, ignore_index=True)
+        return sla_entries[sla_entries['order_id'].notna()]
+
     def log_sla_summary(self, sla_report):
         """Log SLA summary to console"""
         try:
             self.logger.info("📊 SLA SUMMARY:")
             self.logger.info("=" * 50)
 
-            # Shopee summary
-            shopee = sla_report.get('shopee', {})
-            if shopee:
-                self.logger.info(f"🛒 SHOPEE:")
-                self.logger.info(f"   📦 Đơn sau 18h: {shopee.get('after_cutoff', 0)}")
-                self.logger.info(f"   ✅ Cần xác nhận: {shopee.get('need_confirm', 0)}")
-                self.logger.info(f"   🚚 Cần bàn giao: {shopee.get('need_handover', 0)}")
-                if shopee.get('overdue_confirm', 0) > 0:
-                    self.logger.warning(f"   🚨 QUÁ HẠN xác nhận: {shopee['overdue_confirm']}")
-                if shopee.get('overdue_handover', 0) > 0:
-                    self.logger.warning(f"   🚨 QUÁ HẠN bàn giao: {shopee['overdue_handover']}")
-
-            # TikTok summary
-            tiktok = sla_report.get('tiktok', {})
-            if tiktok:
-                self.logger.info(f"📱 TIKTOK:")
-                self.logger.info(f"   📦 Đơn sau 14h: {tiktok.get('after_cutoff', 0)}")
-                self.logger.info(f"   🚚 Cần bàn giao: {tiktok.get('need_handover', 0)}")
-                if tiktok.get('overdue_handover', 0) > 0:
-                    self.logger.warning(f"   🚨 QUÁ HẠN bàn giao: {tiktok['overdue_handover']}")
+            for platform in sla_report.get('platform_rules', ['shopee', 'tiktok']):
+                analysis = sla_report.get(platform, {})
+                if not analysis.get('total_orders'):
+                    continue
+
+                self.logger.info(f"🛒 {platform.upper()}:")
+                self.logger.info(f"   📦 Đơn sau cutoff: {analysis.get('after_cutoff', 0)}")
+                if 'need_confirm' in analysis:
+                    self.logger.info(f"   ✅ Cần xác nhận: {analysis['need_confirm']}")
+                if 'need_handover' in analysis:
+                    self.logger.info(f"   🚚 Cần bàn giao: {analysis['need_handover']}")
+                if analysis.get('overdue_confirm', 0) > 0:
+                    self.logger.warning(f"   🚨 QUÁ HẠN xác nhận: {analysis['overdue_confirm']}")
+                if analysis.get('overdue_handover', 0) > 0:
+                    self.logger.warning(f"   🚨 QUÁ HẠN bàn giao: {analysis['overdue_handover']}")
 
             # Alerts
             alerts = sla_report.get('alerts', [])
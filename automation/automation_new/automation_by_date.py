@@ -9,6 +9,8 @@ import sys
 import time
 import os
 import json
+import argparse
+import threading
 import requests
 import re
 from datetime import datetime
@@ -19,20 +21,50 @@ from scripts.login_manager import CompleteLoginManager
 from scripts.date_customizer import DateCustomizer
 from scripts.pagination_handler import PaginationHandler
 from scripts.enhanced_scraper import EnhancedScraper
+from scripts.product_cache import open_product_cache
+from scripts.parallel_extractor import ExtractionSink, ParallelExtractor, split_date_range
+from scripts.shard_planner import (ShardPlanner, make_filter_probe, save_shard_plan, load_shard_plan,
+                                  sub_day_shards, FILTER_MIN_SPAN_HOURS)
+from scripts.run_checkpoint import open_run_checkpoint
 
 
 class JuneFreshSessionWithProducts:
     """🔄 Fresh session per page processor WITH product analysis"""
 
-    def __init__(self):
+    def __init__(self, start_date='2025-06-01', end_date='2025-06-30', run_id=None):
         self.target_records = 23452
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.start_date = start_date
+        self.end_date = end_date
+        self.session_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
         self.processed_pages = 0
         self.total_extracted = 0
         self.total_products_extracted = 0
-
-    def login_and_setup(self):
-        """🔐 Fresh login and setup for each page"""
+        self.product_cache = open_product_cache(base_dir=os.path.dirname(os.path.abspath(__file__)))
+        self._stats_lock = threading.Lock()
+
+        # Checkpoint theo run_id (= session_id): trạng thái từng trang/shard để --resume
+        self.checkpoint = open_run_checkpoint(self.session_id, base_dir=os.path.dirname(os.path.abspath(__file__)))
+
+    def period(self):
+        """
+        📅 Nhãn khoảng ngày của run (theo start_date/end_date, kể cả khi --resume đọc lại từ checkpoint)
+
+        Returns:
+            dict: {month, year, date_range, file_prefix} - vd June 2025 / june_2025,
+                  khoảng nhiều tháng: June-July / 2025-06-01 → 2025-07-15 / 20250601_20250715
+        """
+        start = datetime.strptime(self.start_date[:10], '%Y-%m-%d')
+        end = datetime.strptime(self.end_date[:10], '%Y-%m-%d')
+        if (start.year, start.month) == (end.year, end.month):
+            return {'month': start.strftime('%B'), 'year': str(start.year),
+                    'date_range': start.strftime('%B %Y'), 'file_prefix': start.strftime('%B_%Y').lower()}
+        return {'month': f"{start:%B}-{end:%B}",
+                'year': str(start.year) if start.year == end.year else f"{start.year}-{end.year}",
+                'date_range': f"{start:%Y-%m-%d} → {end:%Y-%m-%d}",
+                'file_prefix': f"{start:%Y%m%d}_{end:%Y%m%d}"}
+
+    def login_and_setup(self, start_date=None, end_date=None):
+        """🔐 Fresh login and setup for each page (hoặc cho một shard khoảng ngày)"""
         try:
             print("🔐 Fresh login and setup...")
 
@@ -49,19 +81,20 @@ class JuneFreshSessionWithProducts:
 
             # Setup date range
             date_customizer = DateCustomizer(driver, logger)
-            if not date_customizer.set_date_range('2025-06-01', '2025-06-30', 'ecom'):
+            if not date_customizer.set_date_range(start_date or self.start_date, end_date or self.end_date, 'ecom'):
                 return None, None, None, None, None
             if not date_customizer.set_display_limit(2000):
                 return None, None, None, None, None
             if not date_customizer.apply_filters(wait_for_load=True):
                 return None, None, None, None, None
 
-            # Wait for data load
-            time.sleep(5)
-
             pagination_handler = PaginationHandler(driver, logger)
             enhanced_scraper = EnhancedScraper(driver, logger)
 
+            # Wait for data load (theo bảng dữ liệu, không sleep cố định)
+            if not enhanced_scraper.wait_for_table_load(timeout=30):
+                return None, None, None, None, None
+
             print("✅ Fresh session ready")
             return login_manager, driver, logger, pagination_handler, enhanced_scraper
 
@@ -88,12 +121,17 @@ class JuneFreshSessionWithProducts:
             return false;
             """
 
+            # Snapshot trước khi gọi API để nhận ra lúc bảng đã vẽ trang mới
+            old_content = pagination_handler._get_table_content_snapshot()
+
             success = pagination_handler.driver.execute_script(navigate_script)
             if success:
                 print(f"✅ Navigation API called for page {target_page}")
 
-                # Wait for page load
-                time.sleep(8)
+                # Chờ nội dung bảng đổi sang trang mới thay cho sleep cố định
+                if not pagination_handler._wait_for_table_content_change(old_content, timeout=30):
+                    print(f"❌ Page {target_page} did not redraw in time")
+                    return False
 
                 print(f"✅ Successfully navigated to page {target_page}")
                 return True
@@ -105,15 +143,12 @@ class JuneFreshSessionWithProducts:
             print(f"❌ Navigation to page {target_page} failed: {e}")
             return False
 
-    def extract_page_data(self, page_number, enhanced_scraper, driver, logger):
+    def extract_page_data(self, page_number, enhanced_scraper, driver, logger, shard=None):
         """📊 Extract data from current page WITH product analysis"""
         try:
             print(f"📊 Extracting data from page {page_number}...")
 
-            # Wait for stability
-            time.sleep(3)
-
-            # Step 1: Extract basic data
+            # Step 1 (extract_single_page_data tự chờ bảng load): Extract basic data
             page_data = enhanced_scraper.extract_single_page_data()
 
             if not page_data:
@@ -124,13 +159,18 @@ class JuneFreshSessionWithProducts:
             order_ids = self.extract_order_ids_from_data(page_data)
             print(f"🆔 Found {len(order_ids)} order IDs for product analysis")
 
+            # Trạng thái hiện tại (col_7) để invalidate cache khi đơn đổi trạng thái
+            statuses = {str(order.get('id')).strip(): order.get('col_7')
+                        for order in page_data if order.get('id')}
+
             # Step 3: Get product details
             product_details = {}
             if order_ids:
-                product_details = self.extract_product_details_batch(order_ids, driver, logger)
+                product_details = self.extract_product_details_batch(order_ids, driver, logger, statuses=statuses)
                 print(f"🛍️ Got product details for {len(product_details)} orders")
 
             # Step 4: Merge and enhance data
+            period = self.period()
             enhanced_data = []
             for i, order in enumerate(page_data):
                 order['session_id'] = self.session_id
@@ -152,9 +192,13 @@ class JuneFreshSessionWithProducts:
                 if order_code:
                     order['order_code_clean'] = str(order_code).strip()
 
-                order['month'] = 'June'
-                order['year'] = '2025'
-                order['date_range'] = 'June 2025'
+                order['month'] = period['month']
+                order['year'] = period['year']
+                order['date_range'] = period['date_range']
+                if shard:
+                    order['shard_id'] = shard['shard_id']
+                    order['shard_start'] = shard['start']
+                    order['shard_end'] = shard['end']
 
                 # Add product details if available
                 order_id_str = str(order_id).strip()
@@ -225,7 +269,7 @@ class JuneFreshSessionWithProducts:
             print(f"❌ Error extracting order IDs: {e}")
             return []
 
-    def extract_product_details_batch(self, order_ids, driver, logger, batch_size=10):
+    def extract_product_details_batch(self, order_ids, driver, logger, batch_size=10, statuses=None):
         """📦 Extract product details for order IDs"""
         try:
             print(f"📦 Extracting product details for {len(order_ids)} orders...")
@@ -233,12 +277,15 @@ class JuneFreshSessionWithProducts:
             product_details = {}
 
             # Try direct API call first (fastest method)
-            product_details = self.fetch_json_api_direct(order_ids, driver)
+            product_details = self.fetch_json_api_direct(order_ids, driver, statuses)
 
-            if not product_details:
-                print("⚠️ API direct failed, trying UI method...")
+            # Cache hit một phần làm kết quả khác rỗng: kiểm tra theo từng order id chưa có chi tiết
+            missing_ids = [order_id for order_id in order_ids if str(order_id) not in product_details]
+            if missing_ids:
+                print(f"⚠️ API direct thiếu {len(missing_ids)}/{len(order_ids)} đơn, thử lại các đơn này...")
+                product_details.update(self.fetch_json_api_direct(missing_ids, driver, statuses))
                 # Fallback to UI method if needed
-                # product_details = self.fetch_json_via_ui(order_ids, driver)
+                # product_details.update(self.fetch_json_via_ui(missing_ids, driver))
 
             return product_details
 
@@ -246,9 +293,16 @@ class JuneFreshSessionWithProducts:
             print(f"❌ Error extracting product details: {e}")
             return {}
 
-    def fetch_json_api_direct(self, order_ids, driver):
-        """🌐 Direct API call for product details"""
+    def fetch_json_api_direct(self, order_ids, driver, statuses=None):
+        """🌐 Direct API call for product details (cache trên đĩa được kiểm tra trước)"""
         try:
+            cached = {}
+            if self.product_cache:
+                cached, order_ids = self.product_cache.get_many(order_ids, statuses)
+                print(f"🗄️ Cache: {len(cached)} hit, {len(order_ids)} cần fetch")
+                if not order_ids:
+                    return cached
+
             # Build API URL
             ids_str = ','.join(map(str, order_ids))
             api_url = f"https://one.tga.com.vn/so/invoiceJSON?id={ids_str}"
@@ -265,17 +319,21 @@ class JuneFreshSessionWithProducts:
                 data = response.json()
                 if not data.get('error', True) and data.get('data'):
                     print(f"✅ API success: Got {len(data['data'])} orders")
-                    return self.parse_json_response(data['data'])
+                    fetched = self.parse_json_response(data['data'])
+                    if self.product_cache:
+                        self.product_cache.put_many(fetched, statuses)
+                    cached.update(fetched)
+                    return cached
                 else:
                     print(f"⚠️ API response error: {data.get('error', 'Unknown error')}")
             else:
                 print(f"⚠️ API status code: {response.status_code}")
 
-            return {}
+            return cached
 
         except Exception as e:
             print(f"⚠️ API call failed: {e}")
-            return {}
+            return cached
 
     def parse_json_response(self, json_data):
         """📋 Parse JSON response and extract product details"""
@@ -342,7 +400,7 @@ class JuneFreshSessionWithProducts:
             print(f"❌ Error parsing product detail: {e}")
             return []
 
-    def save_page_data(self, page_data, page_number):
+    def save_page_data(self, page_data, page_number, shard=None):
         """💾 Save enhanced page data with products"""
         try:
             if not page_data:
@@ -350,8 +408,10 @@ class JuneFreshSessionWithProducts:
 
             print("💾 Saving enhanced page data...")
 
-            # Local backup
-            filename = f"data/june_2025_enhanced_page_{page_number:02d}_{self.session_id}.json"
+            # Local backup (mỗi shard một tên file riêng để các worker không ghi đè nhau)
+            shard_part = f"{shard['shard_id']}_" if shard else ""
+            period = self.period()
+            filename = f"data/{period['file_prefix']}_enhanced_{shard_part}page_{page_number:02d}_{self.session_id}.json"
             os.makedirs('data', exist_ok=True)
 
             # Calculate statistics
@@ -367,9 +427,10 @@ class JuneFreshSessionWithProducts:
                     'total_products': total_products,
                     'orders_with_products': orders_with_products,
                     'product_extraction_rate': f"{orders_with_products/len(page_data)*100:.1f}%",
-                    'date_range': 'June 2025',
+                    'date_range': period['date_range'],
                     'processing_method': 'Fresh Session Per Page WITH Products',
-                    'target_total': self.target_records
+                    'target_total': self.target_records,
+                    'shard': shard
                 },
                 'orders': page_data
             }
@@ -379,7 +440,7 @@ class JuneFreshSessionWithProducts:
 
             print(f"📁 Enhanced backup: {filename}")
             print(f"   📊 {len(page_data)} orders, {total_products} products")
-            return True
+            return filename
 
         except Exception as e:
             print(f"❌ Save failed: {e}")
@@ -398,12 +459,36 @@ class JuneFreshSessionWithProducts:
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
 
+    def start_checkpoint(self, mode, units):
+        """📍 Ghi tham số run và đăng ký unit (unit đã có giữ nguyên trạng thái khi resume)"""
+        if not self.checkpoint:
+            return
+        self.checkpoint.start_run({'mode': mode, 'start_date': self.start_date, 'end_date': self.end_date})
+        self.checkpoint.register_units(units)
+
+    def record_page(self, unit_id, page_data, filename, shard=None):
+        """📍 Đánh dấu một trang đã lưu xong (số dòng, content hash, file, số sản phẩm)"""
+        if not self.checkpoint:
+            return
+        spec = {'kind': 'page', 'shard_id': shard['shard_id']} if shard else {'kind': 'page'}
+        self.checkpoint.register_units([(unit_id, spec)])
+        self.checkpoint.mark_done(unit_id, records=page_data, output_path=filename, details={
+            'products': sum(order.get('product_count', 0) for order in page_data)
+        })
+
+    def checkpoint_totals(self):
+        """📊 (số trang, số đơn, số sản phẩm) của các trang đã xong trong checkpoint"""
+        pages = [unit for unit in self.checkpoint.units(['done'])
+                 if (unit['spec'] or {}).get('kind') == 'page'] if self.checkpoint else []
+        return (len(pages), sum(unit['rows'] or 0 for unit in pages),
+                sum(unit['details'].get('products', 0) for unit in pages))
+
     def process_all_pages_with_products(self):
         """🎯 Process all pages with fresh session + product analysis"""
         try:
             start_time = time.time()
 
-            print("🔄 JUNE 2025 FRESH SESSION + PRODUCT EXTRACTION")
+            print(f"🔄 {self.period()['date_range'].upper()} FRESH SESSION + PRODUCT EXTRACTION")
             print("=" * 70)
             print("🎯 Strategy: Fresh Login/Logout Per Page + Product Analysis")
             print(f"📊 Target: {self.target_records:,} orders")
@@ -416,7 +501,20 @@ class JuneFreshSessionWithProducts:
             successful_pages = []
             failed_pages = []
 
+            self.start_checkpoint('pages', [(f"page-{page_num:02d}", {'kind': 'page', 'page_number': page_num})
+                                            for page_num in range(1, estimated_pages + 1)])
+            done_pages = self.checkpoint.done_ids() if self.checkpoint else set()
+            if done_pages:
+                self.processed_pages, self.total_extracted, self.total_products_extracted = self.checkpoint_totals()
+                print(f"📍 Resume: {len(done_pages)} page(s) already done ({self.total_extracted:,} orders)")
+
             for page_num in range(1, estimated_pages + 1):
+                unit_id = f"page-{page_num:02d}"
+                if unit_id in done_pages:
+                    print(f"⏭️ Page {page_num}: already done in run {self.session_id}, skipping")
+                    successful_pages.append(page_num)
+                    continue
+
                 print(f"\n🔄 PROCESSING PAGE {page_num}/{estimated_pages}")
                 print("=" * 50)
 
@@ -428,8 +526,13 @@ class JuneFreshSessionWithProducts:
                 if not all([login_manager, driver, logger, pagination_handler, enhanced_scraper]):
                     print(f"❌ Page {page_num}: Setup failed")
                     failed_pages.append(page_num)
+                    if self.checkpoint:
+                        self.checkpoint.mark_failed(unit_id, 'setup failed')
                     continue
 
+                if self.checkpoint:
+                    self.checkpoint.mark_running(unit_id)
+
                 try:
                     # STEP 2: Navigate to target page
                     if self.navigate_to_page(page_num, pagination_handler):
@@ -439,7 +542,9 @@ class JuneFreshSessionWithProducts:
 
                         if page_data:
                             # STEP 4: Save enhanced data
-                            if self.save_page_data(page_data, page_num):
+                            saved_file = self.save_page_data(page_data, page_num)
+                            if saved_file:
+                                self.record_page(unit_id, page_data, saved_file)
                                 self.processed_pages += 1
                                 self.total_extracted += len(page_data)
 
@@ -468,14 +573,14 @@ class JuneFreshSessionWithProducts:
                         print(f"❌ Page {page_num}: Navigation failed")
                         failed_pages.append(page_num)
 
+                    if page_num in failed_pages and self.checkpoint:
+                        self.checkpoint.mark_failed(unit_id, 'page failed')
+
                 finally:
                     # STEP 5: Always logout and cleanup
+                    # (không chờ cố định giữa các trang: lần login kế tiếp tự chờ trang sẵn sàng)
                     self.logout_and_cleanup(login_manager)
 
-                    # Wait between pages
-                    print("⏳ Waiting between pages...")
-                    time.sleep(5)
-
             # Final summary
             total_time = time.time() - start_time
             completion_rate = (self.total_extracted / self.target_records) * 100
@@ -491,11 +596,16 @@ class JuneFreshSessionWithProducts:
             print(f"📄 Pages: {self.processed_pages}/{estimated_pages}")
             print(f"⏱️ Total Time: {total_time/60:.1f} minutes")
             print(f"⚡ Rate: {self.total_extracted/total_time:.1f} orders/sec")
+            if self.product_cache:
+                cache_stats = self.product_cache.get_stats()
+                print(f"🗄️ Product cache: {cache_stats['hits']:,} hit / {cache_stats['misses']:,} miss "
+                      f"({cache_stats['hit_rate']}%)")
 
             if successful_pages:
                 print(f"✅ Successful pages: {successful_pages}")
             if failed_pages:
                 print(f"❌ Failed pages: {failed_pages}")
+                print(f"📍 Retry only these pages: python automation_by_date.py --resume {self.session_id}")
 
             print("=" * 70)
 
@@ -506,10 +616,235 @@ class JuneFreshSessionWithProducts:
             return False
 
 
+    def process_shard(self, shard, sink):
+        """🧵 Chạy một shard và ghi trạng thái shard vào checkpoint"""
+        if self.checkpoint:
+            self.checkpoint.mark_running(shard['shard_id'])
+
+        result = self.process_date_range(shard, sink)
+
+        if self.checkpoint:
+            if result['success']:
+                self.checkpoint.mark_done(shard['shard_id'], rows=result['records'],
+                                          details={'pages': result['pages']})
+            else:
+                self.checkpoint.mark_failed(shard['shard_id'], result.get('error'))
+        return result
+
+    def process_date_range(self, shard, sink, max_pages=50):
+        """
+        🧵 Worker: một phiên đăng nhập cho cả shard khoảng ngày, phân trang trong cùng phiên
+        (không đăng nhập lại mỗi trang), ghi từng trang vào sink dùng chung
+        """
+        tag = f"[{shard['shard_id']}]"
+        login_manager, driver, logger, pagination_handler, enhanced_scraper = self.login_and_setup(
+            shard['start'], shard['end']
+        )
+        if not all([login_manager, driver, logger, pagination_handler, enhanced_scraper]):
+            print(f"❌ {tag} Setup failed")
+            self.logout_and_cleanup(login_manager)
+            return {'success': False, 'pages': 0, 'records': 0, 'error': 'setup failed'}
+
+        pages = 0
+        records = 0
+        try:
+            for page_num in range(1, max_pages + 1):
+                page_data = self.extract_page_data(page_num, enhanced_scraper, driver, logger, shard=shard)
+                if not page_data:
+                    print(f"❌ {tag} Page {page_num}: No data extracted")
+                    return {'success': False, 'pages': pages, 'records': records,
+                            'error': f'page {page_num} empty'}
+
+                if not sink.write(shard, page_num, page_data):
+                    return {'success': False, 'pages': pages, 'records': records,
+                            'error': f'page {page_num} save failed'}
+
+                pages += 1
+                records += len(page_data)
+                print(f"✅ {tag} Page {page_num}: {len(page_data)} orders (shard total {records:,})")
+
+                if not pagination_handler.get_current_page_info()['has_next']:
+                    break
+                if not pagination_handler.go_to_next_page():
+                    return {'success': False, 'pages': pages, 'records': records,
+                            'error': f'navigation after page {page_num} failed'}
+
+            return {'success': True, 'pages': pages, 'records': records}
+
+        finally:
+            self.logout_and_cleanup(login_manager)
+
+    def build_shard_plan(self, page_size=2000, min_span_hours=24, plan_file=None):
+        """
+        🗺️ Probe số đơn theo khoảng ngày (một phiên đăng nhập) và chia thành shard ≤ page_size dòng
+        để mỗi shard chỉ cần đúng một trang; có plan_file thì đọc lại plan đã lưu thay vì probe
+        """
+        if min_span_hours < FILTER_MIN_SPAN_HOURS:
+            print(f"❌ min_span_hours={min_span_hours}: bộ lọc #date_from/#date_to chỉ nhận ngày, "
+                  f"chưa xác nhận backend lọc theo giờ")
+            return None
+
+        if plan_file and os.path.exists(plan_file):
+            plan = load_shard_plan(plan_file)
+            sub_day = sub_day_shards(plan)
+            if sub_day:
+                print(f"❌ Shard plan {plan_file} có shard theo giờ ({', '.join(sub_day)}): "
+                      f"bộ lọc #date_from/#date_to chỉ nhận ngày")
+                return None
+            print(f"📂 Loaded shard plan: {plan_file} ({len(plan)} shards)")
+            return plan
+
+        login_manager, driver, logger, pagination_handler, enhanced_scraper = self.login_and_setup()
+        if not all([login_manager, driver, logger]):
+            print("❌ Shard planning: setup failed")
+            return None
+
+        try:
+            planner = ShardPlanner(make_filter_probe(driver, logger, page_size=page_size),
+                                   page_size=page_size, min_span_hours=min_span_hours, logger=logger)
+            plan = planner.plan(self.start_date, self.end_date)
+        finally:
+            self.logout_and_cleanup(login_manager)
+
+        plan_file = plan_file or f"data/shard_plan_{self.session_id}.json"
+        save_shard_plan(plan, plan_file, metadata={
+            'session_id': self.session_id,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'page_size': page_size,
+            'probes': planner.probes
+        })
+        print(f"🗺️ Shard plan: {len(plan)} shards → {plan_file}")
+        return plan
+
+    def process_all_parallel(self, workers=3, shards=None, start_interval=5.0, plan=None, retries=1):
+        """
+        🧵 Chia khoảng ngày thành shard và chạy trên `workers` phiên trình duyệt song song
+        Mỗi phiên lọc theo khoảng ngày riêng nên không cần nhảy trang sâu / đăng nhập lại mỗi trang
+
+        Args:
+            plan (list): Shard plan từ build_shard_plan (mặc định: chia đều theo ngày)
+            retries (int): Số lần chạy lại riêng một shard lỗi
+
+        Khi resume, plan lấy từ checkpoint của run và chỉ chạy các shard chưa xong
+        """
+        try:
+            start_time = time.time()
+
+            registered = [unit for unit in self.checkpoint.units()
+                          if (unit['spec'] or {}).get('kind') == 'shard'] if self.checkpoint else []
+            if registered:
+                plan = [{key: value for key, value in unit['spec'].items() if key != 'kind'} for unit in registered]
+            else:
+                plan = plan or split_date_range(self.start_date, self.end_date, shards or workers)
+                self.start_checkpoint('parallel', [(shard['shard_id'], dict(shard, kind='shard')) for shard in plan])
+
+            done_shards = self.checkpoint.done_ids() if self.checkpoint else set()
+            pending = [shard for shard in plan if shard['shard_id'] not in done_shards]
+
+            print("🧵 PARALLEL DATE-RANGE EXTRACTION + PRODUCTS")
+            print("=" * 70)
+            print(f"📅 Range: {self.start_date} → {self.end_date}")
+            print(f"🧵 Workers: {workers}, shards: {len(plan)}")
+            if done_shards:
+                print(f"📍 Resume: {len(plan) - len(pending)} shard(s) already done, {len(pending)} to run")
+            print(f"🆔 Session: {self.session_id}")
+            print("=" * 70)
+
+            def write_page(shard, page_number, records):
+                filename = self.save_page_data(records, page_number, shard=shard)
+                if filename:
+                    self.record_page(f"{shard['shard_id']}/page-{page_number:02d}", records, filename, shard=shard)
+                return filename
+
+            sink = ExtractionSink(writer=write_page)
+            extractor = ParallelExtractor(lambda shard: self.process_shard(shard, sink),
+                                          max_workers=workers, start_interval=start_interval, retries=retries)
+            results = extractor.run(pending)
+
+            summary = sink.summary()
+            with self._stats_lock:
+                if self.checkpoint:
+                    # Gồm cả các trang đã xong ở lần chạy trước của run này
+                    self.processed_pages, self.total_extracted, self.total_products_extracted = \
+                        self.checkpoint_totals()
+                else:
+                    self.processed_pages = summary['pages']
+                    self.total_extracted = summary['total_records']
+                    self.total_products_extracted = summary['total_products']
+
+            total_time = time.time() - start_time
+            completion_rate = (self.total_extracted / self.target_records) * 100
+
+            print("\n" + "=" * 70)
+            print("🎉 PARALLEL EXTRACTION COMPLETED!")
+            print("=" * 70)
+            for result in results:
+                shard = result['shard']
+                status = "✅" if result['success'] else f"❌ {result.get('error', '')}"
+                print(f"   {shard['shard_id']} {shard['start']} → {shard['end']}: "
+                      f"{result.get('records', 0):,} orders, {result.get('pages', 0)} pages, "
+                      f"{result['seconds']}s {status}")
+            print(f"📦 Extracted: {self.total_extracted:,} orders")
+            print(f"🛍️ Products: {self.total_products_extracted:,} products")
+            print(f"📈 Completion: {completion_rate:.1f}%")
+            print(f"⏱️ Total Time: {total_time/60:.1f} minutes")
+            print(f"⚡ Rate: {self.total_extracted/total_time:.1f} orders/sec")
+            if not all(result['success'] for result in results):
+                print(f"📍 Retry only failed shards: python automation_by_date.py --resume {self.session_id} "
+                      f"--workers {workers}")
+            print("=" * 70)
+
+            return all(result['success'] for result in results) and completion_rate >= 85
+
+        except Exception as e:
+            print(f"❌ Parallel processing failed: {e}")
+            return False
+
+
 def main():
-    processor = JuneFreshSessionWithProducts()
+    parser = argparse.ArgumentParser(description="Fresh session extraction WITH products")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Số phiên trình duyệt song song (1 = chạy tuần tự từng trang như cũ)")
+    parser.add_argument('--shards', type=int, default=None, help="Số khoảng ngày (mặc định = workers)")
+    parser.add_argument('--start', default='2025-06-01', help="Ngày bắt đầu (YYYY-MM-DD)")
+    parser.add_argument('--end', default='2025-06-30', help="Ngày kết thúc (YYYY-MM-DD)")
+    parser.add_argument('--plan', action='store_true',
+                        help="Probe số đơn và chia shard ≤ 1 trang (không phân trang khi trích xuất)")
+    parser.add_argument('--plan-file', default=None, help="Đọc/lưu shard plan JSON")
+    parser.add_argument('--min-span-hours', type=int, default=FILTER_MIN_SPAN_HOURS,
+                        help="Shard nhỏ nhất khi lập plan (giờ, ≥ 24: bộ lọc ngày chưa hỗ trợ nửa ngày)")
+    parser.add_argument('--retries', type=int, default=1, help="Số lần chạy lại một shard lỗi")
+    parser.add_argument('--resume', metavar='RUN_ID', default=None,
+                        help="Chạy tiếp run cũ: bỏ qua trang/shard đã xong, chỉ chạy lại phần lỗi")
+    args = parser.parse_args()
+    if args.min_span_hours < FILTER_MIN_SPAN_HOURS:
+        parser.error(f"--min-span-hours phải ≥ {FILTER_MIN_SPAN_HOURS}: #date_from/#date_to chỉ nhận ngày, "
+                     f"chưa xác nhận backend lọc theo giờ")
 
     try:
+        if args.resume:
+            processor = JuneFreshSessionWithProducts(run_id=args.resume)
+            params = processor.checkpoint.get_params() if processor.checkpoint else {}
+            if not params:
+                print(f"❌ Run {args.resume} not found in checkpoint DB")
+                return False
+
+            processor.start_date, processor.end_date = params['start_date'], params['end_date']
+            print(f"📍 Resuming run {args.resume} ({params['mode']}): {processor.checkpoint.summary()}")
+            if params['mode'] == 'parallel':
+                return processor.process_all_parallel(workers=args.workers, retries=args.retries)
+            return processor.process_all_pages_with_products()
+
+        processor = JuneFreshSessionWithProducts(start_date=args.start, end_date=args.end)
+
+        if args.plan or args.plan_file:
+            plan = processor.build_shard_plan(min_span_hours=args.min_span_hours, plan_file=args.plan_file)
+            if not plan:
+                return False
+            return processor.process_all_parallel(workers=args.workers, plan=plan, retries=args.retries)
+        if args.workers > 1:
+            return processor.process_all_parallel(workers=args.workers, shards=args.shards, retries=args.retries)
         success = processor.process_all_pages_with_products()
         return success
 
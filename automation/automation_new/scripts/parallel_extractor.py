@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧵 Parallel Extractor Module - Chia khoảng ngày cho nhiều phiên trình duyệt chạy song song
+Handles: chia khoảng ngày thành shard, worker pool giới hạn số phiên đồng thời,
+giãn cách đăng nhập, sink dùng chung (thread-safe) để gom kết quả
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def split_date_range(start_date, end_date, parts):
+    """
+    📅 Chia [start_date, end_date] (YYYY-MM-DD, tính cả 2 đầu) thành tối đa `parts` khoảng ngày liên tiếp
+
+    Returns:
+        list: [{'shard_id': 'd01', 'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD'}, ...]
+    """
+    start = datetime.strptime(start_date, DATE_FORMAT).date()
+    end = datetime.strptime(end_date, DATE_FORMAT).date()
+    if end < start:
+        raise ValueError(f"Khoảng ngày không hợp lệ: {start_date} > {end_date}")
+
+    total_days = (end - start).days + 1
+    parts = max(1, min(int(parts), total_days))
+    base, remainder = divmod(total_days, parts)
+
+    shards = []
+    cursor = start
+    for index in range(parts):
+        days = base + (1 if index < remainder else 0)
+        shard_end = cursor + timedelta(days=days - 1)
+        shards.append({
+            'shard_id': f"d{index + 1:02d}",
+            'start': cursor.strftime(DATE_FORMAT),
+            'end': shard_end.strftime(DATE_FORMAT)
+        })
+        cursor = shard_end + timedelta(days=1)
+    return shards
+
+
+class ExtractionSink:
+    """
+    📥 Nơi các worker ghi kết quả: mỗi lần ghi chạy writer trong lock (không ghi đè nhau)
+    và cộng dồn bộ đếm dùng chung
+    """
+
+    def __init__(self, writer=None):
+        """
+        Args:
+            writer: writer(shard, page_number, records) -> bool, ví dụ lưu file JSON của trang
+        """
+        self.writer = writer
+        self._lock = threading.Lock()
+        self.pages = {}
+
+    def write(self, shard, page_number, records):
+        """
+        Ghi một trang kết quả; trả về kết quả của writer (True nếu không có writer)
+        Shard chạy lại ghi đè trang cùng số nên bộ đếm không bị cộng trùng
+        """
+        with self._lock:
+            saved = self.writer(shard, page_number, records) if self.writer else True
+            if saved:
+                products = sum(record.get('product_count', 0) or 0 for record in records)
+                self.pages[(shard['shard_id'], page_number)] = {'records': len(records), 'products': products}
+            return saved
+
+    def summary(self):
+        with self._lock:
+            return {
+                'total_records': sum(page['records'] for page in self.pages.values()),
+                'total_products': sum(page['products'] for page in self.pages.values()),
+                'pages': len(self.pages)
+            }
+
+
+class ParallelExtractor:
+    """
+    🧵 Chạy work_function(shard) cho từng shard trên tối đa `max_workers` phiên trình duyệt đồng thời
+    Các phiên bắt đầu cách nhau ít nhất `start_interval` giây để backend không nhận nhiều lần đăng nhập cùng lúc;
+    shard lỗi được chạy lại riêng tối đa `retries` lần
+    """
+
+    def __init__(self, work_function, max_workers=3, start_interval=5.0, retries=0, logger=None):
+        self.work_function = work_function
+        self.max_workers = max(1, int(max_workers or 1))
+        self.start_interval = max(0.0, float(start_interval or 0))
+        self.retries = max(0, int(retries or 0))
+        self.logger = logger
+        self._start_lock = threading.Lock()
+        self._last_start = None
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(message)
+
+    def _wait_for_start_slot(self):
+        """Giãn cách thời điểm mở phiên mới giữa các worker"""
+        with self._start_lock:
+            if self._last_start is not None:
+                delay = self._last_start + self.start_interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            self._last_start = time.time()
+
+    def _run_shard(self, shard):
+        start_time = time.time()
+        for attempt in range(1, self.retries + 2):
+            self._wait_for_start_slot()
+            retry_note = f" (lần {attempt})" if attempt > 1 else ""
+            self._log('info', f"🧵 [{shard['shard_id']}] Bắt đầu {shard['start']} → {shard['end']}{retry_note}")
+
+            try:
+                result = self.work_function(shard) or {}
+            except Exception as e:
+                self._log('error', f"❌ [{shard['shard_id']}] Worker lỗi: {e}")
+                result = {'success': False, 'error': str(e)}
+
+            result = dict(result)
+            result.setdefault('success', False)
+            if result['success']:
+                break
+
+        result['shard'] = shard
+        result['attempts'] = attempt
+        result['seconds'] = round(time.time() - start_time, 1)
+
+        status = "✅" if result['success'] else "❌"
+        self._log('info', f"{status} [{shard['shard_id']}] Xong sau {result['seconds']}s")
+        return result
+
+    def run(self, shards):
+        """
+        ▶️ Chạy tất cả shard
+
+        Returns:
+            list: Kết quả từng shard theo thứ tự shard đầu vào (mỗi kết quả có shard, seconds, success)
+        """
+        shards = list(shards)
+        if not shards:
+            return []
+
+        workers = min(self.max_workers, len(shards))
+        self._log('info', f"🧵 Chạy {len(shards)} shard trên {workers} phiên song song")
+
+        if workers == 1:
+            return [self._run_shard(shard) for shard in shards]
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract') as executor:
+            futures = {executor.submit(self._run_shard, shard): position for position, shard in enumerate(shards)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return [results[position] for position in range(len(shards))]
+
+
+def run_parallel_extraction(work_function, start_date, end_date, workers=3, shards=None,
+                            start_interval=5.0, retries=0, logger=None):
+    """Convenience function: chia khoảng ngày thành `shards` (mặc định = workers) rồi chạy song song"""
+    plan = split_date_range(start_date, end_date, shards or workers)
+    extractor = ParallelExtractor(work_function, max_workers=workers, start_interval=start_interval,
+                                  retries=retries, logger=logger)
+    return extractor.run(plan)
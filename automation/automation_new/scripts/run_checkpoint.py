@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📍 Run Checkpoint Module - Lưu trạng thái từng trang/shard của một lần trích xuất
+Handles: SQLite state DB (runs + units), status/row count/content hash theo unit,
+resume theo run_id: bỏ qua unit đã xong, chỉ chạy lại unit lỗi/chưa chạy
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def content_hash(records):
+    """🔑 SHA-256 của danh sách record (JSON, key đã sort) để phát hiện dữ liệu trang thay đổi giữa các lần chạy"""
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class RunCheckpoint:
+    """
+    📍 Checkpoint của một run: mỗi unit (trang hoặc shard khoảng ngày) có status, số dòng,
+    content hash, file đầu ra, số lần thử; đọc lại bằng run_id để resume
+    """
+
+    def __init__(self, db_path="data/run_checkpoints.db", run_id=None, logger=None):
+        """
+        Args:
+            db_path (str): Đường dẫn file SQLite
+            run_id (str): Id của run (mặc định: timestamp hiện tại)
+            logger: Logger instance
+        """
+        self.db_path = db_path
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.logger = logger
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                run_id TEXT NOT NULL,
+                unit_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                spec TEXT,
+                status TEXT NOT NULL,
+                rows INTEGER,
+                content_hash TEXT,
+                output_path TEXT,
+                details TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, unit_id)
+            );
+        """)
+        self._conn.commit()
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+
+    def start_run(self, params=None):
+        """Ghi tham số của run (giữ nguyên created_at nếu run đã tồn tại)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, params, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET params = excluded.params, updated_at = excluded.updated_at",
+                (self.run_id, json.dumps(params or {}, ensure_ascii=False), now, now)
+            )
+            self._conn.commit()
+
+    def exists(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (self.run_id,)).fetchone() is not None
+
+    def get_params(self):
+        """Tham số đã lưu của run (dict rỗng nếu chưa có)"""
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM runs WHERE run_id = ?", (self.run_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    # ------------------------------------------------------------------
+    # Units
+    # ------------------------------------------------------------------
+
+    def register_units(self, units):
+        """
+        Đăng ký danh sách unit (bỏ qua unit đã có - không reset trạng thái khi resume)
+
+        Args:
+            units (list): [(unit_id, spec dict | None), ...] theo thứ tự chạy
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (run_id, unit_id, position, spec, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.run_id, unit_id, position, json.dumps(spec, ensure_ascii=False) if spec is not None else None,
+                  PENDING, now) for position, (unit_id, spec) in enumerate(units)]
+            )
+            self._conn.commit()
+
+    def _update(self, unit_id, sql, values):
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE units SET {sql}, updated_at = ? WHERE run_id = ? AND unit_id = ?",
+                (*values, time.time(), self.run_id, unit_id)
+            )
+            self._conn.commit()
+
+    def mark_running(self, unit_id):
+        self._update(unit_id, "status = ?, attempts = attempts + 1, error = NULL", (RUNNING,))
+
+    def mark_done(self, unit_id, rows=None, records=None, output_path=None, details=None):
+        """✅ Đánh dấu unit xong kèm số dòng và content hash (tính từ records nếu có)"""
+        digest = content_hash(records) if records is not None else None
+        if rows is None and records is not None:
+            rows = len(records)
+        self._update(unit_id, "status = ?, rows = ?, content_hash = ?, output_path = ?, details = ?, error = NULL",
+                     (DONE, rows, digest, output_path,
+                      json.dumps(details, ensure_ascii=False) if details is not None else None))
+        return digest
+
+    def mark_failed(self, unit_id, error=None):
+        self._update(unit_id, "status = ?, error = ?", (FAILED, str(error) if error else None))
+
+    def units(self, statuses=None):
+        """
+        Danh sách unit theo thứ tự đăng ký
+
+        Returns:
+            list: [{unit_id, spec, status, rows, content_hash, output_path, details, attempts, error}, ...]
+        """
+        query = ("SELECT unit_id, spec, status, rows, content_hash, output_path, details, attempts, error "
+                 "FROM units WHERE run_id = ?")
+        params = [self.run_id]
+        if statuses:
+            query += f" AND status IN ({','.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY position"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [{
+            'unit_id': unit_id,
+            'spec': json.loads(spec) if spec else None,
+            'status': status,
+            'rows': count,
+            'content_hash': digest,
+            'output_path': output_path,
+            'details': json.loads(details) if details else {},
+            'attempts': attempts,
+            'error': error
+        } for unit_id, spec, status, count, digest, output_path, details, attempts, error in rows]
+
+    def done_ids(self):
+        return {unit['unit_id'] for unit in self.units([DONE])}
+
+    def is_done(self, unit_id):
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM units WHERE run_id = ? AND unit_id = ?",
+                                     (self.run_id, unit_id)).fetchone()
+        return bool(row) and row[0] == DONE
+
+    def summary(self):
+        """📊 {total, done, failed, pending, running, rows} của run"""
+        units = self.units()
+        summary = {'total': len(units), DONE: 0, FAILED: 0, PENDING: 0, RUNNING: 0, 'rows': 0}
+        for unit in units:
+            summary[unit['status']] = summary.get(unit['status'], 0) + 1
+            if unit['status'] == DONE:
+                summary['rows'] += unit['rows'] or 0
+        return summary
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_run_checkpoint(run_id=None, settings=None, logger=None, base_dir=None):
+    """
+    📍 Mở checkpoint DB theo section `run_checkpoint` của config.json
+
+    Returns:
+        RunCheckpoint | None: None nếu bị tắt hoặc không mở được
+    """
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    db_path = settings.get('db_path', 'data/run_checkpoints.db')
+    if base_dir and not os.path.isabs(db_path):
+        db_path = os.path.join(base_dir, db_path)
+
+    try:
+        return RunCheckpoint(db_path, run_id=run_id, logger=logger)
+
+    except Exception as e:
+        if logger:
+            logger.warning(f"⚠️ Không mở được run checkpoint: {e}")
+        return None
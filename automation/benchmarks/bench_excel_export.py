@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark Excel Export - So sánh openpyxl + duyệt từng ô (cũ) với xlsxwriter constant_memory
+Usage: python benchmarks/bench_excel_export.py [--sizes 2000 20000 100000] [--legacy-limit 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.excel_export import compute_column_widths, write_excel_openpyxl, write_excel_streaming
+
+
+def make_orders(n, extra_columns=20, seed=42):
+    """Tạo n đơn hàng giả lập giống orders_export_*.csv (toàn cột chuỗi, ~30 cột)"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(500000, 500000 + n).astype(str),
+        'order_code': [f"SO01072025:{i:07d}" for i in range(n)],
+        'customer': rng.choice(['Shopee', 'Tiktok', 'Lazada', 'MIA.vn website'], size=n),
+        'col_7': rng.choice(['Xác nhận', 'Chờ xác nhận', 'Đã hủy'], size=n),
+        'col_16': [f"{v:,}" for v in rng.integers(100, 5000, size=n) * 1000],
+        'col_19': (pd.Timestamp('2025-07-01') - pd.to_timedelta(rng.integers(0, 3 * 86400, size=n), unit='s')
+                   ).strftime('%Y-%m-%d %H:%M:%S'),
+        'api_address': rng.choice(['Số 126, Nguyễn Kim, Phường 12, Quận 5, Hồ Chí Minh',
+                                   'Hà Nội', 'Đà Nẵng'], size=n),
+        'product_summary': rng.choice(['Mia Luggage Tag S Orange',
+                                       'The Travel Star Multi-use Bag with Shoes Pocket XL Fruit Green'], size=n),
+        'product_count': rng.integers(1, 5, size=n)
+    })
+    for i in range(extra_columns):
+        df[f'col_{20 + i}'] = rng.integers(0, 10 ** rng.integers(2, 9), size=n).astype(str)
+    return df
+
+
+def legacy_widths(filename):
+    worksheet = load_workbook(filename, read_only=False)['Đơn hàng']
+    return [worksheet.column_dimensions[column[0].column_letter].width for column in worksheet.columns]
+
+
+def run(sizes, legacy_limit):
+    print(f"{'rows':>8} | {'openpyxl (s)':>12} | {'streaming (s)':>13} | {'speedup':>8} | {'size (KB)':>10}")
+    print("-" * 66)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = make_orders(n)
+            fast_file = os.path.join(tmp, f'fast_{n}.xlsx')
+            legacy_file = os.path.join(tmp, f'legacy_{n}.xlsx')
+
+            start = time.perf_counter()
+            write_excel_streaming(df, fast_file)
+            fast = time.perf_counter() - start
+
+            legacy = None
+            if n <= legacy_limit:
+                start = time.perf_counter()
+                write_excel_openpyxl(df, legacy_file)
+                legacy = time.perf_counter() - start
+
+                if n <= 2000:
+                    assert legacy_widths(legacy_file) == compute_column_widths(df), "Độ rộng cột khác nhau"
+                    fast_values = pd.read_excel(fast_file, dtype=str)
+                    legacy_values = pd.read_excel(legacy_file, dtype=str)
+                    pd.testing.assert_frame_equal(fast_values, legacy_values)
+
+            legacy_text = f"{legacy:12.2f}" if legacy is not None else f"{'skipped':>12}"
+            speedup = f"{legacy / fast:7.1f}x" if legacy is not None else f"{'-':>8}"
+            print(f"{n:>8,} | {legacy_text} | {fast:13.2f} | {speedup} | {os.path.getsize(fast_file) / 1024:10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Excel export")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 20000, 100000])
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help="Chỉ chạy đường openpyxl cũ khi số dòng <= giá trị này")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark Order Records - So sánh list dict col_N (cũ) với OrderBatch dạng cột
+Đo bộ nhớ (tracemalloc) và thời gian dựng DataFrame
+Usage: python benchmarks/bench_order_records.py [--sizes 10000 100000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.order_records import OrderBatch
+
+
+def make_rows(n, seed=42):
+    """Tạo n dòng 23 ô giống kết quả JS của bảng #orderTB"""
+    rng = np.random.default_rng(seed)
+    platforms = ['Shopee', 'Tiktok', 'Lazada', 'MIA.vn website']
+    rows = []
+    for i in range(n):
+        platform = platforms[rng.integers(0, len(platforms))]
+        rows.append([
+            '', str(500000 + i), f"SO01072025:{i:07d}", '', platform, '', 'Xác nhận', 'Đã xử lý',
+            'Chưa đóng gói', 'Chưa giao hàng', 'Chưa thu tiền', f"2507{i:08d}QWFUP", 'S - SPX Instant',
+            f"VN{i:013d}R", f"MIAC{i:09X}", f"{rng.integers(100, 5000) * 1000:,}", '0', platform,
+            '2025-07-01 11:12:17', '2025-07-01 11:16:27', '1 - Kho Trung Tâm', 'Đặng Trường Giang',
+            f"VN{i:013d}R.2507{i:08d}QWFUP."
+        ])
+    return rows
+
+
+def legacy_orders(rows_data):
+    """Đường cũ của scrape_order_data: một dict/dòng, alias + mọi col_N, timestamp riêng từng dòng"""
+    orders = []
+    for i, cell_texts in enumerate(rows_data):
+        if not cell_texts or len(cell_texts) < 2:
+            continue
+        order_data = {
+            'row_index': i + 1,
+            'total_columns': len(cell_texts),
+            'scraped_at': datetime.now().isoformat()
+        }
+        order_data['col_1'] = cell_texts[0]
+        order_data['id'] = cell_texts[1]
+        order_data['order_code'] = cell_texts[2]
+        order_data['col_4'] = cell_texts[3]
+        order_data['customer'] = cell_texts[4]
+        for j, text in enumerate(cell_texts):
+            if text:
+                order_data[f'col_{j+1}'] = text
+        orders.append(order_data)
+    return orders
+
+
+def measure(build):
+    """(kết quả, bộ nhớ tăng thêm MB, thời gian s) của build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1024 / 1024, seconds
+
+
+def run(sizes):
+    print(f"{'orders':>8} | {'path':>7} | {'records (MB)':>12} | {'build (s)':>9} | {'to DataFrame (s)':>16}")
+    print("-" * 66)
+
+    for n in sizes:
+        rows = make_rows(n)
+
+        orders, memory, build = measure(lambda: legacy_orders(rows))
+        start = time.perf_counter()
+        legacy_df = pd.DataFrame(orders)
+        convert = time.perf_counter() - start
+        print(f"{n:>8,} | {'dicts':>7} | {memory:12.1f} | {build:9.3f} | {convert:16.3f}")
+        del orders
+
+        batch, memory, build = measure(lambda: OrderBatch.from_rows(rows))
+        start = time.perf_counter()
+        batch_df = batch.to_frame()
+        convert = time.perf_counter() - start
+        print(f"{n:>8,} | {'batch':>7} | {memory:12.1f} | {build:9.3f} | {convert:16.3f}")
+
+        # Dict cũ bỏ hẳn cột trống ở mọi dòng; OrderBatch giữ đủ cột của bảng
+        columns = [name for name in legacy_df.columns if name != 'scraped_at']
+        assert columns == [name for name in batch_df.columns if name in columns], "Thứ tự cột khác nhau"
+        assert legacy_df[columns].fillna('').equals(batch_df[columns].fillna('').astype(legacy_df[columns].dtypes)), \
+            "Dữ liệu khác nhau"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order record layout")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    run(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
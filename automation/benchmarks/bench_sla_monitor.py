@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Benchmark SLA Monitor - So sánh iterrows (cũ) với evaluator dạng cột
+Usage: python benchmarks/bench_sla_monitor.py [--sizes 10000 100000 1000000] [--legacy-limit 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sla_monitor import SLAMonitor
+
+
+def make_orders(n, seed=42):
+    """Tạo n đơn hàng giả lập trong 3 ngày gần nhất"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    offsets = rng.integers(0, 3 * 24 * 3600, size=n)
+    return pd.DataFrame({
+        'id': np.arange(500000, 500000 + n).astype(str),
+        'platform': rng.choice(['Shopee', 'TikTok', 'Lazada', 'Website'], size=n, p=[0.5, 0.3, 0.1, 0.1]),
+        'created_datetime': pd.to_datetime(now) - pd.to_timedelta(offsets, unit='s')
+    })
+
+
+def legacy_shopee(monitor, df, confirm_deadline, handover_deadline):
+    """Đường cũ: iterrows + calculate_order_sla_status + list comprehension"""
+    sla_status = [
+        monitor.calculate_order_sla_status(order, confirm_deadline, handover_deadline, 'shopee')
+        for _, order in df.iterrows()
+    ]
+    return sla_status, {
+        'need_confirm': len([s for s in sla_status if s['needs_confirm']]),
+        'need_handover': len([s for s in sla_status if s['needs_handover']]),
+        'overdue_confirm': len([s for s in sla_status if s['confirm_overdue']]),
+        'overdue_handover': len([s for s in sla_status if s['handover_overdue']])
+    }
+
+
+def run(sizes, legacy_limit):
+    monitor = SLAMonitor()
+    monitor.logger.setLevel('WARNING')
+
+    today = monitor.current_time.date()
+    cutoff = datetime.combine(today - timedelta(days=1), datetime.strptime("18:00", "%H:%M").time())
+    confirm_deadline = datetime.combine(today, datetime.strptime("09:00", "%H:%M").time())
+    handover_deadline = datetime.combine(today, datetime.strptime("12:00", "%H:%M").time())
+
+    print(f"{'orders':>10} | {'legacy (s)':>11} | {'columnar (s)':>12} | {'+records (s)':>12} | {'speedup':>8}")
+    print("-" * 66)
+
+    for n in sizes:
+        df = monitor.prepare_order_data(make_orders(n))
+        after_cutoff = df[df['created_datetime'] > cutoff]
+
+        start = time.perf_counter()
+        sla_frame, summary = monitor.evaluate_sla_frame(after_cutoff, confirm_deadline, handover_deadline, 'shopee')
+        columnar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = monitor.sla_frame_to_records(sla_frame)
+        with_records = columnar + time.perf_counter() - start
+
+        legacy = None
+        if n <= legacy_limit:
+            start = time.perf_counter()
+            legacy_records, legacy_summary = legacy_shopee(monitor, after_cutoff, confirm_deadline, handover_deadline)
+            legacy = time.perf_counter() - start
+
+            assert legacy_summary == {k: summary[k] for k in legacy_summary}, "Summary khác nhau"
+            assert legacy_records == records, "Kết quả theo đơn khác nhau"
+
+        legacy_text = f"{legacy:11.3f}" if legacy is not None else f"{'skipped':>11}"
+        speedup = f"{legacy / columnar:7.0f}x" if legacy is not None else f"{'-':>8}"
+        print(f"{n:>10,} | {legacy_text} | {columnar:12.4f} | {with_records:12.3f} | {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SLA evaluator")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help="Chỉ chạy đường iterrows cũ khi số đơn <= giá trị này")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📡 DataTables API Module - Lấy dữ liệu trực tiếp từ endpoint AJAX của DataTables
+Handles: endpoint discovery, cookie-sharing requests.Session, windowed start/length paging
+"""
+
+import html
+import re
+import time
+from urllib.parse import parse_qsl, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DETAIL_ID_PATTERN = re.compile(r'/so/detail/(\d+)')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+BREAK_PATTERN = re.compile(r'<br\s*/?>', re.IGNORECASE)
+
+
+def html_cell_to_text(value):
+    """Chuyển nội dung HTML của một ô DataTables thành text (gần giống innerText)"""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        return str(value)
+
+    text = BREAK_PATTERN.sub('\n', value)
+    text = TAG_PATTERN.sub('', text)
+    text = html.unescape(text).replace('\xa0', ' ')
+    return '\n'.join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+
+def normalize_rows(raw_rows, columns=None):
+    """
+    Chuyển rows của response DataTables (list hoặc object theo mData) thành list text + order id từ link chi tiết
+
+    Args:
+        raw_rows (list): Trường data/aaData của response
+        columns (list): mData của từng cột (None = giữ thứ tự key của object)
+
+    Returns:
+        tuple: (rows: list[list[str]], detail_ids: list)
+    """
+    rows_data = []
+    detail_ids = []
+
+    for raw in raw_rows:
+        if isinstance(raw, dict):
+            cells = [raw.get(key, '') if key is not None else '' for key in columns] if columns \
+                else list(raw.values())
+        else:
+            cells = list(raw)
+
+        detail_id = None
+        for cell in cells:
+            if isinstance(cell, str):
+                match = DETAIL_ID_PATTERN.search(cell)
+                if match:
+                    detail_id = match.group(1)
+                    break
+
+        rows_data.append([html_cell_to_text(cell) for cell in cells])
+        detail_ids.append(detail_id)
+
+    return rows_data, detail_ids
+
+
+def build_pooled_session(pool_size=8, retries=2):
+    """Tạo requests.Session với connection pool và retry cho các lỗi tạm thời"""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                  allowed_methods=frozenset(['GET', 'POST']))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class DataTablesAjaxExtractor:
+    """
+    📡 Gọi thẳng endpoint server-side của bảng #orderTB bằng cookies đã đăng nhập
+    Trả về các dòng dạng list text giống kết quả scrape DOM để dùng lại pipeline cũ
+    """
+
+    DISCOVERY_SCRIPT = """
+    var selector = arguments[0];
+    if (typeof $ === 'undefined' || !$.fn || !$.fn.dataTable) return null;
+    if (!$.fn.dataTable.isDataTable(selector)) return null;
+
+    var api = $(selector).DataTable();
+    var settings = api.settings()[0];
+    var ajax = settings.ajax;
+    var url = api.ajax.url() || (typeof ajax === 'string' ? ajax : (ajax && ajax.url)) || settings.sAjaxSource;
+    if (!url) return null;
+
+    var params = api.ajax.params() || {};
+    var info = api.page.info();
+    return {
+        url: url,
+        method: ((ajax && (ajax.type || ajax.method)) || settings.sServerMethod || 'GET').toUpperCase(),
+        query: $.param(params),
+        server_side: !!settings.oFeatures.bServerSide,
+        columns: settings.aoColumns.map(function(c) {
+            return (typeof c.mData === 'string' || typeof c.mData === 'number') ? String(c.mData) : null;
+        }),
+        records_total: info.recordsDisplay,
+        user_agent: navigator.userAgent,
+        page_url: window.location.href
+    };
+    """
+
+    def __init__(self, driver, logger, table_selector='#orderTB', page_length=5000,
+                 session=None, timeout=30, endpoint=None):
+        """
+        Args:
+            driver: WebDriver đã đăng nhập (None khi chạy HTTP-only: cần truyền session + endpoint)
+            endpoint (dict): Endpoint đã biết {url, method, query, server_side, columns, page_url, user_agent}
+        """
+        self.driver = driver
+        self.logger = logger
+        self.table_selector = table_selector
+        self.page_length = page_length
+        self.timeout = timeout
+        self.session = session
+        self.endpoint = endpoint
+
+    def discover_endpoint(self):
+        """
+        🔍 Đọc URL, method và tham số AJAX cuối cùng mà DataTables đã gửi
+
+        Returns:
+            dict | None: Thông tin endpoint hoặc None nếu bảng không dùng AJAX
+        """
+        if self.driver is None:
+            return None
+
+        try:
+            endpoint = self.driver.execute_script(self.DISCOVERY_SCRIPT, self.table_selector)
+            if not endpoint:
+                self.logger.info("📡 DataTables AJAX endpoint không khả dụng")
+                return None
+
+            endpoint['url'] = urljoin(endpoint['page_url'], endpoint['url'])
+            self.endpoint = endpoint
+            self.logger.info(f"📡 DataTables endpoint: {endpoint['method']} {endpoint['url']} "
+                             f"(server_side={endpoint['server_side']})")
+            return endpoint
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không đọc được cấu hình DataTables: {e}")
+            return None
+
+    def _ensure_session(self):
+        """Tạo session dùng chung cookies với WebDriver (HTTP-only: session đã có cookies đăng nhập)"""
+        if self.session is None:
+            self.session = build_pooled_session()
+
+        if self.driver is not None:
+            for cookie in self.driver.get_cookies():
+                self.session.cookies.set(cookie['name'], cookie['value'],
+                                         domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        self.session.headers.update({
+            'User-Agent': self.endpoint.get('user_agent') or self.session.headers.get('User-Agent') or 'Mozilla/5.0',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Referer': self.endpoint['page_url'],
+            'Accept': 'application/json, text/javascript, */*; q=0.01'
+        })
+        return self.session
+
+    def _request_window(self, base_params, start, length, draw):
+        """Gửi một request với cửa sổ start/length"""
+        params = [(k, v) for k, v in base_params if k not in ('start', 'length', 'draw')]
+        params += [('draw', str(draw)), ('start', str(start)), ('length', str(length))]
+
+        if self.endpoint['method'] == 'POST':
+            response = self.session.post(self.endpoint['url'], data=params, timeout=self.timeout)
+        else:
+            response = self.session.get(self.endpoint['url'], params=params, timeout=self.timeout)
+
+        response.raise_for_status()
+        return response.json()
+
+    def _normalize_rows(self, raw_rows):
+        """Chuyển rows (list hoặc object theo mData) thành list text + order id từ link chi tiết"""
+        return normalize_rows(raw_rows, self.endpoint.get('columns'))
+
+    def fetch_rows(self, max_rows=None):
+        """
+        📥 Lấy toàn bộ dòng qua endpoint AJAX với cửa sổ start/length lớn
+
+        Args:
+            max_rows (int): Giới hạn số dòng (None = lấy hết)
+
+        Returns:
+            dict | None: {rows: list[list[str]], detail_ids: list, total: int, requests: int}
+                         hoặc None nếu endpoint không dùng được (caller fallback về DOM)
+        """
+        if not self.endpoint and not self.discover_endpoint():
+            return None
+
+        try:
+            start_time = time.time()
+            self._ensure_session()
+            base_params = parse_qsl(self.endpoint.get('query') or '', keep_blank_values=True)
+
+            all_rows, all_ids = [], []
+            total = None
+            start, draw, request_count = 0, 1, 0
+
+            while True:
+                length = self.page_length
+                if max_rows:
+                    length = min(length, max_rows - len(all_rows))
+
+                payload = self._request_window(base_params, start, length, draw)
+                request_count += 1
+
+                raw_rows = payload.get('data', payload.get('aaData'))
+                if raw_rows is None:
+                    raise ValueError("Response không có trường data/aaData")
+
+                rows, ids = self._normalize_rows(raw_rows)
+                all_rows.extend(rows)
+                all_ids.extend(ids)
+
+                total = payload.get('recordsFiltered', payload.get('iTotalDisplayRecords', total))
+                total = int(total) if total is not None else len(all_rows)
+
+                self.logger.info(f"📡 AJAX window start={start}: +{len(rows)} dòng ({len(all_rows)}/{total})")
+
+                # Client-side ajax trả toàn bộ dữ liệu trong một lần
+                if not self.endpoint.get('server_side') or not rows:
+                    break
+                if len(all_rows) >= total or (max_rows and len(all_rows) >= max_rows):
+                    break
+
+                start += len(rows)
+                draw += 1
+
+            elapsed = time.time() - start_time
+            self.logger.info(f"✅ AJAX extraction: {len(all_rows)} dòng, {request_count} request, {elapsed:.2f}s")
+
+            return {
+                'rows': all_rows,
+                'detail_ids': all_ids,
+                'total': total,
+                'requests': request_count
+            }
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ AJAX extraction thất bại, dùng DOM: {e}")
+            return None
+
+
+def fetch_order_rows_via_ajax(driver, logger, page_length=5000, max_rows=None, session=None):
+    """
+    ⚡ Convenience function: lấy dòng đơn hàng qua DataTables AJAX
+
+    Returns:
+        dict | None: Kết quả fetch_rows hoặc None nếu cần fallback về DOM
+    """
+    extractor = DataTablesAjaxExtractor(driver, logger, page_length=page_length, session=session)
+    return extractor.fetch_rows(max_rows=max_rows)
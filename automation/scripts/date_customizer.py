@@ -5,13 +5,14 @@
 Handles: date range selection, time type, limit settings, form submission
 """
 
-import time
 from datetime import datetime, timedelta
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+from scripts.wait_engine import AdaptiveWaiter
+
 
 class DateCustomizer:
     """
@@ -22,6 +23,7 @@ class DateCustomizer:
     def __init__(self, driver, logger):
         self.driver = driver
         self.logger = logger
+        self.waiter = AdaptiveWaiter(driver, logger)
 
     def set_date_range(self, start_date, end_date, time_type="ecom"):
         """
@@ -163,8 +165,8 @@ class DateCustomizer:
                 EC.presence_of_element_located((By.CSS_SELECTOR, "#orderTB tbody tr"))
             )
 
-            # Additional stability wait
-            time.sleep(2)
+            # Chờ AJAX còn lại (không sleep cố định)
+            self.waiter.wait_for_idle('filters.data_load', timeout=10)
 
             self.logger.info("✅ Filters applied successfully")
             return True
@@ -201,12 +203,15 @@ class DateCustomizer:
 
             # Click date range button
             self.driver.find_element(By.ID, "daterange-btn").click()
-            time.sleep(1)
 
-            # Find and click the preset
-            preset_link = self.driver.find_element(
-                By.XPATH, f"//li[contains(text(), '{preset_text}')]"
-            )
+            # Find and click the preset (chờ menu preset hiện ra)
+            preset_link = self.waiter.wait(
+                'filters.date_preset',
+                lambda driver: next((link for link in driver.find_elements(
+                    By.XPATH, f"//li[contains(text(), '{preset_text}')]") if link.is_displayed()), None),
+                timeout=5)
+            if not preset_link:
+                raise TimeoutException(f"Preset '{preset_text}' không hiện ra")
             preset_link.click()
 
             self.logger.info(f"✅ Date preset '{preset_name}' applied")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏊 Driver Pool Module - Giữ sẵn các Chrome headless đã đăng nhập
+Handles: warm WebDriver instances, checkout/checkin, health check, shared pools
+"""
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Hết thời gian chờ trình duyệt rảnh trong pool"""
+
+
+class PooledDriver:
+    """Một WebDriver nằm trong pool kèm trạng thái sử dụng"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.logged_in = False
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    🏊 Pool giữ N trình duyệt headless đã khởi động và đăng nhập sẵn
+    Mỗi lần chạy checkout một trình duyệt, health-check rồi trả lại sau khi xong
+    """
+
+    def __init__(self, driver_factory, login_function=None, size=2, logger=None,
+                 max_age_seconds=3600, session_check=None):
+        """
+        Args:
+            driver_factory: Hàm tạo WebDriver mới (trả về driver hoặc None)
+            login_function: Hàm login(driver) -> bool để đăng nhập trước khi đưa vào pool.
+                            Chạy ngoài lock và có thể song song: chỉ được thao tác trên driver được truyền vào
+            size (int): Số trình duyệt tối đa giữ trong pool
+            logger: Logger instance
+            max_age_seconds (int): Tuổi tối đa của một trình duyệt (theo session timeout)
+            session_check: Hàm session_check(driver) -> bool xác nhận phiên đăng nhập còn sống
+                           (server có thể hết hạn session trong lúc trình duyệt nằm chờ)
+        """
+        self.driver_factory = driver_factory
+        self.login_function = login_function
+        self.session_check = session_check
+        self.size = max(1, int(size))
+        self.logger = logger
+        self.max_age_seconds = max_age_seconds
+
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {'created': 0, 'reused': 0, 'discarded': 0, 'checkouts': 0}
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def _create(self):
+        """Tạo một trình duyệt mới và đăng nhập nếu có login_function"""
+        driver = self.driver_factory()
+        if not driver:
+            raise Exception("Không thể khởi tạo WebDriver cho pool")
+
+        pooled = PooledDriver(driver)
+        with self._condition:
+            self._stats['created'] += 1
+
+        if self.login_function:
+            try:
+                pooled.logged_in = bool(self.login_function(driver))
+            except Exception as e:
+                self._log('warning', f"⚠️ Pool: đăng nhập trước thất bại: {e}")
+
+        self._log('info', f"🏊 Pool: đã tạo trình duyệt mới (logged_in={pooled.logged_in})")
+        return pooled
+
+    def is_healthy(self, pooled):
+        """Kiểm tra trình duyệt còn sống, còn hạn và phản hồi JavaScript"""
+        try:
+            if self.max_age_seconds and time.time() - pooled.created_at > self.max_age_seconds:
+                self._log('info', "♻️ Pool: trình duyệt quá tuổi, sẽ tạo lại")
+                return False
+
+            state = pooled.driver.execute_script("return document.readyState")
+            if state not in ('interactive', 'complete'):
+                return False
+
+            # Trình duyệt còn sống nhưng session phía server có thể đã hết hạn: xác nhận lại trước khi tin logged_in
+            if pooled.logged_in and self.session_check and not self.session_check(pooled.driver):
+                self._log('info', "🔐 Pool: phiên đăng nhập đã hết hạn, lần chạy sẽ đăng nhập lại")
+                pooled.logged_in = False
+            return True
+
+        except Exception as e:
+            self._log('warning', f"⚠️ Pool: health check thất bại: {e}")
+            return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def checkout(self, timeout=None):
+        """
+        🔑 Lấy một trình duyệt từ pool (tạo mới nếu pool chưa đầy)
+
+        Args:
+            timeout (float): Thời gian chờ tối đa khi tất cả trình duyệt đang bận (None = chờ mãi, 0 = không chờ)
+
+        Returns:
+            PooledDriver: Trình duyệt đã health-check
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise Exception("Driver pool đã đóng")
+
+                pooled = None
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._total < self.size:
+                    self._total += 1
+                else:
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeoutError("Hết thời gian chờ trình duyệt rảnh trong pool")
+                    self._condition.wait(remaining)
+                    continue
+
+            # Health check và tạo mới nằm ngoài lock để không chặn các luồng khác
+            if pooled is not None:
+                if self.is_healthy(pooled):
+                    pooled.uses += 1
+                    pooled.last_used = time.time()
+                    with self._condition:
+                        self._stats['reused'] += 1
+                        self._stats['checkouts'] += 1
+                    self._log('info', f"🏊 Pool: dùng lại trình duyệt ấm (lần {pooled.uses})")
+                    return pooled
+
+                # Giữ nguyên slot: đóng trình duyệt hỏng và tạo trình duyệt thay thế
+                self._quit(pooled)
+                with self._condition:
+                    self._stats['discarded'] += 1
+
+            try:
+                pooled = self._create()
+            except Exception:
+                with self._condition:
+                    self._total -= 1
+                    self._condition.notify()
+                raise
+
+            pooled.uses += 1
+            with self._condition:
+                self._stats['checkouts'] += 1
+            return pooled
+
+    def checkin(self, pooled, discard=False):
+        """
+        🔙 Trả trình duyệt về pool
+
+        Args:
+            pooled (PooledDriver): Trình duyệt đã checkout
+            discard (bool): Đóng luôn trình duyệt thay vì giữ lại (vd: sau lỗi)
+        """
+        if pooled is None:
+            return
+
+        pooled.last_used = time.time()
+
+        with self._condition:
+            if not discard and not self._closed:
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+
+        self._discard(pooled)
+
+    def _discard(self, pooled):
+        self._quit(pooled)
+        with self._condition:
+            self._total -= 1
+            self._stats['discarded'] += 1
+            self._condition.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager: checkout, yield PooledDriver, checkin (discard khi lỗi)"""
+        pooled = self.checkout(timeout)
+        failed = False
+        try:
+            yield pooled
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(pooled, discard=failed)
+
+    def warm_up(self, count=None):
+        """🔥 Khởi động trước `count` trình duyệt (mặc định: đầy pool)"""
+        target = min(count or self.size, self.size)
+        warmed = []
+
+        try:
+            for _ in range(target):
+                warmed.append(self.checkout(timeout=1))
+        except Exception as e:
+            self._log('warning', f"⚠️ Pool: warm-up dừng sớm: {e}")
+        finally:
+            for pooled in warmed:
+                self.checkin(pooled)
+
+        self._log('info', f"🔥 Pool: {len(warmed)}/{target} trình duyệt đã sẵn sàng")
+        return len(warmed)
+
+    def shutdown(self):
+        """🧹 Đóng tất cả trình duyệt đang rảnh và khóa pool"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+
+        for pooled in idle:
+            self._quit(pooled)
+            with self._condition:
+                self._total -= 1
+
+        self._log('info', f"🧹 Pool: đã đóng {len(idle)} trình duyệt")
+
+    def get_stats(self):
+        """📊 Thống kê pool"""
+        with self._condition:
+            return dict(self._stats, size=self.size, total=self._total, idle=len(self._idle))
+
+
+# Shared pools (dùng chung giữa automation bridge và schedule_automation)
+_shared_pools = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(name, driver_factory, login_function=None, size=2, logger=None,
+                    max_age_seconds=3600, session_check=None):
+    """
+    🏊 Lấy (hoặc tạo) pool dùng chung theo tên trong process hiện tại
+
+    Returns:
+        DriverPool: Pool dùng chung
+    """
+    with _shared_lock:
+        pool = _shared_pools.get(name)
+        if pool is None or pool._closed:
+            pool = DriverPool(driver_factory, login_function, size, logger, max_age_seconds, session_check)
+            _shared_pools[name] = pool
+        return pool
+
+
+def get_shared_pool_stats():
+    """📊 Thống kê tất cả pool dùng chung theo tên"""
+    with _shared_lock:
+        pools = dict(_shared_pools)
+
+    return {name: pool.get_stats() for name, pool in pools.items()}
+
+
+def shutdown_shared_pools():
+    """🧹 Đóng tất cả pool dùng chung"""
+    with _shared_lock:
+        pools = list(_shared_pools.values())
+        _shared_pools.clear()
+
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_shared_pools)
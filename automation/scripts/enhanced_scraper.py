@@ -6,12 +6,15 @@ Handles: enhanced data extraction, JavaScript acceleration, progress tracking
 """
 
 import time
-from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+from scripts.order_records import OrderBatch
+from scripts.order_table_dom import extract_order_table
+from scripts.table_watcher import TableRedrawWatcher
+
 
 class EnhancedScraper:
     """Class xử lý scraping nâng cao với tối ưu JavaScript"""
@@ -19,6 +22,7 @@ class EnhancedScraper:
     def __init__(self, driver, logger):
         self.driver = driver
         self.logger = logger
+        self.table_watcher = TableRedrawWatcher(driver, logger)
 
     def scrape_order_data_basic(self):
         """Lấy dữ liệu đơn hàng cơ bản với JavaScript acceleration"""
@@ -28,31 +32,18 @@ class EnhancedScraper:
             start_time = time.time()
             orders = []
 
-            # Sử dụng JavaScript để tăng tốc truy vấn DOM
-            js_script = """
-            return Array.from(document.querySelectorAll('table tbody tr, tbody tr, .table tbody tr'))
-                .filter(row => row.querySelectorAll('td').length > 0)
-                .map(row => {
-                    const cells = Array.from(row.querySelectorAll('td'));
-                    return cells.map(cell => cell.innerText.trim());
-                });
-            """
-
             try:
-                # Chờ ngắn cho DOM ổn định
-                time.sleep(0.3)
-
-                # Thực thi script JS để lấy dữ liệu trực tiếp - nhanh hơn nhiều
-                rows_data = self.driver.execute_script(js_script)
+                # Một execute_script cho cả trang: text ô + id link chi tiết/span action theo cột
+                orders = extract_order_table(self.driver, self.logger, min_cells=3)
 
-                if not rows_data or len(rows_data) == 0:
+                if not orders:
                     self.logger.error("❌ Không tìm thấy dữ liệu thông qua JavaScript")
 
                     # Fallback sang cách cũ nếu JS không hoạt động
-                    rows_data = self._fallback_scraping_method()
+                    orders = self._fallback_scraping_method()
 
-                if rows_data:
-                    orders = self._process_rows_data(rows_data)
+                elif orders.column('id') is not None:
+                    self._fill_missing_ids(orders)
 
             except Exception as e:
                 self.logger.error(f"❌ Lỗi JavaScript scraping: {e}")
@@ -95,45 +86,12 @@ class EnhancedScraper:
             return []
 
     def _process_rows_data(self, rows_data):
-        """Xử lý raw rows data thành structured orders"""
+        """Xử lý raw rows data thành OrderBatch (mảng theo cột, alias theo column map của trang)"""
         try:
-            orders = []
-
-            for i, row_cells in enumerate(rows_data):
-                if len(row_cells) < 3:  # Skip invalid rows
-                    continue
-
-                # Tạo order data structure
-                order_data = {
-                    'row_index': i + 1,
-                    'total_columns': len(row_cells),
-                    'scraped_at': datetime.now().isoformat()
-                }
+            orders = OrderBatch.from_rows(rows_data, min_cells=3)
 
-                # Map cells to columns
-                for j, cell_text in enumerate(row_cells):
-                    order_data[f'col_{j+1}'] = cell_text
-
-                # Extract order ID using various patterns
-                order_id = self._extract_order_id(row_cells)
-                if order_id:
-                    order_data['id'] = order_id
-
-                # Extract customer name (usually in specific columns)
-                customer = self._extract_customer_name(row_cells)
-                if customer:
-                    order_data['customer'] = customer
-
-                # Extract order code (usually first clickable column)
-                order_code = self._extract_order_code(row_cells)
-                if order_code:
-                    order_data['order_code'] = order_code
-
-                orders.append(order_data)
-
-                # Progress logging
-                if (i + 1) % 50 == 0:
-                    self.logger.info(f"⚡ Processed {i + 1}/{len(rows_data)} rows")
+            if orders.column('id') is not None:
+                self._fill_missing_ids(orders)
 
             return orders
 
@@ -141,6 +99,14 @@ class EnhancedScraper:
             self.logger.error(f"❌ Error processing rows data: {e}")
             return []
 
+    def _fill_missing_ids(self, orders):
+        """Bảng không theo column map chuẩn: dò id bằng heuristic cho các dòng thiếu id hợp lệ"""
+        for position, order_id in enumerate(orders.column('id')):
+            if not (order_id and order_id.isdigit()):
+                order_id = self._extract_order_id(orders.row_cells(position))
+                if order_id:
+                    orders.set_value('id', position, order_id)
+
     def _extract_order_id(self, row_cells):
         """Extract order ID from row cells"""
         try:
@@ -191,25 +157,15 @@ class EnhancedScraper:
             order_ids = []
             orders_with_ids = []
 
-            for order in orders:
-                order_id = order.get('id')
-                if order_id:
-                    order_ids.append(order_id)
-                    orders_with_ids.append(order)
-                else:
-                    # Try harder to extract ID from DOM
-                    enhanced_id = self._extract_id_from_dom(order)
-                    if enhanced_id:
-                        order['id'] = enhanced_id
-                        order_ids.append(enhanced_id)
-                        orders_with_ids.append(order)
+            # id thiếu đã được điền từ link chi tiết/span action ngay trong lần trích xuất bảng
+            orders_with_ids = orders.filter_present('id')
+            order_ids = list(orders_with_ids.column('id') or [])
 
             self.logger.info(f"📦 Tìm thấy {len(order_ids)} order IDs từ {len(orders)} đơn hàng")
 
             # Step 3: Add metadata for further processing
-            for order in orders_with_ids:
-                order['has_id'] = True
-                order['ready_for_enhancement'] = True
+            orders_with_ids.set_column('has_id', [True] * len(orders_with_ids))
+            orders_with_ids.set_column('ready_for_enhancement', [True] * len(orders_with_ids))
 
             self.logger.info(f"✅ Enhanced {len(orders_with_ids)} đơn hàng với order IDs")
             return {
@@ -230,39 +186,6 @@ class EnhancedScraper:
                 'enhancement_rate': 0
             }
 
-    def _extract_id_from_dom(self, order):
-        """Trích xuất order ID từ DOM bằng JavaScript nâng cao"""
-        try:
-            # Sử dụng row index để tìm order ID từ DOM
-            row_index = order.get('row_index', 0)
-            if row_index == 0:
-                return None
-
-            js_script = f"""
-            try {{
-                const rows = document.querySelectorAll('table tbody tr, tbody tr, .table tbody tr');
-                if (rows.length >= {row_index}) {{
-                    const targetRow = rows[{row_index - 1}];
-                    const links = targetRow.querySelectorAll('a[href*="/so/detail/"]');
-                    if (links.length > 0) {{
-                        const href = links[0].getAttribute('href');
-                        const match = href.match(/\\/so\\/detail\\/(\\d+)/);
-                        return match ? match[1] : null;
-                    }}
-                }}
-                return null;
-            }} catch(e) {{
-                return null;
-            }}
-            """
-
-            result = self.driver.execute_script(js_script)
-            return result
-
-        except Exception as e:
-            self.logger.debug(f"⚠️ Không thể extract ID từ DOM cho row {order.get('row_index', 'unknown')}: {e}")
-            return None
-
     def get_table_structure_info(self):
         """Lấy thông tin cấu trúc bảng để debug"""
         try:
@@ -314,8 +237,9 @@ class EnhancedScraper:
             except:
                 self.logger.info("⚠️ jQuery not available, skipping AJAX wait")
 
-            # Additional stability wait
-            time.sleep(1)
+            # Chờ bảng ổn định theo sự kiện (draw.dt/MutationObserver) thay cho sleep cố định
+            if self.table_watcher.wait_until_settled(timeout=timeout) is False:
+                self.logger.warning("⚠️ Bảng vẫn đang thay đổi khi hết thời gian chờ")
 
             self.logger.info("✅ Bảng dữ liệu đã load hoàn toàn")
             return True
@@ -349,10 +273,41 @@ class EnhancedScraper:
             self.logger.error(f"❌ Error extracting single page data: {e}")
             return []
 
-    def enhanced_scrape_all_pages(self):
+    def scrape_all_via_ajax(self, page_length=5000):
+        """
+        📡 Lấy tất cả đơn hàng qua endpoint AJAX của DataTables (không phân trang DOM)
+
+        Returns:
+            list | None: Orders data hoặc None nếu endpoint không khả dụng
+        """
+        from scripts.datatables_api import fetch_order_rows_via_ajax
+
+        ajax_result = fetch_order_rows_via_ajax(self.driver, self.logger, page_length=page_length)
+        if not ajax_result or not ajax_result['rows']:
+            return None
+
+        orders = OrderBatch.from_rows(ajax_result['rows'], min_cells=3)
+        if not orders:
+            return None
+
+        # id lấy từ link chi tiết khi cột id trống (row_index = vị trí dòng gốc, tính từ 1)
+        ids = list(orders.column('id') or [None] * len(orders))
+        for position, row_index in enumerate(orders.row_index):
+            detail_id = ajax_result['detail_ids'][row_index - 1]
+            if detail_id and not ids[position]:
+                ids[position] = detail_id
+        orders.set_column('id', ids)
+        orders.row_index = list(range(1, len(orders) + 1))
+
+        return orders
+
+    def enhanced_scrape_all_pages(self, use_ajax=True):
         """
         📊 Enhanced scraping với pagination - lấy hết tất cả trang
 
+        Args:
+            use_ajax (bool): Thử gọi thẳng endpoint AJAX trước, chỉ phân trang DOM khi không được
+
         Returns:
             dict: Complete extraction result with all pages data
         """
@@ -364,16 +319,27 @@ class EnhancedScraper:
             # Initialize pagination handler
             pagination_handler = PaginationHandler(self.driver, self.logger)
 
-            # Get total records estimate
-            page_estimate = pagination_handler.quick_page_count_estimate()
-            if page_estimate['estimated_pages'] > 0:
-                self.logger.info(f"📊 Estimated: {page_estimate['estimated_pages']} pages for {page_estimate['total_records']:,} records")
+            ajax_orders = self.scrape_all_via_ajax() if use_ajax else None
 
-            # Extract data from all pages
-            result = pagination_handler.extract_all_pages_data(
-                extract_function=self.extract_single_page_data,
-                max_pages=50  # Safety limit
-            )
+            if ajax_orders:
+                result = {
+                    'all_data': ajax_orders,
+                    'pages_processed': 1,
+                    'total_expected': len(ajax_orders),
+                    'completion_rate': 100.0,
+                    'success': True
+                }
+            else:
+                # Get total records estimate
+                page_estimate = pagination_handler.quick_page_count_estimate()
+                if page_estimate['estimated_pages'] > 0:
+                    self.logger.info(f"📊 Estimated: {page_estimate['estimated_pages']} pages for {page_estimate['total_records']:,} records")
+
+                # Extract data from all pages
+                result = pagination_handler.extract_all_pages_data(
+                    extract_function=self.extract_single_page_data,
+                    max_pages=50  # Safety limit
+                )
 
             if not result['success']:
                 self.logger.error("❌ Pagination extraction failed")
@@ -389,15 +355,17 @@ class EnhancedScraper:
 
             # Process all collected orders
             all_orders = result['all_data']
-            order_ids = []
-            enhanced_orders = []
 
             # Extract order IDs and enhance data
-            for order in all_orders:
-                order_id = order.get('id')
-                if order_id:
-                    order_ids.append(order_id)
-                    enhanced_orders.append(order)
+            if isinstance(all_orders, OrderBatch):
+                enhanced_orders = all_orders.filter_present('id')
+                order_ids = list(enhanced_orders.column('id') or [])
+                enhanced_orders.set_column('has_id', [True] * len(enhanced_orders))
+                enhanced_orders.set_column('ready_for_enhancement', [True] * len(enhanced_orders))
+            else:
+                enhanced_orders = [order for order in all_orders if order.get('id')]
+                order_ids = [order['id'] for order in enhanced_orders]
+                for order in enhanced_orders:
                     order['has_id'] = True
                     order['ready_for_enhancement'] = True
 
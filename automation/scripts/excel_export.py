@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📗 Excel Export Module - Ghi file Excel dạng streaming
+Handles: xlsxwriter constant_memory (ghi từng dòng, không giữ workbook trong bộ nhớ),
+tính độ rộng cột bằng pandas str.len() trước khi ghi, fallback openpyxl
+"""
+
+import pandas as pd
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+
+MAX_COLUMN_WIDTH = 50
+
+
+def compute_column_widths(df, max_width=MAX_COLUMN_WIDTH):
+    """
+    📏 Độ rộng cột = min(độ dài lớn nhất của header/giá trị + 2, max_width), tính theo cột bằng pandas
+
+    Returns:
+        list: Độ rộng theo thứ tự cột
+    """
+    widths = []
+    for position, name in enumerate(df.columns):
+        column = df.iloc[:, position]
+        longest = column.astype(str).str.len().max() if len(column) else 0
+        longest = max(int(0 if pd.isna(longest) else longest), len(str(name)))
+        widths.append(min(longest + 2, max_width))
+    return widths
+
+
+def prepare_cell_values(df):
+    """
+    Chuyển DataFrame thành các cột giá trị ô cho xlsxwriter (theo cột, trước khi ghi):
+    NaN/NaT -> ô trống, list/dict -> chuỗi, numpy scalar -> kiểu Python
+    """
+    columns = []
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if column.dtype == object:
+            column = column.map(lambda value: str(value) if isinstance(value, (list, dict, tuple, set)) else value)
+        values = column.astype(object).where(column.notna(), None)
+        columns.append(values.tolist())
+    return columns
+
+
+def write_excel_streaming(df, filename, sheet_name='Đơn hàng'):
+    """⚡ Ghi Excel bằng xlsxwriter constant_memory: độ rộng cột tính trước, dữ liệu ghi theo dòng"""
+    workbook = xlsxwriter.Workbook(filename, {
+        'constant_memory': True,
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+    })
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'bold': True, 'border': 1})
+
+        for position, width in enumerate(compute_column_widths(df)):
+            worksheet.set_column(position, position, width)
+
+        worksheet.write_row(0, 0, [str(name) for name in df.columns], header_format)
+        for row_number, row in enumerate(zip(*prepare_cell_values(df)), start=1):
+            worksheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+
+
+def write_excel_openpyxl(df, filename, sheet_name='Đơn hàng'):
+    """🐢 Đường cũ: pandas + openpyxl, duyệt từng ô sau khi ghi để chỉnh độ rộng cột"""
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+        # Tự động điều chỉnh độ rộng cột
+        worksheet = writer.sheets[sheet_name]
+        for column in worksheet.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, MAX_COLUMN_WIDTH)
+            worksheet.column_dimensions[column_letter].width = adjusted_width
+
+
+def write_excel(df, filename, sheet_name='Đơn hàng', streaming=True):
+    """
+    📗 Xuất DataFrame ra Excel (streaming nếu có xlsxwriter, nếu không dùng openpyxl)
+
+    Returns:
+        str: Engine đã dùng ('xlsxwriter' | 'openpyxl')
+    """
+    if streaming and XLSXWRITER_AVAILABLE:
+        write_excel_streaming(df, filename, sheet_name)
+        return 'xlsxwriter'
+
+    write_excel_openpyxl(df, filename, sheet_name)
+    return 'openpyxl'
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🚚 Export Stage Module - Chạy song song các writer xuất file độc lập
+Handles: thread pool, ghi file tạm rồi rename (atomic), thời gian + dung lượng từng writer
+"""
+
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def temp_path_for(path):
+    """File tạm cùng thư mục (cùng phần mở rộng để engine Excel/JSON nhận đúng định dạng)"""
+    directory, filename = os.path.split(path)
+    stem, extension = os.path.splitext(filename)
+    return os.path.join(directory, f".{stem}.tmp-{uuid.uuid4().hex[:8]}{extension}")
+
+
+def atomic_write(path, writer):
+    """
+    ✍️ Ghi file qua file tạm rồi os.replace, người đọc không bao giờ thấy file ghi dở
+
+    Args:
+        path (str): File đích
+        writer: Hàm writer(temp_path) ghi nội dung
+
+    Returns:
+        str | None: path nếu writer đã tạo file, None nếu writer không ghi gì
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = temp_path_for(path)
+    try:
+        writer(temp_path)
+        if not os.path.exists(temp_path):
+            return None
+        os.replace(temp_path, path)
+        return path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def atomic_copy(source, destination):
+    """📋 Copy file sang đích theo kiểu atomic (dùng cho orders_latest.csv)"""
+    return atomic_write(destination, lambda temp_path: shutil.copyfile(source, temp_path))
+
+
+class ExportFiles(dict):
+    """{loại: đường dẫn} như trước, kèm `stats` = {loại: {path, seconds, bytes}} của từng writer"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {}
+        self.wall_seconds = 0.0
+
+    def total_bytes(self):
+        return sum(stat['bytes'] or 0 for stat in self.stats.values())
+
+
+class ExportStage:
+    """
+    🚚 Gom các writer chỉ phụ thuộc vào DataFrame đã xử lý xong và chạy chúng trong thread pool
+    (ghi file, nén, serialize JSON/Parquet phần lớn nhả GIL nên chạy song song được)
+    """
+
+    def __init__(self, max_workers=4, logger=None):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.logger = logger
+        self._tasks = []
+
+    def add(self, name, path, writer, atomic=True):
+        """
+        Đăng ký một writer
+
+        Args:
+            name (str): Khóa trong export_files ('csv', 'excel', ...)
+            path (str): File đích; None nếu writer tự quản lý đầu ra (trả về đường dẫn)
+            writer: writer(target_path) khi có path, writer() khi path=None
+            atomic (bool): Ghi qua file tạm + rename
+        """
+        self._tasks.append((name, path, writer, atomic))
+        return self
+
+    def _run_task(self, name, path, writer, atomic):
+        start = time.perf_counter()
+        ok = True
+        try:
+            if path is None:
+                result = writer()
+            elif atomic:
+                result = atomic_write(path, writer)
+            else:
+                writer(path)
+                result = path if os.path.exists(path) else None
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"❌ Lỗi xuất {name}: {e}")
+            result, ok = None, False
+
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(result) if isinstance(result, str) and os.path.isfile(result) else None
+        return name, ok, result, seconds, size
+
+    def run(self):
+        """
+        ▶️ Chạy tất cả writer đã đăng ký
+
+        Returns:
+            ExportFiles: {name: path} cho các writer đã tạo file (giữ thứ tự đăng ký);
+                         stats có cả writer không tạo file (vd: upsert warehouse)
+        """
+        export_files = ExportFiles()
+        if not self._tasks:
+            return export_files
+
+        start = time.perf_counter()
+        workers = min(self.max_workers, len(self._tasks))
+        if workers == 1:
+            results = [self._run_task(*task) for task in self._tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export') as executor:
+                results = list(executor.map(lambda task: self._run_task(*task), self._tasks))
+
+        for name, ok, result, seconds, size in results:
+            if not ok:
+                continue
+            export_files.stats[name] = {'path': result, 'seconds': round(seconds, 3), 'bytes': size}
+            if isinstance(result, str):
+                export_files[name] = result
+                if self.logger:
+                    size_text = f", {size / 1024:.1f} KB" if size is not None else ""
+                    self.logger.info(f"✅ Đã xuất {name}: {result} ({seconds:.2f}s{size_text})")
+
+        export_files.wall_seconds = round(time.perf_counter() - start, 3)
+        self._tasks = []
+
+        if self.logger and workers > 1:
+            serial_seconds = sum(stat['seconds'] for stat in export_files.stats.values())
+            self.logger.info(f"🚚 Export stage: {len(results)} writer trong {export_files.wall_seconds:.2f}s "
+                             f"(tổng thời gian writer {serial_seconds:.2f}s, {workers} luồng)")
+        return export_files
+
+
+def merge_export_files(target, source):
+    """Gộp ExportFiles (kể cả stats) vào target"""
+    target.update(source)
+    if isinstance(target, ExportFiles) and isinstance(source, ExportFiles):
+        target.stats.update(source.stats)
+        target.wall_seconds = round(target.wall_seconds + source.wall_seconds, 3)
+    return target
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 HTTP Engine Module - Đăng nhập và lấy danh sách đơn ONE chỉ bằng requests.Session (không mở Chrome)
+Handles: form đăng nhập (kèm hidden/CSRF token), dùng lại cookies đã lưu, parse bảng #orderTB
+từ HTML server render (lxml nếu có, html.parser nếu không) hoặc endpoint AJAX của DataTables
+"""
+
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urlencode, urljoin, urlparse
+
+from scripts.datatables_api import (DETAIL_ID_PATTERN, DataTablesAjaxExtractor, build_pooled_session,
+                                    html_cell_to_text)
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/126.0 Safari/537.36')
+USERNAME_FIELDS = ('username', 'email', 'user', 'login')
+PASSWORD_INPUT = re.compile(r'<input[^>]+type=["\']?password', re.IGNORECASE)
+# ajax: '/so/list' | ajax: {url: '/so/list', type: 'POST'} | sAjaxSource: '/so/list'
+AJAX_URL_PATTERN = re.compile(
+    r"""(?:ajax|sAjaxSource)\s*:\s*(?:\{[^}]*?url\s*:\s*)?['"]([^'"]+)['"]""", re.IGNORECASE | re.DOTALL)
+AJAX_METHOD_PATTERN = re.compile(r"""ajax\s*:\s*\{[^}]*?(?:type|method)\s*:\s*['"](\w+)['"]""",
+                                 re.IGNORECASE | re.DOTALL)
+SERVER_SIDE_PATTERN = re.compile(r"""serverSide\s*:\s*true|bServerSide\s*:\s*true""", re.IGNORECASE)
+
+
+class _FormParser(HTMLParser):
+    """Gom các <form> và <input> của trang đăng nhập"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._current = {'action': attrs.get('action') or '', 'method': (attrs.get('method') or 'post').upper(),
+                             'inputs': []}
+            self.forms.append(self._current)
+        elif tag == 'input' and self._current is not None:
+            self._current['inputs'].append({
+                'name': attrs.get('name'),
+                'type': (attrs.get('type') or 'text').lower(),
+                'value': attrs.get('value') or ''
+            })
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._current = None
+
+
+class _TableParser(HTMLParser):
+    """Fallback không cần lxml: lấy text từng ô + href chi tiết của các dòng (ngoài thead) trong bảng có id"""
+
+    def __init__(self, table_id):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.rows, self.detail_ids = [], []
+        self._depth = 0          # độ sâu <table> lồng nhau bên trong bảng đích
+        self._in_head = False
+        self._row = None
+        self._cell = None
+        self._detail_id = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'table':
+            if self._depth or attrs.get('id') == self.table_id:
+                self._depth += 1
+            return
+        if not self._depth:
+            return
+
+        if tag == 'thead' and self._depth == 1:
+            self._in_head = True
+        elif tag == 'tr' and not self._in_head and self._depth == 1:
+            self._row, self._detail_id = [], None
+        elif tag == 'td' and self._row is not None and self._depth == 1:
+            self._cell = [] if 'dataTables_empty' not in (attrs.get('class') or '') else None
+            if self._cell is None:
+                self._row = None
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append('\n')
+        elif tag == 'a' and self._row is not None and self._detail_id is None:
+            match = DETAIL_ID_PATTERN.search(attrs.get('href') or '')
+            if match:
+                self._detail_id = match.group(1)
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        if tag == 'table':
+            self._depth -= 1
+        elif tag == 'thead' and self._depth == 1:
+            self._in_head = False
+        elif tag == 'td' and self._cell is not None and self._row is not None:
+            self._row.append(_clean_text(''.join(self._cell)))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None and self._depth == 1:
+            if self._row:
+                self.rows.append(self._row)
+                self.detail_ids.append(self._detail_id)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _clean_text(text):
+    """Gần giống innerText: bỏ khoảng trắng đầu/cuối từng dòng, bỏ dòng trống"""
+    text = text.replace('\xa0', ' ')
+    return '\n'.join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+
+def is_login_page(page_html):
+    """Trang còn ô mật khẩu = chưa đăng nhập (bị redirect về form login)"""
+    return bool(PASSWORD_INPUT.search(page_html or ''))
+
+
+def parse_login_form(page_html, base_url):
+    """
+    🔍 Tìm form đăng nhập (form có ô password) và các field cần gửi
+
+    Returns:
+        dict | None: {action, method, fields (hidden/CSRF + giá trị mặc định), username_field, password_field}
+    """
+    parser = _FormParser()
+    parser.feed(page_html or '')
+
+    for form in parser.forms:
+        password = next((field['name'] for field in form['inputs']
+                         if field['type'] == 'password' and field['name']), None)
+        if not password:
+            continue
+
+        text_inputs = [field['name'] for field in form['inputs']
+                       if field['type'] in ('text', 'email') and field['name']]
+        username = next((name for name in text_inputs if name.lower() in USERNAME_FIELDS),
+                        text_inputs[0] if text_inputs else None)
+        fields = {field['name']: field['value'] for field in form['inputs']
+                  if field['name'] and field['type'] not in ('submit', 'button', 'image', 'checkbox', 'radio')}
+        return {
+            'action': urljoin(base_url, form['action'] or base_url),
+            'method': form['method'],
+            'fields': fields,
+            'username_field': username,
+            'password_field': password
+        }
+    return None
+
+
+def parse_order_table(page_html, table_id='orderTB'):
+    """
+    📋 Các dòng tbody của bảng đơn trong HTML server render
+
+    Returns:
+        tuple: (rows: list[list[str]], detail_ids: list) - rows rỗng nếu bảng không có sẵn dữ liệu (AJAX)
+    """
+    if not page_html or table_id not in page_html:
+        return [], []
+
+    if not LXML_AVAILABLE:
+        parser = _TableParser(table_id)
+        parser.feed(page_html)
+        return parser.rows, parser.detail_ids
+
+    document = lxml_html.fromstring(page_html)
+    tables = document.xpath(f'//table[@id="{table_id}"]')
+    if not tables:
+        return [], []
+
+    table = tables[0]
+    for br in table.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+
+    rows, detail_ids = [], []
+    for row in table.xpath('./tbody/tr | ./tr'):
+        cells = row.xpath('./td')
+        if not cells or 'dataTables_empty' in (cells[0].get('class') or ''):
+            continue
+
+        detail_id = None
+        for href in row.xpath('.//a/@href'):
+            match = DETAIL_ID_PATTERN.search(href)
+            if match:
+                detail_id = match.group(1)
+                break
+
+        rows.append([_clean_text(cell.text_content()) for cell in cells])
+        detail_ids.append(detail_id)
+    return rows, detail_ids
+
+
+def find_ajax_endpoint(page_html, page_url):
+    """
+    🔍 Đọc URL AJAX của DataTables trong script inline của trang đơn hàng
+
+    Returns:
+        dict | None: endpoint theo định dạng DataTablesAjaxExtractor (không có tham số query)
+    """
+    match = AJAX_URL_PATTERN.search(page_html or '')
+    if not match:
+        return None
+
+    method = AJAX_METHOD_PATTERN.search(page_html)
+    return {
+        'url': urljoin(page_url, html_cell_to_text(match.group(1))),
+        'method': method.group(1).upper() if method else 'GET',
+        'query': '',
+        'server_side': bool(SERVER_SIDE_PATTERN.search(page_html)),
+        'columns': None,
+        'page_url': page_url,
+        'user_agent': None
+    }
+
+
+class HttpOrderClient:
+    """
+    🌐 Phiên ONE chỉ dùng HTTP: cùng các bước với login_to_one (mở trang, điền form, submit, xác nhận)
+    nhưng bằng requests.Session, rồi lấy bảng đơn từ HTML hoặc DataTables JSON
+    """
+
+    def __init__(self, config, logger, session=None, session_manager=None):
+        """
+        Args:
+            config (dict): Toàn bộ config.json (system, credentials, http_engine)
+            logger: Logger instance
+            session: requests.Session có sẵn (mặc định: session pool mới)
+            session_manager: SessionManager để dùng lại/lưu cookies đăng nhập
+        """
+        self.config = config
+        self.logger = logger
+        self.settings = config.get('http_engine', {})
+        self.session_manager = session_manager
+        self.timeout = self.settings.get('timeout', 30)
+        self.one_url = config['system']['one_url']
+        self.orders_url = config['system'].get('orders_url', urljoin(self.one_url, '/so/'))
+
+        self.session = session or build_pooled_session(pool_size=self.settings.get('pool_size', 8))
+        self.session.headers.update({
+            'User-Agent': self.settings.get('user_agent', DEFAULT_USER_AGENT),
+            'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8'
+        })
+        self.orders_page = None
+        self.is_logged_in = False
+        self.stats = {'requests': 0, 'bytes': 0, 'source': None}
+
+    def _get(self, url, **kwargs):
+        response = self.session.get(url, timeout=self.timeout, **kwargs)
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(response.content)
+        response.raise_for_status()
+        return response
+
+    def _open_orders_page(self):
+        """GET trang đơn hàng; None nếu bị chuyển về form đăng nhập"""
+        response = self._get(self.orders_url)
+        if is_login_page(response.text):
+            return None
+        self.orders_page = response
+        return response
+
+    def _restore_session(self):
+        """Dùng lại cookies đăng nhập đã lưu (của phiên trình duyệt hoặc HTTP trước)"""
+        session_data = self.session_manager.load_session() if self.session_manager else None
+        if not session_data:
+            return False
+
+        for cookie in session_data.get('cookies', []):
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        if self._open_orders_page() is None:
+            self.session.cookies.clear()
+            return False
+
+        self.logger.info("✅ HTTP: dùng lại session đã lưu")
+        return True
+
+    def _save_session(self):
+        if not self.session_manager:
+            return
+        cookies = [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+                   for cookie in self.session.cookies]
+        self.session_manager.save_session(cookies, self.orders_url)
+
+    def login(self):
+        """
+        🔐 Đăng nhập ONE bằng HTTP
+
+        Returns:
+            bool: True nếu đã vào được trang đơn hàng
+        """
+        try:
+            if self._restore_session():
+                self.is_logged_in = True
+                return True
+
+            self.logger.info("🔐 HTTP: đăng nhập mới...")
+            login_page = self._get(self.one_url)
+            if not is_login_page(login_page.text) and self._open_orders_page() is not None:
+                self.is_logged_in = True
+                return True
+
+            form = parse_login_form(login_page.text, login_page.url)
+            if not form or not form['username_field']:
+                raise Exception("Không tìm thấy form đăng nhập")
+
+            payload = dict(form['fields'])
+            payload[form['username_field']] = self.config['credentials']['username']
+            payload[form['password_field']] = self.config['credentials']['password']
+
+            origin = urlparse(login_page.url)
+            headers = {'Referer': login_page.url, 'Origin': f"{origin.scheme}://{origin.netloc}"}
+            if form['method'] == 'GET':
+                response = self.session.get(form['action'], params=payload, headers=headers, timeout=self.timeout)
+            else:
+                response = self.session.post(form['action'], data=payload, headers=headers, timeout=self.timeout)
+            self.stats['requests'] += 1
+            response.raise_for_status()
+
+            if is_login_page(response.text) or self._open_orders_page() is None:
+                raise Exception("Sai thông tin đăng nhập hoặc form yêu cầu bước bổ sung")
+
+            self.logger.info("✅ HTTP: đăng nhập thành công")
+            self.is_logged_in = True
+            self._save_session()
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ HTTP login thất bại: {e}")
+            return False
+
+    def _ajax_endpoint(self):
+        """Endpoint AJAX: cấu hình `http_engine.ajax_url` hoặc đọc từ script của trang đơn hàng"""
+        page_url = self.orders_page.url if self.orders_page is not None else self.orders_url
+        if self.settings.get('ajax_url'):
+            endpoint = {
+                'url': urljoin(page_url, self.settings['ajax_url']),
+                'method': self.settings.get('ajax_method', 'GET').upper(),
+                'query': '', 'server_side': True, 'columns': None, 'page_url': page_url, 'user_agent': None
+            }
+        else:
+            endpoint = find_ajax_endpoint(self.orders_page.text if self.orders_page is not None else '', page_url)
+
+        if endpoint:
+            # Bộ lọc (tab chờ xuất kho, khoảng ngày...) của bản trình duyệt truyền qua tham số AJAX
+            endpoint['query'] = urlencode(self.settings.get('ajax_params', {}), doseq=True)
+        return endpoint
+
+    def fetch_order_rows(self, max_rows=None, page_length=5000):
+        """
+        📥 Lấy các dòng đơn hàng (list text theo ô như DOM/AJAX của bản trình duyệt)
+
+        Returns:
+            dict | None: {rows, detail_ids, total, requests, source: 'html' | 'ajax'} hoặc None nếu không lấy được
+        """
+        try:
+            start_time = time.time()
+            if self.orders_page is None and self._open_orders_page() is None:
+                raise Exception("Phiên HTTP chưa đăng nhập")
+
+            rows, detail_ids = parse_order_table(self.orders_page.text,
+                                                 self.settings.get('table_id', 'orderTB'))
+            if rows:
+                self.stats['source'] = 'html'
+                if max_rows:
+                    rows, detail_ids = rows[:max_rows], detail_ids[:max_rows]
+                self.logger.info(f"✅ HTTP: {len(rows)} dòng từ HTML trang đơn hàng "
+                                 f"({'lxml' if LXML_AVAILABLE else 'html.parser'}, {time.time() - start_time:.2f}s)")
+                return {'rows': rows, 'detail_ids': detail_ids, 'total': len(rows),
+                        'requests': self.stats['requests'], 'source': 'html'}
+
+            endpoint = self._ajax_endpoint()
+            if not endpoint:
+                raise Exception("Bảng đơn không có sẵn dữ liệu và không tìm thấy endpoint AJAX")
+
+            extractor = DataTablesAjaxExtractor(None, self.logger, page_length=page_length,
+                                                session=self.session, timeout=self.timeout, endpoint=endpoint)
+            result = extractor.fetch_rows(max_rows=max_rows)
+            if not result:
+                return None
+
+            self.stats['source'] = 'ajax'
+            result['source'] = 'ajax'
+            return result
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ HTTP: không lấy được bảng đơn: {e}")
+            return None
+
+    def cookies(self):
+        """Cookies đăng nhập dạng dict (cho ProductDetailFetcher/invoiceJSON)"""
+        return {cookie.name: cookie.value for cookie in self.session.cookies}
+
+    def close(self):
+        self.session.close()
+
+
+def fetch_orders_over_http(config, logger, session_manager=None, max_rows=None):
+    """
+    🌐 Convenience function: đăng nhập bằng HTTP rồi lấy dòng đơn hàng
+
+    Returns:
+        tuple: (HttpOrderClient | None, kết quả fetch_order_rows | None) - client giữ session cho invoiceJSON
+    """
+    client = HttpOrderClient(config, logger, session_manager=session_manager)
+    if not client.login():
+        client.close()
+        return None, None
+
+    page_length = config.get('data_processing', {}).get('ajax_page_length', 5000)
+    return client, client.fetch_order_rows(max_rows=max_rows, page_length=page_length)
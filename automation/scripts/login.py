@@ -6,12 +6,13 @@ Handles: authentication, session persistence, login validation
 """
 
 import os
-import time
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+from scripts.wait_engine import AdaptiveWaiter
+
 
 class LoginManager:
     """Class xử lý đăng nhập hệ thống"""
@@ -22,6 +23,7 @@ class LoginManager:
         self.logger = logger
         self.session_manager = session_manager
         self.is_logged_in = False
+        self.waiter = AdaptiveWaiter(driver, logger)
 
     def check_existing_session(self):
         """Kiểm tra session hiện tại có còn hợp lệ không"""
@@ -37,7 +39,7 @@ class LoginManager:
 
             # Load cookies vào driver
             self.driver.get(session_data['url'])
-            time.sleep(1)
+            self.waiter.wait_for_ready('session.load')
 
             for cookie in session_data['cookies']:
                 try:
@@ -47,7 +49,7 @@ class LoginManager:
 
             # Refresh trang để áp dụng cookies
             self.driver.refresh()
-            time.sleep(2)
+            self.waiter.wait_for_idle('session.refresh')
 
             # Kiểm tra đã login chưa
             try:
@@ -102,7 +104,7 @@ class LoginManager:
             # Truy cập trang đăng nhập (trang chính)
             login_url = self.config['system']['one_url']
             self.driver.get(login_url)
-            time.sleep(2)
+            self.waiter.wait_for_ready('login.load')
 
             # Kiểm tra nhanh đã login chưa
             try:
@@ -179,8 +181,8 @@ class LoginManager:
             login_button.click()
             self.logger.info("✅ Đã click nút đăng nhập")
 
-            # Chờ login thành công
-            time.sleep(3)
+            # Chờ request đăng nhập xong, rồi xác nhận bên dưới
+            self.waiter.wait_for_idle('login.submit')
 
             # Kiểm tra login thành công với nhiều cách
             try:
@@ -256,7 +258,7 @@ class LoginManager:
             except TimeoutException:
                 self.logger.warning("⚠️ Trang tải chậm, tiếp tục...")
 
-            time.sleep(1)  # Small delay for stability
+            self.waiter.wait_for_idle('orders.ready')
             return True
 
         except Exception as e:
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🛰️ Network Capture Module - Bắt response XHR (DataTables, invoiceJSON) qua Chrome DevTools
+Handles: bật performance log + CDP Network domain khi tạo driver, đọc sự kiện Network.*,
+lấy body JSON bằng Network.getResponseBody, dựng dòng đơn hàng / chi tiết sản phẩm từ payload
+"""
+
+import base64
+import json
+import re
+import time
+
+from scripts.datatables_api import normalize_rows
+
+
+DEFAULT_PATTERNS = {
+    'datatables': None,             # None = mọi JSON có dạng response DataTables (data/aaData + draw/records*)
+    'invoice': r'invoiceJSON'
+}
+DATATABLES_KEYS = ('draw', 'recordsTotal', 'recordsFiltered', 'iTotalRecords', 'iTotalDisplayRecords', 'sEcho')
+
+
+def enable_performance_logging(options):
+    """Bật performance log (sự kiện Network.*) cho ChromeOptions trước khi tạo driver"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return options
+
+
+def enable_network_domain(driver, buffer_mb=64):
+    """Bật CDP Network domain với buffer đủ lớn để giữ body response tới khi đọc"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {
+            'maxTotalBufferSize': buffer_mb * 1024 * 1024,
+            'maxResourceBufferSize': buffer_mb * 1024 * 1024
+        })
+        return True
+    except Exception:
+        return False
+
+
+def is_datatables_payload(payload):
+    if not isinstance(payload, dict):
+        return False
+    rows = payload.get('data', payload.get('aaData'))
+    return isinstance(rows, list) and any(key in payload for key in DATATABLES_KEYS)
+
+
+class NetworkCapture:
+    """
+    🛰️ Đọc performance log của một WebDriver: ghi nhận response JSON khớp pattern,
+    lấy body sau Network.loadingFinished và giữ payload theo thứ tự đến
+    """
+
+    COLUMNS_SCRIPT = """
+    var selector = arguments[0];
+    if (typeof $ === 'undefined' || !$.fn || !$.fn.dataTable || !$.fn.dataTable.isDataTable(selector)) return null;
+    return $(selector).DataTable().settings()[0].aoColumns.map(function(c) {
+        return (typeof c.mData === 'string' || typeof c.mData === 'number') ? String(c.mData) : null;
+    });
+    """
+
+    def __init__(self, driver, logger, patterns=None, max_payloads=50, table_selector='#orderTB'):
+        """
+        Args:
+            driver: WebDriver tạo với enable_performance_logging
+            logger: Logger instance
+            patterns (dict): {'datatables': regex URL | None, 'invoice': regex URL}
+            max_payloads (int): Số payload DataTables giữ lại (cũ nhất bị bỏ)
+            table_selector (str): Bảng DataTables dùng để đọc mData khi response trả row dạng object
+        """
+        self.driver = driver
+        self.logger = logger
+        self.table_selector = table_selector
+        patterns = dict(DEFAULT_PATTERNS, **(patterns or {}))
+        self.patterns = {kind: re.compile(pattern) if pattern else None for kind, pattern in patterns.items()}
+        self.max_payloads = max_payloads
+
+        self._pending = {}          # requestId -> (kind, url)
+        self.table_payloads = []    # [{'url', 'payload', 'received_at'}]
+        self.invoice_payloads = []
+        self.stats = {'events': 0, 'responses': 0, 'bodies': 0, 'failed_bodies': 0}
+
+    def _classify(self, url, mime_type):
+        if self.patterns.get('invoice') and self.patterns['invoice'].search(url):
+            return 'invoice'
+        if 'json' not in (mime_type or '') and 'javascript' not in (mime_type or ''):
+            return None
+        table_pattern = self.patterns.get('datatables')
+        if table_pattern is None or table_pattern.search(url):
+            return 'datatables'
+        return None
+
+    def _read_body(self, request_id):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            self.stats['bodies'] += 1
+        except Exception:
+            self.stats['failed_bodies'] += 1
+            return None
+
+        text = body.get('body', '')
+        if body.get('base64Encoded'):
+            text = base64.b64decode(text).decode('utf-8', errors='replace')
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def poll(self, entries=None):
+        """
+        📥 Đọc các sự kiện mới trong performance log (log bị xóa sau khi đọc) và lấy body của response đã xong
+
+        Args:
+            entries (list): Entry đã được nơi khác đọc ra (vd: RequestBlocker ở chế độ debug), None = tự đọc log
+
+        Returns:
+            int: Số payload mới ghi nhận
+        """
+        if entries is None:
+            try:
+                entries = self.driver.get_log('performance')
+            except Exception as e:
+                self.logger.debug(f"⚠️ Không đọc được performance log: {e}")
+                return 0
+
+        captured = 0
+        for entry in entries:
+            self.stats['events'] += 1
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                kind = self._classify(response.get('url', ''), response.get('mimeType'))
+                if kind and response.get('status', 200) < 400:
+                    self._pending[params.get('requestId')] = (kind, response.get('url'))
+                    self.stats['responses'] += 1
+
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                kind, url = self._pending.pop(params['requestId'])
+                payload = self._read_body(params['requestId'])
+                if payload is None:
+                    continue
+
+                record = {'url': url, 'payload': payload, 'received_at': time.time()}
+                if kind == 'invoice':
+                    self.invoice_payloads.append(record)
+                    captured += 1
+                elif is_datatables_payload(payload):
+                    self.table_payloads.append(record)
+                    del self.table_payloads[:-self.max_payloads]
+                    captured += 1
+
+            elif method == 'Network.loadingFailed':
+                self._pending.pop(params.get('requestId'), None)
+
+        return captured
+
+    def clear(self):
+        """Bỏ payload đã bắt và sự kiện còn trong log (vd: trình duyệt ấm lấy từ pool còn log của lần chạy trước)"""
+        try:
+            self.driver.get_log('performance')
+        except Exception:
+            pass
+        self._pending.clear()
+        self.table_payloads = []
+        self.invoice_payloads = []
+
+    def wait_for_table_payload(self, timeout=5, after=None):
+        """⏳ Chờ tới khi có payload DataTables (mới hơn `after` nếu có)"""
+        deadline = time.time() + timeout
+        while True:
+            self.poll()
+            if self.table_payloads and (after is None or self.table_payloads[-1]['received_at'] > after):
+                return self.table_payloads[-1]
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.1)
+
+    def latest_table_rows(self, columns=None, timeout=0):
+        """
+        📋 Dòng đơn hàng từ response DataTables gần nhất (chính là dữ liệu đang hiển thị trong bảng)
+
+        Returns:
+            dict | None: {rows, detail_ids, total, url} giống fetch_order_rows_via_ajax, None nếu chưa bắt được
+        """
+        if timeout:
+            record = self.wait_for_table_payload(timeout)
+        else:
+            self.poll()
+            record = self.table_payloads[-1] if self.table_payloads else None
+        if not record:
+            return None
+
+        payload = record['payload']
+        raw_rows = payload.get('data', payload.get('aaData')) or []
+        if columns is None and raw_rows and isinstance(raw_rows[0], dict):
+            # Row dạng object: thứ tự cột theo mData của bảng, không theo thứ tự key JSON
+            try:
+                columns = self.driver.execute_script(self.COLUMNS_SCRIPT, self.table_selector)
+            except Exception:
+                columns = None
+
+        rows, detail_ids = normalize_rows(raw_rows, columns)
+        total = payload.get('recordsFiltered', payload.get('iTotalDisplayRecords', len(rows)))
+        self.logger.info(f"🛰️ Network capture: {len(rows)} dòng từ response DataTables {record['url']}")
+        return {'rows': rows, 'detail_ids': detail_ids, 'total': int(total or 0), 'url': record['url']}
+
+    def invoice_details(self, parse_function):
+        """
+        📦 Chi tiết sản phẩm từ mọi response invoiceJSON đã bắt được
+
+        Args:
+            parse_function: Hàm parse list `data` của invoiceJSON -> {order_id: details}
+
+        Returns:
+            dict: {order_id: details}
+        """
+        self.poll()
+        details = {}
+        for record in self.invoice_payloads:
+            payload = record['payload']
+            if isinstance(payload, dict) and not payload.get('error', True) and payload.get('data'):
+                details.update(parse_function(payload['data']) or {})
+        return details
+
+
+def create_network_capture(driver, logger, settings=None):
+    """
+    🛰️ Convenience function: NetworkCapture theo section `network_capture` của config.json
+
+    Returns:
+        NetworkCapture | None: None nếu bị tắt hoặc driver không có performance log
+    """
+    settings = settings or {}
+    if not settings.get('enabled', False) or driver is None:
+        return None
+    return NetworkCapture(driver, logger, patterns=settings.get('patterns'),
+                          max_payloads=settings.get('max_payloads', 50),
+                          table_selector=settings.get('table_selector', '#orderTB'))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔁 Order Changes Module - Change-data-capture đơn hàng giữa các lần chạy
+Handles: content hash từng đơn (trạng thái, đơn vị vận chuyển, tổng tiền, chi tiết sản phẩm),
+phân loại inserted/updated/disappeared so với lần chạy trước, file change set gọn,
+dữ liệu mang sang (chi tiết sản phẩm, SLA) cho đơn không đổi
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from scripts.order_warehouse import parse_products
+from scripts.run_checkpoint import content_hash
+
+
+# Cột nguồn cho từng trường (lấy cột đầu tiên tồn tại trong DataFrame)
+DEFAULT_COLUMNS = {
+    'order_id': ['id', 'col_2', 'Mã đơn hàng'],
+    'order_code': ['order_code', 'col_3'],
+    'platform': ['col_18', 'platform', 'Sàn TMĐT'],
+    'order_date': ['col_19', 'created_date', 'Ngày tạo'],
+    'status': ['col_7', 'status', 'Trạng thái'],
+    'transporter': ['col_13', 'shipping_method', 'Phương thức vận chuyển'],
+    'amount': ['col_16', 'total_amount', 'Tổng tiền'],
+    'products': ['products', 'Sản phẩm']
+}
+# Trường đọc được ngay trên bảng đơn (trước khi lấy chi tiết sản phẩm)
+SCAN_FIELDS = ('status', 'transporter', 'amount')
+CONTENT_FIELDS = SCAN_FIELDS + ('products',)
+CHANGE_COLUMNS = ['change_type', 'order_id', 'order_code', 'platform', 'order_date', 'status',
+                  'previous_status', 'transporter', 'amount', 'product_count', 'changed_fields']
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class OrderChangeTracker:
+    """
+    🔁 Giữ hash nội dung của từng đơn từ lần chạy trước (SQLite, khóa theo order id)
+    để pipeline chỉ xử lý/xuất/thông báo phần đơn mới, đơn thay đổi và đơn biến mất khỏi cửa sổ
+    """
+
+    def __init__(self, db_path="data/order_changes.db", logger=None, columns=None):
+        """
+        Args:
+            db_path (str): Đường dẫn file SQLite
+            logger: Logger instance
+            columns (dict): Ghi đè cột nguồn cho từng trường ({'transporter': ['api_transporter'], ...})
+        """
+        self.db_path = db_path
+        self.logger = logger
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+
+        self._lock = threading.Lock()
+        self.stats = {'runs': 0, 'inserted': 0, 'updated': 0, 'disappeared': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS order_state (
+                order_id TEXT PRIMARY KEY,
+                scan_hash TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                fields TEXT NOT NULL,
+                carry TEXT,
+                present INTEGER NOT NULL DEFAULT 1,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                changed_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_order_state_present ON order_state (present);
+        """)
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Hash từng đơn
+    # ------------------------------------------------------------------
+
+    def _column(self, df, field):
+        for name in self.columns.get(field, []):
+            if name in df.columns:
+                return df[name].tolist()
+        return [None] * len(df)
+
+    @staticmethod
+    def _text(value):
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return None
+        text = str(value).strip()
+        return text if text and text.lower() not in ('nan', 'none', 'null') else None
+
+    @staticmethod
+    def _amount(value):
+        """'1,250,000' / 1250000 / '' -> 1250000.0 / None (so sánh được giữa CSV và API)"""
+        text = OrderChangeTracker._text(value)
+        if text is None:
+            return None
+        try:
+            return float(text.replace(',', '').replace('"', ''))
+        except ValueError:
+            return text
+
+    @staticmethod
+    def _products(value):
+        """Chi tiết sản phẩm chuẩn hóa [(tên, số lượng)] đã sort (thứ tự dòng không tính là thay đổi)"""
+        items = []
+        for product in parse_products(value):
+            if isinstance(product, dict):
+                items.append((str(product.get('name', '')), product.get('quantity')))
+        return sorted(items, key=lambda item: (item[0], str(item[1])))
+
+    def order_fields(self, df):
+        """
+        Trường theo dõi + scan_hash/content_hash của từng đơn (đơn trùng id lấy dòng cuối)
+
+        Returns:
+            DataFrame: index order_id, các cột status/transporter/amount/products_hash/... và 2 hash
+        """
+        rows = []
+        columns = {field: self._column(df, field) for field in self.columns}
+        for position in range(len(df)):
+            order_id = self._text(columns['order_id'][position])
+            if order_id is None:
+                continue
+
+            products = self._products(columns['products'][position])
+            values = {
+                'status': self._text(columns['status'][position]),
+                'transporter': self._text(columns['transporter'][position]),
+                'amount': self._amount(columns['amount'][position]),
+                'products': products
+            }
+            rows.append({
+                'order_id': order_id,
+                'order_code': self._text(columns['order_code'][position]),
+                'platform': self._text(columns['platform'][position]),
+                'order_date': self._text(columns['order_date'][position]),
+                'status': values['status'],
+                'transporter': values['transporter'],
+                'amount': values['amount'],
+                'product_count': len(products),
+                'products_hash': content_hash([products]),
+                'scan_hash': content_hash([[values[field] for field in SCAN_FIELDS]]),
+                'content_hash': content_hash([[values[field] for field in CONTENT_FIELDS]])
+            })
+
+        fields = pd.DataFrame(rows, columns=['order_id', 'order_code', 'platform', 'order_date', 'status',
+                                             'transporter', 'amount', 'product_count', 'products_hash',
+                                             'scan_hash', 'content_hash'])
+        return fields.drop_duplicates('order_id', keep='last').set_index('order_id')
+
+    # ------------------------------------------------------------------
+    # So sánh với lần chạy trước
+    # ------------------------------------------------------------------
+
+    def _previous_state(self):
+        """{order_id: (scan_hash, content_hash, fields dict, present)} của mọi đơn đã biết"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT order_id, scan_hash, content_hash, fields, present FROM order_state").fetchall()
+        return {order_id: (scan, content, json.loads(fields), bool(present))
+                for order_id, scan, content, fields, present in rows}
+
+    @staticmethod
+    def _classify(fields, previous, hash_column):
+        inserted, updated, unchanged = [], [], []
+        for order_id, digest in fields[hash_column].items():
+            known = previous.get(order_id)
+            if known is None:
+                inserted.append(order_id)
+            elif known[0 if hash_column == 'scan_hash' else 1] != digest or not known[3]:
+                # Đơn quay lại cửa sổ sau khi biến mất cũng tính là thay đổi
+                updated.append(order_id)
+            else:
+                unchanged.append(order_id)
+        current = set(fields.index)
+        disappeared = [order_id for order_id, known in previous.items() if known[3] and order_id not in current]
+        return inserted, updated, unchanged, disappeared
+
+    def scan(self, df):
+        """
+        🔎 So sánh nhanh chỉ bằng trường trên bảng đơn (trạng thái, vận chuyển, tổng tiền) -
+        dùng trước bước lấy chi tiết sản phẩm để chỉ enrich đơn mới/thay đổi
+
+        Returns:
+            dict: {'inserted', 'updated', 'unchanged', 'disappeared'} (list order id), 'baseline' (chưa có lần chạy trước)
+        """
+        previous = self._previous_state()
+        inserted, updated, unchanged, disappeared = self._classify(self.order_fields(df), previous, 'scan_hash')
+        return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged,
+                'disappeared': disappeared, 'baseline': not previous}
+
+    def diff(self, df):
+        """
+        🔁 Change set của lần chạy này so với lần trước (theo content hash gồm cả chi tiết sản phẩm)
+
+        Args:
+            df (DataFrame): Dữ liệu đơn hàng đã xử lý của cả cửa sổ
+
+        Returns:
+            dict: {'inserted', 'updated', 'unchanged', 'disappeared'} (list order id), 'counts',
+                  'baseline', 'frame' (DataFrame change set gọn, cột CHANGE_COLUMNS)
+        """
+        fields = self.order_fields(df)
+        previous = self._previous_state()
+        inserted, updated, unchanged, disappeared = self._classify(fields, previous, 'content_hash')
+
+        records = []
+        for change_type, order_ids in (('inserted', inserted), ('updated', updated)):
+            for order_id in order_ids:
+                row = fields.loc[order_id]
+                old = previous.get(order_id, (None, None, {}, True))[2]
+                changed = [name for name, key in (('status', 'status'), ('transporter', 'transporter'),
+                                                  ('amount', 'amount'), ('products', 'products_hash'))
+                           if old and old.get(key) != row[key]]
+                records.append({
+                    'change_type': change_type, 'order_id': order_id, 'order_code': row['order_code'],
+                    'platform': row['platform'], 'order_date': row['order_date'], 'status': row['status'],
+                    'previous_status': old.get('status'), 'transporter': row['transporter'],
+                    'amount': row['amount'], 'product_count': row['product_count'],
+                    'changed_fields': ','.join(changed) if change_type == 'updated' else ''
+                })
+        for order_id in disappeared:
+            old = previous[order_id][2]
+            records.append({
+                'change_type': 'disappeared', 'order_id': order_id, 'order_code': old.get('order_code'),
+                'platform': old.get('platform'), 'order_date': old.get('order_date'), 'status': None,
+                'previous_status': old.get('status'), 'transporter': old.get('transporter'),
+                'amount': old.get('amount'), 'product_count': old.get('product_count'), 'changed_fields': ''
+            })
+
+        counts = {'inserted': len(inserted), 'updated': len(updated),
+                  'disappeared': len(disappeared), 'unchanged': len(unchanged)}
+        if self.logger:
+            self.logger.info(f"🔁 Order changes: {counts['inserted']} mới, {counts['updated']} thay đổi, "
+                             f"{counts['disappeared']} biến mất, {counts['unchanged']} không đổi")
+
+        return {
+            'inserted': inserted, 'updated': updated, 'unchanged': unchanged, 'disappeared': disappeared,
+            'counts': counts, 'baseline': not previous,
+            'frame': pd.DataFrame(records, columns=CHANGE_COLUMNS),
+            '_fields': fields
+        }
+
+    def carried(self, order_ids):
+        """📦 Dữ liệu mang sang đã lưu (vd: {'details': ..., 'sla': ...}) của các đơn"""
+        order_ids = [str(order_id) for order_id in order_ids]
+        carried = {}
+        with self._lock:
+            for start in range(0, len(order_ids), 500):
+                chunk = order_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT order_id, carry FROM order_state WHERE carry IS NOT NULL "
+                    f"AND order_id IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                carried.update({order_id: json.loads(carry) for order_id, carry in rows})
+        return carried
+
+    # ------------------------------------------------------------------
+    # Ghi trạng thái
+    # ------------------------------------------------------------------
+
+    def commit(self, changes, carry=None):
+        """
+        💾 Lưu trạng thái lần chạy này làm mốc cho lần sau (gọi sau khi export thành công)
+
+        Args:
+            changes (dict): Kết quả diff()
+            carry (dict): {order_id: {key: value}} ghi đè từng key dữ liệu mang sang (key khác giữ nguyên)
+        """
+        fields = changes['_fields']
+        carry = {str(order_id): value for order_id, value in (carry or {}).items()}
+        existing = self.carried(list(carry)) if carry else {}
+        now = datetime.now().strftime(DATE_FORMAT)
+
+        stored_fields = fields.drop(columns=['scan_hash', 'content_hash']).astype(object)
+        stored_fields = stored_fields.where(stored_fields.notna(), None).to_dict('index')
+
+        rows = []
+        for order_id, row in fields.iterrows():
+            stored = stored_fields[order_id]
+            merged = None
+            if order_id in carry:
+                merged = json.dumps(dict(existing.get(order_id, {}), **carry[order_id]),
+                                    ensure_ascii=False, default=str)
+            rows.append((order_id, row['scan_hash'], row['content_hash'],
+                         json.dumps(stored, ensure_ascii=False, default=str), merged, now, now, now))
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO order_state (order_id, scan_hash, content_hash, fields, carry, present,
+                                             first_seen, last_seen, changed_at)
+                    VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
+                    ON CONFLICT(order_id) DO UPDATE SET
+                        changed_at = CASE WHEN order_state.content_hash != excluded.content_hash
+                                            OR order_state.present = 0
+                                          THEN excluded.changed_at ELSE order_state.changed_at END,
+                        scan_hash = excluded.scan_hash,
+                        content_hash = excluded.content_hash,
+                        fields = excluded.fields,
+                        carry = COALESCE(excluded.carry, order_state.carry),
+                        present = 1,
+                        last_seen = excluded.last_seen
+                """, rows)
+                self._conn.executemany("UPDATE order_state SET present = 0, changed_at = ? WHERE order_id = ?",
+                                       [(now, order_id) for order_id in changes['disappeared']])
+
+        self.stats['runs'] += 1
+        for key in ('inserted', 'updated', 'disappeared'):
+            self.stats[key] += changes['counts'][key]
+        return len(rows)
+
+    def get_stats(self):
+        """📊 Số đơn đang theo dõi + thống kê các lần chạy hiện tại"""
+        with self._lock:
+            tracked, present = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(present), 0) FROM order_state").fetchone()
+        return dict(self.stats, tracked_orders=tracked, present_orders=present)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def changed_order_ids(changes):
+    """Order id cần xử lý lại (mới + thay đổi)"""
+    return list(changes.get('inserted', [])) + list(changes.get('updated', []))
+
+
+def open_order_change_tracker(settings=None, logger=None, base_dir=None):
+    """
+    🔁 Mở store change-data-capture theo section `order_changes` của config.json
+
+    Returns:
+        OrderChangeTracker | None: None nếu bị tắt hoặc không mở được
+    """
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    db_path = settings.get('db_path', 'data/order_changes.db')
+    if base_dir and not os.path.isabs(db_path):
+        db_path = os.path.join(base_dir, db_path)
+
+    try:
+        return OrderChangeTracker(db_path, logger, settings.get('columns'))
+
+    except Exception as e:
+        if logger:
+            logger.warning(f"⚠️ Không mở được order change store: {e}")
+        return None
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧾 Order Records Module - Lưu đơn hàng dạng cột thay cho dict col_N theo từng dòng
+Handles: column map theo phiên bản trang, OrderBatch (mảng theo cột, một timestamp cho cả lô),
+view OrderRecord tương thích dict cho code cũ, DataFrame có kiểu dựng thẳng từ mảng cột
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+
+
+class OrderTableSchema:
+    """Column map của bảng đơn hàng cho một phiên bản trang (tên gọi -> vị trí cột, tính từ 1)"""
+
+    __slots__ = ('name', 'aliases', 'column_count')
+
+    def __init__(self, name, aliases, column_count=None):
+        self.name = name
+        self.aliases = dict(aliases)
+        self.column_count = column_count
+
+
+# Trang /so/ (bảng #orderTB): cột 2 = id, cột 3 = mã đơn, cột 5 = kênh/khách hàng
+ORDER_TABLE_SCHEMAS = {
+    'so_v1': OrderTableSchema('so_v1', {'id': 2, 'order_code': 3, 'customer': 5}, column_count=23),
+}
+DEFAULT_SCHEMA = 'so_v1'
+META_COLUMNS = ('row_index', 'total_columns', 'scraped_at')
+
+
+def get_schema(schema=None):
+    """OrderTableSchema theo tên (mặc định trang /so/ hiện tại)"""
+    if isinstance(schema, OrderTableSchema):
+        return schema
+    return ORDER_TABLE_SCHEMAS[schema or DEFAULT_SCHEMA]
+
+
+class OrderRecord(Mapping):
+    """
+    View một dòng của OrderBatch, dùng như dict cũ (get/[]/in/copy/items)
+    Gán order['key'] = value ghi thẳng vào cột tương ứng của batch
+    """
+
+    __slots__ = ('_batch', '_position')
+
+    def __init__(self, batch, position):
+        self._batch = batch
+        self._position = position
+
+    def __getitem__(self, key):
+        column = self._batch.column(key)
+        if column is None:
+            raise KeyError(key)
+        value = column[self._position] if isinstance(column, list) else column
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._batch.set_value(key, self._position, value)
+
+    def __iter__(self):
+        for key in self._batch.column_names():
+            column = self._batch.column(key)
+            value = column[self._position] if isinstance(column, list) else column
+            if value is not None:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"OrderRecord({self.copy()!r})"
+
+
+class OrderBatch:
+    """
+    🧾 Lô đơn hàng lưu theo cột: mỗi cột bảng là một list (chuỗi rỗng -> None),
+    alias (id, order_code, customer) trỏ vào cùng list với col_N nên không nhân đôi dữ liệu,
+    scraped_at là một giá trị cho cả lô
+    """
+
+    __slots__ = ('schema', 'scraped_at', 'row_index', 'total_columns', 'cells', 'extra')
+
+    def __init__(self, cells, row_index, total_columns, scraped_at=None, schema=None, extra=None):
+        self.schema = get_schema(schema)
+        self.scraped_at = scraped_at or datetime.now()
+        self.cells = cells
+        self.row_index = row_index
+        self.total_columns = total_columns
+        self.extra = extra or {}
+
+    # ------------------------------------------------------------------
+    # Khởi tạo
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows, schema=None, scraped_at=None, min_cells=2):
+        """
+        Dựng lô từ list dòng (list text các ô) - kết quả JS/AJAX kiểu cũ
+
+        Args:
+            rows (list): [[cell_text, ...], ...]
+            min_cells (int): Bỏ qua dòng có ít ô hơn
+        """
+        positions = [i for i, row in enumerate(rows) if row and len(row) >= min_cells]
+        kept = [rows[i] for i in positions]
+        cells = [[value if value else None for value in column] for column in zip_longest(*kept)]
+        return cls(cells, [i + 1 for i in positions], [len(row) for row in kept], scraped_at, schema)
+
+    @classmethod
+    def from_columns(cls, columns, total_columns=None, row_index=None, schema=None, scraped_at=None, extra=None):
+        """
+        Dựng lô trực tiếp từ mảng theo cột (script JS trả về column arrays)
+
+        Args:
+            columns (list): [[text dòng 1, text dòng 2, ...] cho cột 1, ...]
+            total_columns (list): Số ô thực tế của từng dòng
+            extra (dict): Cột bổ sung {name: list} (vd: detail_id)
+        """
+        cells = [[value if value else None for value in column] for column in columns]
+        size = len(cells[0]) if cells else 0
+        return cls(cells,
+                   list(row_index) if row_index is not None else list(range(1, size + 1)),
+                   list(total_columns) if total_columns is not None else [len(cells)] * size,
+                   scraped_at, schema, extra)
+
+    @classmethod
+    def concat(cls, batches):
+        """Gộp nhiều lô (vd: các trang phân trang) thành một"""
+        batches = [batch for batch in batches if batch is not None and len(batch)]
+        if not batches:
+            return cls([], [], [])
+
+        width = max(len(batch.cells) for batch in batches)
+        cells = [[] for _ in range(width)]
+        extra_names = []
+        for batch in batches:
+            extra_names.extend(name for name in batch.extra if name not in extra_names)
+
+        row_index, total_columns, extra = [], [], {name: [] for name in extra_names}
+        offset = 0
+        for batch in batches:
+            size = len(batch)
+            for j in range(width):
+                cells[j].extend(batch.cells[j] if j < len(batch.cells) else [None] * size)
+            for name in extra_names:
+                extra[name].extend(batch.extra.get(name, [None] * size))
+            row_index.extend(index + offset for index in batch.row_index)
+            total_columns.extend(batch.total_columns)
+            offset += size
+
+        return cls(cells, row_index, total_columns, batches[0].scraped_at, batches[0].schema, extra)
+
+    # ------------------------------------------------------------------
+    # Truy cập
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.row_index)
+
+    def __iter__(self):
+        return (OrderRecord(self, position) for position in range(len(self)))
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return self.take(range(len(self))[position])
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return OrderRecord(self, position)
+
+    def _alias_position(self, name):
+        position = self.schema.aliases.get(name)
+        return position - 1 if position and position <= len(self.cells) else None
+
+    def column(self, name):
+        """List giá trị của một cột (scraped_at trả về giá trị chung của lô), None nếu không có"""
+        if name in self.extra:
+            return self.extra[name]
+        if name == 'row_index':
+            return self.row_index
+        if name == 'total_columns':
+            return self.total_columns
+        if name == 'scraped_at':
+            return self.scraped_at.isoformat()
+        position = self._alias_position(name)
+        if position is None and name.startswith('col_') and name[4:].isdigit():
+            position = int(name[4:]) - 1
+            position = position if 0 <= position < len(self.cells) else None
+        return self.cells[position] if position is not None else None
+
+    def column_names(self):
+        """Thứ tự cột giống dict cũ: meta, các ô đầu kèm alias, phần còn lại col_N, cột bổ sung"""
+        aliases = {position - 1: name for name, position in self.schema.aliases.items()
+                   if position <= len(self.cells)}
+        head = max(aliases) + 1 if aliases else 0
+
+        names = list(META_COLUMNS)
+        names.extend(aliases.get(j, f'col_{j + 1}') for j in range(head))
+        names.extend(f'col_{j + 1}' for j in range(len(self.cells)) if f'col_{j + 1}' not in names)
+        names.extend(name for name in self.extra if name not in names)
+        return names
+
+    def set_column(self, name, values):
+        """Gán/ghi đè cả cột (vd: id lấy từ link chi tiết, products sau khi merge)"""
+        values = list(values)
+        if len(values) != len(self):
+            raise ValueError(f"Cột {name}: {len(values)} giá trị cho {len(self)} đơn")
+        self.extra[name] = values
+
+    def set_value(self, name, position, value):
+        if name not in self.extra:
+            current = self.column(name)
+            self.extra[name] = list(current) if isinstance(current, list) else [None] * len(self)
+        self.extra[name][position] = value
+
+    def row_cells(self, position):
+        """Text các ô của một dòng (chuỗi rỗng thay cho None) - cho các heuristic theo dòng"""
+        width = self.total_columns[position]
+        return [self.cells[j][position] or '' for j in range(width)]
+
+    def take(self, positions):
+        """Lô con theo vị trí (giữ schema và timestamp)"""
+        positions = list(positions)
+        return OrderBatch(
+            [[column[i] for i in positions] for column in self.cells],
+            [self.row_index[i] for i in positions],
+            [self.total_columns[i] for i in positions],
+            self.scraped_at, self.schema,
+            {name: [values[i] for i in positions] for name, values in self.extra.items()}
+        )
+
+    def filter_present(self, name):
+        """Chỉ giữ các đơn có giá trị ở cột `name` (vd: đơn có id)"""
+        values = self.column(name) or []
+        return self.take(i for i, value in enumerate(values) if value)
+
+    def to_records(self):
+        """List dict kiểu cũ (cho code còn cần dict thật)"""
+        return [record.copy() for record in self]
+
+    def to_frame(self):
+        """
+        📊 DataFrame có kiểu dựng thẳng từ mảng cột (không qua list dict)
+        row_index int32, total_columns int16, scraped_at datetime64, ô bảng object (None = trống)
+        """
+        size = len(self)
+        data = {
+            'row_index': np.asarray(self.row_index, dtype=np.int32),
+            'total_columns': np.asarray(self.total_columns, dtype=np.int16),
+            'scraped_at': pd.DatetimeIndex([pd.Timestamp(self.scraped_at)] * size) if size else
+                          pd.DatetimeIndex([])
+        }
+        for name in self.column_names()[len(META_COLUMNS):]:
+            column = self.column(name)
+            if name in self.extra:
+                data[name] = pd.Series(column, dtype=None if size else object)
+            else:
+                values = np.empty(size, dtype=object)
+                values[:] = column
+                data[name] = values
+        return pd.DataFrame(data)
+
+
+def orders_to_frame(orders):
+    """DataFrame từ OrderBatch (dựng theo cột) hoặc list dict (cách cũ)"""
+    if isinstance(orders, OrderBatch):
+        return orders.to_frame()
+    return pd.DataFrame(orders)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧮 Order Table DOM Module - Lấy toàn bộ bảng #orderTB trong MỘT lần execute_script
+Handles: script JS trả mảng theo cột (text ô, id link chi tiết, id span action, trạng thái dòng),
+chỉ lấy dòng của #orderTB (không trùng), dựng OrderBatch trực tiếp từ mảng cột
+"""
+
+import time
+
+from scripts.order_records import OrderBatch
+
+
+class OrderTableDomExtractor:
+    """
+    🧮 Trích xuất bảng đơn hàng theo cột bằng một round trip WebDriver cho cả trang
+    (thay cho một execute_script/dòng khi dò id từ DOM)
+    """
+
+    EXTRACTION_SCRIPT = """
+    var selector = arguments[0];
+    var minCells = arguments[1] || 1;
+
+    var table = document.querySelector(selector);
+    var rows = [];
+    if (table) {
+        for (var b = 0; b < table.tBodies.length; b++) {
+            rows.push.apply(rows, table.tBodies[b].rows);
+        }
+    } else {
+        // Không có bảng theo selector: lấy bảng đầu tiên có dòng dữ liệu
+        var tables = document.querySelectorAll('table');
+        for (var t = 0; t < tables.length && !rows.length; t++) {
+            for (var tb = 0; tb < tables[t].tBodies.length; tb++) {
+                rows.push.apply(rows, tables[t].tBodies[tb].rows);
+            }
+        }
+    }
+
+    var seen = new Set();
+    var kept = rows.filter(function(row) {
+        if (seen.has(row)) return false;
+        seen.add(row);
+        var cells = row.cells;
+        if (cells.length < minCells) return false;
+        return !(cells.length === 1 && cells[0].classList.contains('dataTables_empty'));
+    });
+
+    var count = kept.length;
+    var columns = [], totalColumns = new Array(count);
+    var detailIds = new Array(count), actionIds = new Array(count), rowStatus = new Array(count);
+    var detailPattern = /\\/so\\/detail\\/(\\d+)/, actionPattern = /\\((\\d+)\\)/;
+
+    for (var i = 0; i < count; i++) {
+        var row = kept[i], cells = row.cells;
+        totalColumns[i] = cells.length;
+        while (columns.length < cells.length) columns.push(new Array(count).fill(''));
+        for (var j = 0; j < cells.length; j++) {
+            columns[j][i] = cells[j].innerText.trim();
+        }
+
+        var link = row.querySelector('a[href*="/so/detail/"]');
+        var detailMatch = link ? (link.getAttribute('href') || '').match(detailPattern) : null;
+        detailIds[i] = detailMatch ? detailMatch[1] : '';
+
+        var action = row.querySelector('span[onclick*="showStatus("], span[onclick*="showInfoPacked("], ' +
+                                       'span[onclick*="showInfoDelivery("]');
+        var actionMatch = action ? (action.getAttribute('onclick') || '').match(actionPattern) : null;
+        actionIds[i] = actionMatch ? actionMatch[1] : '';
+
+        var status = row.querySelector('span[onclick*="showStatus("]');
+        rowStatus[i] = status ? status.innerText.trim() : '';
+    }
+
+    return {
+        table: table ? selector : null,
+        columns: columns,
+        total_columns: totalColumns,
+        detail_ids: detailIds,
+        action_ids: actionIds,
+        row_status: rowStatus
+    };
+    """
+
+    def __init__(self, driver, logger, table_selector='#orderTB'):
+        self.driver = driver
+        self.logger = logger
+        self.table_selector = table_selector
+
+    def extract_columns(self, min_cells=1):
+        """
+        Chạy script trích xuất (một round trip)
+
+        Returns:
+            dict | None: {columns, total_columns, detail_ids, action_ids, row_status} hoặc None khi lỗi
+        """
+        try:
+            result = self.driver.execute_script(self.EXTRACTION_SCRIPT, self.table_selector, min_cells)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không chạy được script trích xuất bảng: {e}")
+            return None
+
+        if not result or not result.get('total_columns'):
+            return None
+        if not result.get('table'):
+            self.logger.debug(f"⚠️ Không thấy {self.table_selector}, dùng bảng đầu tiên có dữ liệu")
+        return result
+
+    def extract_batch(self, min_cells=1, keep_link_columns=True):
+        """
+        📦 Dựng OrderBatch từ mảng cột của trang hiện tại
+
+        Args:
+            min_cells (int): Bỏ qua dòng có ít ô hơn
+            keep_link_columns (bool): Giữ detail_id/action_id/row_status thành cột của batch
+
+        Returns:
+            OrderBatch | None: Lô đơn hàng (id thiếu được điền từ link chi tiết/span action), None nếu không có dữ liệu
+        """
+        start_time = time.time()
+        result = self.extract_columns(min_cells=min_cells)
+        if not result:
+            return None
+
+        extra = {
+            'detail_id': [value or None for value in result['detail_ids']],
+            'action_id': [value or None for value in result['action_ids']],
+            'row_status': [value or None for value in result['row_status']]
+        }
+        orders = OrderBatch.from_columns(result['columns'], total_columns=result['total_columns'],
+                                         extra=extra if keep_link_columns else None)
+
+        ids = orders.column('id')
+        if ids is not None:
+            filled = [order_id if order_id and order_id.isdigit() else (detail_id or action_id or order_id)
+                      for order_id, detail_id, action_id in zip(ids, extra['detail_id'], extra['action_id'])]
+            if filled != ids:
+                orders.set_column('id', filled)
+
+        self.logger.debug(f"🧮 Trích xuất {len(orders)} dòng × {len(result['columns'])} cột "
+                          f"trong 1 round trip ({time.time() - start_time:.2f}s)")
+        return orders
+
+
+def extract_order_table(driver, logger, table_selector='#orderTB', min_cells=1, keep_link_columns=True):
+    """Convenience function: OrderBatch của bảng đơn hàng trang hiện tại (một execute_script)"""
+    extractor = OrderTableDomExtractor(driver, logger, table_selector=table_selector)
+    return extractor.extract_batch(min_cells=min_cells, keep_link_columns=keep_link_columns)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏬 Order Warehouse Module - Kho lịch sử đơn hàng cục bộ qua các lần chạy
+Handles: SQLite store keyed by order id (upsert mỗi lần export), index theo ngày đặt/sàn/trạng thái,
+bảng fact sản phẩm, truy vấn theo khoảng ngày thay cho glob file CSV
+"""
+
+import ast
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+
+# Cột nguồn cho từng trường được index (lấy cột đầu tiên tồn tại trong DataFrame export)
+DEFAULT_COLUMNS = {
+    'order_id': ['id', 'col_2', 'Mã đơn hàng'],
+    'order_code': ['order_code', 'col_3'],
+    'platform': ['col_18', 'platform', 'Sàn TMĐT'],
+    'status': ['col_7', 'status', 'Trạng thái'],
+    'order_date': ['col_19', 'created_date', 'Ngày tạo'],
+    'customer': ['customer', 'api_customer', 'Tên khách hàng'],
+    'amount': ['api_amount', 'total_amount', 'Tổng tiền'],
+    'products': ['products', 'Sản phẩm']
+}
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_products(value):
+    """List sản phẩm từ cột products (list gốc hoặc chuỗi repr khi đọc lại từ CSV)"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.strip().startswith('['):
+        try:
+            parsed = ast.literal_eval(value)
+            return parsed if isinstance(parsed, list) else []
+        except (ValueError, SyntaxError):
+            return []
+    return []
+
+
+def _json_default(value):
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class OrderWarehouse:
+    """
+    🏬 Lưu mọi đơn hàng đã export vào SQLite (khóa theo order id)
+    để dashboard/API truy vấn lịch sử bằng điều kiện khoảng ngày thay vì đọc lại từng file CSV
+    """
+
+    def __init__(self, db_path="data/order_warehouse.db", logger=None, columns=None):
+        """
+        Args:
+            db_path (str): Đường dẫn file SQLite
+            logger: Logger instance
+            columns (dict): Ghi đè cột nguồn cho từng trường ({'platform': ['col_18'], ...})
+        """
+        self.db_path = db_path
+        self.logger = logger
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+
+        self._lock = threading.Lock()
+        self.stats = {'runs': 0, 'orders_upserted': 0, 'products_upserted': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS orders (
+                order_id TEXT PRIMARY KEY,
+                order_code TEXT,
+                platform TEXT,
+                status TEXT,
+                order_date TEXT,
+                customer TEXT,
+                amount REAL,
+                product_count INTEGER,
+                payload TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date);
+            CREATE INDEX IF NOT EXISTS idx_orders_platform ON orders (platform, order_date);
+            CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, order_date);
+
+            CREATE TABLE IF NOT EXISTS order_products (
+                order_id TEXT NOT NULL,
+                line_no INTEGER NOT NULL,
+                product_name TEXT,
+                quantity REAL,
+                PRIMARY KEY (order_id, line_no)
+            );
+            CREATE INDEX IF NOT EXISTS idx_order_products_name ON order_products (product_name);
+        """)
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Ghi dữ liệu
+    # ------------------------------------------------------------------
+
+    def _column(self, df, field):
+        """Series nguồn cho một trường (None nếu DataFrame không có cột nào phù hợp)"""
+        for name in self.columns.get(field, []):
+            if name in df.columns:
+                return df[name]
+        return None
+
+    def _text(self, df, field):
+        column = self._column(df, field)
+        if column is None:
+            return [None] * len(df)
+        present = column.notna() & (column.astype(str).str.strip() != '')
+        return [str(value) if keep else None for value, keep in zip(column.tolist(), present.tolist())]
+
+    def _orders_frame(self, df):
+        """Chuẩn hóa DataFrame export thành các trường được index của bảng orders"""
+        order_date = self._column(df, 'order_date')
+        if order_date is not None:
+            order_date = pd.to_datetime(order_date, errors='coerce').dt.strftime(DATE_FORMAT)
+            order_date = order_date.astype(object).where(order_date.notna(), None).tolist()
+        else:
+            order_date = [None] * len(df)
+
+        amount = self._column(df, 'amount')
+        if amount is not None:
+            amount = pd.to_numeric(amount.astype(str).str.replace(',', '', regex=False), errors='coerce')
+            amount = amount.astype(object).where(amount.notna(), None).tolist()
+        else:
+            amount = [None] * len(df)
+
+        products = self._column(df, 'products')
+        products = [parse_products(value) for value in products] if products is not None else [[]] * len(df)
+
+        return pd.DataFrame({
+            'order_id': self._text(df, 'order_id'),
+            'order_code': self._text(df, 'order_code'),
+            'platform': self._text(df, 'platform'),
+            'status': self._text(df, 'status'),
+            'order_date': order_date,
+            'customer': self._text(df, 'customer'),
+            'amount': amount,
+            'products': products
+        }, index=df.index)
+
+    def upsert_orders(self, df):
+        """
+        💾 Upsert toàn bộ DataFrame export vào kho (đơn đã có được cập nhật, first_seen giữ nguyên)
+
+        Args:
+            df (DataFrame): Dữ liệu đơn hàng đã xử lý (giống file orders_export_*.csv)
+
+        Returns:
+            int: Số đơn được ghi
+        """
+        if df is None or df.empty:
+            return 0
+
+        fields = self._orders_frame(df)
+        valid = fields['order_id'].notna()
+        if not valid.any():
+            if self.logger:
+                self.logger.warning("⚠️ Order warehouse: không tìm thấy cột order id, bỏ qua")
+            return 0
+
+        fields = fields[valid]
+        payloads = df[valid].astype(object).where(df[valid].notna(), None).to_dict('records')
+        now = datetime.now().strftime(DATE_FORMAT)
+
+        order_rows, product_rows = [], []
+        for row, payload in zip(fields.itertuples(index=False), payloads):
+            order_rows.append((
+                row.order_id, row.order_code, row.platform, row.status, row.order_date,
+                row.customer, row.amount, len(row.products),
+                json.dumps(payload, ensure_ascii=False, default=_json_default), now, now
+            ))
+            for line_no, product in enumerate(row.products):
+                if isinstance(product, dict):
+                    product_rows.append((row.order_id, line_no, product.get('name'), product.get('quantity')))
+
+        order_ids = [(row[0],) for row in order_rows]
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO orders (order_id, order_code, platform, status, order_date, customer,
+                                        amount, product_count, payload, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(order_id) DO UPDATE SET
+                        order_code = COALESCE(excluded.order_code, orders.order_code),
+                        platform = COALESCE(excluded.platform, orders.platform),
+                        status = COALESCE(excluded.status, orders.status),
+                        order_date = COALESCE(excluded.order_date, orders.order_date),
+                        customer = COALESCE(excluded.customer, orders.customer),
+                        amount = COALESCE(excluded.amount, orders.amount),
+                        product_count = CASE WHEN excluded.product_count > 0
+                                             THEN excluded.product_count ELSE orders.product_count END,
+                        payload = excluded.payload,
+                        last_seen = excluded.last_seen
+                """, order_rows)
+
+                # Bảng fact sản phẩm: chỉ thay khi lần chạy này có chi tiết sản phẩm cho đơn
+                product_order_ids = sorted({(row[0],) for row in product_rows})
+                self._conn.executemany("DELETE FROM order_products WHERE order_id = ?", product_order_ids)
+                self._conn.executemany(
+                    "INSERT INTO order_products (order_id, line_no, product_name, quantity) VALUES (?, ?, ?, ?)",
+                    product_rows)
+
+        self.stats['runs'] += 1
+        self.stats['orders_upserted'] += len(order_ids)
+        self.stats['products_upserted'] += len(product_rows)
+
+        if self.logger:
+            self.logger.info(f"🏬 Order warehouse: upsert {len(order_ids)} đơn, {len(product_rows)} dòng sản phẩm")
+        return len(order_ids)
+
+    # ------------------------------------------------------------------
+    # Truy vấn
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _date_bound(value, end=False):
+        """'2025-07-01' -> cận trên/dưới dạng chuỗi so sánh được với cột order_date"""
+        if value in (None, ''):
+            return None
+        timestamp = pd.Timestamp(value)
+        if end and len(str(value)) <= 10:
+            timestamp = timestamp + pd.Timedelta(days=1)
+            return timestamp.strftime(DATE_FORMAT), '<'
+        return timestamp.strftime(DATE_FORMAT), '<=' if end else '>='
+
+    def _where(self, start=None, end=None, platform=None, status=None, alias=''):
+        clauses, params = [], []
+        for bound in (self._date_bound(start), self._date_bound(end, end=True)):
+            if bound:
+                clauses.append(f"{alias}order_date {bound[1]} ?")
+                params.append(bound[0])
+        if platform:
+            clauses.append(f"LOWER({alias}platform) LIKE ?")
+            params.append(f"%{str(platform).lower()}%")
+        if status:
+            clauses.append(f"{alias}status = ?")
+            params.append(status)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_orders(self, start=None, end=None, platform=None, status=None, limit=None, include_payload=False):
+        """
+        🔍 Đơn hàng theo khoảng ngày đặt (dùng index order_date)
+
+        Args:
+            start/end: Ngày hoặc thời điểm ('2025-07-01', '2025-07-01 12:00'); end dạng ngày lấy trọn ngày
+            platform (str): Lọc theo sàn (so khớp chuỗi con, không phân biệt hoa thường)
+            status (str): Lọc theo trạng thái đơn
+            limit (int): Số dòng tối đa (mới nhất trước)
+            include_payload (bool): Trả về toàn bộ cột export gốc thay vì các trường được index
+
+        Returns:
+            DataFrame
+        """
+        where, params = self._where(start, end, platform, status)
+        sql = ("SELECT order_id, order_code, platform, status, order_date, customer, amount, product_count, "
+               f"first_seen, last_seen, payload FROM orders{where} ORDER BY order_date DESC")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+
+        if include_payload:
+            return pd.DataFrame([json.loads(payload) for payload in df['payload']])
+        return df.drop(columns=['payload'])
+
+    def query_products(self, start=None, end=None, platform=None, status=None):
+        """🛍️ Tổng số lượng theo sản phẩm cho các đơn trong khoảng ngày"""
+        where, params = self._where(start, end, platform, status, alias='o.')
+        sql = ("SELECT p.product_name, SUM(p.quantity) AS quantity, COUNT(DISTINCT p.order_id) AS orders "
+               f"FROM order_products p JOIN orders o ON o.order_id = p.order_id{where} "
+               "GROUP BY p.product_name ORDER BY quantity DESC")
+
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def summarize(self, start=None, end=None, group_by='platform'):
+        """📊 Số đơn và doanh thu theo sàn/trạng thái/ngày trong khoảng ngày"""
+        groups = {'platform': 'platform', 'status': 'status', 'date': 'SUBSTR(order_date, 1, 10)'}
+        if group_by not in groups:
+            raise ValueError(f"group_by phải là một trong {sorted(groups)}")
+
+        where, params = self._where(start, end)
+        sql = (f"SELECT {groups[group_by]} AS {group_by}, COUNT(*) AS orders, SUM(amount) AS amount "
+               f"FROM orders{where} GROUP BY 1 ORDER BY orders DESC")
+
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def get_stats(self):
+        """📊 Kích thước kho + thống kê ghi của lần chạy hiện tại"""
+        with self._lock:
+            total_orders, first_date, last_date = self._conn.execute(
+                "SELECT COUNT(*), MIN(order_date), MAX(order_date) FROM orders").fetchone()
+            total_products = self._conn.execute("SELECT COUNT(*) FROM order_products").fetchone()[0]
+
+        return dict(self.stats, total_orders=total_orders, total_product_lines=total_products,
+                    first_order_date=first_date, last_order_date=last_date)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_order_warehouse(settings=None, logger=None, base_dir=None):
+    """
+    🏬 Mở kho đơn hàng theo section `order_warehouse` của config.json
+
+    Returns:
+        OrderWarehouse | None: None nếu kho bị tắt hoặc không mở được
+    """
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    db_path = settings.get('db_path', 'data/order_warehouse.db')
+    if base_dir and not os.path.isabs(db_path):
+        db_path = os.path.join(base_dir, db_path)
+
+    try:
+        return OrderWarehouse(db_path, logger, settings.get('columns'))
+
+    except Exception as e:
+        if logger:
+            logger.warning(f"⚠️ Không mở được order warehouse: {e}")
+        return None
@@ -12,6 +12,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from scripts.order_records import OrderBatch
+from scripts.table_watcher import TableRedrawWatcher
+from scripts.strategy_cache import get_shared_strategy_cache, page_fingerprint, try_strategies
+
 
 class PaginationHandler:
     """
@@ -19,9 +23,11 @@ class PaginationHandler:
     Based on: ONE_SYSTEM_STRUCTURE.md pagination analysis
     """
 
-    def __init__(self, driver, logger):
+    def __init__(self, driver, logger, strategy_cache=None):
         self.driver = driver
         self.logger = logger
+        self.table_watcher = TableRedrawWatcher(driver, logger)
+        self.strategy_cache = strategy_cache or get_shared_strategy_cache()
 
     def get_total_records(self):
         """
@@ -117,10 +123,41 @@ class PaginationHandler:
             self.logger.error(f"❌ Error getting page info: {e}")
             return {'current_page': 1, 'has_next': False, 'has_previous': False}
 
+    NEXT_PAGE_SELECTORS = [
+        ".paginate_button.next:not(.disabled)",
+        "a.paginate_button.next",
+        ".dataTables_paginate .next",
+        ".paginate_button[data-dt-idx]:last-child"
+    ]
+
+    JS_CLICK_SCRIPT = """
+    var nextButtons = document.querySelectorAll('.paginate_button.next');
+    for (var i = 0; i < nextButtons.length; i++) {
+        var btn = nextButtons[i];
+        if (!btn.classList.contains('disabled') && btn.offsetWidth > 0 && btn.offsetHeight > 0) {
+            btn.click();
+            return true;
+        }
+    }
+    return false;
+    """
+
+    DATATABLES_NEXT_SCRIPT = """
+    if (typeof $ !== 'undefined' && $('#orderTB').length > 0) {
+        var table = $('#orderTB').DataTable();
+        table.page('next').draw('page');
+        return true;
+    }
+    return false;
+    """
+
     def go_to_next_page(self, wait_timeout=30):
         """
         ➡️ Chuyển sang trang tiếp theo với proper waiting và content change detection
 
+        Các chiến lược (JS click → Selenium selectors → URL → DataTables API) được thử theo thứ tự
+        strategy cache đề xuất: chiến lược thắng lần trước trên trang này được thử đầu tiên
+
         Args:
             wait_timeout (int): Timeout chờ trang load
 
@@ -141,134 +178,68 @@ class PaginationHandler:
             old_content = self._get_table_content_snapshot()
             self.logger.info(f"📸 Captured current table content: {len(old_content)} items")
 
-            # STRATEGY 1: Scroll to pagination area first
+            # Cài MutationObserver + hook draw.dt trước khi bấm để không lỡ lần vẽ lại
+            redraw_token = self.table_watcher.arm()
+
+            # Scroll to pagination area first
             try:
-                self.logger.info("🔄 Strategy 1: Scroll to pagination area...")
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
 
-                # Find pagination container and scroll to it
+                # Find pagination container and scroll to it (scrollIntoView chạy đồng bộ, không cần chờ)
                 pagination_container = self.driver.find_element(By.CSS_SELECTOR, ".dataTables_paginate")
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", pagination_container)
-                time.sleep(1)
 
             except Exception as e:
                 self.logger.warning(f"⚠️ Scroll strategy failed: {e}")
 
-            # STRATEGY 2: Try JavaScript click first
-            try:
-                self.logger.info("🔄 Strategy 2: JavaScript click...")
-
-                js_click_script = """
-                var nextButtons = document.querySelectorAll('.paginate_button.next');
-                for (var i = 0; i < nextButtons.length; i++) {
-                    var btn = nextButtons[i];
-                    if (!btn.classList.contains('disabled') && btn.offsetWidth > 0 && btn.offsetHeight > 0) {
-                        btn.click();
-                        return true;
-                    }
-                }
-                return false;
-                """
-
-                clicked = self.driver.execute_script(js_click_script)
-                if clicked:
-                    self.logger.info("✅ JavaScript click successful")
-
-                    # Đợi table content thay đổi
-                    if self._wait_for_table_content_change(old_content, timeout=15):
-                        new_page_info = self.get_current_page_info()
-                        if new_page_info['current_page'] > current_page:
-                            self.logger.info(f"📄 Successfully moved to page {new_page_info['current_page']}")
-                            return True
-
-            except Exception as e:
-                self.logger.warning(f"⚠️ JavaScript strategy failed: {e}")
-
-            # STRATEGY 3: Try Selenium click with multiple selectors
-            try:
-                self.logger.info("🔄 Strategy 3: Selenium click with multiple selectors...")
-
-                selectors = [
-                    ".paginate_button.next:not(.disabled)",
-                    "a.paginate_button.next",
-                    ".dataTables_paginate .next",
-                    ".paginate_button[data-dt-idx]:last-child"
-                ]
-
-                for selector in selectors:
-                    try:
-                        next_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if next_button.is_displayed() and next_button.is_enabled():
-                            # Scroll to button
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                            time.sleep(0.5)
-
-                            # Try click
-                            next_button.click()
-                            self.logger.info(f"✅ Clicked with selector: {selector}")
-
-                            # Đợi table content thay đổi
-                            if self._wait_for_table_content_change(old_content, timeout=15):
-                                new_page_info = self.get_current_page_info()
-                                if new_page_info['current_page'] > current_page:
-                                    self.logger.info(f"📄 Successfully moved to page {new_page_info['current_page']}")
-                                    return True
-
-                    except Exception as e:
-                        self.logger.debug(f"Selector {selector} failed: {e}")
-                        continue
-
-            except Exception as e:
-                self.logger.warning(f"⚠️ Selenium strategy failed: {e}")
-
-            # STRATEGY 4: Direct page navigation via URL manipulation
-            try:
-                self.logger.info("🔄 Strategy 4: Direct URL navigation...")
-
-                current_url = self.driver.current_url
-
-                # Try to increment page in URL if it exists
-                if "page=" in current_url:
-                    import re
-                    new_url = re.sub(r'page=(\d+)', lambda m: f"page={int(m.group(1)) + 1}", current_url)
-                    self.driver.get(new_url)
-                    time.sleep(3)
-
-                    new_page_info = self.get_current_page_info()
-                    if new_page_info['current_page'] > current_page:
-                        self.logger.info(f"📄 URL navigation successful to page {new_page_info['current_page']}")
-                        return True
-
-            except Exception as e:
-                self.logger.warning(f"⚠️ URL navigation failed: {e}")
-
-            # STRATEGY 5: DataTables API direct navigation
-            try:
-                self.logger.info("🔄 Strategy 5: DataTables API navigation...")
-
-                dt_script = """
-                if (typeof $ !== 'undefined' && $('#orderTB').length > 0) {
-                    var table = $('#orderTB').DataTable();
-                    table.page('next').draw('page');
-                    return true;
-                }
-                return false;
-                """
+            def moved(timeout):
+                """Đợi table content thay đổi và số trang tăng"""
+                if not self._wait_for_table_content_change(old_content, timeout=timeout, token=redraw_token):
+                    return False
+                new_page_info = self.get_current_page_info()
+                if new_page_info['current_page'] > current_page:
+                    self.logger.info(f"📄 Successfully moved to page {new_page_info['current_page']}")
+                    return True
+                return False
 
-                api_success = self.driver.execute_script(dt_script)
-                if api_success:
-                    self.logger.info("✅ DataTables API navigation successful")
+            def attempt(strategy):
+                if strategy == 'js_click':
+                    return self.driver.execute_script(self.JS_CLICK_SCRIPT) and moved(15)
+
+                if strategy.startswith('selenium:'):
+                    next_button = self.driver.find_element(By.CSS_SELECTOR, strategy.split(':', 1)[1])
+                    if not (next_button.is_displayed() and next_button.is_enabled()):
+                        return False
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
+                    next_button.click()
+                    return moved(15)
+
+                if strategy == 'url':
+                    # Direct page navigation: tăng page= trong URL nếu có
+                    current_url = self.driver.current_url
+                    if "page=" not in current_url:
+                        return False
+                    self.driver.get(re.sub(r'page=(\d+)', lambda m: f"page={int(m.group(1)) + 1}", current_url))
+
+                    # Trang load lại: chờ bảng có dòng rồi chờ bảng ổn định (không sleep cố định)
+                    WebDriverWait(self.driver, wait_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "#orderTB tbody tr"))
+                    )
+                    self.table_watcher.wait_until_settled(timeout=wait_timeout)
+                    return self.get_current_page_info()['current_page'] > current_page
+
+                if strategy == 'datatables_api':
+                    return self.driver.execute_script(self.DATATABLES_NEXT_SCRIPT) and moved(20)
 
-                    # Đợi table content thay đổi
-                    if self._wait_for_table_content_change(old_content, timeout=20):
-                        new_page_info = self.get_current_page_info()
-                        if new_page_info['current_page'] > current_page:
-                            self.logger.info(f"📄 Successfully moved to page {new_page_info['current_page']}")
-                            return True
+                return False
 
-            except Exception as e:
-                self.logger.warning(f"⚠️ DataTables API failed: {e}")
+            strategies = (['js_click'] + [f"selenium:{selector}" for selector in self.NEXT_PAGE_SELECTORS]
+                          + ['url', 'datatables_api'])
+            strategy, _ = try_strategies(self.strategy_cache, 'pagination.next', strategies, attempt,
+                                         page_fingerprint(self.driver), self.logger)
+            if strategy:
+                self.logger.info(f"✅ Pagination strategy: {strategy}")
+                return True
 
             # All strategies failed
             self.logger.error(f"❌ All pagination strategies failed for page {current_page}")
@@ -301,31 +272,42 @@ class PaginationHandler:
             self.logger.debug(f"⚠️ Error capturing table snapshot: {e}")
             return []
 
-    def _wait_for_table_content_change(self, old_content, timeout=30):
-        """⏳ Đợi table content thay đổi"""
+    def _wait_for_table_content_change(self, old_content, timeout=30, token=None):
+        """
+        ⏳ Đợi table content thay đổi
+
+        Có token của table watcher: chờ sự kiện draw.dt/MutationObserver (resolve ngay khi vẽ xong).
+        Không có (trang không có bảng/JS lỗi): poll snapshot tới khi đổi và 2 lần liên tiếp giống nhau
+        """
         try:
             self.logger.info(f"⏳ Waiting for table content to change (timeout: {timeout}s)...")
 
+            if token:
+                redrawn = self.table_watcher.wait_for_redraw(token, timeout=timeout)
+                if redrawn is not None:
+                    return redrawn
+
             start_time = time.time()
-            check_interval = 0.5
+            check_interval = 0.25
+            changed_content = None
 
             while time.time() - start_time < timeout:
-                # Đợi một chút trước khi check
                 time.sleep(check_interval)
 
                 # Lấy content mới
                 new_content = self._get_table_content_snapshot()
 
-                # So sánh với content cũ
+                # So sánh với content cũ; chỉ trả về khi nội dung mới đã ổn định
                 if new_content != old_content and len(new_content) > 0:
-                    self.logger.info(f"✅ Table content changed! New content: {len(new_content)} items")
-
-                    # Đợi thêm một chút cho table ổn định
-                    time.sleep(2)
-                    return True
+                    if new_content == changed_content:
+                        self.logger.info(f"✅ Table content changed! New content: {len(new_content)} items")
+                        return True
+                    changed_content = new_content
+                    check_interval = 0.25
+                    continue
 
                 # Tăng interval để không spam request
-                check_interval = min(check_interval * 1.1, 2.0)
+                check_interval = min(check_interval * 1.5, 2.0)
 
             self.logger.warning(f"❌ Timeout waiting for table content change ({timeout}s)")
             return False
@@ -354,6 +336,7 @@ class PaginationHandler:
                 self.logger.warning("⚠️ No total records found, proceeding with available data")
 
             all_data = []
+            page_batches = []
             pages_processed = 0
 
             while pages_processed < max_pages:
@@ -367,7 +350,10 @@ class PaginationHandler:
                 try:
                     page_data = extract_function()
                     if page_data:
-                        all_data.extend(page_data)
+                        if isinstance(page_data, OrderBatch):
+                            page_batches.append(page_data)
+                        else:
+                            all_data.extend(page_data)
                         self.logger.info(f"✅ Page {current_page}: extracted {len(page_data)} records")
                     else:
                         self.logger.warning(f"⚠️ Page {current_page}: no data extracted")
@@ -385,6 +371,11 @@ class PaginationHandler:
                     self.logger.warning("⚠️ Failed to go to next page, stopping")
                     break
 
+            # Các trang dạng OrderBatch được gộp theo cột thay vì nối list dict
+            if page_batches:
+                all_data = OrderBatch.concat(page_batches) if not all_data else \
+                    all_data + [order.copy() for batch in page_batches for order in batch]
+
             # Summary
             total_extracted = len(all_data)
             completion_rate = (total_extracted / total_expected * 100) if total_expected > 0 else 0
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧱 Parquet Export Module - Xuất đơn hàng dạng cột (Parquet/Arrow)
+Handles: ép kiểu cột (categorical/numeric/datetime), partition theo ngày đặt + sàn, nén, manifest
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from scripts.order_warehouse import DEFAULT_COLUMNS, parse_products
+
+
+DEFAULT_PARTITIONS = ['order_day', 'platform']
+MANIFEST_FILE = '_manifest.json'
+UNKNOWN_PARTITION = 'unknown'
+
+
+def _first_column(df, candidates):
+    for name in candidates:
+        if name in df.columns:
+            return name
+    return None
+
+
+def build_typed_frame(df, columns=None):
+    """
+    🔢 Ép kiểu DataFrame export (toàn object/string) thành cột có kiểu cho Parquet
+
+    - platform, status: category
+    - order_value: số (bỏ dấu phân cách hàng nghìn)
+    - order_date: datetime64, order_day: 'YYYY-MM-DD' (khóa partition)
+    - products: chuỗi JSON; các cột còn lại: string
+
+    Args:
+        df (DataFrame): Dữ liệu đơn hàng đã xử lý
+        columns (dict): Ghi đè cột nguồn ({'platform': ['col_18'], ...}), mặc định như order warehouse
+
+    Returns:
+        DataFrame
+    """
+    columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+    typed = pd.DataFrame(index=df.index)
+
+    id_column = _first_column(df, columns['order_id'])
+    if id_column:
+        typed['order_id'] = df[id_column].astype('string')
+    else:
+        typed['order_id'] = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    date_column = _first_column(df, columns['order_date'])
+    if date_column:
+        order_date = pd.to_datetime(df[date_column], errors='coerce')
+    else:
+        order_date = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    typed['order_date'] = order_date
+    typed['order_day'] = order_date.dt.strftime('%Y-%m-%d').fillna(UNKNOWN_PARTITION).astype('string')
+
+    for field in ('platform', 'status'):
+        source = _first_column(df, columns[field])
+        values = df[source].astype(str).str.strip() if source else pd.Series('', index=df.index)
+        typed[field] = values.replace({'': UNKNOWN_PARTITION, 'nan': UNKNOWN_PARTITION}).astype('category')
+
+    amount_column = _first_column(df, columns['amount'])
+    if amount_column:
+        typed['order_value'] = pd.to_numeric(
+            df[amount_column].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    else:
+        typed['order_value'] = pd.Series(float('nan'), index=df.index)
+
+    products_column = _first_column(df, columns['products'])
+    used = {id_column, date_column, amount_column, products_column,
+            _first_column(df, columns['platform']), _first_column(df, columns['status'])}
+
+    if products_column:
+        typed['products'] = pd.Series([json.dumps(parse_products(value), ensure_ascii=False)
+                                       for value in df[products_column]], index=df.index, dtype='string')
+
+    for name in df.columns:
+        if name in used or name in typed.columns:
+            continue
+        column = df[name]
+        typed[name] = column if pd.api.types.is_numeric_dtype(column) else column.astype('string')
+
+    return typed.reset_index(drop=True)
+
+
+def write_manifest(root_dir, run_files, partition_cols, compression, schema_text):
+    """📝 Ghi _manifest.json liệt kê mọi file của dataset (partition, số dòng, dung lượng)"""
+    files = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        for filename in sorted(filenames):
+            if not filename.endswith('.parquet'):
+                continue
+            path = os.path.join(dirpath, filename)
+            relative = os.path.relpath(path, root_dir)
+            partitions = dict(part.split('=', 1) for part in relative.split(os.sep)[:-1] if '=' in part)
+            files.append({
+                'path': relative.replace(os.sep, '/'),
+                'partitions': partitions,
+                'rows': pq.ParquetFile(path).metadata.num_rows,
+                'bytes': os.path.getsize(path),
+                'written_this_run': relative in run_files
+            })
+
+    manifest = {
+        'updated_at': datetime.now().isoformat(),
+        'format': 'parquet',
+        'compression': compression,
+        'partition_by': partition_cols,
+        'schema': schema_text,
+        'total_rows': sum(f['rows'] for f in files),
+        'total_bytes': sum(f['bytes'] for f in files),
+        'files': files
+    }
+
+    manifest_path = os.path.join(root_dir, MANIFEST_FILE)
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+    return manifest_path
+
+
+def export_parquet_dataset(df, settings=None, logger=None, timestamp=None):
+    """
+    🧱 Xuất DataFrame thành dataset Parquet partition theo ngày đặt + sàn
+
+    Partition nào có trong lần chạy này được ghi đè (delete_matching) để dataset luôn phản ánh
+    trạng thái mới nhất của đơn; các partition khác giữ nguyên.
+
+    Args:
+        df (DataFrame): Dữ liệu đơn hàng đã xử lý
+        settings (dict): Section export.parquet của config.json
+        logger: Logger instance
+        timestamp (str): Hậu tố tên file của lần chạy
+
+    Returns:
+        str | None: Đường dẫn manifest, None nếu không xuất được
+    """
+    settings = settings or {}
+    if not PYARROW_AVAILABLE:
+        if logger:
+            logger.warning("⚠️ pyarrow chưa được cài - bỏ qua Parquet export (pip install pyarrow)")
+        return None
+
+    root_dir = settings.get('output_dir', 'data/parquet/orders')
+    partition_cols = settings.get('partition_by', DEFAULT_PARTITIONS)
+    compression = settings.get('compression', 'zstd')
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    typed = build_typed_frame(df, settings.get('columns'))
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+
+    run_files = set()
+    os.makedirs(root_dir, exist_ok=True)
+    pq.write_to_dataset(
+        table,
+        root_path=root_dir,
+        partition_cols=partition_cols,
+        basename_template=f"part-{timestamp}-{{i}}.parquet",
+        existing_data_behavior=settings.get('existing_data_behavior', 'delete_matching'),
+        compression=compression,
+        file_visitor=lambda written: run_files.add(os.path.relpath(written.path, root_dir))
+    )
+
+    manifest_path = write_manifest(root_dir, run_files, partition_cols, compression, str(table.schema))
+    if logger:
+        logger.info(f"✅ Đã xuất Parquet: {root_dir} ({len(typed)} đơn, {len(run_files)} file, "
+                    f"nén {compression})")
+    return manifest_path
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ Product Cache Module - Cache chi tiết sản phẩm (invoiceJSON) trên đĩa
+Handles: SQLite store keyed by order id, TTL, invalidation khi trạng thái đơn thay đổi, hit/miss stats
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ProductDetailCache:
+    """
+    🗄️ Cache {order_id: details} trong SQLite để các lần chạy trùng khoảng ngày
+    chỉ gọi invoiceJSON cho đơn hàng mới hoặc đã đổi trạng thái
+    """
+
+    def __init__(self, db_path="data/product_cache.db", ttl_hours=72, logger=None):
+        """
+        Args:
+            db_path (str): Đường dẫn file SQLite
+            ttl_hours (float): Thời gian sống của một entry (0 = không hết hạn)
+            logger: Logger instance
+        """
+        self.db_path = db_path
+        self.ttl_seconds = float(ttl_hours or 0) * 3600
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'invalidated': 0, 'stored': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_details (
+                order_id TEXT PRIMARY KEY,
+                status TEXT,
+                details TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, order_ids, statuses=None):
+        """
+        🔍 Tra cache cho danh sách order id
+
+        Args:
+            order_ids (list): Danh sách order id
+            statuses (dict): {order_id: trạng thái hiện tại} để phát hiện đơn đã đổi trạng thái
+
+        Returns:
+            tuple: (cached_details dict, missing_ids list)
+        """
+        statuses = statuses or {}
+        ids = [str(order_id) for order_id in order_ids]
+        rows = {}
+
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for order_id, status, details, fetched_at in self._conn.execute(
+                        f"SELECT order_id, status, details, fetched_at FROM product_details "
+                        f"WHERE order_id IN ({placeholders})", chunk):
+                    rows[order_id] = (status, details, fetched_at)
+
+        now = time.time()
+        cached, missing = {}, []
+
+        for order_id in ids:
+            row = rows.get(order_id)
+            if row is None:
+                missing.append(order_id)
+                self.stats['misses'] += 1
+                continue
+
+            status, details, fetched_at = row
+            if self.ttl_seconds and now - fetched_at > self.ttl_seconds:
+                missing.append(order_id)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                continue
+
+            current_status = statuses.get(order_id)
+            if current_status is not None and status is not None and str(current_status) != status:
+                missing.append(order_id)
+                self.stats['invalidated'] += 1
+                self.stats['misses'] += 1
+                continue
+
+            cached[order_id] = json.loads(details)
+            self.stats['hits'] += 1
+
+        return cached, missing
+
+    def put_many(self, product_details, statuses=None):
+        """💾 Lưu chi tiết vừa fetch vào cache"""
+        statuses = statuses or {}
+        now = time.time()
+        records = [
+            (str(order_id), None if statuses.get(str(order_id)) is None else str(statuses[str(order_id)]),
+             json.dumps(details, ensure_ascii=False), now)
+            for order_id, details in product_details.items()
+        ]
+        if not records:
+            return 0
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO product_details (order_id, status, details, fetched_at) "
+                "VALUES (?, ?, ?, ?)", records)
+            self._conn.commit()
+
+        self.stats['stored'] += len(records)
+        return len(records)
+
+    def purge_expired(self):
+        """🧹 Xóa các entry đã hết hạn"""
+        if not self.ttl_seconds:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM product_details WHERE fetched_at < ?",
+                                        (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self):
+        """📊 Thống kê hit/miss của lần chạy hiện tại"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        hit_rate = round(self.stats['hits'] / lookups * 100, 1) if lookups else 0.0
+        return dict(self.stats, lookups=lookups, hit_rate=hit_rate)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_product_cache(settings=None, logger=None, base_dir=None):
+    """
+    🗄️ Mở cache theo section `product_cache` của config.json
+
+    Returns:
+        ProductDetailCache | None: None nếu cache bị tắt hoặc không mở được
+    """
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    db_path = settings.get('db_path', 'data/product_cache.db')
+    if base_dir and not os.path.isabs(db_path):
+        db_path = os.path.join(base_dir, db_path)
+
+    try:
+        cache = ProductDetailCache(db_path, settings.get('ttl_hours', 72), logger)
+        cache.purge_expired()
+        return cache
+
+    except Exception as e:
+        if logger:
+            logger.warning(f"⚠️ Không mở được product cache: {e}")
+        return None
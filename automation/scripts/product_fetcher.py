@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 Product Fetcher Module - Lấy chi tiết sản phẩm (invoiceJSON) song song
+Handles: asyncio fetching, shared connection pool, bounded concurrency, token-bucket rate limit
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from scripts.datatables_api import build_pooled_session
+
+
+DEFAULT_API_URL = "https://one.tga.com.vn/so/invoiceJSON"
+
+
+class TokenBucket:
+    """🪣 Token bucket giới hạn số request/giây (dùng được cho cả thread và asyncio)"""
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = float(rate_per_second) if rate_per_second else 0.0
+        self.capacity = float(burst or max(1, self.rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Lấy một token, trả về số giây phải chờ trước khi gửi request"""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class ProductDetailFetcher:
+    """
+    📦 Gọi invoiceJSON cho nhiều batch order id cùng lúc qua một connection pool dùng chung
+    Trả về map {order_id: details} giống extract_product_details_batch cũ
+    """
+
+    def __init__(self, cookies, logger, parse_function, api_url=DEFAULT_API_URL, batch_size=20,
+                 concurrency=8, rate_per_second=10, burst=None, timeout=15, headers=None):
+        """
+        Args:
+            cookies (dict): Cookies đăng nhập lấy từ WebDriver
+            logger: Logger instance
+            parse_function: Hàm parse list `data` của invoiceJSON -> {order_id: details}
+            api_url (str): Endpoint invoiceJSON
+            batch_size (int): Số order id mỗi request
+            concurrency (int): Số request đồng thời tối đa
+            rate_per_second (float): Giới hạn request/giây (0 = không giới hạn)
+            burst (int): Số request được gửi dồn tối đa
+            timeout (int): Timeout mỗi request (giây)
+            headers (dict): Header bổ sung (User-Agent, Referer...)
+        """
+        self.cookies = cookies or {}
+        self.logger = logger
+        self.parse_function = parse_function
+        self.api_url = api_url
+        self.batch_size = max(1, int(batch_size))
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.timeout = timeout
+        self.headers = headers or {}
+
+        self.failed_batches = []
+        self.stats = {'requests': 0, 'failed': 0, 'orders': 0, 'duration': 0.0, 'engine': None}
+
+    def _batches(self, order_ids):
+        ids = [str(order_id) for order_id in order_ids]
+        return [ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size)]
+
+    def _parse_payload(self, data):
+        """Parse payload invoiceJSON; `error: true` hoặc không có chi tiết nào thì raise để batch vào failed_batches"""
+        if data.get('error', True) or not data.get('data'):
+            raise Exception("invoiceJSON trả về lỗi hoặc dữ liệu rỗng")
+        batch_details = self.parse_function(data['data'])
+        if not batch_details:
+            raise Exception("invoiceJSON không có chi tiết sản phẩm nào")
+        return batch_details
+
+    async def _fetch_batch_async(self, session, semaphore, batch_ids):
+        async with semaphore:
+            await self.bucket.acquire_async()
+            self.stats['requests'] += 1
+            try:
+                async with session.get(self.api_url, params={'id': ','.join(batch_ids)}) as response:
+                    if response.status != 200:
+                        raise Exception(f"HTTP {response.status}")
+                    data = await response.json(content_type=None)
+                    return self._parse_payload(data)
+
+            except Exception as e:
+                self.logger.warning(f"⚠️ invoiceJSON batch lỗi ({len(batch_ids)} đơn): {e}")
+                self.failed_batches.append(batch_ids)
+                self.stats['failed'] += 1
+                return {}
+
+    async def fetch_all_async(self, order_ids):
+        """⚡ Lấy chi tiết cho tất cả order id bằng aiohttp"""
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookies=self.cookies, headers=self.headers) as session:
+            results = await asyncio.gather(*[
+                self._fetch_batch_async(session, semaphore, batch_ids)
+                for batch_ids in self._batches(order_ids)
+            ])
+
+        product_details = {}
+        for batch_details in results:
+            product_details.update(batch_details)
+        return product_details
+
+    def _fetch_batch_threaded(self, session, batch_ids):
+        self.bucket.acquire()
+        self.stats['requests'] += 1
+        try:
+            response = session.get(self.api_url, params={'id': ','.join(batch_ids)}, timeout=self.timeout)
+            response.raise_for_status()
+            return self._parse_payload(response.json())
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ invoiceJSON batch lỗi ({len(batch_ids)} đơn): {e}")
+            self.failed_batches.append(batch_ids)
+            self.stats['failed'] += 1
+            return {}
+
+    def fetch_all_threaded(self, order_ids):
+        """🧵 Fallback khi không có aiohttp: thread pool + requests.Session keep-alive"""
+        session = build_pooled_session(pool_size=self.concurrency)
+        session.cookies.update(self.cookies)
+        session.headers.update(self.headers)
+
+        product_details = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for batch_details in executor.map(lambda ids: self._fetch_batch_threaded(session, ids),
+                                                  self._batches(order_ids)):
+                    product_details.update(batch_details)
+        finally:
+            session.close()
+
+        return product_details
+
+    def _run_async(self, order_ids):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_all_async(order_ids))
+
+        # Đang ở trong event loop (vd: FastAPI) -> chạy loop riêng trong thread khác
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.fetch_all_async(order_ids)).result()
+
+    def fetch(self, order_ids):
+        """
+        📦 Lấy chi tiết sản phẩm cho danh sách order id
+
+        Returns:
+            dict: {order_id: details}; các batch lỗi nằm trong self.failed_batches
+        """
+        start_time = time.time()
+        self.failed_batches = []
+
+        if not order_ids:
+            return {}
+
+        if AIOHTTP_AVAILABLE:
+            self.stats['engine'] = 'aiohttp'
+            product_details = self._run_async(order_ids)
+        else:
+            self.stats['engine'] = 'threads'
+            product_details = self.fetch_all_threaded(order_ids)
+
+        self.stats['orders'] = len(product_details)
+        self.stats['duration'] = round(time.time() - start_time, 2)
+        self.logger.info(f"✅ invoiceJSON ({self.stats['engine']}): {len(product_details)}/{len(order_ids)} đơn, "
+                         f"{self.stats['requests']} request, {self.stats['failed']} lỗi, "
+                         f"{self.stats['duration']}s")
+        return product_details
+
+
+def fetch_product_details(driver, logger, order_ids, parse_function, settings=None, session=None):
+    """
+    ⚡ Convenience function: lấy chi tiết sản phẩm bằng cookies của WebDriver
+
+    Args:
+        settings (dict): Section `product_details` trong config.json
+        session: requests.Session đã đăng nhập (HTTP engine) - dùng thay cookies của WebDriver
+
+    Returns:
+        tuple: (product_details, failed_batches)
+    """
+    settings = settings or {}
+    if session is not None:
+        cookies = {cookie.name: cookie.value for cookie in session.cookies}
+        user_agent = session.headers.get('User-Agent')
+    else:
+        cookies = {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+        except Exception:
+            user_agent = None
+
+    fetcher = ProductDetailFetcher(
+        cookies, logger, parse_function,
+        api_url=settings.get('api_url', DEFAULT_API_URL),
+        batch_size=settings.get('batch_size', 20),
+        concurrency=settings.get('concurrency', 8),
+        rate_per_second=settings.get('rate_per_second', 10),
+        burst=settings.get('burst'),
+        timeout=settings.get('timeout', 15),
+        headers={'User-Agent': user_agent} if user_agent else None
+    )
+    return fetcher.fetch(order_ids), fetcher.failed_batches
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🚫 Request Blocking Module - Chặn font, stylesheet, analytics, chat widget... qua Chrome DevTools
+Handles: danh sách chặn Network.setBlockedURLs theo từng trang (allow/deny theo URL pattern),
+chế độ debug báo số request / bytes tiết kiệm được mỗi lần tải trang
+"""
+
+import fnmatch
+import json
+import re
+import time
+
+from scripts.network_capture import enable_network_domain
+
+
+class RequestBlocker:
+    """
+    🚫 Áp danh sách URL bị chặn cho một WebDriver trước mỗi lần điều hướng
+
+    Pattern theo cú pháp của Network.setBlockedURLs (`*` là wildcard). Rule theo trang:
+    {'url': regex URL trang, 'allow': [pattern được bỏ chặn], 'block': [pattern chặn thêm]}
+    """
+
+    def __init__(self, driver, logger, block=None, pages=None, debug=False, baseline=True, forward=None):
+        """
+        Args:
+            driver: WebDriver (Chrome)
+            logger: Logger instance
+            block (list): Pattern chặn cho mọi trang
+            pages (list): Rule allow/deny theo URL trang
+            debug (bool): Đo request/bytes mỗi lần tải trang (cần performance log)
+            baseline (bool): Ở debug, tải trang lần đầu không chặn để biết kích thước các request bị chặn
+            forward: Hàm nhận các entry performance log đã đọc (vd: NetworkCapture.poll) để không làm mất sự kiện
+        """
+        self.driver = driver
+        self.logger = logger
+        self.block = list(block or [])
+        self.pages = [dict(rule, pattern=re.compile(rule['url'])) for rule in (pages or []) if rule.get('url')]
+        self.debug = debug
+        self.baseline = baseline
+        self.forward = forward
+
+        self.applied = None             # Danh sách đang áp trên driver
+        self.sizes = {}                 # URL -> bytes (học từ lần tải baseline)
+        self.baselined = set()
+        self.page_reports = []
+        self.network_enabled = False
+
+    def patterns_for(self, url):
+        """Danh sách pattern chặn cho trang `url` sau khi áp các rule khớp"""
+        patterns = list(self.block)
+        for rule in self.pages:
+            if not rule['pattern'].search(url or ''):
+                continue
+            allowed = rule.get('allow', [])
+            patterns = [pattern for pattern in patterns
+                        if not any(fnmatch.fnmatchcase(pattern, allow) for allow in allowed)]
+            patterns += [pattern for pattern in rule.get('block', []) if pattern not in patterns]
+        return patterns
+
+    def apply(self, url=None, patterns=None):
+        """
+        Áp danh sách chặn cho trang sắp mở (bỏ qua nếu không đổi)
+
+        Returns:
+            bool: True nếu danh sách đang áp đúng như yêu cầu
+        """
+        patterns = self.patterns_for(url) if patterns is None else patterns
+        if patterns == self.applied:
+            return True
+        try:
+            if not self.network_enabled:
+                # Network domain bật 2 lần không sao (network capture có thể đã bật với buffer riêng)
+                self.network_enabled = enable_network_domain(self.driver) or self.network_enabled
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            self.applied = patterns
+            return True
+        except Exception as e:
+            self.logger.warning(f"⚠️ Không áp được danh sách chặn request: {e}")
+            return False
+
+    def navigate(self, url=None, refresh=False):
+        """
+        🌐 Mở `url` (hoặc refresh trang hiện tại) với danh sách chặn của trang đó
+
+        Args:
+            url (str): URL cần mở (bỏ qua khi refresh)
+            refresh (bool): driver.refresh() thay vì driver.get()
+        """
+        if refresh:
+            url = self.driver.current_url
+
+        if self.debug and self.baseline and self._page_key(url) not in self.baselined:
+            self.baselined.add(self._page_key(url))
+            self.apply(patterns=[])
+            self._drain()
+            self._load(url, refresh)
+            self._learn_sizes(self._drain())
+
+        self.apply(url)
+        if self.debug:
+            self._drain()
+        started = time.time()
+        self._load(url, refresh)
+        if self.debug:
+            self._report(url, self._drain(), time.time() - started)
+
+    def _load(self, url, refresh):
+        if refresh:
+            self.driver.refresh()
+        else:
+            self.driver.get(url)
+
+    @staticmethod
+    def _page_key(url):
+        return (url or '').split('?')[0].split('#')[0]
+
+    def _drain(self):
+        """Đọc (và xóa) performance log, chuyển tiếp cho người dùng log khác"""
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return []
+        if self.forward and entries:
+            try:
+                self.forward(entries)
+            except Exception:
+                pass
+        return entries
+
+    @staticmethod
+    def _traffic(entries):
+        """Tổng hợp request theo performance log: {'urls', 'bytes', 'blocked'}"""
+        urls, loaded, blocked = {}, {}, []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            method, params = message.get('method'), message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                urls[request_id] = params.get('request', {}).get('url', '')
+            elif method == 'Network.loadingFinished':
+                loaded[request_id] = params.get('encodedDataLength', 0) or 0
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                blocked.append(urls.get(request_id, ''))
+        return {'urls': urls, 'bytes': loaded, 'blocked': blocked}
+
+    def _learn_sizes(self, entries):
+        traffic = self._traffic(entries)
+        for request_id, size in traffic['bytes'].items():
+            if request_id in traffic['urls']:
+                self.sizes[traffic['urls'][request_id]] = size
+
+    def _report(self, url, entries, seconds):
+        traffic = self._traffic(entries)
+        known = [blocked_url for blocked_url in traffic['blocked'] if blocked_url in self.sizes]
+        report = {
+            'url': url,
+            'requests': len(traffic['bytes']),
+            'bytes': sum(traffic['bytes'].values()),
+            'blocked_requests': len(traffic['blocked']),
+            'saved_bytes': sum(self.sizes[blocked_url] for blocked_url in known),
+            'unmeasured_blocked': len(traffic['blocked']) - len(known),
+            'seconds': round(seconds, 2),
+            'blocked_urls': traffic['blocked']
+        }
+        self.page_reports.append(report)
+
+        saved = f"~{report['saved_bytes'] / 1024:.0f} KB" if known else "chưa đo"
+        self.logger.info(
+            f"🚫 {self._page_key(url)}: chặn {report['blocked_requests']} request ({saved}), "
+            f"tải {report['requests']} request ({report['bytes'] / 1024:.0f} KB) trong {report['seconds']}s"
+        )
+        for blocked_url in traffic['blocked']:
+            self.logger.debug(f"   🚫 {blocked_url}")
+        return report
+
+    def get_stats(self):
+        """Tổng hợp các lần tải trang đã đo ở chế độ debug"""
+        return {
+            'page_loads': len(self.page_reports),
+            'blocked_requests': sum(report['blocked_requests'] for report in self.page_reports),
+            'saved_bytes': sum(report['saved_bytes'] for report in self.page_reports),
+            'loaded_bytes': sum(report['bytes'] for report in self.page_reports)
+        }
+
+
+def create_request_blocker(driver, logger, settings=None, forward=None):
+    """
+    🚫 Convenience function: RequestBlocker theo section `request_blocking` của config.json
+
+    Returns:
+        RequestBlocker | None: None nếu bị tắt
+    """
+    settings = settings or {}
+    if not settings.get('enabled', False) or driver is None:
+        return None
+    return RequestBlocker(driver, logger, block=settings.get('block'), pages=settings.get('pages'),
+                          debug=settings.get('debug', False), baseline=settings.get('debug_baseline', True),
+                          forward=forward)
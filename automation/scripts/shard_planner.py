@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗺️ Shard Planner Module - Chia khoảng ngày thành các shard vừa một trang (≤ 2000 dòng)
+Handles: đếm số đơn theo khoảng ngày (probe), chia đệ quy theo ngày / nửa ngày,
+lưu/đọc shard plan JSON để các worker chạy và retry độc lập
+"""
+
+import json
+import math
+import os
+from datetime import datetime, timedelta
+
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# #date_from/#date_to của ONE là ô chỉ có ngày; chưa xác nhận backend lọc theo phần giờ của
+# 'YYYY-MM-DD HH:MM:SS', nên shard chạy qua DateCustomizer nhỏ nhất là một ngày
+FILTER_MIN_SPAN_HOURS = 24
+
+
+def _parse(value, is_end=False):
+    """'YYYY-MM-DD' hoặc 'YYYY-MM-DD HH:MM:SS' -> datetime (ngày kết thúc tính tới hết ngày)"""
+    if len(value) <= 10:
+        moment = datetime.strptime(value, DATE_FORMAT)
+        return moment + timedelta(days=1) if is_end else moment
+    moment = datetime.strptime(value, DATETIME_FORMAT)
+    return moment + timedelta(seconds=1) if is_end else moment
+
+
+def _format(start, end):
+    """Khoảng [start, end) -> (start, end) dạng chuỗi cho DateCustomizer.set_date_range"""
+    whole_days = start.time() == datetime.min.time() and end.time() == datetime.min.time()
+    if whole_days:
+        return start.strftime(DATE_FORMAT), (end - timedelta(days=1)).strftime(DATE_FORMAT)
+    return start.strftime(DATETIME_FORMAT), (end - timedelta(seconds=1)).strftime(DATETIME_FORMAT)
+
+
+class ShardPlanner:
+    """
+    🗺️ Lập shard plan: đếm số đơn của khoảng ngày, nếu vượt page_size thì chia nhỏ
+    (số phần ước theo count/page_size, cắt theo ranh giới ngày, nhỏ nhất min_span_hours)
+    """
+
+    def __init__(self, count_function, page_size=2000, min_span_hours=24, headroom=0.8, logger=None):
+        """
+        Args:
+            count_function: count(start, end) -> int | None, đếm số đơn của khoảng (chuỗi như set_date_range)
+            page_size (int): Số dòng tối đa một trang (set_display_limit)
+            min_span_hours (int): Khoảng nhỏ nhất được phép chia tới (24 = ngày, 12 = nửa ngày)
+            headroom (float): Tỉ lệ page_size dùng khi ước số phần (chừa chỗ cho ngày lệch tải)
+            logger: Logger instance
+        """
+        self.count_function = count_function
+        self.page_size = int(page_size)
+        self.min_span = timedelta(hours=max(1, int(min_span_hours)))
+        self.headroom = min(max(float(headroom), 0.1), 1.0)
+        self.logger = logger
+        self.probes = 0
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def _count(self, start, end):
+        self.probes += 1
+        start_text, end_text = _format(start, end)
+        try:
+            count = self.count_function(start_text, end_text)
+        except Exception as e:
+            self._log('warning', f"⚠️ Probe {start_text} → {end_text} lỗi: {e}")
+            return None
+        self._log('info', f"🔎 Probe {start_text} → {end_text}: {count if count is not None else '?'} đơn")
+        return count
+
+    def _split_points(self, start, end, count):
+        """
+        Điểm cắt: chia thành ~count/(page_size*headroom) phần bằng nhau, làm tròn theo ngày
+        (chỉ cắt theo min_span khi khoảng không còn chia theo ngày được nữa)
+        """
+        day = timedelta(days=1)
+        midnight = datetime.min.time()
+        aligned = start.time() == midnight and end.time() == midnight and end - start >= 2 * day
+        step = day if aligned or self.min_span > day else self.min_span
+
+        units = int((end - start) / step)
+        parts = math.ceil(count / (self.page_size * self.headroom)) if count else 2
+        parts = max(2, min(parts, units))
+        points = [start]
+        for index in range(1, parts):
+            offset = round(units * index / parts)
+            point = start + step * offset
+            if point > points[-1]:
+                points.append(point)
+        points.append(end)
+        return points
+
+    def _plan_range(self, start, end, count=None):
+        if count is None:
+            count = self._count(start, end)
+
+        start_text, end_text = _format(start, end)
+        shard = {'start': start_text, 'end': end_text, 'expected': count, 'oversize': False}
+
+        if count is None:
+            # Không đếm được: giữ nguyên khoảng, worker phân trang như cũ
+            shard['oversize'] = True
+            return [shard]
+        if count <= self.page_size:
+            return [shard]
+        if end - start <= self.min_span:
+            self._log('warning', f"⚠️ {start_text} → {end_text} có {count:,} đơn > {self.page_size:,} "
+                                 f"nhưng không chia nhỏ hơn được, worker sẽ phân trang")
+            shard['oversize'] = True
+            return [shard]
+
+        points = self._split_points(start, end, count)
+        shards = []
+        for piece_start, piece_end in zip(points, points[1:]):
+            shards.extend(self._plan_range(piece_start, piece_end))
+        return shards
+
+    def plan(self, start_date, end_date):
+        """
+        🗺️ Lập shard plan cho [start_date, end_date] (tính cả 2 đầu)
+
+        Returns:
+            list: [{'shard_id', 'start', 'end', 'expected', 'oversize'}, ...] theo thứ tự thời gian
+        """
+        start, end = _parse(start_date), _parse(end_date, is_end=True)
+        if end <= start:
+            raise ValueError(f"Khoảng ngày không hợp lệ: {start_date} > {end_date}")
+
+        self.probes = 0
+        shards = self._plan_range(start, end)
+        for index, shard in enumerate(shards):
+            shard['shard_id'] = f"s{index + 1:03d}"
+
+        expected = sum(shard['expected'] or 0 for shard in shards)
+        oversize = sum(1 for shard in shards if shard['oversize'])
+        self._log('info', f"🗺️ Shard plan: {len(shards)} shard, ~{expected:,} đơn, "
+                          f"{oversize} shard cần phân trang, {self.probes} lần probe")
+        return shards
+
+
+def make_filter_probe(driver, logger, page_size=2000, time_type='ecom'):
+    """
+    Tạo count_function dùng trình duyệt đã đăng nhập: lọc theo khoảng ngày rồi đọc tổng số dòng
+    của DataTables (PaginationHandler.get_total_records)
+    """
+    from scripts.date_customizer import DateCustomizer
+    from scripts.pagination_handler import PaginationHandler
+
+    date_customizer = DateCustomizer(driver, logger)
+    pagination_handler = PaginationHandler(driver, logger)
+
+    def count(start, end):
+        if not date_customizer.set_date_range(start, end, time_type):
+            return None
+        if not date_customizer.set_display_limit(page_size):
+            return None
+        if not date_customizer.apply_filters(wait_for_load=True):
+            return None
+        return pagination_handler.get_total_records()
+
+    return count
+
+
+def sub_day_shards(shards):
+    """shard_id của các shard có phần giờ (lập với min_span_hours < 24) - chưa chạy được qua bộ lọc ngày"""
+    return [shard.get('shard_id', '?') for shard in shards
+            if len(shard['start']) > 10 or len(shard['end']) > 10]
+
+
+def save_shard_plan(shards, path, metadata=None):
+    """💾 Ghi shard plan ra JSON (ghi file tạm rồi rename)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata or {}, 'shards': shards}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_shard_plan(path):
+    """📂 Đọc shard plan đã lưu (list shard)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['shards']
+
+
+def plan_date_shards(count_function, start_date, end_date, page_size=2000, min_span_hours=24, logger=None):
+    """Convenience function: lập shard plan cho khoảng ngày"""
+    planner = ShardPlanner(count_function, page_size=page_size, min_span_hours=min_span_hours, logger=logger)
+    return planner.plan(start_date, end_date)
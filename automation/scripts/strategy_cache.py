@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎯 Strategy Cache Module - Nhớ selector / chiến lược nào thắng trên từng trang
+Handles: SQLite store win/miss theo (ladder, page fingerprint, strategy), thử strategy thắng lần trước trước,
+báo cáo thời gian bị tốn vào các lần thử trượt
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def page_fingerprint(driver):
+    """
+    🔖 Fingerprint của trang hiện tại: path URL, id số thay bằng ':id' (/so/detail/505276 -> /so/detail/:id)
+    """
+    try:
+        path = urlparse(driver.current_url).path or '/'
+    except Exception:
+        return ''
+    return re.sub(r'/\d+(?=/|$)', '/:id', path.rstrip('/') or '/')
+
+
+class StrategyCache:
+    """
+    🎯 Thống kê từng bậc của một "ladder" (chuỗi selector/chiến lược thử lần lượt) theo trang,
+    để lần sau thử bậc thắng gần nhất trước và không tốn implicit wait cho các bậc trượt
+    """
+
+    def __init__(self, db_path="data/strategy_cache.db", logger=None):
+        """
+        Args:
+            db_path (str): Đường dẫn file SQLite
+            logger: Logger instance
+        """
+        self.db_path = db_path
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._stats = {}        # (ladder, fingerprint) -> {strategy: {wins, misses, win_seconds, miss_seconds, last_win}}
+        self.stats = {'attempts': 0, 'wins': 0, 'misses': 0, 'miss_seconds': 0.0, 'first_try_wins': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS strategy_stats (
+                ladder TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                wins INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                win_seconds REAL NOT NULL DEFAULT 0,
+                miss_seconds REAL NOT NULL DEFAULT 0,
+                last_win REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (ladder, fingerprint, strategy)
+            )
+        """)
+        self._conn.commit()
+
+        for ladder, fingerprint, strategy, wins, misses, win_seconds, miss_seconds, last_win in self._conn.execute(
+                "SELECT ladder, fingerprint, strategy, wins, misses, win_seconds, miss_seconds, last_win "
+                "FROM strategy_stats"):
+            self._stats.setdefault((ladder, fingerprint), {})[strategy] = {
+                'wins': wins, 'misses': misses, 'win_seconds': win_seconds,
+                'miss_seconds': miss_seconds, 'last_win': last_win
+            }
+
+    def order(self, ladder, strategies, fingerprint=''):
+        """
+        🔀 Sắp lại thứ tự thử: bậc thắng gần nhất, rồi các bậc từng thắng (tỉ lệ thắng giảm dần),
+        rồi bậc chưa thử (giữ thứ tự gốc), cuối cùng là bậc chỉ toàn trượt
+
+        Returns:
+            list: strategies theo thứ tự nên thử
+        """
+        with self._lock:
+            stats = dict(self._stats.get((ladder, fingerprint), {}))
+
+        winners = [strategy for strategy in strategies if stats.get(strategy, {}).get('last_win')]
+        last_winner = max(winners, key=lambda strategy: stats[strategy]['last_win']) if winners else None
+
+        def rank(strategy):
+            entry = stats.get(strategy)
+            if strategy == last_winner:
+                return (0, 0)
+            if not entry:
+                return (2, 0)
+            if entry['wins']:
+                return (1, -entry['wins'] / (entry['wins'] + entry['misses']))
+            return (3, 0)
+
+        return sorted(strategies, key=rank)
+
+    def record(self, ladder, strategy, success, seconds, fingerprint=''):
+        """📝 Ghi kết quả một lần thử (cập nhật bộ nhớ và SQLite)"""
+        now = time.time()
+        with self._lock:
+            entry = self._stats.setdefault((ladder, fingerprint), {}).setdefault(strategy, {
+                'wins': 0, 'misses': 0, 'win_seconds': 0.0, 'miss_seconds': 0.0, 'last_win': None
+            })
+            if success:
+                entry['wins'] += 1
+                entry['win_seconds'] += seconds
+                entry['last_win'] = now
+            else:
+                entry['misses'] += 1
+                entry['miss_seconds'] += seconds
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO strategy_stats (ladder, fingerprint, strategy, wins, misses, "
+                "win_seconds, miss_seconds, last_win, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ladder, fingerprint, strategy, entry['wins'], entry['misses'], entry['win_seconds'],
+                 entry['miss_seconds'], entry['last_win'], now))
+            self._conn.commit()
+
+        self.stats['attempts'] += 1
+        if success:
+            self.stats['wins'] += 1
+        else:
+            self.stats['misses'] += 1
+            self.stats['miss_seconds'] += seconds
+
+    def report(self, top=10):
+        """
+        📊 Các bậc tốn nhiều thời gian trượt nhất (tích lũy qua mọi lần chạy)
+
+        Returns:
+            list: [{ladder, fingerprint, strategy, wins, misses, win_rate, miss_seconds, avg_miss_seconds}]
+        """
+        with self._lock:
+            rows = [
+                dict(entry, ladder=ladder, fingerprint=fingerprint, strategy=strategy)
+                for (ladder, fingerprint), strategies in self._stats.items()
+                for strategy, entry in strategies.items()
+            ]
+
+        for row in rows:
+            attempts = row['wins'] + row['misses']
+            row['win_rate'] = round(row['wins'] / attempts * 100, 1) if attempts else 0.0
+            row['avg_miss_seconds'] = round(row['miss_seconds'] / row['misses'], 2) if row['misses'] else 0.0
+            row['miss_seconds'] = round(row['miss_seconds'], 2)
+            row.pop('last_win', None)
+            row.pop('win_seconds', None)
+
+        rows.sort(key=lambda row: row['miss_seconds'], reverse=True)
+        return rows[:top] if top else rows
+
+    def log_report(self, top=5):
+        """📊 Ghi log thống kê lần chạy này + các bậc trượt tốn thời gian nhất"""
+        if not self.logger or not self.stats['attempts']:
+            return
+        self.logger.info(
+            f"🎯 Strategy cache: {self.stats['attempts']} lần thử, {self.stats['first_try_wins']} thắng ngay bậc đầu, "
+            f"{self.stats['misses']} trượt tốn {self.stats['miss_seconds']:.1f}s"
+        )
+        for row in self.report(top):
+            if row['misses']:
+                self.logger.info(
+                    f"   🎯 {row['ladder']} @ {row['fingerprint'] or '-'} | {row['strategy']}: "
+                    f"{row['win_rate']}% thắng, {row['misses']} trượt = {row['miss_seconds']}s"
+                )
+
+    def get_stats(self):
+        """📊 Thống kê của lần chạy hiện tại"""
+        return dict(self.stats, miss_seconds=round(self.stats['miss_seconds'], 2))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def try_strategies(cache, ladder, strategies, attempt, fingerprint='', logger=None):
+    """
+    🎯 Thử lần lượt các strategy (theo thứ tự cache đề xuất nếu có) tới khi attempt trả về giá trị truthy
+
+    Args:
+        cache (StrategyCache | None): None = thử theo thứ tự gốc, không ghi thống kê
+        ladder (str): Tên ladder (vd: 'login.username')
+        strategies (list): Key của từng bậc (selector hoặc tên chiến lược)
+        attempt: Hàm nhận key, trả về kết quả (falsy hoặc exception = trượt)
+        fingerprint (str): Fingerprint trang (page_fingerprint)
+
+    Returns:
+        tuple: (strategy thắng, kết quả) hoặc (None, None)
+    """
+    ordered = cache.order(ladder, strategies, fingerprint) if cache else list(strategies)
+
+    for position, strategy in enumerate(ordered):
+        started = time.perf_counter()
+        try:
+            result = attempt(strategy)
+        except Exception as e:
+            if logger:
+                logger.debug(f"Strategy {ladder} | {strategy} failed: {e}")
+            result = None
+
+        if cache:
+            cache.record(ladder, strategy, bool(result), time.perf_counter() - started, fingerprint)
+        if result:
+            if cache and position == 0:
+                cache.stats['first_try_wins'] += 1
+            return strategy, result
+
+    return None, None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def open_strategy_cache(settings=None, logger=None, base_dir=None):
+    """
+    🎯 Mở strategy cache theo section `strategy_cache` của config.json và dùng chung trong process
+    (PaginationHandler... tạo ở nơi khác lấy qua get_shared_strategy_cache)
+
+    Returns:
+        StrategyCache | None: None nếu bị tắt hoặc không mở được
+    """
+    global _shared_cache
+
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    db_path = settings.get('db_path', 'data/strategy_cache.db')
+    if base_dir and not os.path.isabs(db_path):
+        db_path = os.path.join(base_dir, db_path)
+
+    with _shared_lock:
+        if _shared_cache is not None and _shared_cache.db_path == db_path:
+            return _shared_cache
+        try:
+            _shared_cache = StrategyCache(db_path, logger)
+            return _shared_cache
+
+        except Exception as e:
+            if logger:
+                logger.warning(f"⚠️ Không mở được strategy cache: {e}")
+            return None
+
+
+def get_shared_strategy_cache():
+    """Strategy cache đã mở trong process (None nếu chưa mở / bị tắt)"""
+    return _shared_cache
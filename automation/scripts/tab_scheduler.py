@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗂️ Tab Scheduler Module - Nhiều tab trong MỘT trình duyệt đã đăng nhập, chạy shard luân phiên
+Handles: mở K tab dùng chung cookie, task dạng generator yield TabWait khi chờ mạng,
+scheduler một thread chuyển tab (switch_to.window) để lúc tab này chờ server thì tab khác trích xuất
+"""
+
+import time
+from collections import deque
+
+
+NAVIGATION_MARK_SCRIPT = "window.__tabNavigationPending = true;"
+NAVIGATION_DONE_SCRIPT = """
+return !window.__tabNavigationPending && document.readyState === 'complete' &&
+       (typeof $ === 'undefined' || !$.active);
+"""
+
+
+def mark_navigation(driver):
+    """Đánh dấu document hiện tại trước khi submit form / điều hướng bằng JS (document mới không có dấu)"""
+    driver.execute_script(NAVIGATION_MARK_SCRIPT)
+
+
+def navigation_finished(driver):
+    """True khi trang đã được thay bằng document mới và tải xong (dùng làm predicate của TabWait)"""
+    return bool(driver.execute_script(NAVIGATION_DONE_SCRIPT))
+
+
+class TabWait:
+    """
+    ⏳ Task yield TabWait khi cần chờ (server trả trang, bảng vẽ lại, HTTP chạy nền...):
+    scheduler kiểm tra predicate(driver) trên tab của task giữa lượt của các tab khác,
+    rồi gửi kết quả predicate (False nếu hết timeout) lại cho task
+    """
+
+    def __init__(self, name, predicate, timeout=30):
+        self.name = name
+        self.predicate = predicate
+        self.timeout = timeout
+        self.started = None
+
+
+class TabScheduler:
+    """
+    🗂️ Chạy task(tab_handle, shard) cho từng shard trên K tab của cùng một WebDriver.
+    WebDriver chỉ điều khiển một tab tại một thời điểm nên scheduler chạy trên một thread, luân phiên cooperative:
+    phần trích xuất của một tab chạy trong lúc các tab khác đang chờ mạng
+    """
+
+    def __init__(self, driver, logger=None, tabs=3, poll_interval=0.05, retries=0):
+        self.driver = driver
+        self.logger = logger
+        self.tabs = max(1, int(tabs or 1))
+        self.poll_interval = poll_interval
+        self.retries = max(0, int(retries or 0))
+
+        self.handles = []
+        self._current = None
+        self.stats = {'switches': 0, 'waits': 0, 'wait_seconds': 0.0, 'busy_seconds': 0.0, 'timeouts': 0}
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(message)
+
+    def open_tabs(self, url=None, timeout=30):
+        """
+        🗂️ Dùng tab hiện tại làm tab 1 và mở thêm tới đủ K tab ở `url` (mặc định: URL hiện tại).
+        Tab mở bằng window.open nên tải song song; cookie đăng nhập dùng chung
+
+        Returns:
+            list: window handle của các tab
+        """
+        self._current = self.driver.current_window_handle
+        url = url or self.driver.current_url
+        self.handles = [self._current]
+
+        for _ in range(self.tabs - 1):
+            existing = set(self.driver.window_handles)
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+            new_handles = [handle for handle in self.driver.window_handles if handle not in existing]
+            if not new_handles:
+                self._log('warning', "⚠️ Không mở thêm được tab, chạy với số tab hiện có")
+                break
+            self.handles.append(new_handles[0])
+
+        self._switch(self._current)
+        deadline = time.time() + timeout
+        for handle in self.handles[1:]:
+            self._switch(handle)
+            while not self.driver.execute_script("return document.readyState === 'complete';"):
+                if time.time() >= deadline:
+                    break
+                time.sleep(self.poll_interval)
+
+        self._log('info', f"🗂️ {len(self.handles)} tab sẵn sàng trong cùng một trình duyệt")
+        return self.handles
+
+    def _switch(self, handle):
+        if handle != self._current:
+            self.driver.switch_to.window(handle)
+            self._current = handle
+            self.stats['switches'] += 1
+
+    def run(self, shards, task_factory):
+        """
+        🔁 Phân shard cho các tab rảnh và luân phiên chạy tới khi hết shard
+
+        Args:
+            shards (list): Các shard ({'shard_id', ...})
+            task_factory: task_factory(handle, shard) -> generator; yield TabWait để nhường lượt,
+                          return dict kết quả ({'success', ...})
+
+        Returns:
+            list: Kết quả theo thứ tự hoàn thành, mỗi kết quả có 'shard', 'tab', 'attempts', 'seconds'
+        """
+        if not self.handles:
+            self.open_tabs()
+
+        pending = deque(shards)
+        attempts = {}
+        slots = dict.fromkeys(self.handles)
+        results = []
+
+        while pending or any(slots.values()):
+            progressed = False
+
+            for handle in self.handles:
+                slot = slots[handle]
+                if slot is None:
+                    if not pending:
+                        continue
+                    shard = pending.popleft()
+                    attempts[shard['shard_id']] = attempts.get(shard['shard_id'], 0) + 1
+                    slot = slots[handle] = {'shard': shard, 'task': None, 'wait': None,
+                                            'started': time.time()}
+
+                self._switch(handle)
+
+                send = None
+                wait = slot['wait']
+                if wait:
+                    try:
+                        ready = wait.predicate(self.driver)
+                    except Exception:
+                        ready = None
+                    waited = time.time() - wait.started
+                    if not ready and waited < wait.timeout:
+                        continue
+                    if not ready:
+                        self.stats['timeouts'] += 1
+                        self._log('warning', f"⏳ [{slot['shard']['shard_id']}] Hết thời gian chờ {wait.name}")
+                    self.stats['waits'] += 1
+                    self.stats['wait_seconds'] += waited
+                    slot['wait'] = None
+                    send = ready or False
+
+                progressed = True
+                busy_started = time.time()
+                try:
+                    if slot['task'] is None:
+                        slot['task'] = task_factory(handle, slot['shard'])
+                        request = next(slot['task'])
+                    else:
+                        request = slot['task'].send(send)
+                except StopIteration as stop:
+                    self._finish(slot, handle, stop.value, attempts, pending, results)
+                    slots[handle] = None
+                    continue
+                except Exception as e:
+                    self._log('error', f"❌ [{slot['shard']['shard_id']}] Tab worker lỗi: {e}")
+                    self._finish(slot, handle, {'success': False, 'error': str(e)}, attempts, pending, results)
+                    slots[handle] = None
+                    continue
+                finally:
+                    self.stats['busy_seconds'] += time.time() - busy_started
+
+                if isinstance(request, TabWait):
+                    request.started = time.time()
+                    slot['wait'] = request
+
+            if not progressed:
+                time.sleep(self.poll_interval)
+
+        return results
+
+    def _finish(self, slot, handle, result, attempts, pending, results):
+        shard = slot['shard']
+        result = dict(result or {})
+        result.setdefault('success', False)
+
+        if not result['success'] and attempts[shard['shard_id']] <= self.retries:
+            self._log('info', f"🔁 [{shard['shard_id']}] Chạy lại shard lỗi: {result.get('error', '')}")
+            pending.append(shard)
+            return
+
+        result.update(shard=shard, tab=self.handles.index(handle) + 1, attempts=attempts[shard['shard_id']],
+                      seconds=round(time.time() - slot['started'], 1))
+        status = "✅" if result['success'] else "❌"
+        self._log('info', f"{status} [{shard['shard_id']}] Tab {result['tab']} xong sau {result['seconds']}s")
+        results.append(result)
+
+    def get_stats(self):
+        """📊 Thời gian chờ đã được che (overlap) bởi việc chạy tab khác"""
+        return dict(self.stats, tabs=len(self.handles),
+                    wait_seconds=round(self.stats['wait_seconds'], 2),
+                    busy_seconds=round(self.stats['busy_seconds'], 2))
+
+    def close_extra_tabs(self):
+        """🧹 Đóng các tab phụ, quay về tab đầu"""
+        for handle in self.handles[1:]:
+            try:
+                self._switch(handle)
+                self.driver.close()
+            except Exception:
+                pass
+            self._current = None
+        if self.handles:
+            try:
+                self.driver.switch_to.window(self.handles[0])
+                self._current = self.handles[0]
+            except Exception:
+                pass
+        self.handles = self.handles[:1]
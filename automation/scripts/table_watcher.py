@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+👀 Table Watcher Module - Phát hiện bảng DataTables vẽ lại bằng sự kiện thay cho sleep cố định
+Handles: MutationObserver trên tbody + hook draw.dt/processing.dt tiêm vào trang,
+execute_async_script resolve ngay khi bảng vẽ xong (hoặc hết timeout)
+"""
+
+import time
+
+
+class TableRedrawWatcher:
+    """
+    👀 Theo dõi bảng (#orderTB) trong trình duyệt:
+    mỗi lần draw.dt tăng bộ đếm `draws`, MutationObserver ghi lại lần thay đổi tbody cuối cùng.
+    Python lấy token (bộ đếm hiện tại) trước khi bấm chuyển trang, rồi chờ async tới khi bộ đếm vượt token
+    """
+
+    INSTALL_SCRIPT = """
+    var selector = arguments[0];
+    var table = document.querySelector(selector);
+    if (!table) return null;
+
+    var key = '__tableWatch_' + selector.replace(/[^\\w]/g, '_');
+    var watch = window[key];
+    if (!watch || watch.table !== table) {
+        watch = window[key] = {table: table, draws: 0, mutations: 0, processing: false,
+                               lastChange: Date.now(), hasDataTables: false};
+
+        var observer = new MutationObserver(function(records) {
+            watch.mutations += records.length;
+            watch.lastChange = Date.now();
+        });
+        var target = table.tBodies.length ? table.tBodies[0] : table;
+        observer.observe(target, {childList: true, subtree: true, characterData: true});
+        watch.observer = observer;
+
+        if (typeof $ !== 'undefined' && $.fn && $.fn.dataTable && $.fn.dataTable.isDataTable(table)) {
+            watch.hasDataTables = true;
+            $(table).off('.tableWatch')
+                .on('draw.dt.tableWatch', function() {
+                    watch.draws += 1;
+                    watch.processing = false;
+                    watch.lastChange = Date.now();
+                })
+                .on('processing.dt.tableWatch', function(e, settings, processing) {
+                    watch.processing = !!processing;
+                });
+        }
+    }
+    return {draws: watch.draws, mutations: watch.mutations, has_datatables: watch.hasDataTables};
+    """
+
+    WAIT_SCRIPT = """
+    var selector = arguments[0], token = arguments[1], quietMs = arguments[2], timeoutMs = arguments[3];
+    var done = arguments[arguments.length - 1];
+    var watch = window['__tableWatch_' + selector.replace(/[^\\w]/g, '_')];
+    if (!watch) { done({status: 'missing'}); return; }
+
+    var started = Date.now();
+    function state(status) {
+        return {status: status, draws: watch.draws, mutations: watch.mutations,
+                rows: watch.table.tBodies.length ? watch.table.tBodies[0].rows.length : 0,
+                waited_ms: Date.now() - started};
+    }
+    function check() {
+        var now = Date.now();
+        var drawn = token ? watch.draws > token.draws : !watch.processing;
+        var mutated = token ? watch.mutations > token.mutations : true;
+        var quiet = now - watch.lastChange >= quietMs;
+
+        // DataTables: chờ draw.dt mới (tbody đã được thay) rồi một khoảng yên ngắn;
+        // không có DataTables: chỉ dựa vào MutationObserver
+        if (!watch.processing && quiet && (watch.hasDataTables ? drawn : mutated)) {
+            done(state('drawn'));
+        } else if (now - started >= timeoutMs) {
+            done(state('timeout'));
+        } else {
+            setTimeout(check, Math.min(50, quietMs));
+        }
+    }
+    check();
+    """
+
+    CHECK_SCRIPT = """
+    var selector = arguments[0], token = arguments[1], quietMs = arguments[2];
+    var watch = window['__tableWatch_' + selector.replace(/[^\\w]/g, '_')];
+    if (!watch) return null;
+    var drawn = token ? watch.draws > token.draws : !watch.processing;
+    var mutated = token ? watch.mutations > token.mutations : true;
+    return !watch.processing && Date.now() - watch.lastChange >= quietMs &&
+           (watch.hasDataTables ? drawn : mutated);
+    """
+
+    def __init__(self, driver, logger, table_selector='#orderTB', quiet_ms=150):
+        self.driver = driver
+        self.logger = logger
+        self.table_selector = table_selector
+        self.quiet_ms = quiet_ms
+
+    def arm(self):
+        """
+        🎯 Cài observer/hook (nếu chưa có) và trả về token trạng thái hiện tại
+
+        Returns:
+            dict | None: {draws, mutations, has_datatables} hoặc None nếu không tìm thấy bảng
+        """
+        try:
+            return self.driver.execute_script(self.INSTALL_SCRIPT, self.table_selector)
+        except Exception as e:
+            self.logger.debug(f"⚠️ Không cài được table watcher: {e}")
+            return None
+
+    def _run_wait(self, token, timeout):
+        previous_timeout = None
+        try:
+            previous_timeout = self.driver.timeouts.script
+        except Exception:
+            pass
+
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            return self.driver.execute_async_script(
+                self.WAIT_SCRIPT, self.table_selector, token, self.quiet_ms, int(timeout * 1000)
+            )
+        except Exception as e:
+            self.logger.debug(f"⚠️ Lỗi chờ bảng vẽ lại: {e}")
+            return None
+        finally:
+            try:
+                self.driver.set_script_timeout(previous_timeout if previous_timeout is not None else 3)
+            except Exception:
+                pass
+
+    def wait_for_redraw(self, token, timeout=15):
+        """
+        ⏳ Chờ bảng vẽ lại sau token (draw.dt mới hoặc tbody đổi) - resolve ngay khi xong
+
+        Returns:
+            bool | None: True nếu đã vẽ lại, False nếu timeout, None nếu watcher không dùng được
+        """
+        if not token:
+            return None
+
+        start_time = time.time()
+        result = self._run_wait(token, timeout)
+        if not result or result.get('status') == 'missing':
+            return None
+
+        if result.get('status') == 'drawn':
+            self.logger.info(f"✅ Bảng đã vẽ lại sau {time.time() - start_time:.2f}s ({result.get('rows', 0)} dòng)")
+            return True
+
+        self.logger.warning(f"❌ Timeout chờ bảng vẽ lại ({timeout}s)")
+        return False
+
+    def is_redrawn(self, token):
+        """
+        🔎 Kiểm tra một lần (không chờ) bảng đã vẽ lại sau token chưa - dùng khi nhiều tab chờ luân phiên
+
+        Returns:
+            bool | None: None nếu watcher không còn (trang đã tải lại / chưa arm)
+        """
+        try:
+            return self.driver.execute_script(self.CHECK_SCRIPT, self.table_selector, token, self.quiet_ms)
+        except Exception as e:
+            self.logger.debug(f"⚠️ Lỗi kiểm tra bảng vẽ lại: {e}")
+            return None
+
+    def wait_until_settled(self, timeout=15):
+        """
+        ⏳ Chờ bảng ổn định: không đang processing và tbody không đổi trong quiet_ms
+
+        Returns:
+            bool | None: True nếu ổn định, False nếu timeout, None nếu watcher không dùng được
+        """
+        if not self.arm():
+            return None
+
+        result = self._run_wait(None, timeout)
+        if not result or result.get('status') == 'missing':
+            return None
+        return result.get('status') == 'drawn'
+
+
+def wait_for_table_redraw(driver, logger, action, table_selector='#orderTB', timeout=15):
+    """
+    Convenience function: arm watcher, chạy action() (bấm trang / gọi API), chờ bảng vẽ lại
+
+    Returns:
+        bool | None: như TableRedrawWatcher.wait_for_redraw; None nếu action trả về False
+    """
+    watcher = TableRedrawWatcher(driver, logger, table_selector=table_selector)
+    token = watcher.arm()
+    if action() is False:
+        return None
+    return watcher.wait_for_redraw(token, timeout=timeout)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Wait Engine Module - Chờ theo điều kiện thay cho time.sleep cố định
+Handles: document.readyState, jQuery $.active == 0, predicate phần tử / số dòng,
+timeout học từ p95 độ trễ gần đây theo site, thống kê thời gian thực sự bị chặn ở mỗi lần chờ
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from selenium.webdriver.common.by import By
+
+
+IDLE_SCRIPT = """
+return document.readyState === 'complete' &&
+       (typeof jQuery === 'undefined' || !jQuery.active) &&
+       (typeof $ === 'undefined' || !$.active);
+"""
+READY_SCRIPT = "return document.readyState === 'complete';"
+
+
+def percentile(samples, fraction):
+    """Percentile (nearest-rank) của danh sách số"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+class LatencyHistory:
+    """
+    ⏱️ Độ trễ gần đây (giây) của từng loại chờ theo site, lưu ra JSON giữa các lần chạy.
+    Timeout học được = p95 × multiplier, kẹp trong [min_timeout, timeout mặc định của chỗ gọi]
+    """
+
+    def __init__(self, path=None, window=50, multiplier=3.0, min_samples=5, min_timeout=1.0, logger=None):
+        """
+        Args:
+            path (str): File JSON lưu lịch sử (None = chỉ trong bộ nhớ)
+            window (int): Số mẫu gần nhất giữ lại cho mỗi (site, tên chờ)
+            multiplier (float): Hệ số nhân p95
+            min_samples (int): Số mẫu tối thiểu trước khi dùng timeout học được
+            min_timeout (float): Timeout học được không nhỏ hơn
+        """
+        self.path = path
+        self.window = window
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._samples = {}          # "site|name" -> [seconds]
+        self.stats = {}             # name -> {waits, blocked_seconds, timeouts, extended} (lần chạy hiện tại)
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._samples = json.load(f).get('samples', {})
+            except Exception as e:
+                if logger:
+                    logger.warning(f"⚠️ Không đọc được lịch sử độ trễ {path}: {e}")
+
+    def learned_timeout(self, site, name, default):
+        """Timeout nên dùng cho lần chờ tới (default nếu chưa đủ mẫu)"""
+        with self._lock:
+            samples = list(self._samples.get(f"{site}|{name}", []))
+        if len(samples) < self.min_samples:
+            return default
+        return min(default, max(self.min_timeout, percentile(samples, 0.95) * self.multiplier))
+
+    def record(self, site, name, seconds, satisfied, extended=False):
+        """📝 Ghi một lần chờ: chỉ lần chờ thành công mới vào mẫu p95 (timeout không làm timeout học được co lại)"""
+        with self._lock:
+            if satisfied:
+                samples = self._samples.setdefault(f"{site}|{name}", [])
+                samples.append(round(seconds, 3))
+                del samples[:-self.window]
+
+            entry = self.stats.setdefault(name, {'waits': 0, 'blocked_seconds': 0.0, 'timeouts': 0, 'extended': 0})
+            entry['waits'] += 1
+            entry['blocked_seconds'] += seconds
+            entry['timeouts'] += 0 if satisfied else 1
+            entry['extended'] += 1 if extended else 0
+
+    def get_stats(self):
+        """📊 Thời gian bị chặn theo tên chờ trong lần chạy hiện tại"""
+        with self._lock:
+            stats = {name: dict(entry, blocked_seconds=round(entry['blocked_seconds'], 2))
+                     for name, entry in self.stats.items()}
+        stats_total = sum(entry['blocked_seconds'] for entry in stats.values())
+        return {'waits': stats, 'blocked_seconds': round(stats_total, 2)}
+
+    def log_report(self, top=8):
+        """📊 Ghi log các loại chờ chặn lâu nhất"""
+        stats = self.get_stats()
+        if not self.logger or not stats['waits']:
+            return
+        self.logger.info(f"⏱️ Wait engine: chặn tổng {stats['blocked_seconds']}s")
+        ranked = sorted(stats['waits'].items(), key=lambda item: item[1]['blocked_seconds'], reverse=True)
+        for name, entry in ranked[:top]:
+            self.logger.info(f"   ⏱️ {name}: {entry['waits']} lần, {entry['blocked_seconds']}s, "
+                             f"{entry['timeouts']} timeout")
+
+    def save(self):
+        """💾 Ghi lịch sử ra JSON (ghi file tạm rồi rename)"""
+        if not self.path:
+            return False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                payload = {'updated_at': time.time(), 'samples': self._samples}
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            return True
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"⚠️ Không lưu được lịch sử độ trễ: {e}")
+            return False
+
+
+class AdaptiveWaiter:
+    """
+    ⏱️ Chờ theo điều kiện trên một WebDriver: trả về ngay khi điều kiện đúng,
+    timeout mặc định lấy từ p95 đã học; lần chờ `required` hết timeout học được thì chờ tiếp tới timeout gốc
+    """
+
+    def __init__(self, driver, logger, history=None, poll_interval=0.05):
+        self.driver = driver
+        self.logger = logger
+        self.history = history or get_shared_latency_history() or LatencyHistory(logger=logger)
+        self.poll_interval = poll_interval
+
+    def site(self):
+        try:
+            return urlparse(self.driver.current_url).netloc or 'local'
+        except Exception:
+            return 'local'
+
+    def _poll(self, condition, deadline):
+        while True:
+            try:
+                result = condition(self.driver)
+            except Exception:
+                result = None
+            if result:
+                return result
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def wait(self, name, condition, timeout=10, required=True):
+        """
+        ⏳ Chờ tới khi condition(driver) truthy
+
+        Args:
+            name (str): Tên loại chờ (khóa học timeout + thống kê)
+            condition: Hàm nhận driver
+            timeout (float): Timeout tối đa (và mặc định khi chưa đủ mẫu)
+            required (bool): True = hết timeout học được vẫn chờ tiếp tới `timeout`
+
+        Returns:
+            Kết quả của condition, hoặc False nếu hết thời gian
+        """
+        site = self.site()
+        learned = self.history.learned_timeout(site, name, timeout)
+        started = time.time()
+
+        result = self._poll(condition, started + learned)
+        extended = False
+        if not result and required and learned < timeout:
+            extended = True
+            self.logger.debug(f"⏱️ {name}: quá timeout học được {learned:.1f}s, chờ tiếp tới {timeout}s")
+            result = self._poll(condition, started + timeout)
+
+        elapsed = time.time() - started
+        self.history.record(site, name, elapsed, bool(result), extended)
+        if not result:
+            self.logger.debug(f"⏱️ {name}: hết thời gian chờ sau {elapsed:.2f}s")
+        return result or False
+
+    def wait_for_ready(self, name, timeout=15, required=True):
+        """document.readyState == 'complete'"""
+        return self.wait(name, lambda driver: driver.execute_script(READY_SCRIPT), timeout, required)
+
+    def wait_for_idle(self, name, timeout=15, required=False):
+        """Trang load xong và không còn AJAX jQuery đang chạy ($.active == 0)"""
+        return self.wait(name, lambda driver: driver.execute_script(IDLE_SCRIPT), timeout, required)
+
+    def wait_for_elements(self, name, selector, minimum=1, timeout=15, by=By.CSS_SELECTOR, required=True):
+        """Có ít nhất `minimum` phần tử khớp selector (trả về danh sách phần tử)"""
+        def enough(driver):
+            elements = driver.find_elements(by, selector)
+            return elements if len(elements) >= minimum else None
+        return self.wait(name, enough, timeout, required)
+
+    def wait_for_gone(self, name, selector, timeout=5, by=By.CSS_SELECTOR, required=False):
+        """Không còn phần tử hiển thị nào khớp selector (vd: modal đã đóng)"""
+        def gone(driver):
+            return not any(element.is_displayed() for element in driver.find_elements(by, selector))
+        return self.wait(name, gone, timeout, required)
+
+    def wait_for_clickable(self, name, element, timeout=5, required=False):
+        """Phần tử đã có đang hiển thị và bấm được"""
+        return self.wait(name, lambda driver: element.is_displayed() and element.is_enabled() and element,
+                         timeout, required)
+
+
+_shared_history = None
+_shared_lock = threading.Lock()
+
+
+def open_wait_history(settings=None, logger=None, base_dir=None):
+    """
+    ⏱️ Mở lịch sử độ trễ theo section `wait_engine` của config.json và dùng chung trong process
+    (DateCustomizer, LoginManager... tạo AdaptiveWaiter ở nơi khác vẫn học chung)
+
+    Returns:
+        LatencyHistory | None: None nếu tắt học timeout
+    """
+    global _shared_history
+
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+
+    path = settings.get('history_path', 'data/wait_latencies.json')
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+
+    with _shared_lock:
+        if _shared_history is None or _shared_history.path != path:
+            _shared_history = LatencyHistory(
+                path, window=settings.get('window', 50), multiplier=settings.get('p95_multiplier', 3.0),
+                min_samples=settings.get('min_samples', 5), min_timeout=settings.get('min_timeout', 1.0),
+                logger=logger)
+        return _shared_history
+
+
+def get_shared_latency_history():
+    """Lịch sử độ trễ đã mở trong process (None nếu chưa mở / bị tắt)"""
+    return _shared_history
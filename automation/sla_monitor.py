@@ -12,6 +12,9 @@ import logging
 import json
 import os
 
+from sla_rules import SLARuleTable
+from scripts.export_stage import ExportStage
+
 
 class SLAMonitor:
     """Hệ thống giám sát SLA cho các sàn TMĐT"""
@@ -19,7 +22,9 @@ class SLAMonitor:
     def __init__(self, config_path="config/sla_config.json"):
         self.setup_logging()
         self.load_sla_config(config_path)
+        self.rule_table = SLARuleTable.from_config(self.sla_config)
         self.current_time = datetime.now()
+        self.sla_frames = {}
 
     def setup_logging(self):
         """Setup logging cho SLA monitor"""
@@ -51,7 +56,9 @@ class SLAMonitor:
                     },
                     "tiktok": {
                         "cutoff_time": "14:00",
-                        "handover_deadline": "21:00"  # Next day
+                        "handover_deadline": "21:00",  # Next day
+                        "handover_day_offset": 1,
+                        "urgent_hours": 4
                     },
                     "other_platforms": {
                         "default_deadline": "17:00"  # Same day
@@ -66,6 +73,16 @@ class SLAMonitor:
             self.logger.error(f"❌ Error loading SLA config: {e}")
             raise
 
+    def apply_sheet_rules(self, sheet_rules):
+        """Biên dịch lại bảng quy tắc với rules từ sheet SLA_Rules (ghi đè sla_config.json)"""
+        try:
+            if not sheet_rules:
+                return
+            self.rule_table = SLARuleTable.from_config(self.sla_config, sheet_rules)
+            self.logger.info(f"✅ SLA rules từ Google Sheets: {', '.join(sorted(sheet_rules))}")
+        except Exception as e:
+            self.logger.error(f"❌ Error applying sheet SLA rules: {e}")
+
     def create_default_config(self, config_path):
         """Create default SLA configuration file"""
         try:
@@ -77,27 +94,43 @@ class SLAMonitor:
             self.logger.error(f"❌ Error creating config: {e}")
 
     def analyze_orders_sla(self, orders_df):
-        """Phân tích SLA cho tất cả đơn hàng"""
+        """Phân tích SLA cho tất cả đơn hàng (một lượt cho mọi sàn theo bảng quy tắc)"""
         try:
             self.logger.info("📊 Bắt đầu phân tích SLA...")
 
             # Prepare data
             df = self.prepare_order_data(orders_df)
 
-            # Analyze by platform
-            shopee_analysis = self.analyze_shopee_sla(df)
-            tiktok_analysis = self.analyze_tiktok_sla(df)
-            other_analysis = self.analyze_other_platforms_sla(df)
+            # Cutoff + deadlines cho tất cả sàn trong một lượt
+            in_window, confirm_deadline, handover_deadline = self.rule_table.compute(
+                df['platform_clean'], df['created_datetime'], self.current_time
+            )
+            window_df = df[in_window]
+            sla_frame, _ = self.evaluate_sla_frame(
+                window_df, confirm_deadline[in_window], handover_deadline[in_window], window_df['platform_clean']
+            )
+
+            platform_totals = df['platform_clean'].value_counts()
+            frames = {name: frame for name, frame in sla_frame.groupby('platform', sort=False)}
+            self.sla_frames = {
+                rule.name: frames.get(rule.name, sla_frame.iloc[0:0]) for rule in self.rule_table.all_rules
+            }
 
             # Combine results
             sla_report = {
                 'analysis_time': self.current_time.isoformat(),
-                'total_orders': len(df),
-                'shopee': shopee_analysis,
-                'tiktok': tiktok_analysis,
-                'other_platforms': other_analysis,
-                'alerts': self.generate_alerts(shopee_analysis, tiktok_analysis, other_analysis)
+                'total_orders': len(df)
             }
+            for rule in self.rule_table.rules:
+                sla_report[rule.name] = self.summarize_platform_sla(
+                    rule, int(platform_totals.get(rule.name, 0)), self.sla_frames[rule.name]
+                )
+            sla_report['other_platforms'] = self.summarize_other_platforms_sla(
+                df[df['platform_clean'] == self.rule_table.default_rule.name],
+                self.sla_frames[self.rule_table.default_rule.name]
+            )
+            sla_report['platform_rules'] = [rule.name for rule in self.rule_table.rules]
+            sla_report['alerts'] = self.generate_alerts(sla_report)
 
             self.logger.info("✅ SLA analysis completed")
             return sla_report
@@ -106,8 +139,14 @@ class SLAMonitor:
             self.logger.error(f"❌ Error in SLA analysis: {e}")
             return {}
 
-    def prepare_order_data(self, orders_df):
-        """Chuẩn bị dữ liệu đơn hàng cho phân tích SLA"""
+    def prepare_order_data(self, orders_df, fill_missing_time=True):
+        """
+        Chuẩn bị dữ liệu đơn hàng cho phân tích SLA
+
+        Args:
+            fill_missing_time (bool): Đơn không có thời điểm tạo lấy thời gian hiện tại;
+                                      False = để NaT cho nơi gọi tự neo (vd: SLA watcher)
+        """
         try:
             df = orders_df.copy()
 
@@ -137,15 +176,14 @@ class SLAMonitor:
 
             if not time_col:
                 # If no time column found, create one with current time
-                self.logger.warning("⚠️ Không tìm thấy cột thời gian, sử dụng thời gian hiện tại")
+                self.logger.warning("⚠️ Không tìm thấy cột thời gian, sử dụng thời gian hiện tại"
+                                    if fill_missing_time else "⚠️ Không tìm thấy cột thời gian")
                 time_col = 'created_datetime'
-                df[time_col] = datetime.now()
+                df[time_col] = datetime.now() if fill_missing_time else pd.NaT
 
-            # Standardize platform names
-            df['platform_clean'] = df[platform_col].astype(str).str.lower()
-            df.loc[df['platform_clean'].str.contains('shopee', na=False), 'platform_clean'] = 'shopee'
-            df.loc[df['platform_clean'].str.contains('tiktok', na=False), 'platform_clean'] = 'tiktok'
-            df.loc[~df['platform_clean'].isin(['shopee', 'tiktok']), 'platform_clean'] = 'other'
+            # Standardize platform names theo bảng quy tắc (shopee, tiktok, lazada, ... hoặc other)
+            df['platform_raw'] = df[platform_col].astype(str).str.lower()
+            df['platform_clean'] = self.rule_table.classify(df['platform_raw'])
 
             # Parse created time
             if time_col == 'created_datetime' and df[time_col].dtype == 'datetime64[ns]':
@@ -155,7 +193,8 @@ class SLAMonitor:
                 df['created_datetime'] = pd.to_datetime(df[time_col], errors='coerce')
 
             # Fill NaT values with current time
-            df['created_datetime'].fillna(datetime.now(), inplace=True)
+            if fill_missing_time:
+                df['created_datetime'] = df['created_datetime'].fillna(datetime.now())
 
             self.logger.info(f"✅ Prepared {len(df)} orders for SLA analysis")
             self.logger.info(f"📊 Platform distribution: {df['platform_clean'].value_counts().to_dict()}")
@@ -165,137 +204,125 @@ class SLAMonitor:
             self.logger.error(f"❌ Error preparing data: {e}")
             return pd.DataFrame()
 
-    def analyze_shopee_sla(self, df):
-        """Phân tích SLA cho Shopee"""
-        try:
-            shopee_df = df[df['platform_clean'] == 'shopee'].copy()
-
-            if shopee_df.empty:
-                return {'total_orders': 0, 'after_cutoff': 0, 'sla_status': []}
-
-            # Get yesterday and today
-            today = self.current_time.date()
-            yesterday = today - timedelta(days=1)
-
-            # Filter orders after 18:00 yesterday
-            cutoff_time = datetime.combine(yesterday, datetime.strptime("18:00", "%H:%M").time())
-            after_cutoff = shopee_df[shopee_df['created_datetime'] > cutoff_time]
-
-            # Calculate SLA deadlines
-            confirm_deadline = datetime.combine(today, datetime.strptime("09:00", "%H:%M").time())
-            handover_deadline = datetime.combine(today, datetime.strptime("12:00", "%H:%M").time())
-
-            # Analyze each order
-            sla_status = []
-            for _, order in after_cutoff.iterrows():
-                status = self.calculate_order_sla_status(
-                    order, confirm_deadline, handover_deadline, 'shopee'
-                )
-                sla_status.append(status)
-
-            # Summary statistics
-            total_after_cutoff = len(after_cutoff)
-            need_confirm = len([s for s in sla_status if s['needs_confirm']])
-            need_handover = len([s for s in sla_status if s['needs_handover']])
-            overdue_confirm = len([s for s in sla_status if s['confirm_overdue']])
-            overdue_handover = len([s for s in sla_status if s['handover_overdue']])
-
-            return {
-                'total_orders': len(shopee_df),
-                'after_cutoff': total_after_cutoff,
-                'need_confirm': need_confirm,
-                'need_handover': need_handover,
-                'overdue_confirm': overdue_confirm,
-                'overdue_handover': overdue_handover,
-                'sla_status': sla_status,
-                'cutoff_time': cutoff_time.isoformat(),
-                'confirm_deadline': confirm_deadline.isoformat(),
-                'handover_deadline': handover_deadline.isoformat()
+    def summarize_platform_sla(self, rule, total_orders, sla_frame):
+        """Tổng hợp SLA của một sàn từ sla_frame (định dạng báo cáo như trước)"""
+        if total_orders == 0:
+            return {'total_orders': 0, 'after_cutoff': 0, 'sla_status': []}
+
+        analysis = {
+            'total_orders': total_orders,
+            'after_cutoff': len(sla_frame)
+        }
+        if rule.confirm:
+            analysis['need_confirm'] = int(sla_frame['needs_confirm'].sum())
+        if rule.handover:
+            analysis['need_handover'] = int(sla_frame['needs_handover'].sum())
+        if rule.confirm:
+            analysis['overdue_confirm'] = int(sla_frame['confirm_overdue'].sum())
+        if rule.handover:
+            analysis['overdue_handover'] = int(sla_frame['handover_overdue'].sum())
+
+        analysis['sla_status'] = self.sla_frame_to_records(sla_frame)
+        analysis.update(self.rule_table.describe(rule.name, self.current_time))
+        analysis['urgent_hours'] = rule.urgent_hours
+        return analysis
+
+    def summarize_other_platforms_sla(self, other_df, sla_frame):
+        """Tổng hợp các sàn không có quy tắc riêng (đơn trong ngày), chỉ đếm theo platform"""
+        if other_df.empty:
+            return {'total_orders': 0, 'platforms': {}}
+
+        today_platforms = other_df.loc[sla_frame.index, 'platform_raw']
+        overdue = sla_frame['handover_overdue'].groupby(today_platforms).sum()
+
+        return {
+            'total_orders': len(other_df),
+            'today_orders': len(sla_frame),
+            'need_handover': int(sla_frame['needs_handover'].sum()),
+            'overdue_handover': int(sla_frame['handover_overdue'].sum()),
+            'platforms': {
+                platform: {'total_orders': int(count), 'overdue_handover': int(overdue.get(platform, 0))}
+                for platform, count in today_platforms.value_counts().items()
             }
+        }
+
+    def evaluate_sla_frame(self, orders_df, confirm_deadline, handover_deadline, platform):
+        """
+        ⚡ Tính trạng thái SLA cho cả DataFrame bằng phép toán mảng (thay cho iterrows)
+
+        Args:
+            orders_df (DataFrame): Đơn hàng đã lọc theo cutoff (cần cột created_datetime)
+            confirm_deadline: datetime, Series theo từng đơn, hoặc None nếu không cần xác nhận
+            handover_deadline: datetime, Series theo từng đơn, hoặc None
+            platform (str): Tên sàn
+
+        Returns:
+            tuple: (sla_frame DataFrame các cột SLA theo đơn, summary dict số lượng)
+        """
+        now = pd.Timestamp(self.current_time)
+        n = len(orders_df)
+
+        sla_frame = pd.DataFrame(index=orders_df.index)
+        sla_frame['order_id'] = orders_df['id'] if 'id' in orders_df.columns else 'Unknown'
+        sla_frame['platform'] = platform
+        sla_frame['created_datetime'] = orders_df['created_datetime']
+
+        for kind, deadline in (('confirm', confirm_deadline), ('handover', handover_deadline)):
+            if deadline is None:
+                sla_frame[f'needs_{kind}'] = np.zeros(n, dtype=bool)
+                sla_frame[f'{kind}_overdue'] = np.zeros(n, dtype=bool)
+                sla_frame[f'time_to_{kind}'] = np.full(n, np.nan)
+                sla_frame[f'{kind}_deadline'] = pd.NaT
+                continue
+
+            if isinstance(deadline, pd.Series):
+                deadline = pd.to_datetime(deadline.reindex(orders_df.index))
+            else:
+                deadline = pd.Series(pd.Timestamp(deadline), index=orders_df.index)
 
-        except Exception as e:
-            self.logger.error(f"❌ Error analyzing Shopee SLA: {e}")
-            return {}
-
-    def analyze_tiktok_sla(self, df):
-        """Phân tích SLA cho TikTok"""
-        try:
-            tiktok_df = df[df['platform_clean'] == 'tiktok'].copy()
-
-            if tiktok_df.empty:
-                return {'total_orders': 0, 'after_cutoff': 0, 'sla_status': []}
-
-            # Get yesterday and tomorrow
-            today = self.current_time.date()
-            yesterday = today - timedelta(days=1)
-            tomorrow = today + timedelta(days=1)
-
-            # Filter orders after 14:00 yesterday
-            cutoff_time = datetime.combine(yesterday, datetime.strptime("14:00", "%H:%M").time())
-            after_cutoff = tiktok_df[tiktok_df['created_datetime'] > cutoff_time]
-
-            # Calculate handover deadline (21:00 tomorrow)
-            handover_deadline = datetime.combine(tomorrow, datetime.strptime("21:00", "%H:%M").time())
-
-            # Analyze each order
-            sla_status = []
-            for _, order in after_cutoff.iterrows():
-                status = self.calculate_order_sla_status(
-                    order, None, handover_deadline, 'tiktok'
-                )
-                sla_status.append(status)
-
-            # Summary statistics
-            total_after_cutoff = len(after_cutoff)
-            need_handover = len([s for s in sla_status if s['needs_handover']])
-            overdue_handover = len([s for s in sla_status if s['handover_overdue']])
-
-            return {
-                'total_orders': len(tiktok_df),
-                'after_cutoff': total_after_cutoff,
-                'need_handover': need_handover,
-                'overdue_handover': overdue_handover,
-                'sla_status': sla_status,
-                'cutoff_time': cutoff_time.isoformat(),
-                'handover_deadline': handover_deadline.isoformat()
-            }
-
-        except Exception as e:
-            self.logger.error(f"❌ Error analyzing TikTok SLA: {e}")
-            return {}
-
-    def analyze_other_platforms_sla(self, df):
-        """Phân tích SLA cho các sàn khác"""
-        try:
-            other_df = df[df['platform_clean'] == 'other'].copy()
-
-            if other_df.empty:
-                return {'total_orders': 0, 'platforms': {}}
+            hours_left = (deadline - now).dt.total_seconds().to_numpy() / 3600
+            overdue = hours_left < 0
 
-            # Get today
-            today = self.current_time.date()
+            sla_frame[f'needs_{kind}'] = deadline.notna().to_numpy()
+            sla_frame[f'{kind}_overdue'] = overdue
+            sla_frame[f'time_to_{kind}'] = np.where(overdue, np.nan, hours_left)
+            sla_frame[f'{kind}_deadline'] = deadline
 
-            # Filter orders from today
-            today_orders = other_df[other_df['created_datetime'].dt.date == today]
+        summary = {
+            'total': n,
+            'need_confirm': int(sla_frame['needs_confirm'].sum()),
+            'need_handover': int(sla_frame['needs_handover'].sum()),
+            'overdue_confirm': int(sla_frame['confirm_overdue'].sum()),
+            'overdue_handover': int(sla_frame['handover_overdue'].sum())
+        }
 
-            # Group by platform
-            platforms = {}
-            for platform in today_orders['platform_clean'].unique():
-                platform_orders = today_orders[today_orders['platform_clean'] == platform]
-                platforms[platform] = {
-                    'total_orders': len(platform_orders),
-                    'orders': platform_orders.to_dict('records')
-                }
+        return sla_frame, summary
 
-            return {
-                'total_orders': len(other_df),
-                'today_orders': len(today_orders),
-                'platforms': platforms
-            }
+    def sla_frame_to_records(self, sla_frame):
+        """Chuyển sla_frame sang list dict theo đúng định dạng calculate_order_sla_status"""
+        if sla_frame.empty:
+            return []
 
-        except Exception as e:
-            self.logger.error(f"❌ Error analyzing other platforms SLA: {e}")
-            return {}
+        # Timestamp.isoformat(): chỉ có phần micro giây khi khác 0
+        created = sla_frame['created_datetime'].to_numpy(dtype='datetime64[us]')
+        created_time = np.where(
+            created.astype('datetime64[s]') == created,
+            np.datetime_as_string(created, unit='s'),
+            np.datetime_as_string(created, unit='us')
+        )
+
+        records = pd.DataFrame({
+            'order_id': sla_frame['order_id'],
+            'platform': sla_frame['platform'],
+            'created_time': created_time,
+            'needs_confirm': sla_frame['needs_confirm'],
+            'needs_handover': sla_frame['needs_handover'],
+            'confirm_overdue': sla_frame['confirm_overdue'],
+            'handover_overdue': sla_frame['handover_overdue'],
+            'time_to_confirm': sla_frame['time_to_confirm'].astype(object).where(sla_frame['time_to_confirm'].notna(), None),
+            'time_to_handover': sla_frame['time_to_handover'].astype(object).where(sla_frame['time_to_handover'].notna(), None)
+        })
+        return records.to_dict('records')
 
     def calculate_order_sla_status(self, order, confirm_deadline, handover_deadline, platform):
         """Tính toán trạng thái SLA cho một đơn hàng"""
@@ -339,60 +366,35 @@ class SLAMonitor:
             self.logger.error(f"❌ Error calculating SLA status: {e}")
             return {}
 
-    def generate_alerts(self, shopee_analysis, tiktok_analysis, other_analysis):
-        """Tạo cảnh báo SLA"""
+    def generate_alerts(self, sla_report):
+        """Tạo cảnh báo SLA cho tất cả sàn có quy tắc riêng"""
         alerts = []
 
         try:
-            # Shopee alerts
-            if shopee_analysis.get('overdue_confirm', 0) > 0:
-                alerts.append({
-                    'type': 'CRITICAL',
-                    'platform': 'Shopee',
-                    'message': f"🚨 {shopee_analysis['overdue_confirm']} đơn hàng QUÁ HẠN xác nhận (9h sáng)",
-                    'count': shopee_analysis['overdue_confirm']
-                })
-
-            if shopee_analysis.get('overdue_handover', 0) > 0:
-                alerts.append({
-                    'type': 'CRITICAL',
-                    'platform': 'Shopee',
-                    'message': f"🚨 {shopee_analysis['overdue_handover']} đơn hàng QUÁ HẠN bàn giao (12h trước)",
-                    'count': shopee_analysis['overdue_handover']
-                })
-
-            # TikTok alerts
-            if tiktok_analysis.get('overdue_handover', 0) > 0:
-                alerts.append({
-                    'type': 'CRITICAL',
-                    'platform': 'TikTok',
-                    'message': f"🚨 {tiktok_analysis['overdue_handover']} đơn hàng QUÁ HẠN bàn giao (21h)",
-                    'count': tiktok_analysis['overdue_handover']
-                })
+            # Critical alerts (quá hạn)
+            for rule in self.rule_table.rules:
+                analysis = sla_report.get(rule.name, {})
+                for kind in ('confirm', 'handover'):
+                    count = analysis.get(f'overdue_{kind}', 0)
+                    if count > 0:
+                        alerts.append(self.build_overdue_alert(rule, kind, count))
 
             # Warning alerts (upcoming deadlines)
-            warning_hours = self.sla_config.get('warning_hours', [2, 1])
-
-            for analysis, platform in [(shopee_analysis, 'Shopee'), (tiktok_analysis, 'TikTok')]:
-                if 'sla_status' in analysis:
-                    for status in analysis['sla_status']:
-                        # Check confirm deadline warnings
-                        if status.get('time_to_confirm') and status['time_to_confirm'] <= max(warning_hours):
-                            alerts.append({
-                                'type': 'WARNING',
-                                'platform': platform,
-                                'message': f"⚠️ Đơn {status['order_id']} sắp hết hạn xác nhận ({status['time_to_confirm']:.1f}h)",
-                                'hours_left': status['time_to_confirm']
-                            })
-
-                        # Check handover deadline warnings
-                        if status.get('time_to_handover') and status['time_to_handover'] <= max(warning_hours):
-                            alerts.append({
-                                'type': 'WARNING',
-                                'platform': platform,
-                                'message': f"⚠️ Đơn {status['order_id']} sắp hết hạn bàn giao ({status['time_to_handover']:.1f}h)",
-                                'hours_left': status['time_to_handover']
-                            })
+            max_warning = max(self.get_warning_hours())
+
+            for rule in self.rule_table.rules:
+                sla_frame = self.sla_frames.get(rule.name)
+                if sla_frame is None or sla_frame.empty:
+                    continue
+
+                warn_confirm = (sla_frame['time_to_confirm'] > 0) & (sla_frame['time_to_confirm'] <= max_warning)
+                warn_handover = (sla_frame['time_to_handover'] > 0) & (sla_frame['time_to_handover'] <= max_warning)
+                upcoming = sla_frame[warn_confirm | warn_handover]
+
+                for row in upcoming.itertuples(index=False):
+                    for kind, hours_left in (('confirm', row.time_to_confirm), ('handover', row.time_to_handover)):
+                        if 0 < hours_left <= max_warning:
+                            alerts.append(self.build_warning_alert(rule, row.order_id, kind, hours_left))
 
             return alerts
 
@@ -400,32 +402,56 @@ class SLAMonitor:
             self.logger.error(f"❌ Error generating alerts: {e}")
             return []
 
+    def get_warning_hours(self):
+        """Các mốc cảnh báo trước deadline (giờ)"""
+        warning_settings = self.sla_config.get('warning_settings', {})
+        return self.sla_config.get('warning_hours') or warning_settings.get('warning_hours', [2, 1])
+
+    def build_overdue_alert(self, rule, kind, count):
+        """Cảnh báo CRITICAL: có `count` đơn vừa quá hạn xác nhận/bàn giao"""
+        action = 'xác nhận' if kind == 'confirm' else 'bàn giao'
+        return {
+            'type': 'CRITICAL',
+            'platform': rule.display_name,
+            'message': f"🚨 {count} đơn hàng QUÁ HẠN {action} ({rule.deadline_label(kind)})",
+            'count': count
+        }
+
+    def build_warning_alert(self, rule, order_id, kind, hours_left):
+        """Cảnh báo WARNING: đơn sắp hết hạn xác nhận/bàn giao"""
+        action = 'xác nhận' if kind == 'confirm' else 'bàn giao'
+        return {
+            'type': 'WARNING',
+            'platform': rule.display_name,
+            'message': f"⚠️ Đơn {order_id} sắp hết hạn {action} ({hours_left:.1f}h)",
+            'hours_left': hours_left
+        }
+
     def export_sla_report(self, sla_report, export_dir="data"):
-        """Xuất báo cáo SLA"""
+        """Xuất báo cáo SLA (JSON, summary, alerts CSV song song, ghi qua file tạm rồi rename)"""
         try:
             os.makedirs(export_dir, exist_ok=True)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-            # 1. JSON report
-            json_file = f"{export_dir}/sla_report_{timestamp}.json"
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(sla_report, f, indent=2, ensure_ascii=False, default=str)
+            def write_json(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(sla_report, f, indent=2, ensure_ascii=False, default=str)
 
+            stage = ExportStage(3)
+            # 1. JSON report
+            stage.add('json', f"{export_dir}/sla_report_{timestamp}.json", write_json)
             # 2. Summary text report
-            txt_file = f"{export_dir}/sla_summary_{timestamp}.txt"
-            self.create_text_summary(sla_report, txt_file)
-
+            stage.add('summary', f"{export_dir}/sla_summary_{timestamp}.txt",
+                      lambda path: self.create_text_summary(sla_report, path))
             # 3. CSV alerts
-            csv_file = f"{export_dir}/sla_alerts_{timestamp}.csv"
-            self.create_alerts_csv(sla_report.get('alerts', []), csv_file)
+            stage.add('alerts', f"{export_dir}/sla_alerts_{timestamp}.csv",
+                      lambda path: self.create_alerts_csv(sla_report.get('alerts', []), path))
 
-            self.logger.info(f"✅ SLA reports exported: {json_file}, {txt_file}, {csv_file}")
+            export_files = stage.run()
+            self.logger.info(f"✅ SLA reports exported: {', '.join(export_files.values())} "
+                             f"({export_files.wall_seconds:.2f}s)")
 
-            return {
-                'json': json_file,
-                'summary': txt_file,
-                'alerts': csv_file
-            }
+            return export_files
 
         except Exception as e:
             self.logger.error(f"❌ Error exporting SLA report: {e}")
@@ -440,25 +466,26 @@ class SLAMonitor:
                 f.write(f"🕐 Thời gian phân tích: {sla_report['analysis_time']}\n")
                 f.write(f"📦 Tổng số đơn hàng: {sla_report['total_orders']}\n\n")
 
-                # Shopee summary
-                shopee = sla_report.get('shopee', {})
-                f.write("🛒 SHOPEE - SLA Analysis\n")
-                f.write("-" * 30 + "\n")
-                f.write(f"📦 Tổng đơn Shopee: {shopee.get('total_orders', 0)}\n")
-                f.write(f"🕐 Đơn sau 18h hôm qua: {shopee.get('after_cutoff', 0)}\n")
-                f.write(f"✅ Cần xác nhận (trước 9h): {shopee.get('need_confirm', 0)}\n")
-                f.write(f"🚚 Cần bàn giao (trước 12h): {shopee.get('need_handover', 0)}\n")
-                f.write(f"🚨 Quá hạn xác nhận: {shopee.get('overdue_confirm', 0)}\n")
-                f.write(f"🚨 Quá hạn bàn giao: {shopee.get('overdue_handover', 0)}\n\n")
-
-                # TikTok summary
-                tiktok = sla_report.get('tiktok', {})
-                f.write("📱 TIKTOK - SLA Analysis\n")
-                f.write("-" * 30 + "\n")
-                f.write(f"📦 Tổng đơn TikTok: {tiktok.get('total_orders', 0)}\n")
-                f.write(f"🕐 Đơn sau 14h hôm qua: {tiktok.get('after_cutoff', 0)}\n")
-                f.write(f"🚚 Cần bàn giao (trước 21h mai): {tiktok.get('need_handover', 0)}\n")
-                f.write(f"🚨 Quá hạn bàn giao: {tiktok.get('overdue_handover', 0)}\n\n")
+                # Các sàn có quy tắc riêng
+                for platform in sla_report.get('platform_rules', ['shopee', 'tiktok']):
+                    rule = self.rule_table.by_name.get(platform)
+                    if rule is None:
+                        continue
+                    analysis = sla_report.get(platform, {})
+
+                    f.write(f"🛒 {rule.display_name.upper()} - SLA Analysis\n")
+                    f.write("-" * 30 + "\n")
+                    f.write(f"📦 Tổng đơn {rule.display_name}: {analysis.get('total_orders', 0)}\n")
+                    f.write(f"🕐 Đơn {rule.cutoff_label()}: {analysis.get('after_cutoff', 0)}\n")
+                    if rule.confirm:
+                        f.write(f"✅ Cần xác nhận (trước {rule.deadline_label('confirm')}): {analysis.get('need_confirm', 0)}\n")
+                    if rule.handover:
+                        f.write(f"🚚 Cần bàn giao (trước {rule.deadline_label('handover')}): {analysis.get('need_handover', 0)}\n")
+                    if rule.confirm:
+                        f.write(f"🚨 Quá hạn xác nhận: {analysis.get('overdue_confirm', 0)}\n")
+                    if rule.handover:
+                        f.write(f"🚨 Quá hạn bàn giao: {analysis.get('overdue_handover', 0)}\n")
+                    f.write("\n")
 
                 # Other platforms
                 other = sla_report.get('other_platforms', {})
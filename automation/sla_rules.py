@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SLA Rules - Biên dịch chính sách SLA (sla_config.json + sheet SLA_Rules) thành bảng quy tắc
+Mỗi sàn là một dòng: cửa sổ cutoff, hạn xác nhận, hạn bàn giao (offset phút tính từ 00:00 hôm nay
+hoặc số giờ tính từ lúc tạo đơn). Đánh giá cho mọi sàn trong một lượt dạng cột.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Các section trong sla_config.json không phải là sàn
+NON_PLATFORM_SECTIONS = {
+    'warning_settings', 'warning_hours', 'business_rules',
+    'notification_channels', 'export_settings'
+}
+DEFAULT_RULE_SECTION = 'other_platforms'
+DEFAULT_RULE_NAME = 'other'
+DAY_LABELS = {-1: ' hôm qua', 0: '', 1: ' ngày mai'}
+
+
+def parse_time_of_day(value):
+    """'18:00' -> 1080 (phút trong ngày)"""
+    hours, _, minutes = str(value).strip().partition(':')
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def format_minutes(minutes):
+    """1080 -> '18h', 570 -> '9h30', 2520 -> '18h ngày mai' (offset tính từ 00:00 hôm nay)"""
+    day, minute_of_day = divmod(int(minutes), 1440)
+    hours, mins = divmod(minute_of_day, 60)
+    label = f"{hours}h{mins:02d}" if mins else f"{hours}h"
+    return label + DAY_LABELS.get(day, f" ngày {day:+d}")
+
+
+class SLARule:
+    """Một quy tắc SLA đã biên dịch cho một sàn"""
+
+    def __init__(self, name, settings, is_default=False):
+        rules = dict(settings.get('rules', {}))
+        rules.update({k: v for k, v in settings.items() if k != 'rules'})
+
+        self.name = name
+        self.display_name = rules.get('name') or name.replace('_', ' ').title()
+        self.is_default = is_default
+        self.match = [str(alias).lower() for alias in (rules.get('match') or [name.replace('_', ' ')])]
+        self.urgent_hours = float(rules.get('urgent_hours', 2))
+
+        # Cửa sổ đơn cần theo dõi: sau cutoff (mặc định hôm qua) hoặc chỉ trong hôm nay
+        if rules.get('cutoff_time') not in (None, ''):
+            cutoff_day = int(rules.get('cutoff_day_offset', -1))
+            self.window_start = cutoff_day * 1440 + parse_time_of_day(rules['cutoff_time'])
+            self.window_start_inclusive = False
+            self.window_end = None
+        else:
+            self.window_start = 0
+            self.window_start_inclusive = True
+            self.window_end = 1440
+
+        # default_deadline (cấu hình cũ của các sàn khác) = hạn bàn giao trong ngày
+        if 'handover_deadline' not in rules and rules.get('default_deadline'):
+            rules['handover_deadline'] = rules['default_deadline']
+
+        self.confirm = self._compile_deadline(rules, 'confirm')
+        self.handover = self._compile_deadline(rules, 'handover')
+
+    @staticmethod
+    def _compile_deadline(rules, kind):
+        """
+        Returns:
+            tuple | None: (minutes, from_created) - offset phút từ 00:00 hôm nay
+                          hoặc từ lúc tạo đơn (khi cấu hình theo số giờ)
+        """
+        if rules.get(f'{kind}_deadline') not in (None, ''):
+            day_offset = int(rules.get(f'{kind}_day_offset', 0))
+            return day_offset * 1440 + parse_time_of_day(rules[f'{kind}_deadline']), False
+        if rules.get(f'{kind}_hours') not in (None, ''):
+            return float(rules[f'{kind}_hours']) * 60, True
+        return None
+
+    def deadline_label(self, kind):
+        """Mô tả ngắn hạn chót cho báo cáo/cảnh báo"""
+        deadline = getattr(self, kind)
+        if deadline is None:
+            return ''
+        minutes, from_created = deadline
+        if from_created:
+            return f"{minutes / 60:g}h sau khi tạo đơn"
+        return format_minutes(minutes)
+
+    def cutoff_label(self):
+        if self.window_end is not None:
+            return 'trong ngày'
+        return f"sau {format_minutes(self.window_start)}"
+
+
+class SLARuleTable:
+    """
+    Bảng quy tắc SLA cho tất cả sàn (biên dịch một lần)
+    Thêm sàn mới = thêm một section vào sla_config.json hoặc dòng trong sheet SLA_Rules
+    """
+
+    def __init__(self, rules, default_rule):
+        self.rules = list(rules)
+        self.default_rule = default_rule
+        self.all_rules = self.rules + [default_rule]
+        self.by_name = {rule.name: rule for rule in self.all_rules}
+        self._build_arrays()
+
+    @classmethod
+    def from_config(cls, sla_config, sheet_rules=None):
+        """
+        Biên dịch từ sla_config.json, ghi đè/bổ sung bằng rules từ sheet SLA_Rules
+
+        Args:
+            sla_config (dict): Nội dung sla_config.json
+            sheet_rules (dict): Kết quả GoogleSheetsConfigService.get_sla_rules()
+        """
+        sections = {}
+        for name, settings in sla_config.items():
+            if name in NON_PLATFORM_SECTIONS or not isinstance(settings, dict):
+                continue
+            sections[name] = dict(settings)
+
+        for name, overrides in (sheet_rules or {}).items():
+            if not isinstance(overrides, dict):
+                continue
+            name = str(name).lower().strip().replace(' ', '_')
+            section = sections.setdefault(name, {})
+            section['rules'] = dict(section.get('rules', {}), **overrides)
+
+        default_settings = sections.pop(DEFAULT_RULE_SECTION, {})
+        rules = [SLARule(name, settings) for name, settings in sections.items()]
+        default_rule = SLARule(DEFAULT_RULE_NAME, default_settings, is_default=True)
+        return cls(rules, default_rule)
+
+    def _build_arrays(self):
+        """Chuyển các quy tắc thành mảng numpy theo mã quy tắc để đánh giá dạng cột"""
+        def column(values):
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+        self.codes = {rule.name: code for code, rule in enumerate(self.all_rules)}
+        self.window_start = column([rule.window_start for rule in self.all_rules])
+        self.window_start_inclusive = np.array([rule.window_start_inclusive for rule in self.all_rules])
+        self.window_end = column([rule.window_end for rule in self.all_rules])
+
+        for kind in ('confirm', 'handover'):
+            deadlines = [getattr(rule, kind) for rule in self.all_rules]
+            setattr(self, f'{kind}_minutes', column([d[0] if d else None for d in deadlines]))
+            setattr(self, f'{kind}_from_created', np.array([bool(d and d[1]) for d in deadlines]))
+
+    def match_platform(self, platform_text):
+        """Tên quy tắc cho một giá trị platform (so khớp chuỗi con theo thứ tự cấu hình)"""
+        text = str(platform_text).lower()
+        for rule in self.rules:
+            if any(alias in text for alias in rule.match):
+                return rule.name
+        return self.default_rule.name
+
+    def classify(self, platform_values):
+        """Gán tên quy tắc cho cả cột platform (chỉ so khớp trên các giá trị duy nhất)"""
+        lowered = platform_values.astype(str).str.lower()
+        mapping = {value: self.match_platform(value) for value in lowered.unique()}
+        return lowered.map(mapping)
+
+    def _codes(self, rule_names):
+        return rule_names.map(self.codes).fillna(self.codes[self.default_rule.name]).to_numpy(dtype=int)
+
+    def _offset(self, minutes, codes):
+        return pd.to_timedelta(minutes[codes], unit='m').to_numpy()
+
+    def _deadlines(self, codes, created, created_values, today_values):
+        """Hạn xác nhận/bàn giao: mốc trong ngày (theo `today_values`) hoặc N giờ sau khi tạo đơn"""
+        deadlines = []
+        for kind in ('confirm', 'handover'):
+            base = np.where(getattr(self, f'{kind}_from_created')[codes], created_values, today_values)
+            deadlines.append(pd.Series(base + self._offset(getattr(self, f'{kind}_minutes'), codes),
+                                       index=created.index))
+        return deadlines
+
+    def compute(self, rule_names, created, current_time):
+        """
+        ⚡ Tính cửa sổ và hạn chót cho tất cả đơn trong một lượt
+
+        Args:
+            rule_names (Series): Tên quy tắc theo đơn (kết quả classify)
+            created (Series): Thời điểm tạo đơn (datetime64)
+            current_time (datetime): Thời điểm phân tích
+
+        Returns:
+            tuple: (in_window bool ndarray, confirm_deadline Series, handover_deadline Series)
+        """
+        codes = self._codes(rule_names)
+        today = pd.Timestamp(current_time).normalize().to_datetime64().astype('datetime64[ns]')
+        created_values = created.to_numpy(dtype='datetime64[ns]')
+
+        window_start = today + self._offset(self.window_start, codes)
+        window_end = today + self._offset(self.window_end, codes)
+
+        after_start = (created_values > window_start) | (self.window_start_inclusive[codes] & (created_values == window_start))
+        after_start |= np.isnat(window_start)
+        before_end = np.isnat(window_end) | (created_values < window_end)
+        in_window = np.asarray(after_start & before_end)
+
+        confirm_deadline, handover_deadline = self._deadlines(codes, created, created_values, today)
+        return in_window, confirm_deadline, handover_deadline
+
+    def compute_order_deadlines(self, rule_names, created):
+        """
+        ⏰ Hạn chót theo chu kỳ riêng của từng đơn (dùng cho giám sát liên tục)
+
+        compute() neo mọi đơn vào "hôm nay" của lần phân tích; ở đây mỗi đơn được neo vào
+        ngày mà cửa sổ cutoff của nó thuộc về (vd: Shopee đặt 19h ngày D -> hạn 9h ngày D+1)
+
+        Returns:
+            tuple: (confirm_deadline Series, handover_deadline Series)
+        """
+        codes = self._codes(rule_names)
+        created_values = created.to_numpy(dtype='datetime64[ns]')
+
+        window_start = self._offset(self.window_start, codes)
+        window_start[np.isnat(window_start)] = np.timedelta64(0, 'ns')
+        order_today = (created_values - window_start).astype('datetime64[D]').astype('datetime64[ns]')
+
+        return tuple(self._deadlines(codes, created, created_values, order_today))
+
+    def describe(self, rule_name, current_time):
+        """Thông tin cutoff/deadline của một quy tắc cho báo cáo (giữ định dạng cũ)"""
+        rule = self.by_name[rule_name]
+        today = pd.Timestamp(current_time).normalize()
+        info = {}
+
+        if rule.window_end is None:
+            info['cutoff_time'] = (today + pd.Timedelta(minutes=rule.window_start)).isoformat()
+
+        for kind in ('confirm', 'handover'):
+            deadline = getattr(rule, kind)
+            if deadline is None:
+                continue
+            minutes, from_created = deadline
+            if from_created:
+                info[f'{kind}_hours'] = minutes / 60
+            else:
+                info[f'{kind}_deadline'] = (today + pd.Timedelta(minutes=minutes)).isoformat()
+
+        return info
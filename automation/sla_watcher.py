@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SLA Watcher - Giám sát SLA liên tục giữa các lần scrape
+Giữ tập đơn hàng mới nhất trong bộ nhớ với min-heap theo deadline kế tiếp,
+chỉ thức dậy khi tới mốc cảnh báo/quá hạn và phát alert đúng định dạng generate_alerts
+"""
+
+import argparse
+import glob
+import heapq
+import itertools
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from sla_monitor import SLAMonitor
+
+# Cột thời điểm đặt đơn trên sàn (col_19 của bảng ONE) - không dùng scraped_at: mỗi lần scrape sẽ dời deadline
+ORDER_TIME_COLUMNS = ('created_datetime', 'created_time', 'date_order', 'col_19', 'created_date', 'Ngày tạo')
+
+
+class SLAWatcher:
+    """⏰ Daemon giám sát deadline SLA bằng priority queue (heapq)"""
+
+    def __init__(self, sla_monitor=None, alert_callback=None, alerts_file="data/sla_alerts_live.jsonl",
+                 now_function=datetime.now):
+        """
+        Args:
+            sla_monitor (SLAMonitor): Monitor dùng chung bảng quy tắc SLA
+            alert_callback: Hàm nhận list alert mỗi khi có mốc bị vượt qua
+            alerts_file (str): File JSON lines ghi lại alert (None = không ghi)
+            now_function: Nguồn thời gian (thay được khi test)
+        """
+        self.sla_monitor = sla_monitor or SLAMonitor()
+        self.logger = self.sla_monitor.logger
+        self.alert_callback = alert_callback
+        self.alerts_file = alerts_file
+        self.now = now_function
+
+        self._heap = []
+        self._orders = {}  # order_id -> (version, rule_name, {kind: deadline})
+        self._first_seen = {}  # order_id -> thời điểm watcher thấy đơn lần đầu (neo cho đơn không có thời điểm tạo)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.stats = {'orders': 0, 'events_fired': 0, 'alerts': 0, 'wakeups': 0}
+
+    # ------------------------------------------------------------------
+    # Cập nhật tập đơn hàng
+    # ------------------------------------------------------------------
+
+    def _order_deadlines(self, orders_df):
+        """Tính deadline theo chu kỳ riêng của từng đơn bằng bảng quy tắc SLA"""
+        df = self.sla_monitor.prepare_order_data(orders_df, fill_missing_time=False)
+        if df.empty or 'id' not in df.columns:
+            return pd.DataFrame(columns=['order_id', 'rule', 'confirm', 'handover'])
+
+        order_ids = df['id'].astype(str)
+        # prepare_order_data lấy cột thời gian đầu tiên có (kể cả scraped_at): watcher chỉ neo theo thời điểm đặt đơn
+        time_col = next((col for col in ORDER_TIME_COLUMNS if col in orders_df.columns), None)
+        if time_col:
+            created = pd.Series(pd.to_datetime(orders_df[time_col], errors='coerce').to_numpy(), index=df.index)
+        else:
+            created = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        missing = created.isna()
+        if missing.any():
+            # Đơn không có thời điểm đặt: neo vào lần đầu watcher thấy đơn để deadline ổn định giữa các lần
+            # load_orders (thời gian hiện tại / scraped_at sẽ lên lịch lại và bắn lại cảnh báo sau mỗi lần nạp)
+            now = self.now()
+            with self._condition:
+                anchors = [self._first_seen.setdefault(order_id, now) for order_id in order_ids[missing]]
+            created[missing] = pd.to_datetime(anchors).to_numpy()
+
+        confirm, handover = self.sla_monitor.rule_table.compute_order_deadlines(
+            df['platform_clean'], created
+        )
+        return pd.DataFrame({
+            'order_id': order_ids,
+            'rule': df['platform_clean'],
+            'confirm': confirm,
+            'handover': handover
+        })
+
+    def _schedule(self, order_id, version, rule_name, kind, deadline, now):
+        """Đẩy các mốc cảnh báo + quá hạn còn ở tương lai vào heap"""
+        for hours in sorted(self.sla_monitor.get_warning_hours(), reverse=True):
+            fire_at = deadline - timedelta(hours=hours)
+            if fire_at > now:
+                heapq.heappush(self._heap, (fire_at, next(self._sequence), order_id, version, rule_name, kind,
+                                            'warning', deadline))
+        if deadline > now:
+            heapq.heappush(self._heap, (deadline, next(self._sequence), order_id, version, rule_name, kind,
+                                        'overdue', deadline))
+
+    def update_orders(self, orders_df):
+        """
+        🔄 Cập nhật tăng dần: thêm/sửa các đơn trong orders_df (đơn không đổi deadline được giữ nguyên)
+
+        Returns:
+            int: Số đơn được lên lịch lại
+        """
+        deadlines = self._order_deadlines(orders_df)
+        now = self.now()
+        rescheduled = 0
+
+        with self._condition:
+            for order_id, rule_name, confirm, handover in deadlines.itertuples(index=False):
+                order_deadlines = {kind: value.to_pydatetime() for kind, value in
+                                   (('confirm', confirm), ('handover', handover)) if pd.notna(value)}
+
+                current = self._orders.get(order_id)
+                if current and current[1] == rule_name and current[2] == order_deadlines:
+                    continue
+
+                # Entry cũ trong heap bị vô hiệu hóa nhờ version mới (lazy deletion)
+                version = current[0] + 1 if current else 0
+                self._orders[order_id] = (version, rule_name, order_deadlines)
+                for kind, deadline in order_deadlines.items():
+                    self._schedule(order_id, version, rule_name, kind, deadline, now)
+                rescheduled += 1
+
+            self.stats['orders'] = len(self._orders)
+            self._condition.notify()
+
+        return rescheduled
+
+    def remove_orders(self, order_ids):
+        """🗑️ Bỏ theo dõi các đơn đã xử lý xong (xác nhận/bàn giao/hủy)"""
+        with self._condition:
+            for order_id in order_ids:
+                self._orders.pop(str(order_id), None)
+                self._first_seen.pop(str(order_id), None)
+            self.stats['orders'] = len(self._orders)
+            self._condition.notify()
+
+    def load_orders(self, orders_df):
+        """📥 Thay toàn bộ tập đơn bằng kết quả scrape mới nhất (chỉ lên lịch lại đơn thay đổi)"""
+        current_ids = set(orders_df['id'].astype(str)) if 'id' in orders_df.columns else set()
+        with self._condition:
+            missing = [order_id for order_id in self._orders if order_id not in current_ids]
+        self.remove_orders(missing)
+
+        rescheduled = self.update_orders(orders_df)
+        self.logger.info(f"⏰ SLA watcher: {self.stats['orders']} đơn đang theo dõi, "
+                         f"{rescheduled} đơn lên lịch lại, {len(missing)} đơn bỏ theo dõi")
+        return rescheduled
+
+    # ------------------------------------------------------------------
+    # Xử lý các mốc tới hạn
+    # ------------------------------------------------------------------
+
+    def _pop_due(self, now):
+        """Lấy các sự kiện đã tới hạn còn hợp lệ (bỏ qua entry đã bị thay thế)"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, order_id, version, rule_name, kind, event, deadline = heapq.heappop(self._heap)
+            current = self._orders.get(order_id)
+            if current and current[0] == version:
+                due.append((order_id, rule_name, kind, event, deadline))
+        return due
+
+    def _build_alerts(self, due, now):
+        """Gom sự kiện thành alert cùng định dạng SLAMonitor.generate_alerts"""
+        rule_table = self.sla_monitor.rule_table
+        alerts = []
+
+        overdue_counts = {}
+        for order_id, rule_name, kind, event, deadline in due:
+            if event == 'overdue':
+                overdue_counts[(rule_name, kind)] = overdue_counts.get((rule_name, kind), 0) + 1
+
+        for (rule_name, kind), count in overdue_counts.items():
+            alerts.append(self.sla_monitor.build_overdue_alert(rule_table.by_name[rule_name], kind, count))
+
+        # Mỗi đơn/loại deadline chỉ một cảnh báo; bỏ cảnh báo khi deadline đã qua (bắt kịp sau khi ngủ lâu)
+        warnings = {}
+        for order_id, rule_name, kind, event, deadline in due:
+            if event == 'warning' and deadline > now:
+                warnings[(order_id, kind)] = (rule_name, deadline)
+
+        for (order_id, kind), (rule_name, deadline) in warnings.items():
+            hours_left = (deadline - now).total_seconds() / 3600
+            alerts.append(self.sla_monitor.build_warning_alert(rule_table.by_name[rule_name],
+                                                               order_id, kind, hours_left))
+        return alerts
+
+    def process_due(self, now=None):
+        """
+        🚨 Phát alert cho các mốc đã bị vượt qua tính tới `now`
+
+        Returns:
+            list: Alert đã phát
+        """
+        now = now or self.now()
+        with self._condition:
+            due = self._pop_due(now)
+
+        if not due:
+            return []
+
+        alerts = self._build_alerts(due, now)
+        self.stats['events_fired'] += len(due)
+        self.stats['alerts'] += len(alerts)
+        self._emit(alerts, now)
+        return alerts
+
+    def _emit(self, alerts, now):
+        for alert in alerts:
+            log = self.logger.warning if alert['type'] == 'CRITICAL' else self.logger.info
+            log(f"⏰ {alert['message']}")
+
+        if self.alerts_file:
+            try:
+                directory = os.path.dirname(self.alerts_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.alerts_file, 'a', encoding='utf-8') as f:
+                    for alert in alerts:
+                        f.write(json.dumps(dict(alert, time=now.isoformat()), ensure_ascii=False) + '\n')
+            except Exception as e:
+                self.logger.error(f"❌ Error writing live SLA alerts: {e}")
+
+        if self.alert_callback:
+            try:
+                self.alert_callback(alerts)
+            except Exception as e:
+                self.logger.error(f"❌ SLA alert callback failed: {e}")
+
+    def next_deadline(self):
+        """Thời điểm mốc kế tiếp còn hợp lệ (None nếu không còn mốc nào)"""
+        with self._condition:
+            while self._heap:
+                _, _, order_id, version = self._heap[0][:4]
+                current = self._orders.get(order_id)
+                if current and current[0] == version:
+                    return self._heap[0][0]
+                heapq.heappop(self._heap)
+            return None
+
+    # ------------------------------------------------------------------
+    # Vòng lặp nền
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                next_at = self.next_deadline()
+                timeout = None if next_at is None else max(0.0, (next_at - self.now()).total_seconds())
+                # Ngủ tới mốc kế tiếp; update_orders/stop sẽ đánh thức sớm
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                self.stats['wakeups'] += 1
+
+            self.process_due()
+
+    def start(self):
+        """▶️ Chạy watcher trong thread nền"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='sla-watcher', daemon=True)
+        self._thread.start()
+        self.logger.info("⏰ SLA watcher started")
+
+    def stop(self):
+        """⏹️ Dừng thread nền"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.logger.info("⏹️ SLA watcher stopped")
+
+    def get_stats(self):
+        next_at = self.next_deadline()
+        return dict(self.stats, pending_events=len(self._heap),
+                    next_deadline=next_at.isoformat() if next_at else None)
+
+
+def find_latest_export(data_dir="data"):
+    """File orders_export_*.csv mới nhất trong data_dir"""
+    files = glob.glob(os.path.join(data_dir, "orders_export_*.csv"))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def main():
+    """Chạy watcher độc lập: nạp export mới nhất và tự nạp lại khi có export mới"""
+    parser = argparse.ArgumentParser(description="SLA watcher - giám sát deadline liên tục")
+    parser.add_argument('--data-dir', default='data', help="Thư mục chứa orders_export_*.csv")
+    parser.add_argument('--poll-minutes', type=float, default=5, help="Chu kỳ kiểm tra export mới")
+    args = parser.parse_args()
+
+    watcher = SLAWatcher()
+    watcher.start()
+    loaded_file, loaded_mtime = None, None
+    stop_event = threading.Event()
+
+    try:
+        while not stop_event.is_set():
+            latest = find_latest_export(args.data_dir)
+            if latest and (latest != loaded_file or os.path.getmtime(latest) != loaded_mtime):
+                watcher.load_orders(pd.read_csv(latest, dtype={'id': str}))
+                loaded_file, loaded_mtime = latest, os.path.getmtime(latest)
+            stop_event.wait(args.poll_minutes * 60)
+
+    except KeyboardInterrupt:
+        print("\n🛑 SLA watcher stopped by user")
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.driver_pool import DriverPool, PoolTimeoutError
+
+
+class IdleBrowser:
+    """Driver giả: luôn load xong, phiên đăng nhập sống theo cờ `session_alive`"""
+
+    def __init__(self):
+        self.session_alive = True
+        self.quit_called = False
+
+    def execute_script(self, script, *args):
+        return 'complete'
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.logins = []
+        self.pool = DriverPool(IdleBrowser, login_function=self.login, size=1,
+                               session_check=lambda driver: driver.session_alive)
+
+    def login(self, driver):
+        self.logins.append(driver)
+        return True
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_warm_driver_is_reused_while_session_is_alive(self):
+        with self.pool.driver() as pooled:
+            first = pooled.driver
+        with self.pool.driver() as pooled:
+            self.assertIs(pooled.driver, first)
+            self.assertTrue(pooled.logged_in)
+
+        self.assertEqual(len(self.logins), 1)
+        self.assertEqual(self.pool.get_stats()['reused'], 1)
+
+    def test_expired_session_clears_logged_in_flag(self):
+        with self.pool.driver() as pooled:
+            pooled.driver.session_alive = False
+        with self.pool.driver() as pooled:
+            self.assertFalse(pooled.logged_in)
+            self.assertFalse(pooled.driver.quit_called)
+
+    def test_zero_timeout_does_not_wait_for_busy_pool(self):
+        with self.pool.driver():
+            with self.assertRaises(PoolTimeoutError):
+                self.pool.checkout(timeout=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
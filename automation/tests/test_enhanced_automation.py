@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import tempfile
+import logging
+
+sys.path.append(os.path.abspath('../'))
+
+from automation import OneAutomationSystem
+from automation_enhanced import EnhancedOneAutomationSystem
+from scripts.driver_pool import shutdown_shared_pools
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'config.json')
+
+
+class FakeDriver:
+    """Driver giả: ghi lại các trang đã mở"""
+
+    def __init__(self):
+        self.opened = []
+        self.current_url = None
+        self.quit_called = False
+
+    def get(self, url):
+        self.current_url = url
+        self.opened.append(url)
+
+    def refresh(self):
+        self.opened.append(self.current_url)
+
+    def get_log(self, log_type):
+        return []
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def quit(self):
+        self.quit_called = True
+
+    def find_element(self, by, selector):
+        if selector != '#orderTB':
+            raise Exception(f"no such element: {selector}")
+        return selector
+
+
+class BrokenHistory:
+    """Lịch sử độ trễ giả: ghi thống kê luôn lỗi"""
+
+    def log_report(self):
+        raise IOError("disk full")
+
+
+class TestEnhancedOneAutomationSystem(unittest.TestCase):
+    def setUp(self):
+        # Các store SQLite / log / sla_config tạo theo đường dẫn tương đối: chạy trong thư mục tạm
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        logging.disable(logging.CRITICAL)
+        self.system = EnhancedOneAutomationSystem(CONFIG)
+
+    def tearDown(self):
+        shutdown_shared_pools()
+        logging.disable(logging.NOTSET)
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_enhanced_init_sets_every_base_attribute(self):
+        # __init__ riêng không gọi super(): thiếu thuộc tính mới của lớp gốc là AttributeError lúc chạy
+        base = OneAutomationSystem(CONFIG)
+        self.assertEqual(set(vars(base)) - set(vars(self.system)), set())
+
+    def test_open_page_uses_base_request_blocker_state(self):
+        self.system.driver = FakeDriver()
+        self.system.open_page('https://one.tga.com.vn/so/')
+        self.system.open_page(refresh=True)
+        self.assertEqual(self.system.driver.opened, ['https://one.tga.com.vn/so/'] * 2)
+
+    def test_waiter_follows_driver_and_failed_timing_report_still_releases_driver(self):
+        driver = FakeDriver()
+        self.system.driver = driver
+        self.assertIs(self.system.get_waiter().driver, driver)
+
+        def collect_orders(progress_callback=None):
+            raise Exception("Không lấy được dữ liệu đơn hàng")
+
+        self.system.collect_orders = collect_orders
+        self.system.wait_history = BrokenHistory()
+        result = self.system.run_enhanced_automation()
+
+        self.assertFalse(result['success'])
+        self.assertTrue(driver.quit_called)
+        self.assertIsNone(self.system.driver)
+
+    def test_enhanced_pipeline_smoke(self):
+        driver = FakeDriver()
+        self.system.driver = driver
+        orders = [
+            {'id': '101', 'col_2': 'SO101', 'col_7': 'Chờ xác nhận', 'platform': 'Shopee',
+             'created_datetime': '2025-07-01 10:00:00'},
+            {'id': '102', 'col_2': 'SO102', 'col_7': 'Chờ xác nhận', 'platform': 'TikTok',
+             'created_datetime': '2025-07-01 11:00:00'}
+        ]
+
+        def collect_orders(progress_callback=None):
+            # Như bước trình duyệt: mở trang đơn hàng rồi tìm bảng qua strategy ladder
+            self.system.open_page('https://one.tga.com.vn/so/')
+            selector, _ = self.system.find_with_strategies('orders.table', ['#missing', '#orderTB'])
+            return list(orders) if selector else []
+
+        def extract_product_details_batch(order_ids, batch_size=None, statuses=None):
+            return self.system.parse_json_response([
+                {'id': order_id, 'detail': f"Áo thun {order_id}(2)"} for order_id in order_ids
+            ])
+
+        self.system.collect_orders = collect_orders
+        self.system.extract_product_details_batch = extract_product_details_batch
+        result = self.system.run_enhanced_automation()
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual((result['order_count'], result['enhanced_order_count']), (2, 2))
+        self.assertTrue(result['export_files'])
+        self.assertTrue(driver.quit_called)
+        # Strategy cache đã ghi lần trượt/thắng: lần sau thử '#orderTB' trước
+        self.assertEqual(self.system.strategy_cache.order('orders.table', ['#missing', '#orderTB'], '/so'),
+                         ['#orderTB', '#missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
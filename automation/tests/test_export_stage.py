@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.export_stage import ExportFiles, ExportStage, atomic_copy, atomic_write, merge_export_files
+
+
+def write_text(text, delay=0.0):
+    def writer(path):
+        time.sleep(delay)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return writer
+
+
+def failing_writer(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('ghi dở')
+    raise IOError("disk full")
+
+
+class TestExportStage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.dir = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def read(self, name):
+        with open(self.path(name), encoding='utf-8') as f:
+            return f.read()
+
+    def temp_files(self):
+        return [name for name in os.listdir(self.dir) if '.tmp-' in name]
+
+    def test_failing_writer_keeps_old_file_and_no_temp_file(self):
+        atomic_write(self.path('orders.csv'), write_text('bản cũ'))
+
+        with self.assertRaises(IOError):
+            atomic_write(self.path('orders.csv'), failing_writer)
+        self.assertEqual(self.read('orders.csv'), 'bản cũ')
+        self.assertEqual(self.temp_files(), [])
+
+        # Trong ExportStage: lỗi được log, writer lỗi không có trong kết quả lẫn stats
+        files = ExportStage(max_workers=2).add('csv', self.path('orders.csv'), failing_writer) \
+            .add('json', self.path('orders.json'), write_text('{}')).run()
+        self.assertEqual(dict(files), {'json': self.path('orders.json')})
+        self.assertNotIn('csv', files.stats)
+        self.assertEqual(self.read('orders.csv'), 'bản cũ')
+        self.assertEqual(self.temp_files(), [])
+
+    def test_writer_without_path_is_in_stats_only(self):
+        files = ExportStage().add('warehouse', None, lambda: 42) \
+            .add('csv', self.path('orders.csv'), write_text('a,b')).run()
+
+        self.assertEqual(dict(files), {'csv': self.path('orders.csv')})
+        self.assertEqual(files.stats['warehouse']['path'], 42)
+        self.assertIsNone(files.stats['warehouse']['bytes'])
+        self.assertEqual(files.stats['csv']['bytes'], 3)
+        self.assertEqual(files.total_bytes(), 3)
+
+    def test_parallel_run_keeps_registration_order(self):
+        stage = ExportStage(max_workers=3)
+        # Writer đăng ký trước chạy lâu nhất: xong sau cùng nhưng vẫn đứng đầu kết quả
+        for index, delay in enumerate((0.2, 0.1, 0.0)):
+            stage.add(f"file{index}", self.path(f"file{index}.txt"), write_text(str(index), delay))
+        files = stage.run()
+
+        self.assertEqual(list(files), ['file0', 'file1', 'file2'])
+        self.assertEqual(list(files.stats), ['file0', 'file1', 'file2'])
+        self.assertEqual(stage.run(), {})
+
+    def test_atomic_copy_and_merge(self):
+        atomic_write(self.path('orders.csv'), write_text('x'))
+        self.assertEqual(atomic_copy(self.path('orders.csv'), self.path('latest/orders_latest.csv')),
+                         self.path('latest/orders_latest.csv'))
+        self.assertIsNone(atomic_write(self.path('empty.csv'), lambda path: None))
+        self.assertFalse(os.path.exists(self.path('empty.csv')))
+
+        target = ExportStage().add('csv', self.path('a.csv'), write_text('a')).run()
+        merged = merge_export_files(target, ExportStage().add('json', self.path('b.json'), write_text('b')).run())
+        self.assertIsInstance(merged, ExportFiles)
+        self.assertEqual(list(merged), ['csv', 'json'])
+        self.assertEqual(set(merged.stats), {'csv', 'json'})
+
+
+if __name__ == '__main__':
+    unittest.main()
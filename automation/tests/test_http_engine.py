@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath('../'))
+
+import scripts.http_engine as http_engine
+from scripts.http_engine import parse_login_form, parse_order_table, find_ajax_endpoint, is_login_page
+
+LOGIN_PAGE = """
+<html><body>
+<form action="/login" method="post">
+  <input type="hidden" name="_token" value="csrf-123">
+  <input type="text" name="username"><input type="password" name="password">
+  <input type="checkbox" name="remember" value="1"><button type="submit">Đăng nhập</button>
+</form>
+</body></html>
+"""
+
+ORDERS_PAGE = """
+<html><body>
+<table id="orderTB" class="table">
+  <thead><tr><th></th><th>ID</th><th>Mã đơn</th><th>Trạng thái</th></tr></thead>
+  <tbody>
+    <tr><td><input type="checkbox"></td><td><a href="/so/detail/505276">505276</a></td>
+        <td>SO01072025:0915480<br> Shopee &amp; Lazada </td><td>Xác nhận</td></tr>
+    <tr><td></td><td>505277</td><td>SO01072025:0915481</td><td>Đã giao</td></tr>
+  </tbody>
+</table>
+<script>
+  $('#orderTB').DataTable({serverSide: true, ajax: {url: '/so/list?tab=pending&amp;v=2', type: 'POST'}});
+</script>
+</body></html>
+"""
+
+EXPECTED_ROWS = [
+    ['', '505276', 'SO01072025:0915480\nShopee & Lazada', 'Xác nhận'],
+    ['', '505277', 'SO01072025:0915481', 'Đã giao']
+]
+
+
+class TestHttpEngineParsing(unittest.TestCase):
+    def test_login_form_keeps_hidden_token(self):
+        form = parse_login_form(LOGIN_PAGE, 'https://one.tga.com.vn/')
+        self.assertEqual(form['action'], 'https://one.tga.com.vn/login')
+        self.assertEqual(form['method'], 'POST')
+        self.assertEqual((form['username_field'], form['password_field']), ('username', 'password'))
+        self.assertEqual(form['fields']['_token'], 'csrf-123')
+        self.assertNotIn('remember', form['fields'])
+        self.assertTrue(is_login_page(LOGIN_PAGE))
+        self.assertFalse(is_login_page(ORDERS_PAGE))
+
+    def test_order_table_same_with_and_without_lxml(self):
+        rows, detail_ids = parse_order_table(ORDERS_PAGE)
+        self.assertEqual(rows, EXPECTED_ROWS)
+        self.assertEqual(detail_ids, ['505276', None])
+
+        lxml_available = http_engine.LXML_AVAILABLE
+        try:
+            http_engine.LXML_AVAILABLE = False
+            self.assertEqual(parse_order_table(ORDERS_PAGE), (rows, detail_ids))
+        finally:
+            http_engine.LXML_AVAILABLE = lxml_available
+
+    def test_ajax_endpoint_from_inline_script(self):
+        endpoint = find_ajax_endpoint(ORDERS_PAGE, 'https://one.tga.com.vn/so/')
+        self.assertEqual(endpoint['url'], 'https://one.tga.com.vn/so/list?tab=pending&v=2')
+        self.assertEqual(endpoint['method'], 'POST')
+        self.assertTrue(endpoint['server_side'])
+        self.assertIsNone(find_ajax_endpoint('<table id="orderTB"></table>', 'https://one.tga.com.vn/so/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
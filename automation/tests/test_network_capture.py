@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import json
+import logging
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.network_capture import NetworkCapture
+
+
+class RecordedDriver:
+    """Driver giả phát lại performance log + body response đã ghi"""
+
+    def __init__(self, responses, columns=None):
+        self.entries, self.bodies, self.columns = [], {}, columns
+        for request_id, (url, mime_type, body) in enumerate(responses, 1):
+            request_id = str(request_id)
+            self.bodies[request_id] = body
+            for method, params in (
+                ('Network.responseReceived', {'requestId': request_id,
+                                              'response': {'url': url, 'mimeType': mime_type, 'status': 200}}),
+                ('Network.loadingFinished', {'requestId': request_id})
+            ):
+                self.entries.append({'message': json.dumps({'message': {'method': method, 'params': params}})})
+
+    def get_log(self, log_type):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        return {'body': json.dumps(self.bodies[params['requestId']]), 'base64Encoded': False}
+
+    def execute_script(self, script, *args):
+        return self.columns
+
+
+class TestNetworkCapture(unittest.TestCase):
+    def test_latest_datatables_response_becomes_rows(self):
+        driver = RecordedDriver([
+            ('https://one.tga.com.vn/so/list', 'application/json',
+             {'draw': 1, 'recordsFiltered': 1, 'data': [['', '1', 'SO-OLD']]}),
+            ('https://one.tga.com.vn/static/app.js', 'application/javascript', {'not': 'a table'}),
+            ('https://one.tga.com.vn/so/list', 'application/json',
+             {'draw': 2, 'recordsFiltered': 2, 'data': [
+                 {'code': 'SO01<br>Shopee', 'id': '<a href="/so/detail/505276">505276</a>', 'amount': 299000},
+                 {'code': 'SO02', 'id': '505277', 'amount': 150000}]})
+        ], columns=['id', 'code', 'amount'])
+        capture = NetworkCapture(driver, logging.getLogger(__name__))
+
+        captured = capture.latest_table_rows()
+        self.assertEqual(captured['rows'], [['505276', 'SO01\nShopee', '299000'], ['505277', 'SO02', '150000']])
+        self.assertEqual(captured['detail_ids'], ['505276', None])
+        self.assertEqual(captured['total'], 2)
+        self.assertEqual(len(capture.table_payloads), 2)
+
+    def test_invoice_payloads_are_parsed_and_clear_drops_old_log(self):
+        driver = RecordedDriver([
+            ('https://one.tga.com.vn/so/invoiceJSON?id=1,2', 'text/html',
+             {'error': False, 'data': [{'id': 1, 'detail': 'A(1)'}, {'id': 2, 'detail': 'B(2)'}]}),
+            ('https://one.tga.com.vn/so/invoiceJSON?id=3', 'application/json', {'error': True, 'data': []})
+        ])
+        capture = NetworkCapture(driver, logging.getLogger(__name__))
+        details = capture.invoice_details(lambda data: {str(order['id']): order['detail'] for order in data})
+        self.assertEqual(details, {'1': 'A(1)', '2': 'B(2)'})
+
+        stale = RecordedDriver([('https://one.tga.com.vn/so/list', 'application/json',
+                                 {'draw': 1, 'recordsFiltered': 1, 'data': [['x']]})])
+        capture = NetworkCapture(stale, logging.getLogger(__name__))
+        capture.clear()
+        self.assertIsNone(capture.latest_table_rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
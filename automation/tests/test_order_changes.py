@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.order_changes import OrderChangeTracker, changed_order_ids
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+ORDERS_CSV = os.path.join(DATA_DIR, 'orders_export_20250701_113535.csv')
+
+
+class TestOrderChangeTracker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tracker = OrderChangeTracker(os.path.join(self.directory.name, 'changes.db'))
+        self.orders = pd.read_csv(ORDERS_CSV, dtype=str, keep_default_na=False).head(50)
+
+    def tearDown(self):
+        self.tracker.close()
+        self.directory.cleanup()
+
+    def test_first_run_inserts_everything_and_rerun_is_quiet(self):
+        changes = self.tracker.diff(self.orders)
+        self.assertTrue(changes['baseline'])
+        self.assertEqual(changes['counts']['inserted'], self.orders['id'].nunique())
+        self.tracker.commit(changes)
+
+        # CSV đọc lại (products dạng chuỗi repr, tổng tiền có dấu phẩy) vẫn cho cùng hash
+        rerun = self.tracker.diff(self.orders.sample(frac=1, random_state=1))
+        self.assertFalse(rerun['baseline'])
+        self.assertEqual(rerun['counts'], {'inserted': 0, 'updated': 0, 'disappeared': 0,
+                                           'unchanged': self.orders['id'].nunique()})
+        self.assertTrue(rerun['frame'].empty)
+
+    def test_delta_lists_inserted_updated_and_disappeared(self):
+        self.tracker.commit(self.tracker.diff(self.orders.iloc[:40]))
+
+        current = self.orders.iloc[1:45].copy()
+        current.iloc[0, current.columns.get_loc('col_7')] = 'Đã giao hàng'
+        current.iloc[1, current.columns.get_loc('products')] = "[{'name': 'Sản phẩm mới', 'quantity': 3}]"
+        changes = self.tracker.diff(current)
+
+        gone, status_changed, products_changed = (str(self.orders['id'].iloc[i]) for i in (0, 1, 2))
+        self.assertEqual(changes['disappeared'], [gone])
+        self.assertEqual(sorted(changes['updated']), sorted([status_changed, products_changed]))
+        self.assertEqual(changes['inserted'], [str(order_id) for order_id in self.orders['id'].iloc[40:45]])
+        self.assertEqual(len(changed_order_ids(changes)), 7)
+
+        frame = changes['frame'].set_index('order_id')
+        self.assertEqual(frame.loc[status_changed, 'changed_fields'], 'status')
+        self.assertEqual(frame.loc[status_changed, 'status'], 'Đã giao hàng')
+        self.assertEqual(frame.loc[products_changed, 'changed_fields'], 'products')
+        self.assertEqual(frame.loc[gone, 'change_type'], 'disappeared')
+
+        # Đơn đã báo biến mất không bị báo lại ở lần sau
+        self.tracker.commit(changes)
+        self.assertEqual(self.tracker.diff(current)['counts']['disappeared'], 0)
+
+    def test_scan_ignores_products_and_carry_survives_commits(self):
+        order_id = str(self.orders['id'].iloc[0])
+        first = self.tracker.diff(self.orders)
+        self.tracker.commit(first, carry={order_id: {'details': {'product_count': 2}, 'sla': {'sla_status': 'urgent'}}})
+
+        without_products = self.orders.drop(columns=['products'])
+        scan = self.tracker.scan(without_products)
+        self.assertEqual(changed_order_ids(scan), [])
+
+        self.tracker.commit(self.tracker.diff(self.orders), carry={order_id: {'sla': {'sla_status': 'overdue'}}})
+        self.assertEqual(self.tracker.carried([order_id]),
+                         {order_id: {'details': {'product_count': 2}, 'sla': {'sla_status': 'overdue'}}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import json
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.order_records import OrderBatch
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+ORDERS_CSV = os.path.join(DATA_DIR, 'orders_export_20250701_113535.csv')
+CELL_COLUMNS = [f'col_{i}' for i in range(1, 24)]
+
+
+def legacy_orders(rows_data):
+    """Bản cũ của scrape_order_data (dict/dòng) dùng làm chuẩn so sánh"""
+    orders = []
+    for i, cell_texts in enumerate(rows_data):
+        if not cell_texts or len(cell_texts) < 2:
+            continue
+        order_data = {'row_index': i + 1, 'total_columns': len(cell_texts), 'scraped_at': ''}
+        order_data['col_1'] = cell_texts[0]
+        order_data['id'] = cell_texts[1]
+        order_data['order_code'] = cell_texts[2]
+        order_data['col_4'] = cell_texts[3]
+        order_data['customer'] = cell_texts[4]
+        for j, text in enumerate(cell_texts):
+            if text:
+                order_data[f'col_{j+1}'] = text
+        orders.append(order_data)
+    return orders
+
+
+class TestOrderBatch(unittest.TestCase):
+    def setUp(self):
+        recorded = pd.read_csv(ORDERS_CSV, dtype=str, keep_default_na=False)
+        self.rows = recorded[CELL_COLUMNS].values.tolist() + [['chỉ một ô']]
+
+    def test_frame_matches_legacy_dicts(self):
+        expected = pd.DataFrame(legacy_orders(self.rows)).drop(columns=['scraped_at'])
+        actual = OrderBatch.from_rows(self.rows).to_frame().drop(columns=['scraped_at'])
+
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        pd.testing.assert_frame_equal(actual.fillna('').astype(str), expected.fillna('').astype(str))
+
+    def test_record_view_behaves_like_dict(self):
+        batch = OrderBatch.from_rows(self.rows)
+        order = batch[0]
+
+        self.assertEqual(order.get('id'), '505276')
+        self.assertEqual(order['col_7'], 'Xác nhận')
+        self.assertNotIn('col_1', order)
+        self.assertIsNone(order.get('col_1'))
+
+        order['id'] = '999'
+        order['has_id'] = True
+        self.assertEqual(batch.column('id')[0], '999')
+        self.assertEqual(batch.column('col_2')[0], '505276')
+        self.assertEqual(json.loads(json.dumps(order.copy()))['has_id'], True)
+
+    def test_concat_and_filter(self):
+        batch = OrderBatch.from_rows(self.rows)
+        batch.set_value('id', 1, None)
+        combined = OrderBatch.concat([batch, batch.take([0, 2])])
+
+        self.assertEqual(len(combined), len(batch) + 2)
+        self.assertEqual(len(combined.filter_present('id')), len(combined) - 1)
+        self.assertEqual(combined.to_frame()['id'].iloc[-1], batch.column('id')[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.order_warehouse import OrderWarehouse
+
+
+def export_frame(rows):
+    """DataFrame giống orders_export_*.csv (products dạng chuỗi repr khi đọc lại từ CSV)"""
+    return pd.DataFrame(rows, columns=['id', 'col_3', 'col_18', 'col_7', 'col_19', 'api_amount', 'products'])
+
+
+class TestOrderWarehouse(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.warehouse = OrderWarehouse(os.path.join(self.directory.name, 'orders.db'))
+
+    def tearDown(self):
+        self.warehouse.close()
+        self.directory.cleanup()
+
+    def test_upsert_same_key_then_query_by_date_range(self):
+        self.assertEqual(self.warehouse.upsert_orders(export_frame([
+            ['1', 'SO1', 'Shopee', 'Chờ xác nhận', '2025-06-30 23:59:59', '100,000',
+             "[{'name': 'Áo', 'quantity': 2}]"],
+            ['2', 'SO2', 'TikTok', 'Chờ xác nhận', '2025-07-01 08:00:00', '50000', ''],
+            ['3', 'SO3', 'Shopee', 'Đã giao', '2025-07-02 00:00:00', '', ''],
+            ['', 'SO4', 'Shopee', 'Đã giao', '2025-07-01 09:00:00', '', '']
+        ])), 3)
+        first_seen = self.warehouse.query_orders().set_index('order_id')['first_seen']
+
+        # Lần export sau: đơn 1 đổi trạng thái, không có sàn/chi tiết sản phẩm -> giữ giá trị cũ
+        self.assertEqual(self.warehouse.upsert_orders(export_frame([
+            ['1', 'SO1', '', 'Đã giao', '2025-06-30 23:59:59', '100000', '']
+        ])), 1)
+
+        orders = self.warehouse.query_orders().set_index('order_id')
+        self.assertEqual(sorted(orders.index), ['1', '2', '3'])
+        self.assertEqual(orders.loc['1', ['status', 'platform', 'amount', 'product_count']].tolist(),
+                         ['Đã giao', 'Shopee', 100000.0, 1])
+        self.assertEqual(orders.loc['1', 'first_seen'], first_seen['1'])
+        self.assertEqual(self.warehouse.query_products()[['product_name', 'quantity']].values.tolist(),
+                         [['Áo', 2.0]])
+
+        # end dạng ngày lấy trọn ngày; end có giờ là cận trên bao gồm
+        self.assertEqual(list(self.warehouse.query_orders('2025-07-01', '2025-07-01')['order_id']), ['2'])
+        self.assertEqual(list(self.warehouse.query_orders('2025-06-30', '2025-07-01')['order_id']), ['2', '1'])
+        self.assertEqual(list(self.warehouse.query_orders(end='2025-07-01 08:00')['order_id']), ['2', '1'])
+        self.assertEqual(list(self.warehouse.query_orders(start='2025-07-01 08:00:01')['order_id']), ['3'])
+        self.assertEqual(list(self.warehouse.query_orders(platform='shop', status='Đã giao')['order_id']),
+                         ['3', '1'])
+
+        payload = self.warehouse.query_orders('2025-07-02', include_payload=True)
+        self.assertEqual(payload.loc[0, 'col_3'], 'SO3')
+        self.assertEqual(self.warehouse.get_stats()['total_orders'], 3)
+
+    def test_date_bound(self):
+        self.assertIsNone(OrderWarehouse._date_bound(''))
+        self.assertEqual(OrderWarehouse._date_bound('2025-07-01'), ('2025-07-01 00:00:00', '>='))
+        self.assertEqual(OrderWarehouse._date_bound('2025-07-01', end=True), ('2025-07-02 00:00:00', '<'))
+        self.assertEqual(OrderWarehouse._date_bound('2025-07-01 12:00', end=True), ('2025-07-01 12:00:00', '<='))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import json
+import logging
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.parquet_export import (PYARROW_AVAILABLE, MANIFEST_FILE, UNKNOWN_PARTITION, build_typed_frame,
+                                    export_parquet_dataset, write_manifest)
+
+
+def export_frame():
+    """DataFrame export như automation_enhanced (toàn chuỗi, products là list)"""
+    return pd.DataFrame({
+        'id': ['101', '102', '103'],
+        'col_18': ['Shopee', 'TikTok', ''],
+        'col_7': ['Chờ xác nhận', 'Đã giao', 'Chờ xác nhận'],
+        'col_19': ['2025-07-01 10:00:00', '2025-07-02 11:30:00', 'không rõ'],
+        'api_amount': ['1,250,000', '90000', ''],
+        'products': [[{'name': 'Áo', 'quantity': 2}], "[{'name': 'Quần', 'quantity': 1}]", ''],
+        'product_count': [1, 1, 0],
+        'col_4': ['Khách A', 'Khách B', None]
+    })
+
+
+class TestBuildTypedFrame(unittest.TestCase):
+    def test_columns_are_typed_and_partition_keys_filled(self):
+        typed = build_typed_frame(export_frame())
+
+        self.assertEqual(list(typed['order_id']), ['101', '102', '103'])
+        self.assertEqual(str(typed['order_id'].dtype), 'string')
+        self.assertEqual(typed['order_date'][0], pd.Timestamp('2025-07-01 10:00:00'))
+        self.assertTrue(pd.isna(typed['order_date'][2]))
+        self.assertEqual(list(typed['order_day']), ['2025-07-01', '2025-07-02', UNKNOWN_PARTITION])
+
+        self.assertEqual(str(typed['platform'].dtype), 'category')
+        self.assertEqual(list(typed['platform']), ['Shopee', 'TikTok', UNKNOWN_PARTITION])
+        self.assertEqual(str(typed['status'].dtype), 'category')
+
+        self.assertEqual(typed['order_value'][0], 1250000)
+        self.assertTrue(pd.isna(typed['order_value'][2]))
+
+        self.assertEqual(json.loads(typed['products'][0]), [{'name': 'Áo', 'quantity': 2}])
+        self.assertEqual(json.loads(typed['products'][1]), [{'name': 'Quần', 'quantity': 1}])
+        self.assertEqual(json.loads(typed['products'][2]), [])
+
+        # Cột nguồn đã map không bị lặp lại; cột khác giữ nguyên (số) hoặc thành string
+        self.assertNotIn('col_18', typed.columns)
+        self.assertNotIn('api_amount', typed.columns)
+        self.assertTrue(pd.api.types.is_integer_dtype(typed['product_count']))
+        self.assertEqual(str(typed['col_4'].dtype), 'string')
+
+    def test_column_overrides_and_missing_sources(self):
+        df = pd.DataFrame({'ma_don': ['A1'], 'san': ['Lazada']})
+        typed = build_typed_frame(df, columns={'order_id': ['ma_don'], 'platform': ['san']})
+
+        self.assertEqual(list(typed['order_id']), ['A1'])
+        self.assertEqual(list(typed['platform']), ['Lazada'])
+        self.assertEqual(list(typed['status']), [UNKNOWN_PARTITION])
+        self.assertEqual(list(typed['order_day']), [UNKNOWN_PARTITION])
+
+
+class TestParquetManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, 'orders')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_manifest_without_parquet_files(self):
+        os.makedirs(self.root)
+        with open(os.path.join(self.root, 'notes.txt'), 'w') as f:
+            f.write('không phải parquet')
+
+        path = write_manifest(self.root, set(), ['order_day', 'platform'], 'zstd', 'schema')
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        self.assertEqual(os.path.basename(path), MANIFEST_FILE)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+        self.assertEqual((manifest['files'], manifest['total_rows'], manifest['partition_by']),
+                         ([], 0, ['order_day', 'platform']))
+
+    @unittest.skipIf(PYARROW_AVAILABLE, "pyarrow đã cài")
+    def test_export_is_skipped_without_pyarrow(self):
+        self.assertIsNone(export_parquet_dataset(export_frame(), {'output_dir': self.root},
+                                                 logging.getLogger(__name__)))
+        self.assertFalse(os.path.exists(self.root))
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "cần pyarrow")
+    def test_export_writes_partitions_and_manifest(self):
+        path = export_parquet_dataset(export_frame(), {'output_dir': self.root}, timestamp='run1')
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        self.assertEqual(manifest['total_rows'], 3)
+        self.assertEqual(len(manifest['files']), 3)
+        self.assertTrue(all(entry['written_this_run'] for entry in manifest['files']))
+        self.assertIn({'order_day': '2025-07-01', 'platform': 'Shopee'},
+                      [entry['partitions'] for entry in manifest['files']])
+
+        # Lần chạy sau ghi đè partition trùng, giữ partition khác
+        second = export_frame().iloc[:1]
+        manifest_path = export_parquet_dataset(second, {'output_dir': self.root}, timestamp='run2')
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['total_rows'], 3)
+        self.assertEqual(sum(entry['written_this_run'] for entry in manifest['files']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import logging
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.product_fetcher import ProductDetailFetcher
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Session giả: trả payload invoiceJSON theo order id đầu tiên của batch"""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    def get(self, url, params=None, timeout=None):
+        return FakeResponse(self.payloads[params['id'].split(',')[0]])
+
+
+class TestProductDetailFetcher(unittest.TestCase):
+    def test_error_and_empty_payloads_are_failed_batches(self):
+        fetcher = ProductDetailFetcher({}, logging.getLogger(__name__),
+                                       lambda data: {str(order['id']): order['detail'] for order in data},
+                                       batch_size=1, rate_per_second=0)
+        session = FakeSession({
+            '1': {'error': False, 'data': [{'id': 1, 'detail': 'A(1)'}]},
+            '2': {'error': True, 'data': [{'id': 2, 'detail': 'B(2)'}]},
+            '3': {'error': False, 'data': []}
+        })
+
+        details = {}
+        for batch_ids in fetcher._batches(['1', '2', '3']):
+            details.update(fetcher._fetch_batch_threaded(session, batch_ids))
+
+        self.assertEqual(details, {'1': 'A(1)'})
+        self.assertEqual(fetcher.failed_batches, [['2'], ['3']])
+        self.assertEqual(fetcher.stats['failed'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
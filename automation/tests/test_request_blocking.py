@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import json
+import fnmatch
+import logging
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.request_blocking import RequestBlocker
+
+PAGE_REQUESTS = [
+    ('https://one.tga.com.vn/so/', 20000),
+    ('https://one.tga.com.vn/static/app.css', 8000),
+    ('https://fonts.gstatic.com/roboto.woff2', 30000),
+    ('https://www.googletagmanager.com/gtm.js', 90000)
+]
+
+
+class FakeChrome:
+    """Driver giả: ghi lệnh CDP, sinh performance log như Chrome với danh sách chặn đang áp"""
+
+    def __init__(self):
+        self.commands, self.log, self.current_url = [], [], None
+        self.blocked = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+        if command == 'Network.setBlockedURLs':
+            self.blocked = params['urls']
+        return {}
+
+    def _event(self, method, params):
+        self.log.append({'message': json.dumps({'message': {'method': method, 'params': params}})})
+
+    def get(self, url):
+        self.current_url = url
+        for request_id, (request_url, size) in enumerate(PAGE_REQUESTS):
+            self._event('Network.requestWillBeSent', {'requestId': str(request_id), 'request': {'url': request_url}})
+            if any(fnmatch.fnmatchcase(request_url, pattern) for pattern in self.blocked):
+                self._event('Network.loadingFailed', {'requestId': str(request_id), 'blockedReason': 'inspector'})
+            else:
+                self._event('Network.loadingFinished', {'requestId': str(request_id), 'encodedDataLength': size})
+
+    def refresh(self):
+        self.get(self.current_url)
+
+    def get_log(self, log_type):
+        entries, self.log = self.log, []
+        return entries
+
+
+class TestRequestBlocker(unittest.TestCase):
+    def setUp(self):
+        self.driver = FakeChrome()
+        self.blocker = RequestBlocker(
+            self.driver, logging.getLogger(__name__),
+            block=['*.woff2', '*.css', '*googletagmanager.com*'],
+            pages=[{'url': r'/login', 'allow': ['*.css']}, {'url': r'/so/', 'block': ['*.svg']}])
+
+    def test_page_rules_allow_and_block(self):
+        self.assertEqual(self.blocker.patterns_for('https://one.tga.com.vn/login'),
+                         ['*.woff2', '*googletagmanager.com*'])
+        self.assertEqual(self.blocker.patterns_for('https://one.tga.com.vn/so/'),
+                         ['*.woff2', '*.css', '*googletagmanager.com*', '*.svg'])
+
+        self.blocker.apply('https://one.tga.com.vn/so/')
+        self.blocker.apply('https://one.tga.com.vn/so/?page=2')
+        blocked_commands = [params for command, params in self.driver.commands if command == 'Network.setBlockedURLs']
+        self.assertEqual(len(blocked_commands), 1)
+
+    def test_debug_reports_saved_requests_and_bytes(self):
+        self.blocker.debug = True
+        forwarded = []
+        self.blocker.forward = forwarded.extend
+
+        self.blocker.navigate('https://one.tga.com.vn/so/')
+        self.blocker.navigate(refresh=True)
+
+        first, second = self.blocker.page_reports
+        self.assertEqual(first['blocked_requests'], 3)
+        self.assertEqual(first['saved_bytes'], 128000)
+        self.assertEqual(first['requests'], 1)
+        self.assertEqual(first['bytes'], 20000)
+        self.assertEqual(second['saved_bytes'], 128000)
+        # Baseline chỉ tải một lần cho mỗi trang; mọi entry đã đọc đều được chuyển tiếp
+        self.assertEqual(len(forwarded), 3 * 2 * len(PAGE_REQUESTS))
+        self.assertEqual(self.blocker.get_stats()['saved_bytes'], 256000)
+
+
+if __name__ == '__main__':
+    unittest.main()
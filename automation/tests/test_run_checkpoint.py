@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.run_checkpoint import RunCheckpoint, content_hash, open_run_checkpoint
+
+
+class TestRunCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'checkpoints.db')
+        self.units = [(f"page-{page:02d}", {'kind': 'page', 'page_number': page}) for page in (1, 2, 3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_register_fail_resume_reruns_only_unfinished_units(self):
+        records = [{'id': '1', 'product_count': 2}, {'id': '2', 'product_count': 1}]
+
+        checkpoint = RunCheckpoint(self.db_path, run_id='run-1')
+        checkpoint.start_run({'mode': 'pages'})
+        checkpoint.register_units(self.units)
+        checkpoint.mark_running('page-01')
+        digest = checkpoint.mark_done('page-01', records=records, output_path='page_01.json', details={'products': 3})
+        checkpoint.mark_running('page-02')
+        checkpoint.mark_failed('page-02', 'navigation failed')
+        checkpoint.close()
+
+        # Resume: mở lại cùng run_id, đăng ký lại unit không reset trạng thái đã lưu
+        resumed = RunCheckpoint(self.db_path, run_id='run-1')
+        self.assertTrue(resumed.exists())
+        self.assertEqual(resumed.get_params(), {'mode': 'pages'})
+        resumed.register_units(self.units)
+
+        self.assertEqual(resumed.done_ids(), {'page-01'})
+        pending = [unit_id for unit_id, _ in self.units if unit_id not in resumed.done_ids()]
+        self.assertEqual(pending, ['page-02', 'page-03'])
+
+        done = resumed.units(['done'])[0]
+        self.assertEqual((done['rows'], done['content_hash'], done['output_path'], done['details']),
+                         (2, digest, 'page_01.json', {'products': 3}))
+        self.assertEqual(digest, content_hash(records))
+
+        failed = resumed.units(['failed'])
+        self.assertEqual([(unit['unit_id'], unit['attempts'], unit['error']) for unit in failed],
+                         [('page-02', 1, 'navigation failed')])
+        self.assertEqual(failed[0]['spec'], {'kind': 'page', 'page_number': 2})
+
+        resumed.mark_running('page-02')
+        resumed.mark_done('page-02', records=records[:1])
+        self.assertTrue(resumed.is_done('page-02'))
+        self.assertEqual(resumed.units(['done'])[1]['attempts'], 2)
+        self.assertEqual({key: resumed.summary()[key] for key in ('total', 'done', 'failed', 'pending', 'rows')},
+                         {'total': 3, 'done': 2, 'failed': 0, 'pending': 1, 'rows': 3})
+        resumed.close()
+
+    def test_content_hash_tracks_page_data_and_runs_are_isolated(self):
+        self.assertEqual(content_hash([{'a': 1, 'b': 2}]), content_hash([{'b': 2, 'a': 1}]))
+        self.assertNotEqual(content_hash([{'a': 1}]), content_hash([{'a': 2}]))
+
+        first = RunCheckpoint(self.db_path, run_id='run-1')
+        first.register_units(self.units)
+        first.mark_done('page-01', rows=5)
+        other = RunCheckpoint(self.db_path, run_id='run-2')
+        self.assertFalse(other.exists())
+        self.assertEqual(other.done_ids(), set())
+        first.close()
+        other.close()
+
+        self.assertIsNone(open_run_checkpoint('run-1', settings={'enabled': False}))
+        checkpoint = open_run_checkpoint('run-1', settings={'db_path': 'checkpoints.db'},
+                                         base_dir=self.directory.name)
+        self.assertEqual(checkpoint.done_ids(), {'page-01'})
+        checkpoint.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+sys.path.append(os.path.abspath('../'))
+
+from one_automation import JuneFreshSessionWithProducts
+
+
+class TestRunPeriod(unittest.TestCase):
+    def processor(self, start_date, end_date):
+        # Bỏ qua __init__ (không mở product cache / checkpoint DB): chỉ kiểm tra nhãn theo khoảng ngày
+        processor = JuneFreshSessionWithProducts.__new__(JuneFreshSessionWithProducts)
+        processor.start_date, processor.end_date = start_date, end_date
+        processor.session_id = 'run-1'
+        processor.target_records = 100
+        return processor
+
+    def test_single_month_keeps_month_labels(self):
+        self.assertEqual(self.processor('2025-06-01', '2025-06-30').period(), {
+            'month': 'June', 'year': '2025', 'date_range': 'June 2025', 'file_prefix': 'june_2025'})
+
+    def test_records_and_files_follow_requested_range(self):
+        processor = self.processor('2025-07-15', '2025-08-10')
+        orders = processor.merge_page_data([{'id': '1'}], {}, 1)
+        self.assertEqual((orders[0]['month'], orders[0]['year'], orders[0]['date_range']),
+                         ('July-August', '2025', '2025-07-15 → 2025-08-10'))
+
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                filename = processor.save_page_data(orders, 1)
+                with open(filename, encoding='utf-8') as f:
+                    metadata = json.load(f)['metadata']
+            finally:
+                os.chdir(cwd)
+
+        self.assertEqual(filename, 'data/20250715_20250810_enhanced_page_01_run-1.json')
+        self.assertEqual(metadata['date_range'], '2025-07-15 → 2025-08-10')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.shard_planner import ShardPlanner, save_shard_plan, load_shard_plan, sub_day_shards
+
+
+def make_counter(orders_per_day):
+    """count(start, end) giả lập theo số đơn mỗi ngày (khoảng có giờ: chia đều theo giờ)"""
+    calls = []
+
+    def parse(value, is_end):
+        if len(value) <= 10:
+            moment = datetime.strptime(value, '%Y-%m-%d')
+            return moment + timedelta(days=1) if is_end else moment
+        moment = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        return moment + timedelta(seconds=1) if is_end else moment
+
+    def count(start, end):
+        calls.append((start, end))
+        moment, stop = parse(start, False), parse(end, True)
+        total = 0.0
+        while moment < stop:
+            total += orders_per_day.get(moment.strftime('%Y-%m-%d'), 0) / 24
+            moment += timedelta(hours=1)
+        return int(round(total))
+
+    return count, calls
+
+
+class TestShardPlanner(unittest.TestCase):
+    def setUp(self):
+        self.days = {f"2025-06-{day:02d}": 800 for day in range(1, 31)}
+        self.days['2025-06-18'] = 3000
+
+    def test_every_shard_fits_one_page_and_covers_range(self):
+        count, _ = make_counter(self.days)
+        plan = ShardPlanner(count, page_size=2000, min_span_hours=12).plan('2025-06-01', '2025-06-30')
+
+        self.assertEqual(plan[0]['start'], '2025-06-01')
+        self.assertEqual(plan[-1]['end'], '2025-06-30')
+        self.assertTrue(all(shard['expected'] <= 2000 and not shard['oversize'] for shard in plan))
+        self.assertEqual(sum(shard['expected'] for shard in plan), sum(self.days.values()))
+        self.assertIn({'start': '2025-06-18 00:00:00', 'end': '2025-06-18 11:59:59'},
+                      [{'start': shard['start'], 'end': shard['end']} for shard in plan])
+        self.assertEqual([shard['shard_id'] for shard in plan][:2], ['s001', 's002'])
+        # Shard nửa ngày chưa chạy được qua bộ lọc chỉ có ngày
+        self.assertEqual(len(sub_day_shards(plan)), 2)
+
+    def test_day_that_cannot_be_split_is_marked_oversize(self):
+        count, _ = make_counter(self.days)
+        plan = ShardPlanner(count, page_size=2000, min_span_hours=24).plan('2025-06-15', '2025-06-20')
+
+        oversize = [shard for shard in plan if shard['oversize']]
+        self.assertEqual([(shard['start'], shard['end']) for shard in oversize], [('2025-06-18', '2025-06-18')])
+        self.assertEqual(sub_day_shards(plan), [])
+
+    def test_failed_probe_keeps_range_and_plan_round_trips(self):
+        plan = ShardPlanner(lambda start, end: None).plan('2025-06-01', '2025-06-07')
+        self.assertEqual(len(plan), 1)
+        self.assertTrue(plan[0]['oversize'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = save_shard_plan(plan, os.path.join(directory, 'plan.json'), metadata={'page_size': 2000})
+            self.assertEqual(load_shard_plan(path), plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import json
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from automation_enhanced import EnhancedOneAutomationSystem
+from sla_monitor import SLAMonitor
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+ORDERS_CSV = os.path.join(DATA_DIR, 'orders_export_20250701_113535.csv')
+SLA_REPORT = os.path.join(DATA_DIR, 'sla_report_20250701_113535.json')
+SLA_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'sla_config.json')
+SLA_COLUMNS = ['sla_platform', 'sla_deadline', 'sla_status', 'sla_priority']
+
+
+def legacy_add_sla_info_to_orders(orders_df, sla_report):
+    """Bản cũ (mask theo từng entry) dùng làm chuẩn so sánh"""
+    orders_df['sla_platform'] = 'other'
+    orders_df['sla_deadline'] = None
+    orders_df['sla_status'] = 'normal'
+    orders_df['sla_priority'] = 'low'
+
+    for status in sla_report.get('shopee', {}).get('sla_status', []):
+        mask = orders_df['id'] == status.get('order_id')
+        orders_df.loc[mask, 'sla_platform'] = 'shopee'
+        orders_df.loc[mask, 'sla_deadline'] = status.get('handover_deadline', '')
+        if status.get('handover_overdue') or status.get('confirm_overdue'):
+            orders_df.loc[mask, 'sla_status'] = 'overdue'
+            orders_df.loc[mask, 'sla_priority'] = 'critical'
+        elif status.get('time_to_handover', 24) < 2:
+            orders_df.loc[mask, 'sla_status'] = 'urgent'
+            orders_df.loc[mask, 'sla_priority'] = 'high'
+
+    for status in sla_report.get('tiktok', {}).get('sla_status', []):
+        mask = orders_df['id'] == status.get('order_id')
+        orders_df.loc[mask, 'sla_platform'] = 'tiktok'
+        orders_df.loc[mask, 'sla_deadline'] = status.get('handover_deadline', '')
+        if status.get('handover_overdue'):
+            orders_df.loc[mask, 'sla_status'] = 'overdue'
+            orders_df.loc[mask, 'sla_priority'] = 'critical'
+        elif status.get('time_to_handover', 24) < 4:
+            orders_df.loc[mask, 'sla_status'] = 'urgent'
+            orders_df.loc[mask, 'sla_priority'] = 'high'
+
+    # Sàn thêm qua sla_config.json (Lazada, Sendo, MIA.vn website): quá hạn xác nhận/bàn giao -> overdue,
+    # còn dưới urgent_hours của sàn -> urgent
+    for platform in sla_report.get('platform_rules', []):
+        if platform in ('shopee', 'tiktok'):
+            continue
+        analysis = sla_report.get(platform, {})
+        for status in analysis.get('sla_status', []):
+            mask = orders_df['id'] == status.get('order_id')
+            orders_df.loc[mask, 'sla_platform'] = platform
+            orders_df.loc[mask, 'sla_deadline'] = status.get('handover_deadline', '')
+            time_to_handover = status.get('time_to_handover')
+            if status.get('handover_overdue') or status.get('confirm_overdue'):
+                orders_df.loc[mask, 'sla_status'] = 'overdue'
+                orders_df.loc[mask, 'sla_priority'] = 'critical'
+            elif time_to_handover is not None and time_to_handover < analysis.get('urgent_hours', 2):
+                orders_df.loc[mask, 'sla_status'] = 'urgent'
+                orders_df.loc[mask, 'sla_priority'] = 'high'
+
+    return orders_df
+
+
+class _System:
+    """Chỉ cần logger + các method SLA, không khởi tạo WebDriver"""
+    logger = logging.getLogger('test_sla_annotation')
+    add_sla_info_to_orders = EnhancedOneAutomationSystem.add_sla_info_to_orders
+    build_sla_annotation_frame = EnhancedOneAutomationSystem.build_sla_annotation_frame
+
+
+class TestSLAAnnotation(unittest.TestCase):
+    def setUp(self):
+        self.orders = pd.read_csv(ORDERS_CSV, dtype={'id': str}).drop(columns=SLA_COLUMNS)
+        with open(SLA_REPORT, encoding='utf-8') as f:
+            self.sla_report = json.load(f)
+
+    def assert_same_annotation(self, sla_report):
+        expected = legacy_add_sla_info_to_orders(self.orders.copy(), sla_report)
+        actual = _System().add_sla_info_to_orders(self.orders.copy(), sla_report)
+        pd.testing.assert_frame_equal(actual[SLA_COLUMNS], expected[SLA_COLUMNS])
+        return actual
+
+    def test_recorded_report(self):
+        self.assert_same_annotation(self.sla_report)
+
+    def test_recomputed_report(self):
+        monitor = SLAMonitor(SLA_CONFIG)
+        for current_time in (datetime(2025, 7, 1, 8, 0), datetime(2025, 7, 1, 10, 30)):
+            monitor.current_time = current_time
+            actual = self.assert_same_annotation(monitor.analyze_orders_sla(self.orders.copy()))
+            self.assertTrue({'lazada', 'mia_website'} <= set(actual['sla_platform']))
+
+    def test_duplicate_entries_last_wins(self):
+        report = {
+            'shopee': {'sla_status': [
+                {'order_id': '505276', 'handover_overdue': True, 'time_to_handover': None},
+                {'order_id': '505277', 'handover_overdue': False, 'time_to_handover': 1.0}
+            ]},
+            'tiktok': {'sla_status': [
+                {'order_id': '505276', 'handover_overdue': False, 'time_to_handover': 10.0},
+                {'order_id': '505277', 'handover_overdue': False, 'time_to_handover': 3.0},
+                {'order_id': '505278', 'handover_overdue': True, 'time_to_handover': None},
+                {'order_id': '505279', 'handover_overdue': False, 'time_to_handover': 30.0}
+            ]}
+        }
+        self.assert_same_annotation(report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('../'))
+
+from sla_monitor import SLAMonitor
+from sla_watcher import SLAWatcher
+
+SLA_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'sla_config.json')
+
+
+class TestSLAWatcher(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger('SLAMonitor').setLevel(logging.ERROR)
+        self.clock = datetime(2025, 7, 1, 20, 0)
+        self.watcher = SLAWatcher(SLAMonitor(SLA_CONFIG), alerts_file=None, now_function=lambda: self.clock)
+
+    def orders(self, created=datetime(2025, 7, 1, 19, 0)):
+        return pd.DataFrame({'id': ['1', '2'], 'platform': ['Shopee', 'TikTok'],
+                             'created_datetime': [created, datetime(2025, 7, 1, 15, 0)]})
+
+    def test_next_deadline_is_earliest_warning_and_overdue_fires_once(self):
+        self.assertEqual(self.watcher.load_orders(self.orders()), 2)
+        # Shopee sau 18h: xác nhận trước 9h hôm sau, cảnh báo sớm nhất 2h trước
+        self.assertEqual(self.watcher.next_deadline(), datetime(2025, 7, 2, 7, 0))
+
+        self.clock = datetime(2025, 7, 2, 8, 0)
+        warnings = self.watcher.process_due()
+        self.assertEqual(len(warnings), 1)
+        self.assertNotEqual(warnings[0]['type'], 'CRITICAL')
+
+        self.clock = datetime(2025, 7, 2, 9, 0)
+        alerts = self.watcher.process_due()
+        self.assertEqual([alert['type'] for alert in alerts], ['CRITICAL'])
+        self.assertEqual(self.watcher.process_due(), [])
+
+    def test_changed_deadline_invalidates_old_heap_entries(self):
+        self.watcher.load_orders(self.orders())
+        # Đơn 1 đổi thành đơn trước cutoff hôm sau: entry cũ trong heap bị bỏ qua nhờ version mới
+        self.assertEqual(self.watcher.update_orders(self.orders(created=datetime(2025, 7, 2, 19, 0))), 1)
+        self.assertEqual(self.watcher.update_orders(self.orders(created=datetime(2025, 7, 2, 19, 0))), 0)
+
+        self.clock = datetime(2025, 7, 2, 9, 0)
+        self.assertEqual(self.watcher.process_due(), [])
+        self.assertEqual(self.watcher.next_deadline(), datetime(2025, 7, 3, 7, 0))
+
+        self.watcher.remove_orders(['1', '2'])
+        self.assertIsNone(self.watcher.next_deadline())
+
+    def test_orders_without_timestamp_keep_first_seen_deadline(self):
+        orders = pd.DataFrame({'id': ['3'], 'platform': ['Lazada']})
+        self.assertEqual(self.watcher.load_orders(orders), 1)
+        deadlines = self.watcher._orders['3'][2]
+
+        self.clock = datetime(2025, 7, 1, 21, 0)
+        self.assertEqual(self.watcher.load_orders(orders), 0)
+        self.assertEqual(self.watcher._orders['3'][2], deadlines)
+        # Xác nhận Lazada trong 24h kể từ lần đầu thấy đơn
+        self.assertEqual(deadlines['confirm'], datetime(2025, 7, 2, 20, 0))
+
+    def test_new_scraped_at_does_not_reschedule_identical_orders(self):
+        orders = pd.DataFrame({'id': ['4', '5'], 'platform': ['Shopee', 'Lazada'],
+                               'col_19': ['2025-07-01 19:00:00', ''],
+                               'scraped_at': ['2025-07-01 20:00:00'] * 2})
+        self.assertEqual(self.watcher.load_orders(orders), 2)
+        heap = list(self.watcher._heap)
+        # Shopee neo theo thời điểm đặt đơn (col_19), Lazada không có: neo theo lần đầu thấy đơn
+        self.assertEqual(self.watcher._orders['4'][2]['confirm'], datetime(2025, 7, 2, 9, 0))
+        self.assertEqual(self.watcher._orders['5'][2]['confirm'], datetime(2025, 7, 2, 20, 0))
+
+        self.clock = datetime(2025, 7, 1, 21, 0)
+        rescraped = orders.assign(scraped_at='2025-07-01 21:00:00')
+        self.assertEqual(self.watcher.update_orders(rescraped), 0)
+        self.assertEqual(self.watcher._heap, heap)
+
+
+if __name__ == '__main__':
+    unittest.main()
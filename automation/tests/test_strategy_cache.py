@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.strategy_cache import StrategyCache, page_fingerprint, try_strategies
+
+SELECTORS = ['#username', "input[name='username']", "input[type='text']"]
+
+
+class FakeDriver:
+    current_url = 'https://one.tga.com.vn/so/detail/505276?tab=invoice'
+
+
+class TestStrategyCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'strategy.db')
+        self.cache = StrategyCache(self.db_path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_last_winner_is_tried_first_and_misses_are_costed(self):
+        attempts = []
+
+        def attempt(selector):
+            attempts.append(selector)
+            if selector != "input[type='text']":
+                raise TimeoutError(selector)
+            return 'element'
+
+        self.assertEqual(try_strategies(self.cache, 'login.username', SELECTORS, attempt, '/'),
+                         ("input[type='text']", 'element'))
+        self.assertEqual(attempts, SELECTORS)
+
+        attempts.clear()
+        try_strategies(self.cache, 'login.username', SELECTORS, attempt, '/')
+        self.assertEqual(attempts, ["input[type='text']"])
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['attempts'], stats['wins'], stats['misses'], stats['first_try_wins']), (4, 2, 2, 1))
+        worst = self.cache.report()[0]
+        self.assertEqual(worst['misses'], 1)
+        self.assertEqual(self.cache.report()[-1]['win_rate'], 100.0)
+
+        # Fingerprint khác: chưa có thống kê nên giữ thứ tự gốc
+        self.assertEqual(self.cache.order('login.username', SELECTORS, '/login'), SELECTORS)
+
+    def test_stats_persist_and_losers_sink_below_untried(self):
+        self.cache.record('pagination.next', 'js_click', False, 3.0, '/so')
+        self.cache.record('pagination.next', 'url', True, 0.5, '/so')
+        self.cache.record('pagination.next', 'datatables_api', True, 0.5, '/so')
+        self.cache.record('pagination.next', 'datatables_api', False, 0.5, '/so')
+        self.cache.close()
+
+        reopened = StrategyCache(self.db_path)
+        self.assertEqual(reopened.order('pagination.next', ['js_click', 'selenium:a.next', 'datatables_api', 'url'], '/so'),
+                         ['datatables_api', 'url', 'selenium:a.next', 'js_click'])
+        self.assertEqual(reopened.report(top=1)[0]['strategy'], 'js_click')
+        self.cache = reopened
+
+    def test_page_fingerprint_groups_detail_pages(self):
+        self.assertEqual(page_fingerprint(FakeDriver()), '/so/detail/:id')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath('../'))
+
+from one_automation import JuneFreshSessionWithProducts
+
+
+def drive(task, wait_for_future=True):
+    """Chạy generator của tab như TabScheduler: chờ predicate của mỗi TabWait (hoặc coi như hết giờ)"""
+    waits = 0
+    try:
+        wait = next(task)
+        while True:
+            waits += 1
+            if wait_for_future:
+                while not wait.predicate(None):
+                    threading.Event().wait(0.01)
+            wait = task.send(wait.predicate(None))
+    except StopIteration as stop:
+        return stop.value, waits
+
+
+class TestFetchProductsInTab(unittest.TestCase):
+    def setUp(self):
+        # Bỏ qua __init__ (không mở product cache / checkpoint DB): chỉ kiểm tra bước invoiceJSON của tab
+        self.automation = JuneFreshSessionWithProducts.__new__(JuneFreshSessionWithProducts)
+        self.calls = []
+
+    def fake_fetch(self, responses):
+        def fetch(order_ids, driver, statuses=None, cookies=None):
+            self.calls.append(list(order_ids))
+            return responses[len(self.calls) - 1](order_ids)
+        return fetch
+
+    def test_missing_orders_are_retried_then_reported(self):
+        self.automation.fetch_json_api_direct = self.fake_fetch([
+            lambda ids: {'1': {'product_count': 1}},
+            lambda ids: {}
+        ])
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            (details, missing), waits = drive(self.automation.fetch_products_in_tab(['1', '2'], {}, {}, pool))
+
+        self.assertEqual(self.calls, [['1', '2'], ['2']])
+        self.assertEqual(waits, 2)
+        self.assertEqual(set(details), {'1'})
+        self.assertEqual(missing, ['2'])
+
+    def test_timed_out_fetch_is_not_merged_as_complete(self):
+        release = threading.Event()
+
+        def slow(ids):
+            release.wait(5)
+            return {order_id: {'product_count': 1} for order_id in ids}
+
+        self.automation.fetch_json_api_direct = self.fake_fetch([slow, slow])
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            (details, missing), _ = drive(self.automation.fetch_products_in_tab(['1', '2'], {}, {}, pool),
+                                          wait_for_future=False)
+            release.set()
+
+        self.assertEqual(details, {})
+        self.assertEqual(missing, ['1', '2'])
+
+    def test_complete_details_need_one_request(self):
+        self.automation.fetch_json_api_direct = self.fake_fetch([
+            lambda ids: {order_id: {'product_count': 1} for order_id in ids}
+        ])
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            (details, missing), waits = drive(self.automation.fetch_products_in_tab(['1', '2'], {}, {}, pool))
+
+        self.assertEqual((set(details), missing, waits), ({'1', '2'}, [], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
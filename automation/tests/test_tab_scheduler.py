@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import time
+import logging
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.tab_scheduler import TabScheduler, TabWait
+
+
+class FakeBrowser:
+    """Driver giả: nhiều window handle, switch_to.window đổi tab đang điều khiển"""
+
+    def __init__(self):
+        self.window_handles = ['tab-1']
+        self.current_window_handle = 'tab-1'
+        self.current_url = 'https://one.tga.com.vn/so/'
+        self.switch_to = self
+        self.closed = []
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        if script.startswith('window.open'):
+            self.window_handles.append(f"tab-{len(self.window_handles) + 1}")
+            return None
+        return True
+
+    def close(self):
+        self.closed.append(self.current_window_handle)
+        self.window_handles.remove(self.current_window_handle)
+
+
+class TestTabScheduler(unittest.TestCase):
+    def setUp(self):
+        self.browser = FakeBrowser()
+        self.scheduler = TabScheduler(self.browser, logging.getLogger(__name__), tabs=3, poll_interval=0.01,
+                                      retries=1)
+        self.failed_once = set()
+
+    def task(self, handle, shard):
+        """Hai lần 'chờ server' 0.2s; predicate và phần xử lý phải chạy đúng trên tab của task"""
+        pages = 0
+        for _ in range(2):
+            ready_at = time.time() + 0.2
+            ready = yield TabWait('page', lambda driver: driver.current_window_handle == handle and
+                                  time.time() >= ready_at, timeout=5)
+            self.assertEqual(self.browser.current_window_handle, handle)
+            if not ready:
+                return {'success': False, 'error': 'timeout'}
+            pages += 1
+
+        if shard['shard_id'] == 'd02' and shard['shard_id'] not in self.failed_once:
+            self.failed_once.add(shard['shard_id'])
+            raise RuntimeError('tab crashed')
+        return {'success': True, 'pages': pages, 'records': pages * 10}
+
+    def test_waits_overlap_across_tabs_and_failed_shard_is_retried(self):
+        self.assertEqual(self.scheduler.open_tabs(), ['tab-1', 'tab-2', 'tab-3'])
+
+        shards = [{'shard_id': f"d{index:02d}"} for index in range(1, 5)]
+        started = time.time()
+        results = self.scheduler.run(shards, self.task)
+        elapsed = time.time() - started
+
+        self.assertEqual(sorted(result['shard']['shard_id'] for result in results), ['d01', 'd02', 'd03', 'd04'])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual({result['shard']['shard_id']: result['attempts'] for result in results}['d02'], 2)
+        # 5 lần chạy × 0.4s chờ nếu tuần tự; 3 tab chờ chồng lên nhau
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(self.scheduler.get_stats()['waits'], 10)
+
+        self.scheduler.close_extra_tabs()
+        self.assertEqual(self.browser.closed, ['tab-2', 'tab-3'])
+        self.assertEqual(self.browser.current_window_handle, 'tab-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import time
+import logging
+import tempfile
+
+sys.path.append(os.path.abspath('../'))
+
+from scripts.wait_engine import AdaptiveWaiter, LatencyHistory, percentile
+
+
+class SlowPage:
+    """Driver giả: trang 'idle' sau `ready_after` giây kể từ lúc tạo"""
+
+    current_url = 'https://one.tga.com.vn/so/'
+
+    def __init__(self, ready_after):
+        self.ready_at = time.time() + ready_after
+
+    def execute_script(self, script, *args):
+        return time.time() >= self.ready_at
+
+
+class TestWaitEngine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'latencies.json')
+        self.logger = logging.getLogger(__name__)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_wait_returns_as_soon_as_condition_holds(self):
+        history = LatencyHistory(self.path)
+        waiter = AdaptiveWaiter(SlowPage(0.1), self.logger, history)
+
+        started = time.time()
+        self.assertTrue(waiter.wait_for_idle('orders.ready', timeout=5))
+        self.assertLess(time.time() - started, 1)
+
+        stats = history.get_stats()['waits']['orders.ready']
+        self.assertEqual((stats['waits'], stats['timeouts']), (1, 0))
+        self.assertGreater(stats['blocked_seconds'], 0)
+
+    def test_learned_timeout_from_p95_and_persisted(self):
+        history = LatencyHistory(self.path, min_samples=5, multiplier=3.0, min_timeout=0.2)
+        for seconds in (0.1, 0.1, 0.2, 0.2, 0.3):
+            history.record('one.tga.com.vn', 'modal.content', seconds, True)
+        history.record('one.tga.com.vn', 'modal.content', 5.0, False)
+        self.assertAlmostEqual(history.learned_timeout('one.tga.com.vn', 'modal.content', 10), 0.9)
+        self.assertEqual(history.learned_timeout('other.site', 'modal.content', 10), 10)
+        self.assertTrue(history.save())
+
+        reloaded = LatencyHistory(self.path, min_samples=5, multiplier=3.0, min_timeout=0.2)
+        self.assertAlmostEqual(reloaded.learned_timeout('one.tga.com.vn', 'modal.content', 10), 0.9)
+
+        # Điều kiện không bao giờ đúng: chờ không bắt buộc dừng ở timeout học được, bắt buộc thì chờ tới timeout gốc
+        waiter = AdaptiveWaiter(SlowPage(60), self.logger, reloaded)
+        started = time.time()
+        self.assertFalse(waiter.wait_for_idle('modal.content', timeout=10))
+        self.assertLess(time.time() - started, 2)
+
+        started = time.time()
+        self.assertFalse(waiter.wait('modal.content', lambda driver: False, timeout=1.2, required=True))
+        self.assertGreaterEqual(time.time() - started, 1.2)
+        self.assertEqual(reloaded.get_stats()['waits']['modal.content']['extended'], 1)
+
+    def test_percentile_nearest_rank(self):
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+        self.assertEqual(percentile([3], 0.95), 3)
+        self.assertIsNone(percentile([], 0.95))
+
+
+if __name__ == '__main__':
+    unittest.main()
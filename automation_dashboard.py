@@ -5,7 +5,7 @@ Automation Dashboard Service
 Web-based dashboard cho Automation System
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 import uvicorn
@@ -38,6 +38,24 @@ app.add_middleware(
 # Global automation instance
 automation_system = None
 
+# Kho lịch sử đơn hàng do automation upsert sau mỗi lần export
+WAREHOUSE_PATH = Path("./automation/data/order_warehouse.db")
+order_warehouse = None
+
+
+def get_order_warehouse():
+    """Mở kho đơn hàng (lazy) - None nếu automation chưa export lần nào"""
+    global order_warehouse
+    if order_warehouse is None and WAREHOUSE_PATH.exists():
+        from scripts.order_warehouse import OrderWarehouse
+        order_warehouse = OrderWarehouse(str(WAREHOUSE_PATH))
+    return order_warehouse
+
+
+def frame_to_records(df):
+    """DataFrame -> list dict an toàn cho JSON (NaN -> None)"""
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
 @app.get("/")
 async def root():
     return HTMLResponse("""
@@ -118,6 +136,8 @@ async def health_check():
         "endpoints": [
             "/automation/status",
             "/automation/data",
+            "/automation/orders",
+            "/automation/products",
             "/automation/sla",
             "/automation/run"
         ]
@@ -135,27 +155,66 @@ async def automation_status():
     }
 
 @app.get("/automation/data")
-async def automation_data():
-    # Try to read recent data
+async def automation_data(start: str = None, end: str = None):
+    """Tổng quan dữ liệu đã xử lý trong khoảng ngày đặt hàng (từ order warehouse)"""
     try:
-        data_files = []
-        data_dir = Path("./automation/data")
-        if data_dir.exists():
-            data_files = [f.name for f in data_dir.glob("*.json")][:10]
+        warehouse = get_order_warehouse()
+        if warehouse is None:
+            return {
+                "error": f"Order warehouse chưa có dữ liệu: {WAREHOUSE_PATH}",
+                "total_orders": 0,
+                "by_platform": []
+            }
 
+        stats = warehouse.get_stats()
+        by_platform = warehouse.summarize(start, end, group_by='platform')
         return {
-            "processed_files": len(data_files),
-            "recent_files": data_files,
-            "data_directory": str(data_dir),
-            "total_size": "0 MB"
+            "range": {"start": start, "end": end},
+            "total_orders": int(by_platform['orders'].sum()) if not by_platform.empty else 0,
+            "by_platform": frame_to_records(by_platform),
+            "by_status": frame_to_records(warehouse.summarize(start, end, group_by='status')),
+            "warehouse": {
+                "path": str(WAREHOUSE_PATH),
+                "total_orders": stats['total_orders'],
+                "first_order_date": stats['first_order_date'],
+                "last_order_date": stats['last_order_date'],
+                "size_mb": round(WAREHOUSE_PATH.stat().st_size / 1024 / 1024, 2)
+            }
         }
     except Exception as e:
         return {
             "error": str(e),
-            "processed_files": 0,
-            "recent_files": []
+            "total_orders": 0,
+            "by_platform": []
         }
 
+@app.get("/automation/orders")
+async def automation_orders(start: str = None, end: str = None, platform: str = None, status: str = None,
+                            limit: int = Query(500, le=10000)):
+    """Danh sách đơn theo khoảng ngày đặt/sàn/trạng thái (truy vấn index, không đọc file CSV)"""
+    warehouse = get_order_warehouse()
+    if warehouse is None:
+        raise HTTPException(status_code=404, detail="Order warehouse chưa có dữ liệu")
+
+    try:
+        orders = warehouse.query_orders(start, end, platform, status, limit=limit)
+        return {"count": len(orders), "orders": frame_to_records(orders)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/automation/products")
+async def automation_products(start: str = None, end: str = None, platform: str = None, status: str = None):
+    """Tổng số lượng theo sản phẩm trong khoảng ngày đặt"""
+    warehouse = get_order_warehouse()
+    if warehouse is None:
+        raise HTTPException(status_code=404, detail="Order warehouse chưa có dữ liệu")
+
+    try:
+        products = warehouse.query_products(start, end, platform, status)
+        return {"count": len(products), "products": frame_to_records(products)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/automation/sla")
 async def sla_monitoring():
     return {
@@ -6,6 +6,7 @@ Simple Automation Bridge - Kết nối automation.py với frontend
 import os
 import sys
 import json
+import asyncio
 from datetime import datetime
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,6 +18,7 @@ sys.path.append('.')
 # Import automation system
 try:
     from automation import OneAutomationSystem
+    from scripts.driver_pool import get_shared_pool_stats, shutdown_shared_pools
     automation_available = True
     print("✅ Automation system imported successfully")
 except Exception as e:
@@ -39,6 +41,24 @@ app.add_middleware(
 orders_storage = []
 automation_status = {"running": False, "last_run": None}
 
+
+@app.on_event("startup")
+async def warm_driver_pool():
+    """Khởi động trước pool trình duyệt dùng chung với schedule_automation"""
+    if not automation_available:
+        return
+
+    automation = OneAutomationSystem()
+    if automation.driver_pool:
+        await asyncio.get_running_loop().run_in_executor(None, automation.driver_pool.warm_up)
+
+
+@app.on_event("shutdown")
+async def close_driver_pool():
+    """Đóng các trình duyệt đang giữ trong pool"""
+    if automation_available:
+        shutdown_shared_pools()
+
 @app.get("/")
 async def root():
     return {"message": "MIA Automation Bridge", "status": "running"}
@@ -54,7 +74,7 @@ async def start_automation():
         return {"success": False, "message": "Automation system not available"}
 
     try:
-        # Initialize and run automation
+        # Initialize and run automation (trình duyệt lấy từ pool dùng chung)
         automation = OneAutomationSystem()
         result = automation.run_automation()
 
@@ -82,7 +102,10 @@ async def get_orders():
 @app.get("/api/automation/status")
 async def get_status():
     """Get automation status"""
-    return {"success": True, "data": automation_status}
+    data = dict(automation_status)
+    if automation_available:
+        data["driver_pools"] = get_shared_pool_stats()
+    return {"success": True, "data": data}
 
 if __name__ == "__main__":
     print("🚀 Starting MIA Automation Bridge...")